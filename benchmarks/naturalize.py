@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Times naturalizing names and titles, as NaturalSortField does whenever an
+object is saved:
+
+    $ python benchmarks/naturalize.py
+
+100,000 strings, drawn from 3,000 distinct generated names and titles, as
+in an import or a rebuild of sort fields, are each naturalized as a person
+and as a thing. The time per call is printed for each way of doing it.
+
+To compare with another version of NaturalSortField, and check its output
+is the same, e.g. the one from before spectator.core.naturalize:
+
+    $ git show 0a92e99^:spectator/core/fields.py > /tmp/old_fields.py
+    $ python benchmarks/naturalize.py --compare /tmp/old_fields.py
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django
+django.setup()
+
+from spectator.core import naturalize
+from spectator.core.fields import NaturalSortField
+
+
+WORDS = ['The', 'A', 'Le', 'la', 'David', 'Foster', 'Wallace', 'Jr', 'III',
+         'Van', 'Gogh', 'Vol.', 'No.', '2', '39', 'Blondes', 'Long', 'du',
+         'Maurier', 'Sir', 'V', 'l’amour', 'Das', 'Boot', 'x']
+
+# Awkward cases that must always come out the same:
+EDGE_CASES = ['', ' ', 'V', 'Prince', 'The The', '  The Long Blondes  ']
+
+
+class Thing(object):
+    sort_as = 'thing'
+
+
+class Person(object):
+    sort_as = 'person'
+
+
+def make_strings(number, distinct, seed=1):
+    "`number` strings drawn from `distinct` generated names and titles."
+    rng = random.Random(seed)
+    corpus = [' '.join(rng.choice(WORDS) for i in range(rng.randint(1, 6)))
+              for i in range(distinct)]
+    return [rng.choice(corpus) for i in range(number)], corpus + EDGE_CASES
+
+
+def field_function(field):
+    "A function that naturalizes a string using `field`'s pre_save()."
+    instances = {'thing': Thing(), 'person': Person()}
+
+    def func(string, sort_as):
+        instance = instances[sort_as]
+        instance.title = string
+        return field.pre_save(instance, False)
+    return func
+
+
+def time_calls(name, func, strings, repeat):
+    "Print the best time per call of func(string, sort_as) for `strings`."
+    def run():
+        naturalize.naturalize.cache_clear()
+        for string in strings:
+            func(string, 'person')
+            func(string, 'thing')
+    seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+    print('{:<30} {:8.3f}s {:8.2f}us per call'.format(
+                            name, seconds, seconds / len(strings) / 2 * 1e6))
+
+
+def time_many(strings, repeat):
+    def run():
+        naturalize.naturalize.cache_clear()
+        naturalize.naturalize_many(strings, 'person')
+        naturalize.naturalize_many(strings, 'thing')
+    seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+    print('{:<30} {:8.3f}s {:8.2f}us per call'.format(
+        'naturalize_many()', seconds, seconds / len(strings) / 2 * 1e6))
+
+
+def load_field(path):
+    "NaturalSortField('title') from the module at `path`."
+    spec = importlib.util.spec_from_file_location('compare_fields', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.NaturalSortField('title')
+
+
+def check_same(func, corpus):
+    "Exit if `func` naturalizes any string differently from naturalize()."
+    for string in corpus:
+        for sort_as in ('thing', 'person'):
+            expected = naturalize.naturalize(string, sort_as)
+            actual = func(string, sort_as)
+            if actual != expected:
+                sys.exit('{!r} as a {}: {!r}, not {!r}'.format(
+                                    string, sort_as, actual, expected))
+    print('Same output for {} strings.'.format(len(corpus) * 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--number', type=int, default=100000,
+                        help="How many strings to naturalize.")
+    parser.add_argument('--distinct', type=int, default=3000,
+                        help="How many distinct strings to draw them from.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="How many times to time each, keeping the best.")
+    parser.add_argument('--compare', metavar='FIELDS_PY',
+                        help="A fields.py with another NaturalSortField to "
+                             "time, and check, too.")
+    args = parser.parse_args()
+
+    strings, corpus = make_strings(args.number, args.distinct)
+
+    if args.compare:
+        other = field_function(load_field(args.compare))
+        check_same(other, corpus)
+        time_calls('Compared pre_save()', other, strings, args.repeat)
+
+    time_calls('naturalize(), without cache',
+               naturalize.naturalize.__wrapped__, strings, args.repeat)
+    time_calls('naturalize()', naturalize.naturalize, strings, args.repeat)
+    time_many(strings, args.repeat)
+    time_calls('NaturalSortField.pre_save()',
+               field_function(NaturalSortField('title')), strings,
+               args.repeat)
+
+
+if __name__ == '__main__':
+    main()
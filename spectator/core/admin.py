@@ -1,10 +1,169 @@
+from django.conf import settings
+from django.conf.urls import url
 from django.contrib import admin
+from django.core import urlresolvers
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.http import JsonResponse
 
+from . import autocomplete
 from .models import Creator
+from .paginator import CachedCount, CountStrategy, EstimatedCount,\
+        ExPaginator
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
+
+
+class AdminPaginator(ExPaginator):
+    """
+    The paginator used by CountAdminMixin. Asking for a page beyond the last
+    one gets the last page, as estimated counts can be wrong.
+    """
+
+    def page(self, number, softlimit=True):
+        return super().page(number, softlimit=softlimit)
+
+
+class CountAdminMixin(object):
+    """
+    For ModelAdmins of big tables. The changelist doesn't count all the
+    objects as well as the filtered ones, and counts the filtered ones
+    using `count_strategy`, which is one of:
+
+    * 'exact' -- A COUNT every time, like the default admin.
+    * 'cached' -- A COUNT, cached until any of the model's objects change
+      (see spectator.core.versions).
+    * 'estimated' -- The database's estimate of the count, if the table is
+      big enough. See spectator.core.paginator.EstimatedCount.
+
+    The SPECTATOR_ADMIN_COUNTS setting can override this for each model,
+    e.g. {'spectator_events.event': 'estimated'}.
+    """
+    count_strategy = 'cached'
+
+    paginator = AdminPaginator
+
+    show_full_result_count = False
+
+    def get_count_strategy(self, request):
+        "Returns a CountStrategy instance for the changelist's paginator."
+        counts = {label.lower(): name for label, name in getattr(
+                        settings, 'SPECTATOR_ADMIN_COUNTS', {}).items()}
+        name = counts.get(self.model._meta.label_lower, self.count_strategy)
+        if name == 'exact':
+            return CountStrategy()
+        elif name == 'cached':
+            return CachedCount(models=[self.model])
+        elif name == 'estimated':
+            return EstimatedCount()
+        raise ImproperlyConfigured(
+            "Admin count strategies should be 'exact', 'cached' or "
+            "'estimated', not {!r}".format(name))
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                                                allow_empty_first_page=True):
+        return self.paginator(queryset, per_page, orphans,
+                              allow_empty_first_page,
+                              count_strategy=self.get_count_strategy(request))
+
+
+class AutocompleteAdminMixin(object):
+    """
+    For ModelAdmins of models registered with spectator.core.autocomplete.
+    Adds an 'autocomplete/' URL, used by the widgets of
+    AutocompleteFieldsMixin and by AutocompleteListFilter, that returns JSON
+    listing a page of the objects whose names start with the 'q' GET
+    parameter, e.g.
+
+        {"results": [{"id": 3, "name": "The Long Blondes",
+                      "url": "/creators/3/"}], "more": true}
+    """
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            url(r'^autocomplete/$',
+                self.admin_site.admin_view(self.autocomplete_view),
+                name='{}_{}_autocomplete'.format(*info)),
+        ] + super().get_urls()
+
+    def autocomplete_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        per_page = autocomplete.get_limit()
+        end = page * per_page
+
+        # One more than we need, to know if there's another page:
+        results = autocomplete.complete(self.model, request.GET.get('q', ''),
+                                        limit=end + 1)
+        return JsonResponse({'results': results[end - per_page:end],
+                             'more': len(results) > end})
+
+
+class AutocompleteFieldsMixin(object):
+    """
+    For ModelAdmins and InlineModelAdmins. ForeignKeys and ManyToManyFields
+    named in `autocomplete_fields` use autocompleting widgets rather than
+    <select>s listing every object. Their models' ModelAdmins must use
+    AutocompleteAdminMixin.
+    """
+    autocomplete_fields = ()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.autocomplete_fields:
+            kwargs['widget'] = AutocompleteSelect(
+                                db_field.remote_field.model, self.admin_site)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name in self.autocomplete_fields:
+            kwargs['widget'] = AutocompleteSelectMultiple(
+                                db_field.remote_field.model, self.admin_site)
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+
+class AutocompleteListFilter(admin.RelatedFieldListFilter):
+    """
+    Use in a ModelAdmin's `list_filter` like `('series',
+    AutocompleteListFilter)` to filter by a ForeignKey with an autocompleting
+    input, rather than listing every related object. The related model's
+    ModelAdmin must use AutocompleteAdminMixin, and the changelist's
+    ModelAdmin should include AutocompleteSelect's Media.
+    """
+    template = 'spectator_core/admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin,
+                                                                field_path):
+        super().__init__(field, request, params, model, model_admin,
+                                                                field_path)
+        other_model = field.remote_field.model
+        self.autocomplete_url = urlresolvers.reverse(
+                    '{}:{}_{}_autocomplete'.format(
+                                            model_admin.admin_site.name,
+                                            other_model._meta.app_label,
+                                            other_model._meta.model_name))
+
+    def has_output(self):
+        return True
+
+    def field_choices(self, field, request, model_admin):
+        "Only the currently selected object, if any."
+        if not self.lookup_val:
+            return []
+        try:
+            objects = field.remote_field.model._default_manager.filter(
+                                                            pk=self.lookup_val)
+            return [(obj.pk, str(obj)) for obj in objects]
+        except ValueError:
+            return []
 
 
 @admin.register(Creator)
-class CreatorAdmin(admin.ModelAdmin):
+class CreatorAdmin(AutocompleteAdminMixin, CountAdminMixin,
+                                                        admin.ModelAdmin):
     list_display = ('name', 'name_sort', 'kind',)
     list_filter = ('kind', )
     search_fields = ('name', 'name_sort', )
@@ -6,6 +6,9 @@ class SpectatorCoreAppConfig(AppConfig):
     name = 'spectator.core'
     verbose_name = 'Spectator Core'
 
+    def ready(self):
+        import spectator.core.signals
+
 
 class Apps(object):
     """Methods for seeing which Spectator apps are installed/enabled.
@@ -0,0 +1,231 @@
+"""
+Finding objects whose names or titles start with what someone has typed,
+for autocompleting, using range queries on indexed fields rather than
+LIKE scans.
+
+What's typed is matched against two forms of each name:
+
+* The naturalized form in its NaturalSortField, e.g. 'long blondes, the'
+  or 'wallace, david foster', so that 'long bl', or 'the long bl', finds
+  The Long Blondes.
+* The name itself, lowercase, capitalised, or title case, so that
+  'david fos' finds David Foster Wallace.
+
+Each form is one query on its own index, in that index's order, with a
+LIMIT, so it stays fast however many objects there are.
+
+Results for short prefixes, which match the most objects, are also kept in
+an in-process trie for each model. A node with all the objects matching its
+prefix can answer longer prefixes below it without using the database.
+The trie is thrown away whenever the model's version changes (see
+spectator.core.versions).
+"""
+import re
+
+from django.conf import settings
+from django.utils.text import capfirst
+
+from . import versions
+
+
+# Maps models to dicts of 'field' and 'sort_field' names:
+_registry = {}
+
+# Maps models to their _Trie:
+_tries = {}
+
+# How many objects to remember for each prefix in a trie. If fewer than
+# this match, the node has all of them:
+TRIE_NODE_SIZE = 100
+
+
+def register(model, field, sort_field=None):
+    """
+    Allow autocompleting objects of `model`.
+
+    field -- The name of the field to match, e.g. 'name'. It should have
+        db_index=True.
+    sort_field -- The name of its NaturalSortField. Default is `field` with
+        '_sort' on the end, e.g. 'name_sort'.
+    """
+    _registry[model] = {'field': field,
+                        'sort_field': sort_field or '{}_sort'.format(field)}
+
+
+def registered_models():
+    "A list of the models that can be autocompleted."
+    return list(_registry.keys())
+
+
+def get_limit():
+    return getattr(settings, 'SPECTATOR_AUTOCOMPLETE_LIMIT', 10)
+
+
+def get_trie_depth():
+    "Prefixes up to this long are kept in the tries. 0 means no tries."
+    return getattr(settings, 'SPECTATOR_AUTOCOMPLETE_TRIE_DEPTH', 3)
+
+
+def complete(model, query, limit=None):
+    """
+    Returns a list of dicts, one for each object of `model` whose name
+    starts with `query`, up to `limit` of them, in order of their
+    NaturalSortField. e.g.
+
+        [{'id': 3, 'name': 'The Long Blondes', 'url': '/creators/3/'}]
+    """
+    if limit is None:
+        limit = get_limit()
+    key = normalize(query)
+    if not key:
+        return []
+
+    depth = get_trie_depth()
+    # The trie's nodes can't provide more than TRIE_NODE_SIZE matches:
+    if depth > 0 and limit <= TRIE_NODE_SIZE:
+        trie = _get_trie(model)
+        matches = trie.get(key)
+        if matches is None:
+            matches, is_complete = _find(model, key, TRIE_NODE_SIZE)
+            if len(key) <= depth:
+                trie.set(key, matches, is_complete)
+    else:
+        matches, is_complete = _find(model, key, limit)
+
+    return [match.result for match in matches[:limit]]
+
+
+def normalize(query):
+    "Lowercases `query` and reduces any whitespace to single spaces."
+    return re.sub(r'\s+', ' ', query.lower()).lstrip()
+
+
+def naturalize(key, sort_field):
+    """
+    Makes `key`, a normalized query, like the start of the values in
+    `sort_field`, a NaturalSortField.
+    """
+    parts = key.split(' ')
+    if len(parts) > 1 and parts[0] in sort_field.articles \
+                            and parts[1] != parts[0] and ''.join(parts[1:]):
+        # 'the long bl' to 'long bl'; we can't know the end of the name yet.
+        key = ' '.join(parts[1:])
+    # Pad numbers, except one at the end that might still be being typed:
+    head, tail = re.match(r'(.*?)(\d*)$', key).groups()
+    return sort_field._naturalize_numbers(head) + tail
+
+
+def get_variants(key):
+    "The ways `key` might start a name, e.g. 'david fos' and 'David Fos'."
+    variants = []
+    for variant in (key, capfirst(key), key.title()):
+        if variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+class _Match(object):
+    __slots__ = ('sort_value', 'value', 'result')
+
+    def __init__(self, sort_value, value, result):
+        self.sort_value = sort_value
+        self.value = value
+        self.result = result
+
+    def matches(self, sort_prefix, variants):
+        return self.sort_value.startswith(sort_prefix) or \
+                    any(self.value.startswith(v) for v in variants)
+
+
+def _find(model, key, size):
+    """
+    Returns a list of up to `size` _Matches for objects of `model` matching
+    `key`, and whether that's all of them.
+    """
+    field_name = _registry[model]['field']
+    sort_field = model._meta.get_field(_registry[model]['sort_field'])
+    sort_prefix = naturalize(key, sort_field)
+    variants = get_variants(key)
+
+    is_complete = True
+    objects = {}
+    for name, prefix in [(sort_field.name, sort_prefix)] + \
+                                    [(field_name, v) for v in variants]:
+        found = list(model._default_manager.filter(**_range(name, prefix))
+                                                .order_by(name)[:size])
+        is_complete = is_complete and len(found) < size
+        for obj in found:
+            objects[obj.pk] = obj
+
+    matches = [_Match(getattr(obj, sort_field.name), getattr(obj, field_name),
+                      {'id': obj.pk, 'name': str(obj),
+                       'url': obj.get_absolute_url()})
+               for obj in objects.values()]
+    # In case the database's collation makes its ranges a little different:
+    matches = [m for m in matches if m.matches(sort_prefix, variants)]
+    matches.sort(key=lambda m: (m.sort_value, m.result['id']))
+    return matches[:size], is_complete and len(matches) <= size
+
+
+def _range(field_name, prefix):
+    "Lookups for values of the field that start with `prefix`."
+    lookups = {'{}__gte'.format(field_name): prefix}
+    if prefix and ord(prefix[-1]) < 0x10ffff:
+        lookups['{}__lt'.format(field_name)] = \
+                                prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return lookups
+
+
+def _get_trie(model):
+    "Returns the model's trie, a new one if the model has changed."
+    version = versions.get_versions(model)
+    trie = _tries.get(model)
+    if trie is None or trie.version != version:
+        trie = _Trie(model, version)
+        _tries[model] = trie
+    return trie
+
+
+class _TrieNode(object):
+    __slots__ = ('children', 'matches', 'is_complete')
+
+    def __init__(self):
+        self.children = {}
+        self.matches = None
+        self.is_complete = False
+
+
+class _Trie(object):
+    """
+    The matches for prefixes of one model's names, one character per level.
+    """
+
+    def __init__(self, model, version):
+        self.sort_field = model._meta.get_field(_registry[model]['sort_field'])
+        self.version = version
+        self.root = _TrieNode()
+
+    def get(self, key):
+        "Returns a list of _Matches for `key`, or None if we don't know."
+        sort_prefix = naturalize(key, self.sort_field)
+        node = self.root
+        for i, char in enumerate(key, 1):
+            node = node.children.get(char)
+            if node is None:
+                return None
+            if i == len(key) and node.matches is not None:
+                return node.matches
+            if node.is_complete and sort_prefix.startswith(
+                                    naturalize(key[:i], self.sort_field)):
+                # Everything matching `key` also matches this prefix.
+                variants = get_variants(key)
+                return [m for m in node.matches
+                                    if m.matches(sort_prefix, variants)]
+        return None
+
+    def set(self, key, matches, is_complete):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.matches = matches
+        node.is_complete = is_complete
@@ -0,0 +1,119 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .models import KindCount
+
+
+# Maps models to the name of their `kind` field:
+_registry = {}
+
+
+def register(model, kind_field='kind'):
+    """
+    Keep counts of how many objects of each kind `model` has, in KindCount.
+
+    The counts are updated whenever an object is saved or deleted.
+    Note that QuerySet.update(), QuerySet.delete() and bulk_create() don't
+    send signals, so after using those, use rebuild().
+
+    model -- e.g. Event.
+    kind_field -- The name of the field whose values we're counting.
+    """
+    _registry[model] = kind_field
+    uid = 'spectator.counters.{}'.format(model._meta.label_lower)
+    post_init.connect(_remember_kind, sender=model, dispatch_uid=uid)
+    post_save.connect(_object_saved, sender=model, dispatch_uid=uid)
+    post_delete.connect(_object_deleted, sender=model, dispatch_uid=uid)
+
+
+def registered_models():
+    "A list of the models whose kinds are counted."
+    return list(_registry.keys())
+
+
+def get_counts(model):
+    """
+    Returns a dict of the number of objects of each kind for `model`, with
+    one query. Includes a count for every kind in the field's choices, and
+    the total in 'all'. e.g.
+
+        {'all': 30, 'gig': 12, 'movie': 18, 'play': 0,}
+    """
+    field = model._meta.get_field(_registry[model])
+    counts = {k: 0 for k, v in field.choices}
+
+    for kind, count in KindCount.objects.filter(
+                            model_label=model._meta.label_lower).values_list(
+                                                            'kind', 'count'):
+        counts[kind] = count
+
+    counts['all'] = sum(counts.values())
+    return counts
+
+
+def rebuild(model, kind_field=None, count_model=KindCount):
+    """
+    Replace all of `model`'s counts with ones made from a single GROUP BY.
+
+    kind_field and count_model can be supplied for use in migrations, where
+    we have the historical versions of the models.
+    """
+    if kind_field is None:
+        kind_field = _registry[model]
+
+    label = model._meta.label_lower
+    rows = model._default_manager.order_by().values(kind_field)\
+                                            .annotate(num=Count('pk'))
+
+    with transaction.atomic():
+        count_model.objects.filter(model_label=label).delete()
+        count_model.objects.bulk_create([
+            count_model(model_label=label, kind=row[kind_field],
+                                                        count=row['num'])
+            for row in rows
+        ])
+
+
+def _change_count(model, kind, change):
+    label = model._meta.label_lower
+    counts = KindCount.objects.filter(model_label=label, kind=kind)
+    if change < 0:
+        # Don't go below zero if we're already out of sync.
+        counts = counts.filter(count__gte=-change)
+
+    with transaction.atomic():
+        if counts.update(count=F('count') + change) == 0 and change > 0:
+            try:
+                with transaction.atomic():
+                    KindCount.objects.create(model_label=label, kind=kind,
+                                                                count=change)
+            except IntegrityError:
+                # Someone else just created it.
+                counts.update(count=F('count') + change)
+
+
+def _remember_kind(sender, instance, **kwargs):
+    # Avoid fetching the field if it's been deferred:
+    instance._spectator_counted_kind = instance.__dict__.get(
+                                                        _registry[sender])
+
+
+def _object_saved(sender, instance, created, **kwargs):
+    kind = getattr(instance, _registry[sender])
+    old_kind = getattr(instance, '_spectator_counted_kind', None)
+
+    if created:
+        _change_count(sender, kind, 1)
+    elif old_kind is not None and old_kind != kind:
+        _change_count(sender, old_kind, -1)
+        _change_count(sender, kind, 1)
+
+    instance._spectator_counted_kind = kind
+
+
+def _object_deleted(sender, instance, **kwargs):
+    kind = getattr(instance, '_spectator_counted_kind', None)
+    if kind is None:
+        kind = getattr(instance, _registry[sender])
+    _change_count(sender, kind, -1)
@@ -0,0 +1,289 @@
+"""
+Keeping CreatorCredits in sync with the roles they copy, and using them to
+fetch everything a Creator has worked on.
+
+Every concrete subclass of BaseRole (PublicationRole, EventRole, MovieRole,
+etc) has a ForeignKey to `creator` and one other ForeignKey, to the thing
+that was worked on. connect_signals() is called when the app is ready.
+"""
+import collections
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+
+from .models import BaseRole, CreatorCredit
+
+
+# How many roles to fetch and create credits for at a time when rebuilding:
+CHUNK_SIZE = 1000
+
+
+def get_role_models():
+    "All the installed concrete subclasses of BaseRole."
+    return [m for m in apps.get_models() if issubclass(m, BaseRole)]
+
+
+def get_object_field(role_model):
+    """
+    The ForeignKey field on a role model that isn't its `creator`.
+    e.g. EventRole.event
+    """
+    for field in role_model._meta.get_fields():
+        if field.many_to_one and field.concrete and field.name != 'creator':
+            return field
+
+
+def make_credit(role, content_type, credit_model=CreatorCredit):
+    """
+    Returns an unsaved CreatorCredit for `role`. Only fetches the thing it's
+    for, if it's not already cached, when it has a date to copy.
+    """
+    field = get_object_field(role.__class__)
+    date = None
+    if _has_date(field.related_model):
+        date = getattr(role, field.name).date
+    return credit_model(
+                creator_id=role.creator_id,
+                content_type_id=content_type.pk,
+                object_id=getattr(role, field.attname),
+                role_id=role.pk,
+                role_name=role.role_name,
+                role_order=role.role_order,
+                date=date)
+
+
+def rebuild(role_models=None, credit_model=CreatorCredit,
+                                            content_type_model=ContentType):
+    """
+    Replace all the credits for the roles of `role_models` (default, all of
+    them) with new ones.
+
+    The models can be supplied for use in migrations, where we have the
+    historical versions of the models.
+    """
+    if role_models is None:
+        role_models = get_role_models()
+
+    for role_model in role_models:
+        field = get_object_field(role_model)
+        obj_model = field.related_model
+        content_type, created = content_type_model.objects.get_or_create(
+                                    app_label=obj_model._meta.app_label,
+                                    model=obj_model._meta.model_name)
+
+        with transaction.atomic():
+            credit_model.objects.filter(content_type_id=content_type.pk)\
+                                .delete()
+            roles = role_model._default_manager.select_related(field.name)\
+                                                .order_by('pk')
+            last_pk = 0
+            while True:
+                chunk = list(roles.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+                if not chunk:
+                    break
+                credit_model.objects.bulk_create([
+                    make_credit(role, content_type, credit_model)
+                    for role in chunk
+                ])
+                last_pk = chunk[-1].pk
+
+
+def get_work_models():
+    """
+    A dict of the models that Creators can be credited on, keyed by the
+    names we use for them, e.g. {'events': Event, 'movies': Movie, ...}
+    """
+    work_models = {}
+    for role_model in get_role_models():
+        model = get_object_field(role_model).related_model
+        work_models['{}s'.format(model._meta.model_name)] = model
+    return work_models
+
+
+def get_works_queryset(creator, model):
+    """
+    A QuerySet of the `model` objects (e.g. Events) that `creator` is
+    credited on, with everything needed to display them.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    qs = model._default_manager.filter(pk__in=creator.credits.filter(
+                    content_type=content_type).values('object_id'))
+    if hasattr(qs, 'for_display'):
+        qs = qs.for_display()
+    return qs
+
+
+def add_credits(creator, objs):
+    """
+    Adds these properties to each of `objs`, which should all be of the same
+    model, using one query:
+
+    * `creator_credits` - List of the `creator`'s CreatorCredits for it.
+    * `creator_role_names` - List of their role_names, if any.
+
+    Returns `objs`.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+
+    content_type = ContentType.objects.get_for_model(objs[0])
+    credits = {}
+    for credit in creator.credits.filter(content_type=content_type,
+                            object_id__in=[obj.pk for obj in objs]):
+        credits.setdefault(credit.object_id, []).append(credit)
+    return _set_credits(objs, credits)
+
+
+def _set_credits(objs, credits):
+    """
+    Sets the properties described in add_credits() on each of `objs`, from
+    `credits`, a dict mapping object ids to lists of CreatorCredits.
+    Returns a list of `objs`.
+    """
+    objs = list(objs)
+    for obj in objs:
+        obj.creator_credits = credits.get(obj.pk, [])
+        obj.creator_role_names = [c.role_name for c in obj.creator_credits
+                                                            if c.role_name]
+    return objs
+
+
+def get_creator_work_counts(creator):
+    """
+    Returns a dict of how many of each kind of thing `creator` has worked
+    on, with one query. e.g. {'events': 20, 'movies': 3}
+    """
+    work_models = get_work_models()
+    rows = creator.credits.order_by().values('content_type')\
+                        .annotate(num=Count('object_id', distinct=True))
+    counts = {}
+    for row in rows:
+        name, model = _get_work_model(row['content_type'], work_models)
+        if model is not None:
+            counts[name] = row['num']
+    return counts
+
+
+def get_creator_works(creator, limit=None):
+    """
+    Returns a dict of everything `creator` has worked on, keyed by the
+    names from get_work_models(), e.g.:
+
+        {
+            'publications': [<Publication>, ...],
+            'events': [<Event>, ...],
+            'movies': [<Movie>, ...],
+        }
+
+    Each list is in its model's usual order, has at most `limit` objects,
+    and each object has the properties set by add_credits().
+
+    One query for all of the creator's CreatorCredits, grouped by the kind
+    of thing they're for, then a few for each kind (see the models'
+    for_display() methods) however many there are.
+    """
+    # Maps content type ids to dicts mapping object ids to lists of credits,
+    # in CreatorCredit's usual order:
+    credits = collections.defaultdict(dict)
+    for credit in creator.credits.all():
+        credits[credit.content_type_id].setdefault(
+                                        credit.object_id, []).append(credit)
+
+    work_models = get_work_models()
+
+    works = {}
+    for content_type_id, object_credits in credits.items():
+        name, model = _get_work_model(content_type_id, work_models)
+        if model is not None:
+            qs = get_works_queryset(creator, model)
+            if limit is not None:
+                qs = qs[:limit]
+            works[name] = _set_credits(qs, object_credits)
+    return works
+
+
+def _get_work_model(content_type_id, work_models):
+    """
+    Returns the name and model from `work_models` for this content type, or
+    (None, None) if it's not one of them.
+    """
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    for name, work_model in work_models.items():
+        if work_model == model:
+            return name, model
+    return None, None
+
+
+def connect_signals():
+    "Keep credits up to date when any kind of role is saved or deleted."
+    for role_model in get_role_models():
+        uid = 'spectator.credits.{}'.format(role_model._meta.label_lower)
+        post_save.connect(_role_saved, sender=role_model, dispatch_uid=uid)
+        post_delete.connect(_role_deleted, sender=role_model, dispatch_uid=uid)
+
+        # If the thing has a date, keep the credits' copies of it current:
+        obj_model = get_object_field(role_model).related_model
+        if _has_date(obj_model):
+            post_save.connect(_object_saved, sender=obj_model,
+                dispatch_uid='spectator.credits.{}'.format(
+                                                obj_model._meta.label_lower))
+
+
+def _has_date(model):
+    return any(f.name == 'date' for f in model._meta.concrete_fields)
+
+
+def _get_content_type(role_model):
+    return ContentType.objects.get_for_model(
+                                get_object_field(role_model).related_model)
+
+
+def _role_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Only the credit's copies of the role's fields need changing, unless the
+    credit is new or the role is now for a different thing, whose date we
+    need.
+    """
+    if raw:
+        return
+    content_type = _get_content_type(sender)
+    if not created:
+        object_id = getattr(instance, get_object_field(sender).attname)
+        if CreatorCredit.objects.filter(content_type_id=content_type.pk,
+                                        role_id=instance.pk,
+                                        object_id=object_id)\
+                                .update(creator_id=instance.creator_id,
+                                        role_name=instance.role_name,
+                                        role_order=instance.role_order):
+            return
+    credit = make_credit(instance, content_type)
+    CreatorCredit.objects.update_or_create(
+            content_type_id=credit.content_type_id,
+            role_id=credit.role_id,
+            defaults={
+                'creator_id': credit.creator_id,
+                'object_id': credit.object_id,
+                'role_name': credit.role_name,
+                'role_order': credit.role_order,
+                'date': credit.date,
+            })
+
+
+def _role_deleted(sender, instance, **kwargs):
+    CreatorCredit.objects.filter(content_type=_get_content_type(sender),
+                                role_id=instance.pk).delete()
+
+
+def _object_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        # It can't have any roles yet.
+        return
+    CreatorCredit.objects.filter(
+                content_type=ContentType.objects.get_for_model(sender),
+                object_id=instance.pk)\
+            .exclude(date=instance.date)\
+            .update(date=instance.date)
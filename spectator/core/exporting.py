@@ -0,0 +1,219 @@
+"""
+Exporting all of Spectator's data as JSON Lines or CSV, a chunk of objects
+at a time, so that memory use doesn't grow with the number of objects.
+
+Models are registered, in each app's signals.py, in the order their data
+should be reloaded, each after the models it refers to:
+
+    exporting.register(Venue, Movie, Play, ClassicalWork, DancePiece, Event)
+
+Each object's roles (Creators, role names and orders) and the pks of its
+other ManyToMany relations, like an Event's ClassicalWorks, are included
+with it, rather than as separate objects. Objects are exported in order of
+pk. So the objects of one model, and their roles, can be reloaded with
+bulk_create() once those of the models before it have been.
+
+Like dumpdata, a line of JSON Lines is like:
+
+    {"model": "spectator_events.event", "pk": 1,
+     "fields": {"venue": 3, "date": "2017-06-01", ...,
+                "roles": [{"pk": 7, "creator": 2, "role_name": "Headliner",
+                           "role_order": 1, ...}],
+                "classicalworks": [], "dancepieces": []}}
+
+A CSV file has the objects of one model, with a column for the pk and each
+field. Roles and lists of pks are JSON.
+
+Things that can be rebuilt from these, like CreatorCredits, counts, years
+and search indexes, aren't exported.
+"""
+import collections
+import csv
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import BaseRole
+
+
+# How many objects to fetch in each query:
+CHUNK_SIZE = 500
+
+# The formats that can be exported:
+FORMATS = ('jsonl', 'csv')
+
+# Maps the labels of the models to export to their models, in the order
+# they should be reloaded:
+_registry = collections.OrderedDict()
+
+
+def register(*models):
+    "Export `models`, in this order, after those already registered."
+    for model in models:
+        _registry[model._meta.label_lower] = model
+
+
+def registered_models():
+    "A list of the models that are exported, in order."
+    return list(_registry.values())
+
+
+def get_model(label):
+    """
+    The registered model with `label`, e.g. 'spectator_events.event'.
+    Raises LookupError if there isn't one.
+    """
+    try:
+        return _registry[label.lower()]
+    except KeyError:
+        raise LookupError('Unknown model: {!r}.'.format(label))
+
+
+def get_field_names(model):
+    """
+    The names of the fields in each exported object of `model`, in order,
+    not including its pk.
+    """
+    names = [f.name for f in model._meta.concrete_fields if not f.primary_key]
+    names += [name for name, role_model, field in _get_roles(model)]
+    names += [field.name for field in _get_many_to_many(model)]
+    return names
+
+
+def iter_objects(model, chunk_size=CHUNK_SIZE):
+    """
+    Yields a (pk, fields) tuple for each object of `model`, in order of pk,
+    where `fields` is a dict of values, keyed by get_field_names().
+
+    Objects are fetched `chunk_size` at a time, each chunk after the pk of
+    the last, with one more query for each of their kinds of roles and
+    ManyToMany relations.
+    """
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    attnames = [f.attname for f in fields]
+    manager = model._base_manager
+    last_pk = None
+
+    while True:
+        objects = manager.order_by('pk')
+        if last_pk is not None:
+            objects = objects.filter(pk__gt=last_pk)
+        rows = list(objects.values_list('pk', *attnames)[:chunk_size])
+        if not rows:
+            return
+        pks = [row[0] for row in rows]
+
+        related = [(name, _get_related_roles(role_model, field, pks))
+                    for name, role_model, field in _get_roles(model)]
+        related += [(field.name, _get_related_pks(field, pks))
+                    for field in _get_many_to_many(model)]
+
+        for row in rows:
+            values = collections.OrderedDict(
+                        (field.name, value)
+                        for field, value in zip(fields, row[1:]))
+            for name, values_by_pk in related:
+                values[name] = values_by_pk.get(row[0], [])
+            yield row[0], values
+
+        last_pk = pks[-1]
+
+
+def export_jsonl(models=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields a line of JSON for each object of `models` (default, all of the
+    registered models), in the order they're registered.
+    """
+    if models is None:
+        models = registered_models()
+    for model in models:
+        label = model._meta.label_lower
+        for pk, fields in iter_objects(model, chunk_size=chunk_size):
+            yield json.dumps({'model': label, 'pk': pk, 'fields': fields},
+                             cls=DjangoJSONEncoder) + '\n'
+
+
+def export_csv(model, chunk_size=CHUNK_SIZE):
+    """
+    Yields lines of CSV for the objects of `model`, after a line of column
+    names.
+    """
+    line = _Line()
+    writer = csv.writer(line)
+    yield writer.writerow(['pk'] + get_field_names(model))
+    for pk, fields in iter_objects(model, chunk_size=chunk_size):
+        yield writer.writerow([pk] + [_to_csv(v) for v in fields.values()])
+
+
+def _get_roles(model):
+    """
+    A list of (name, role model, field) tuples for each kind of role that
+    objects of `model` have, e.g. ('roles', EventRole, the 'event' field).
+    """
+    return [(rel.get_accessor_name(), rel.related_model, rel.field)
+            for rel in model._meta.related_objects
+            if rel.one_to_many and issubclass(rel.related_model, BaseRole)]
+
+
+def _get_many_to_many(model):
+    """
+    The ManyToManyFields of `model` that aren't through roles, e.g. an
+    Event's classicalworks.
+    """
+    return [f for f in model._meta.many_to_many
+            if f.remote_field.through._meta.auto_created]
+
+
+def _get_related_roles(role_model, field, pks):
+    """
+    A dict mapping each of `pks` to a list of dicts of the values of its
+    roles, e.g. {'pk': 7, 'creator': 2, 'role_name': '', 'role_order': 1}.
+    """
+    fields = [f for f in role_model._meta.concrete_fields
+                                if not f.primary_key and f != field]
+    rows = role_model._base_manager\
+                    .filter(**{'{}__in'.format(field.attname): pks})\
+                    .order_by(field.attname, 'role_order', 'pk')\
+                    .values_list(field.attname, 'pk',
+                                 *[f.attname for f in fields])
+    roles = collections.defaultdict(list)
+    for row in rows:
+        values = collections.OrderedDict([('pk', row[1])])
+        values.update((f.name, value) for f, value in zip(fields, row[2:]))
+        roles[row[0]].append(values)
+    return roles
+
+
+def _get_related_pks(field, pks):
+    """
+    A dict mapping each of `pks` to a list of the pks of the objects it's
+    related to with the ManyToManyField `field`.
+    """
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    rows = through._base_manager.filter(**{'{}__in'.format(source): pks})\
+                                .order_by(source, target)\
+                                .values_list(source, target)
+    related = collections.defaultdict(list)
+    for source_pk, target_pk in rows:
+        related[source_pk].append(target_pk)
+    return related
+
+
+def _to_csv(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+class _Line(object):
+    "For csv.writer to write to, which returns each line it's given."
+
+    def write(self, value):
+        return value
@@ -1,7 +1,7 @@
-import re
-
 from django.db import models
 
+from . import naturalize
+
 
 class NaturalSortField(models.CharField):
     """
@@ -11,7 +11,8 @@ class NaturalSortField(models.CharField):
     If the object has a `sort_as` property and that is set to `person` then
     the string will be treated as if it's a name, i.e. surname put first.
 
-    Either way, this will be done:
+    The work is done by spectator.core.naturalize. Either way, this will be
+    done:
 
     * Stripped of leading/trailing spaces.
     * All lowercase.
@@ -48,6 +49,9 @@ class NaturalSortField(models.CharField):
 
     description = "A string to allow more human-friendly sorting"
 
+    # Things we want to move to the back of the string:
+    articles = naturalize.ARTICLES
+
     def __init__(self, for_field, *args, **kwargs):
         """
         for_field - The name of the field to base this field's string on.
@@ -65,119 +69,26 @@ class NaturalSortField(models.CharField):
         return name, path, args, kwargs
 
     def pre_save(self, model_instance, add):
-        string = getattr(model_instance, self.for_field)
-
-        string = string.strip()
+        return self.make_sort_value(model_instance)
 
-        if hasattr(model_instance, 'sort_as') and model_instance.sort_as == 'person':
-            string = self.naturalize_person(string)
-            # The case of the name is important, so we lowercase afterwards:
-            string = string.lower()
-        else:
-            string = string.lower()
-            string = self.naturalize_thing(string)
-
-        return string
-
-    def naturalize_thing(self, string):
+    def make_sort_value(self, model_instance):
         """
-        Make a naturalized version of a general string, not a person's name.
-        e.g., title of a book, a band's name, etc.
-
-        string -- a lowercase string.
+        Returns the value this field should have for `model_instance`, from
+        its current `for_field`.
         """
+        return naturalize.naturalize(getattr(model_instance, self.for_field),
+                                getattr(model_instance, 'sort_as', 'thing'))
 
-        # Things we want to move to the back of the string:
-        articles = [
-                        'a', 'an', 'the',
-                        'un', 'une', 'le', 'la', 'les', "l'", "l’",
-                        'ein', 'eine', 'der', 'die', 'das',
-                        'una', 'el', 'los', 'las',
-                    ]
-
-        sort_string = string
-        parts = string.split(' ')
-
-        if len(parts) > 1 and parts[0] in articles:
-            if parts[0] != parts[1]:
-                # Don't do this if the name is 'The The' or 'La La Land'.
-                # Makes 'long blondes, the':
-                sort_string = '{}, {}'.format(' '.join(parts[1:]), parts[0])
-
-        sort_string = self._naturalize_numbers(sort_string)
-
-        return sort_string
+    def naturalize_thing(self, string):
+        "See spectator.core.naturalize.naturalize_thing()."
+        return naturalize.naturalize_thing(string)
 
     def naturalize_person(self, string):
-        """
-        Attempt to make a version of the string that has the surname, if any,
-        at the start.
-
-        'John, Brown' to 'Brown, John'
-        'Sir John Brown Jr' to 'Brown, Sir John Jr'
-        'Prince' to 'Prince'
-
-        string -- The string to change.
-        """
-        suffixes = [
-                    'Jr', 'Jr.', 'Sr', 'Sr.',
-                    'I', 'II', 'III', 'IV', 'V',
-                    ]
-        # Add lowercase versions:
-        suffixes = suffixes + [s.lower() for s in suffixes]
-
-        # If a name has a capitalised particle in we use that to sort.
-        # So 'Le Carre, John' but 'Carre, John le'.
-        particles = [
-                    'Le', 'La',
-                    'Von', 'Van',
-                    'Du', 'De',
-                    ]
-
-        surname = '' # Smith
-        names = ''   # Fred James
-        suffix = ''  # Jr
-
-        sort_string = string
-        parts = string.split(' ')
-
-        if parts[-1] in suffixes:
-            # Remove suffixes entirely, as we'll add them back on the end.
-            suffix = parts[-1]
-            parts = parts[0:-1] # Remove suffix from parts
-            sort_string = ' '.join(parts)
-
-        if len(parts) > 1:
-
-            if parts[-2] in particles:
-                # From ['Alan', 'Barry', 'Le', 'Carré']
-                # to   ['Alan', 'Barry', 'Le Carré']:
-                parts = parts[0:-2] + [ ' '.join(parts[-2:]) ]
-
-            # From 'David Foster Wallace' to 'Wallace, David Foster':
-            sort_string = '{}, {}'.format(parts[-1], ' '.join(parts[:-1]))
-
-        if suffix:
-            # Add it back on.
-            sort_string = '{} {}'.format(sort_string, suffix)
-
-        # In case this name has any numbers in it.
-        sort_string = self._naturalize_numbers(sort_string)
-
-        return sort_string
+        "See spectator.core.naturalize.naturalize_person()."
+        return naturalize.naturalize_person(string)
 
     def _naturalize_numbers(self, string):
-        """
-        Makes any integers into very zero-padded numbers.
-        e.g. '1' becomes '00000001'.
-        """
-
-        def naturalize_int_match(match):
-            return '%08d' % (int(match.group(0)),)
-
-        string = re.sub(r'\d+', naturalize_int_match, string)
-
-        return string
+        return naturalize.naturalize_numbers(string)
 
 
 class PersonNaturalSortField(NaturalSortField):
@@ -0,0 +1,413 @@
+"""
+What importers of lots of data at once, like spectator.events.importer and
+spectator.reading.importer, have in common.
+
+Saving every object one at a time sends signals that update titles,
+credits, counts, caches and the search index for every row. Instead
+importers read rows a batch at a time, and import each batch in one
+transaction:
+
+* Creators, Venues, etc are found by their naturalized names (the values
+  of their name_sort or title_sort fields) using Resolvers, which remember
+  them, with one query for all those not seen before. Any that don't exist
+  are made with bulk_create().
+* Everything else is made with bulk_create(), which sends no signals.
+* The pks of everything involved are collected with add_changed(). Once
+  every batch has been imported, their versions, and surrogate keys, are
+  changed with touch(), once each, which also updates their search
+  documents.
+
+import_rows() does the reading, batching and counting:
+
+    changed = collections.defaultdict(set)
+
+    def import_batch(rows):
+        with transaction.atomic():
+            rows = exclude_imported(rows)
+            ...
+            record_imported(Publication, rows.keys(), publication_pks)
+        add_changed(changed, [(Publication, publication_pks), ...])
+        return len(rows)
+
+    try:
+        result = import_rows(read_csv(f), 'spectator_reading.Publication',
+                             parse_row, import_batch)
+    finally:
+        touch(changed.items())
+
+Each row's contents are hashed, and saved as an ImportRecord, so rows that
+have already been imported, e.g. when re-running an import that stopped
+part way through, are skipped.
+
+As some databases (e.g. SQLite, MySQL) don't return the pks of objects
+made with bulk_create(), bulk_create_with_pks() fetches the newest pks
+instead, having stopped anything else adding the same kinds of objects
+until the transaction ends. On MySQL that relies on InnoDB's locks on the
+gaps between rows, which are only taken at the REPEATABLE READ isolation
+level, Django's default for it.
+"""
+import collections
+import csv
+import hashlib
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, connections, transaction
+
+from . import surrogates, versions
+from .models import Creator, ImportRecord
+
+
+# How many rows to import in each transaction:
+BATCH_SIZE = 500
+
+# How many names to look up in each query:
+CHUNK_SIZE = 500
+
+# The result of an import.
+# imported -- the number of rows imported.
+# skipped -- the number of rows that had already been imported.
+# errors -- a list of (row number, message) tuples for invalid rows.
+Result = collections.namedtuple('Result', ['imported', 'skipped', 'errors'])
+
+
+class RowError(ValueError):
+    "Raised when a row of data can't be imported."
+    pass
+
+
+def read_csv(f):
+    """
+    Yields (row number, dict) for each row of a CSV file, whose first row
+    has the column names.
+    """
+    for number, data in enumerate(csv.DictReader(f), 1):
+        yield number, data
+
+
+def import_rows(rows, label, parse_row, import_batch, batch_size=BATCH_SIZE):
+    """
+    Imports `rows`, an iterable of (row number, data) tuples like those from
+    read_csv(). Returns a Result.
+
+    label -- Identifies the kind of import in the rows' hashes, e.g.
+        'spectator_events.Event'.
+    parse_row -- A function that returns a JSON-serializable version of a
+        row's data, or raises RowError if it's invalid.
+    import_batch -- A function that imports a list of (hash, parsed row)
+        tuples, skipping those already imported (see exclude_imported()),
+        and returns how many it imported.
+    """
+    imported = 0
+    skipped = 0
+    errors = []
+
+    batch = []
+    for number, data in rows:
+        try:
+            row = parse_row(data)
+        except RowError as e:
+            errors.append((number, str(e)))
+            continue
+        batch.append((make_hash(label, row), row))
+        if len(batch) == batch_size:
+            count = import_batch(batch)
+            imported += count
+            skipped += len(batch) - count
+            batch = []
+
+    if batch:
+        count = import_batch(batch)
+        imported += count
+        skipped += len(batch) - count
+
+    return Result(imported, skipped, errors)
+
+
+def make_hash(label, row):
+    "The hash of a parsed row, to save in its ImportRecord."
+    content = json.dumps([label, row], sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def exclude_imported(rows):
+    """
+    Returns an OrderedDict mapping hashes to rows, from `rows`, a list of
+    (hash, row) tuples, without duplicates or those already imported.
+    """
+    unique = collections.OrderedDict(rows)
+    for content_hash in ImportRecord.objects\
+                                .filter(content_hash__in=unique.keys())\
+                                .values_list('content_hash', flat=True):
+        del unique[content_hash]
+    return unique
+
+
+def record_imported(model, hashes, pks):
+    """
+    Save ImportRecords for rows with `hashes`, each imported as the object
+    of `model` whose pk is at the same position in `pks`.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    ImportRecord.objects.bulk_create([
+        ImportRecord(content_hash=content_hash, content_type=content_type,
+                                                                object_id=pk)
+        for content_hash, pk in zip(hashes, pks)])
+
+
+def bulk_create_with_pks(model, objs):
+    """
+    bulk_create() the objects and set their pks. Only some databases return
+    them, so on others we stop anything else adding objects of `model` until
+    the transaction ends, then fetch the pks of the newest objects, checking
+    there are the right number.
+    """
+    if not objs:
+        return
+    manager = model._default_manager
+    if connections[manager.db].features.can_return_ids_from_bulk_insert:
+        manager.bulk_create(objs)
+        return
+
+    with transaction.atomic(using=manager.db):
+        last_pk = _lock_for_insert(model, manager.db)
+        manager.bulk_create(objs)
+        pks = list(manager.filter(pk__gt=last_pk).order_by('pk')
+                                            .values_list('pk', flat=True))
+    if len(pks) != len(objs):
+        raise DatabaseError(
+                "Expected {} new {} but found {}. Were others being created "
+                "at the same time?".format(len(objs),
+                                    model._meta.verbose_name_plural, len(pks)))
+    for obj, pk in zip(objs, pks):
+        obj.pk = pk
+
+
+def _lock_for_insert(model, using):
+    """
+    Stops other connections adding objects of `model` until the current
+    transaction ends, and returns the biggest pk, or 0 if there are none.
+
+    On SQLite any write locks the whole database, so we make one that
+    changes nothing. Elsewhere, e.g. on MySQL, selecting the last row FOR
+    UPDATE also locks the gap after it, where new rows would go.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE {0} SET {1} = {1} WHERE 1 = 0'.format(
+                    qn(model._meta.db_table), qn(model._meta.pk.column)))
+    last = list(model._default_manager.using(using).select_for_update()
+                        .order_by('-pk').values_list('pk', flat=True)[:1])
+    return last[0] if last else 0
+
+
+def add_changed(changed, items):
+    """
+    Add the pks in `items`, a list of (model, pks) tuples, to `changed`, a
+    defaultdict(set) mapping models to the pks to touch() once the import
+    has finished.
+    """
+    for model, pks in items:
+        changed[model].update(pks)
+
+
+def touch(changed):
+    """
+    Change the versions of the objects that have been created, or whose
+    pages have changed, and purge their surrogate keys and those of their
+    models' lists. Which also updates their search documents.
+
+    In one transaction, so each search document is only updated once, even
+    if several of the models change it.
+
+    changed -- A list of (model, pks) tuples.
+    """
+    keys = set()
+    with transaction.atomic():
+        for model, pks in changed:
+            if pks:
+                pks = sorted(set(pks))
+                versions.bump(model, pks)
+                keys.add(surrogates.list_key(model))
+                keys |= {surrogates.object_key(model, pk) for pk in pks}
+        surrogates.purge(keys)
+
+
+def get_text(data, key, max_length=255):
+    "The stripped string value of data[key], or '' if there isn't one."
+    value = data.get(key)
+    if value is None:
+        return ''
+    value = str(value).strip()
+    if len(value) > max_length:
+        raise RowError('{} should be at most {} characters.'.format(
+                                                            key, max_length))
+    return value
+
+
+def get_list(data, key, separator=';'):
+    """
+    A list of the stripped strings in data[key], which can be a list or a
+    string of values separated by `separator`.
+    """
+    value = data.get(key)
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(separator)
+    elif not isinstance(value, list):
+        raise RowError('{} should be a list.'.format(key))
+    return [v for v in (get_text({key: v}, key) for v in value) if v]
+
+
+class Resolver(object):
+    """
+    Finds the pks of objects of `model`, described by dicts of their
+    fields' values, by the naturalized value of one of their fields,
+    creating any that don't exist. Remembers every pk it finds, and the
+    str() and sort value of its object.
+
+    model -- e.g. Venue.
+    sort_field -- The name of a NaturalSortField to match on, e.g.
+        'name_sort'. If several objects match, the oldest is used.
+    extra_fields -- Names of fields that must also match, e.g. ('year',).
+    """
+
+    def __init__(self, model, sort_field, extra_fields=()):
+        self.model = model
+        self.sort_field = model._meta.get_field(sort_field)
+        self.extra_fields = extra_fields
+        # Maps keys (see get_keys()) to pks:
+        self.pks = {}
+        # Maps pks to the str()s of their objects, e.g. for Events' titles:
+        self.names = {}
+        # Maps pks to the values of their objects' sort_field, e.g. to order
+        # them by, as their model's Meta.ordering would:
+        self.sort_values = {}
+        # The pks of the objects we've created:
+        self.created = []
+        # Maps the items of dicts of values to their make_values_key()s:
+        self._values_keys = {}
+
+    def resolve(self, values_list):
+        """
+        Returns a list of the pks of the objects described by each of the
+        dicts of field values in `values_list`, creating any that don't
+        exist.
+        """
+        keys_list = [self.get_keys(values) for values in values_list]
+
+        missing = [keys for keys in keys_list if self.find(keys) is None]
+        if missing:
+            self.fetch({key for keys in missing for key in keys})
+
+            # Each new object, and the keys it will be found by, so that
+            # later rows find it just as they would if it already existed:
+            new = []
+            new_keys = set()
+            for keys, values in zip(keys_list, values_list):
+                if self.find(keys) is None and new_keys.isdisjoint(keys):
+                    obj = self.make_object(values)
+                    new.append((obj, self.get_object_keys(values)))
+                    new_keys.update(new[-1][1])
+            if new:
+                bulk_create_with_pks(self.model, [obj for obj, k in new])
+                for obj, object_keys in new:
+                    for key in object_keys:
+                        self.pks.setdefault(key, obj.pk)
+                    self.names[obj.pk] = str(obj)
+                    self.sort_values[obj.pk] = \
+                                        self.sort_field.make_sort_value(obj)
+                    self.created.append(obj.pk)
+
+        return [self.find(keys) for keys in keys_list]
+
+    def resolve_lists(self, values_lists):
+        """
+        Like resolve() but for a list of lists of values, e.g. each row's
+        Creators, returning a list of lists of pks.
+        """
+        pks = iter(self.resolve([v for values in values_lists
+                                                        for v in values]))
+        return [[next(pks) for v in values] for values in values_lists]
+
+    def get_keys(self, values):
+        """
+        A list of the keys that could identify the object described by
+        `values`, best first. Each is a tuple of the object's naturalized
+        name and the values of the extra_fields.
+        """
+        return [self.make_values_key(values)]
+
+    def get_object_keys(self, values):
+        """
+        The keys that the object created from `values` can be found by. By
+        default, the best of its get_keys().
+        """
+        return self.get_keys(values)[:1]
+
+    def make_values_key(self, values):
+        """
+        make_key() for the object described by `values`. Remembered, as
+        making the object to get it from is slow, and the same Creators,
+        etc, appear in many rows.
+        """
+        items = tuple(sorted(values.items()))
+        if items not in self._values_keys:
+            self._values_keys[items] = self.make_key(self.make_object(values))
+        return self._values_keys[items]
+
+    def make_key(self, obj):
+        return (self.sort_field.make_sort_value(obj),) +\
+                tuple(getattr(obj, name) for name in self.extra_fields)
+
+    def make_object(self, values):
+        "An unsaved object from `values`, ignoring Nones."
+        return self.model(**{k: v for k, v in values.items() if v is not None})
+
+    def find(self, keys):
+        "The pk of the first of `keys` we know about, or None."
+        for key in keys:
+            if key in self.pks:
+                return self.pks[key]
+        return None
+
+    def fetch(self, keys):
+        "Remember the pks, and names, of any existing objects with `keys`."
+        sort_values = sorted({key[0] for key in keys})
+        fields = [self.sort_field.name] + list(self.extra_fields)
+        # The field the sort field is made from, e.g. 'name', for str():
+        name_fields = list(self.extra_fields) + [self.sort_field.for_field]
+        for i in range(0, len(sort_values), CHUNK_SIZE):
+            rows = self.model._default_manager\
+                    .filter(**{'{}__in'.format(self.sort_field.name):
+                                            sort_values[i:i+CHUNK_SIZE]})\
+                    .order_by('pk')\
+                    .values_list(*(fields + [self.sort_field.for_field, 'pk']))
+            for row in rows:
+                key = tuple(row[:len(fields)])
+                pk = row[-1]
+                if key in keys and key not in self.pks:
+                    self.pks[key] = pk
+                    self.names[pk] = str(self.model(
+                                    **dict(zip(name_fields, row[1:-1]))))
+                    self.sort_values[pk] = row[0]
+
+
+class CreatorResolver(Resolver):
+    """
+    As Creators' names are naturalized differently depending on their kind,
+    if the kind isn't known we look for both, preferring an individual, as
+    that's what a new Creator would be.
+    """
+
+    def __init__(self):
+        super().__init__(Creator, 'name_sort')
+
+    def get_keys(self, values):
+        if values.get('kind') is not None:
+            return super().get_keys(values)
+        return [self.make_values_key(dict(values, kind=kind))
+                                for kind, name in Creator.KIND_CHOICES]
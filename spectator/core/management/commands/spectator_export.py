@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from spectator.core import exporting
+
+
+class Command(BaseCommand):
+    help = ("Exports all of Spectator's data as JSON Lines, or one model's "
+            "as CSV, a chunk of objects at a time. Each object includes its "
+            "roles and the pks of the things it's related to.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='model',
+                            help="Labels of the models to export, e.g. "
+                                 "spectator_events.event. Default, all of "
+                                 "them, which only JSON Lines can have.")
+        parser.add_argument('--format', choices=exporting.FORMATS,
+                            default='jsonl')
+        parser.add_argument('--output', '-o',
+                            help="The file to write to. Default, stdout.")
+        parser.add_argument('--chunk-size', type=int,
+                            default=exporting.CHUNK_SIZE,
+                            help="How many objects to fetch in each query.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size should be at least 1.')
+
+        try:
+            models = [exporting.get_model(label)
+                                            for label in options['models']]
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        if options['format'] == 'csv':
+            if len(models) != 1:
+                raise CommandError('CSV exports need exactly one model.')
+            lines = exporting.export_csv(models[0],
+                                         chunk_size=options['chunk_size'])
+        else:
+            lines = exporting.export_jsonl(models or None,
+                                           chunk_size=options['chunk_size'])
+
+        if options['output']:
+            try:
+                with open(options['output'], 'w', encoding='utf-8',
+                                                        newline='') as f:
+                    f.writelines(lines)
+            except OSError as e:
+                raise CommandError(str(e))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
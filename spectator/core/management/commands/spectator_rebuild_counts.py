@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from spectator.core import counters, years
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the counts of each kind of Creator, Event, Publication, "
+            "etc, and the index of years with Events and Readings. "
+            "Use after bulk changes that bypass the models' signals.")
+
+    def handle(self, *args, **options):
+        for model in counters.registered_models():
+            counters.rebuild(model)
+            if options['verbosity'] > 0:
+                self.stdout.write('Rebuilt counts for {}'.format(
+                                                    model._meta.label_lower))
+
+        for model in years.registered_models():
+            years.rebuild(model)
+            if options['verbosity'] > 0:
+                self.stdout.write('Rebuilt years for {}'.format(
+                                                    model._meta.label_lower))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from spectator.core import credits
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the CreatorCredits from every kind of role. Use after "
+            "bulk changes that bypass the models' signals.")
+
+    def handle(self, *args, **options):
+        for role_model in credits.get_role_models():
+            credits.rebuild(role_models=[role_model])
+            if options['verbosity'] > 0:
+                self.stdout.write('Rebuilt credits for {}'.format(
+                                                role_model._meta.label_lower))
@@ -0,0 +1,63 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from spectator.core import sorting
+
+
+class Command(BaseCommand):
+    help = ("Recalculates the title_sort, name_sort, etc fields of all "
+            "models, saving any that have changed. Use after bulk changes "
+            "that bypass the models' save(), or after changing how the "
+            "fields are naturalized.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.Model',
+                            help="Only rebuild these models.")
+        parser.add_argument('--verify', action='store_true',
+                            help="Don't save anything, only report values "
+                                 "that are stale.")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="How many processes to use for each model, "
+                                 "each with its own range of pks.")
+        parser.add_argument('--batch-size', type=int,
+                            default=sorting.BATCH_SIZE,
+                            help="How many objects to check at a time.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers should be at least 1.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size should be at least 1.')
+
+        for model in self.get_models(options['models']):
+            result = sorting.rebuild_in_parallel(model,
+                                    workers=options['workers'],
+                                    batch_size=options['batch_size'],
+                                    verify=options['verify'])
+            if options['verbosity'] > 0:
+                self.report(model, result, options)
+
+    def get_models(self, labels):
+        if not labels:
+            return sorting.get_models()
+        models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError):
+                raise CommandError('Unknown model: {}'.format(label))
+            if not sorting.get_sort_fields(model):
+                raise CommandError(
+                        '{} has no NaturalSortFields.'.format(label))
+            models.append(model)
+        return models
+
+    def report(self, model, result, options):
+        name = model._meta.label
+        verb = 'stale' if options['verify'] else 'updated'
+        for field, pks in result.stale.items():
+            self.stdout.write('{}.{}: {} of {} {}'.format(
+                                name, field, len(pks), result.checked, verb))
+            if pks and options['verbosity'] > 1:
+                self.stdout.write('  pks: {}'.format(
+                                        ', '.join(map(str, sorted(pks)))))
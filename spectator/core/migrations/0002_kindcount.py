@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:43
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from spectator.core.counters import rebuild
+
+
+def count_creators(apps, schema_editor):
+    rebuild(apps.get_model('spectator_core', 'Creator'),
+            kind_field='kind',
+            count_model=apps.get_model('spectator_core', 'KindCount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KindCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('kind', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='kindcount',
+            unique_together=set([('model_label', 'kind')]),
+        ),
+        migrations.RunPython(count_creators, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:49
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('spectator_core', '0002_kindcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreatorCredit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('role_id', models.PositiveIntegerField()),
+                ('role_name', models.CharField(blank=True, max_length=50)),
+                ('role_order', models.PositiveSmallIntegerField(default=1)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credits', to='spectator_core.Creator')),
+            ],
+            options={
+                'ordering': ('role_order', 'role_name'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='creatorcredit',
+            unique_together=set([('content_type', 'role_id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='creatorcredit',
+            index_together=set([('creator', 'content_type', 'object_id')]),
+        ),
+    ]
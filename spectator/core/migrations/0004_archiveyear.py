@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:56
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_core', '0003_creatorcredit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveYear',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+            ],
+            options={
+                'ordering': ('model_label', 'year'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='archiveyear',
+            unique_together=set([('model_label', 'year')]),
+        ),
+    ]
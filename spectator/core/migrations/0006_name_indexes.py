@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:22
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_core', '0005_modelversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='creator',
+            name='name',
+            field=models.CharField(db_index=True, help_text="e.g. 'Douglas Adams' or 'The Long Blondes'.", max_length=255),
+        ),
+    ]
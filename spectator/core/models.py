@@ -1,3 +1,5 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 try:
     # Django >= 1.10
@@ -89,7 +91,7 @@ class Creator(TimeStampedModelMixin, models.Model):
         ('group', 'Group'),
     )
 
-    name = models.CharField(max_length=255,
+    name = models.CharField(max_length=255, db_index=True,
             help_text="e.g. 'Douglas Adams' or 'The Long Blondes'.")
 
     name_sort = NaturalSortField(
@@ -120,13 +122,14 @@ class Creator(TimeStampedModelMixin, models.Model):
         """
         A list of all the Movies the Creator worked on.
         Each one also has these properties:
-        * `creator_roles` - QuerySet of MovieRole objects for this Creator.
+        * `creator_roles` - List of MovieRole objects for this Creator.
         * `creator_role_names` - List of the role_names (if any this Creator
             had. Note, this could be empty if none of the roles have names.
         """
         movies = []
-        for movie in self.movies.distinct():
-            movie.creator_roles = movie.roles.filter(creator=self)
+        roles = models.Prefetch('roles', to_attr='creator_roles',
+                    queryset=self.movie_roles.model.objects.filter(creator=self))
+        for movie in self.movies.distinct().prefetch_related(roles):
             movie.creator_role_names = []
             for role in movie.creator_roles:
                 if role.role_name:
@@ -138,13 +141,14 @@ class Creator(TimeStampedModelMixin, models.Model):
         """
         A list of all the Plays the Creator worked on.
         Each one also has these properties:
-        * `creator_roles` - QuerySet of PlayRole objects for this Creator.
+        * `creator_roles` - List of PlayRole objects for this Creator.
         * `creator_role_names` - List of the role_names (if any this Creator
             had. Note, this could be empty if none of the roles have names.
         """
         plays = []
-        for play in self.plays.distinct():
-            play.creator_roles = play.roles.filter(creator=self)
+        roles = models.Prefetch('roles', to_attr='creator_roles',
+                    queryset=self.play_roles.model.objects.filter(creator=self))
+        for play in self.plays.distinct().prefetch_related(roles):
             play.creator_role_names = []
             for role in play.creator_roles:
                 if role.role_name:
@@ -152,3 +156,126 @@ class Creator(TimeStampedModelMixin, models.Model):
             plays.append(play)
         return plays
 
+
+class KindCount(models.Model):
+    """
+    How many objects of a particular `kind` there are for a model.
+    e.g. how many Events are gigs, or how many Creators are groups.
+
+    These are kept up to date by spectator.core.counters, so that we can get
+    all the counts for a model with one query.
+    """
+    # e.g. 'spectator_events.event':
+    model_label = models.CharField(max_length=100)
+
+    kind = models.CharField(max_length=20)
+
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('model_label', 'kind'),)
+
+    def __str__(self):
+        return '{} {}: {}'.format(self.model_label, self.kind, self.count)
+
+
+class ModelVersion(models.Model):
+    """
+    The current version of a model, which increases whenever one of its
+    objects is changed.
+
+    These are kept by spectator.core.versions, which reads them from the
+    cache, using these when they're not there.
+    """
+    # e.g. 'spectator_events.event':
+    model_label = models.CharField(max_length=100, unique=True)
+
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return '{}: {}'.format(self.model_label, self.version)
+
+
+class ArchiveYear(models.Model):
+    """
+    A year in which a model has objects, e.g. a year in which there are
+    Events, with how many there are and the first and last dates.
+
+    These are kept up to date by spectator.core.years, so that we can get
+    all the years for a model, for the year archive pages and cards, with
+    one query.
+    """
+    # e.g. 'spectator_events.event':
+    model_label = models.CharField(max_length=100)
+
+    year = models.PositiveSmallIntegerField()
+
+    count = models.PositiveIntegerField(default=0)
+
+    first_date = models.DateField()
+
+    last_date = models.DateField()
+
+    class Meta:
+        ordering = ('model_label', 'year',)
+        unique_together = (('model_label', 'year'),)
+
+    def __str__(self):
+        return '{} {}: {}'.format(self.model_label, self.year, self.count)
+
+
+class CreatorCredit(models.Model):
+    """
+    A copy of one of a Creator's roles (a PublicationRole, EventRole,
+    MovieRole, etc), so that we can get everything a Creator has worked on
+    with one query.
+
+    These are kept up to date by spectator.core.credits whenever a role is
+    saved or deleted.
+    """
+    creator = models.ForeignKey('spectator_core.Creator',
+                        on_delete=models.CASCADE, related_name='credits')
+
+    # The thing that was worked on, e.g. a Publication or Event:
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    # The pk of the role, e.g. of a PublicationRole or EventRole:
+    role_id = models.PositiveIntegerField()
+
+    role_name = models.CharField(null=False, blank=True, max_length=50)
+
+    role_order = models.PositiveSmallIntegerField(null=False, default=1)
+
+    # The date of the thing, if it has one, e.g. an Event's:
+    date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('role_order', 'role_name',)
+        unique_together = (('content_type', 'role_id'),)
+        index_together = (('creator', 'content_type', 'object_id'),)
+
+    def __str__(self):
+        return '{}: {} {}'.format(self.creator_id, self.content_type_id,
+                                                            self.object_id)
+
+
+class ImportRecord(models.Model):
+    """
+    Records that a row of imported data has been saved, by a hash of its
+    contents, so that importing the same data again skips it.
+
+    Made by importers like spectator.events.importer.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+
+    # The object the row was imported as, e.g. an Event:
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    time_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.content_hash
@@ -0,0 +1,126 @@
+"""
+Making versions of names and titles that sort more naturally, as used by
+NaturalSortField. e.g.
+
+    >>> naturalize('The Long Blondes')
+    'long blondes, the'
+    >>> naturalize('David Foster Wallace', 'person')
+    'wallace, david foster'
+    >>> naturalize_many(['Vol. 2', 'Vol. 10'])
+    ['vol. 00000002', 'vol. 00000010']
+
+The same names are naturalized again and again, e.g. whenever a Creator is
+saved, an Event's title is recalculated, or sort fields are rebuilt, so
+results are kept in an LRU cache of CACHE_SIZE strings.
+"""
+import functools
+import re
+
+
+# Things we want to move to the back of the string:
+ARTICLES = frozenset([
+    'a', 'an', 'the',
+    'un', 'une', 'le', 'la', 'les', "l'", "l’",
+    'ein', 'eine', 'der', 'die', 'das',
+    'una', 'el', 'los', 'las',
+])
+
+# Things we want to keep at the end of people's names:
+SUFFIXES = frozenset(s for suffix in ['Jr', 'Jr.', 'Sr', 'Sr.',
+                                      'I', 'II', 'III', 'IV', 'V']
+                            for s in (suffix, suffix.lower()))
+
+# If a name has a capitalised particle in we use that to sort.
+# So 'Le Carre, John' but 'Carre, John le'.
+PARTICLES = frozenset(['Le', 'La', 'Von', 'Van', 'Du', 'De'])
+
+# How many strings, and their naturalized versions, to remember:
+CACHE_SIZE = 10000
+
+_number_re = re.compile(r'\d+')
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def naturalize(string, sort_as='thing'):
+    """
+    Returns the naturalized version of `string`: stripped of leading and
+    trailing spaces, lowercase, with integers padded with zeros and either,
+    if `sort_as` is 'person', the surname first, or any leading article
+    moved to the end.
+    """
+    string = string.strip()
+    if sort_as == 'person':
+        # The case of the name is important, so we lowercase afterwards:
+        return naturalize_person(string).lower()
+    else:
+        return naturalize_thing(string.lower())
+
+
+def naturalize_many(strings, sort_as='thing'):
+    "Returns a list of the naturalized versions of `strings`."
+    return [naturalize(string, sort_as) for string in strings]
+
+
+def naturalize_thing(string):
+    """
+    Make a naturalized version of a general string, not a person's name.
+    e.g., title of a book, a band's name, etc.
+
+    string -- a lowercase string.
+    """
+    parts = string.split(' ')
+
+    if len(parts) > 1 and parts[0] in ARTICLES and parts[0] != parts[1]:
+        # Don't do this if the name is 'The The' or 'La La Land'.
+        # Makes 'long blondes, the':
+        string = '{}, {}'.format(' '.join(parts[1:]), parts[0])
+
+    return naturalize_numbers(string)
+
+
+def naturalize_person(string):
+    """
+    Attempt to make a version of the string that has the surname, if any,
+    at the start.
+
+    'John, Brown' to 'Brown, John'
+    'Sir John Brown Jr' to 'Brown, Sir John Jr'
+    'Prince' to 'Prince'
+
+    string -- The string to change.
+    """
+    suffix = ''
+    parts = string.split(' ')
+
+    if parts[-1] in SUFFIXES:
+        # Remove suffixes entirely, as we'll add them back on the end.
+        suffix = parts.pop()
+        string = ' '.join(parts)
+
+    if len(parts) > 1:
+        if parts[-2] in PARTICLES:
+            # From ['Alan', 'Barry', 'Le', 'Carré']
+            # to   ['Alan', 'Barry', 'Le Carré']:
+            parts = parts[:-2] + [' '.join(parts[-2:])]
+
+        # From 'David Foster Wallace' to 'Wallace, David Foster':
+        string = '{}, {}'.format(parts[-1], ' '.join(parts[:-1]))
+
+    if suffix:
+        # Add it back on.
+        string = '{} {}'.format(string, suffix)
+
+    # In case this name has any numbers in it.
+    return naturalize_numbers(string)
+
+
+def naturalize_numbers(string):
+    """
+    Makes any integers into very zero-padded numbers.
+    e.g. '1' becomes '00000001'.
+    """
+    return _number_re.sub(_pad_number, string)
+
+
+def _pad_number(match):
+    return '%08d' % (int(match.group(0)),)
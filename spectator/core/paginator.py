@@ -1,18 +1,180 @@
+import base64
+import binascii
+import collections.abc
+import hashlib
+import json
 import math
 from functools import reduce
+
+from django.core.cache import caches
+from django.core.exceptions import (
+    EmptyResultSet, ImproperlyConfigured, ValidationError)
 from django.core.paginator import \
-    Paginator, QuerySetPaginator, Page, InvalidPage
+    Paginator, QuerySetPaginator, Page, InvalidPage, EmptyPage,\
+    PageNotAnInteger
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+from . import versions
 
 # From https://djangosnippets.org/snippets/773/
 # Lets us do better pagination, so we don't need to show *every* page.
 
 __all__ = (
     'InvalidPage',
+    'CountStrategy',
+    'CachedCount',
+    'EstimatedCount',
+    'NoCount',
     'ExPaginator',
     'DiggPaginator',
     'QuerySetDiggPaginator',
+    'KeysetPaginator',
 )
 
+
+class CountStrategy(object):
+    """
+    Decides how a paginator finds out how many items are in its object_list.
+
+    This default does an exact COUNT every time. Pass an instance of one of
+    these to ExPaginator (or a child) like:
+
+        paginator = DiggPaginator(qs, 50, count_strategy=CachedCount())
+
+    If `count()` returns None the paginator doesn't know the count and has to
+    work without it (see NoCount).
+    """
+
+    # If True, the paginator will try not to need a count at all.
+    count_free = False
+
+    def count(self, object_list):
+        try:
+            return object_list.count()
+        except (AttributeError, TypeError):
+            # A list, or similar.
+            return len(object_list)
+
+
+class CachedCount(CountStrategy):
+    """
+    An exact count, but cached, keyed on the SQL of the QuerySet (ignoring
+    its ordering). So each different filter is counted once per `timeout`.
+
+    If `models` is a list of models registered with spectator.core.versions
+    their versions are part of the key too, so the count is done again as
+    soon as any of their objects change.
+    """
+
+    def __init__(self, timeout=300, cache_alias='default', models=None):
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self.models = models or []
+
+    def count(self, object_list):
+        key = self.get_cache_key(object_list)
+        if key is None:
+            return super().count(object_list)
+
+        cache = caches[self.cache_alias]
+        count = cache.get(key)
+        if count is None:
+            count = super().count(object_list)
+            cache.set(key, count, self.timeout)
+        return count
+
+    def get_cache_key(self, object_list):
+        "The key is based on the query, so on its filters. Or None."
+        try:
+            sql, params = object_list.order_by().query.sql_with_params()
+        except (AttributeError, EmptyResultSet):
+            return None
+        signature = '{}|{}'.format(sql, params)
+        if self.models:
+            signature += '|{}'.format(versions.get_versions(*self.models))
+        signature = signature.encode('utf-8')
+        return 'spectator.count.{}'.format(
+                                        hashlib.md5(signature).hexdigest())
+
+
+class EstimatedCount(CountStrategy):
+    """
+    Uses the database's own estimate of how many rows a query will return,
+    which is much quicker than a COUNT for big tables:
+
+    * PostgreSQL: the query planner's estimate, from EXPLAIN.
+    * SQLite: the row count from the `sqlite_stat1` table, if the database
+      has been ANALYZEd, and only for unfiltered queries.
+
+    If there's no estimate, or it's below `threshold` (where an exact COUNT
+    is cheap, and estimates are least accurate), does an exact count.
+
+    Estimates can be wrong, so use with the `softlimit` option of
+    ExPaginator.page().
+    """
+
+    def __init__(self, threshold=10000):
+        self.threshold = threshold
+
+    def count(self, object_list):
+        try:
+            estimate = self.estimate(object_list)
+        except (AttributeError, DatabaseError, EmptyResultSet):
+            estimate = None
+
+        if estimate is None or estimate < self.threshold:
+            return super().count(object_list)
+        else:
+            return estimate
+
+    def estimate(self, queryset):
+        "Returns the estimated number of rows, or None."
+        connection = connections[queryset.db]
+        query = queryset.order_by().query
+
+        if connection.vendor == 'postgresql':
+            sql, params = query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN (FORMAT JSON) {}'.format(sql), params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+        elif connection.vendor == 'sqlite':
+            if query.where or query.distinct or query.low_mark or query.high_mark:
+                # We only know about whole tables.
+                return None
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = %s",
+                    [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            # The first number in 'stat' is the number of rows:
+            return int(row[0].split(' ')[0])
+
+        return None
+
+
+class NoCount(CountStrategy):
+    """
+    Never counts. Instead the paginator fetches one more row than it needs,
+    to find out if there's a next page.
+
+    The DiggPaginator then can't show the last pages, but does show the
+    pages up to the one after the current page.
+    """
+    count_free = True
+
+    def count(self, object_list):
+        return None
+
+
 class ExPaginator(Paginator):
     """Adds a ``softlimit`` option to ``page()``. If True, querying a
     page number larger than max. will not fail, but instead return the
@@ -35,7 +197,31 @@ class ExPaginator(Paginator):
     >>> paginator.page("str")
     Traceback (most recent call last):
     InvalidPage: That page number is not an integer
+
+    Also adds a ``count_strategy`` option, a CountStrategy instance which
+    decides how (and whether) the items are counted.
     """
+    def __init__(self, *args, **kwargs):
+        self.count_strategy = kwargs.pop('count_strategy', None)
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        strategy = self.count_strategy or CountStrategy()
+        count = strategy.count(self.object_list)
+        if count is None:
+            # The strategy doesn't count, but we need to now, e.g. to find
+            # the last page.
+            count = CountStrategy().count(self.object_list)
+        return count
+
+    @property
+    def count_free(self):
+        "Are we avoiding counting the items?"
+        return self.count_strategy is not None \
+                and self.count_strategy.count_free \
+                and 'count' not in self.__dict__
+
     def _ensure_int(self, num, e):
         # see Django #7307
         try:
@@ -44,6 +230,8 @@ class ExPaginator(Paginator):
             raise e
 
     def page(self, number, softlimit=False):
+        if self.count_free:
+            return self._page_without_count(number, softlimit)
         try:
             return super().page(number)
         except InvalidPage as e:
@@ -53,6 +241,36 @@ class ExPaginator(Paginator):
             else:
                 raise e
 
+    def _page_without_count(self, number, softlimit=False):
+        """
+        Fetch one more row than we need. Then we know the count is at least
+        the number of rows up to and including that one, which is enough to
+        know whether there's a next page.
+        """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+
+        if len(rows) == 0 and (number > 1 or not self.allow_empty_first_page):
+            if softlimit and number > 1:
+                # Give in and count, so we can return the last page:
+                self.__dict__['count'] = CountStrategy().count(
+                                                            self.object_list)
+                return self.page(self.num_pages, softlimit=False)
+            raise EmptyPage('That page contains no results')
+
+        # The lower bound of the count:
+        self.__dict__['count'] = bottom + len(rows)
+        self.__dict__.pop('num_pages', None)
+
+        return self._get_page(rows[:self.per_page], number, self)
+
 class DiggPaginator(ExPaginator):
     """
     Based on Django's default paginator, it adds "Digg-style" page ranges
@@ -191,6 +409,9 @@ class DiggPaginator(ExPaginator):
         if self.padding > max_padding:
             raise ValueError('padding too large for body (max %d)'%max_padding)
         super().__init__(*args, **kwargs)
+        if self.count_free:
+            # We won't know where the end is.
+            self.align_left = True
 
     def page(self, number, *args, **kwargs):
         """Return a standard ``Page`` instance with custom, digg-specific
@@ -278,6 +499,293 @@ class DiggPage(Page):
 class QuerySetDiggPaginator(DiggPaginator, QuerySetPaginator):
     pass
 
+
+class KeysetPaginator(object):
+    """
+    Paginates a QuerySet by "seeking" on its ordering, rather than by using
+    an OFFSET. e.g. the page after the one that ended with an Event on
+    2017-02-10 with pk 35 is:
+
+        WHERE (date < '2017-02-10') OR (date = '2017-02-10' AND id > 35)
+        ORDER BY date DESC, id ASC LIMIT 51
+
+    So fetching a page takes the same time however deep into the list it is,
+    and we never need to COUNT the whole list.
+
+    The QuerySet's ordering (or its model's default ordering) is used, with
+    `pk` appended if it's not already there, so that every row has a unique
+    position. The ordering should only use plain fields, which can span
+    relationships, e.g. `('-date',)` or `('series__title_sort',)`. NULLs,
+    like Events without dates or Publications without series, are ordered
+    as if smaller than any other value, whatever the database's default.
+
+    Pages are requested with opaque cursor tokens (see `KeysetPage`), or:
+
+        * `None` or `1` for the first page.
+        * `'last'` for the last page.
+        * Any other integer, which falls back to an OFFSET, so that old links
+          like `?p=3` still work.
+
+    >>> paginator = KeysetPaginator(Event.objects.order_by('-date'), 50)
+    >>> page = paginator.page()
+    >>> page = paginator.page(page.next_cursor)
+    """
+
+    def __init__(self, object_list, per_page):
+        self.per_page = int(per_page)
+        self.ordering = self._get_ordering(object_list)
+        # The names of the fields in the ordering that can be NULL:
+        self.nullable = {f for f, desc in self.ordering
+                                if self._is_nullable(f, object_list.model)}
+        self.object_list = object_list.order_by(
+                                    *[self._order_by(f, desc)
+                                            for f, desc in self.ordering])
+        # Not using reverse(), which changes the ordering's expressions:
+        self.reversed_list = object_list.order_by(
+                                    *[self._order_by(f, not desc)
+                                            for f, desc in self.ordering])
+
+    def page(self, value=None):
+        "Returns a KeysetPage for `value`, a cursor, page number or 'last'."
+        if value is None or str(value) == '1':
+            return self._first_page()
+        elif value == 'last':
+            return self._last_page()
+
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return self._cursor_page(value)
+        else:
+            return self._numbered_page(number)
+
+    def _first_page(self):
+        rows = list(self.object_list[:self.per_page+1])
+        return KeysetPage(rows[:self.per_page], self,
+                            has_next=(len(rows) > self.per_page),
+                            has_previous=False,
+                            number=1)
+
+    def _last_page(self):
+        rows = list(self.reversed_list[:self.per_page+1])
+        has_previous = (len(rows) > self.per_page)
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, self, has_next=False,
+                                        has_previous=has_previous)
+
+    def _numbered_page(self, number):
+        if number < 1:
+            raise InvalidPage('That page number is less than 1')
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom+self.per_page+1])
+        if len(rows) == 0:
+            raise InvalidPage('That page contains no results')
+        return KeysetPage(rows[:self.per_page], self,
+                            has_next=(len(rows) > self.per_page),
+                            has_previous=True,
+                            number=number)
+
+    def _cursor_page(self, cursor):
+        direction, values = self.decode_cursor(cursor)
+        reverse = (direction == 'p')
+
+        qs = self.reversed_list if reverse else self.object_list
+        qs = qs.filter(self._seek_filter(values, reverse))
+        rows = list(qs[:self.per_page+1])
+        has_more = (len(rows) > self.per_page)
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            if not has_more and len(rows) < self.per_page:
+                # We've gone back past the start; just show the first page.
+                return self._first_page()
+            return KeysetPage(rows, self, has_next=True,
+                                            has_previous=has_more)
+        else:
+            return KeysetPage(rows, self, has_next=has_more,
+                                            has_previous=True)
+
+    def _seek_filter(self, values, reverse=False):
+        """
+        A Q object selecting all the rows after (or before, if `reverse`) the
+        row whose ordering values are `values`.
+        """
+        q = Q()
+        for i, (field, desc) in enumerate(self.ordering):
+            clause = self._beyond(field, values[i], smaller=(desc != reverse))
+            if clause is None:
+                # Nothing is smaller than NULL.
+                continue
+            for j, (prev_field, prev_desc) in enumerate(self.ordering[:i]):
+                if values[j] is None:
+                    clause &= Q(**{'{}__isnull'.format(prev_field): True})
+                else:
+                    clause &= Q(**{prev_field: values[j]})
+            q |= clause
+        return q
+
+    def _beyond(self, field, value, smaller):
+        """
+        A Q object selecting rows whose `field` is smaller (or larger) than
+        `value`, with NULLs smaller than anything. Or None if there can't be
+        any.
+        """
+        if value is None:
+            if smaller:
+                return None
+            return Q(**{'{}__isnull'.format(field): False})
+        clause = Q(**{'{}__{}'.format(field, 'lt' if smaller else 'gt'): value})
+        if smaller and field in self.nullable:
+            clause |= Q(**{'{}__isnull'.format(field): True})
+        return clause
+
+    def encode_cursor(self, obj, direction):
+        """
+        Make an opaque token for the row `obj`.
+        `direction` is 'n' (rows after obj) or 'p' (rows before obj).
+        """
+        values = [self._get_value(obj, f) for f, desc in self.ordering]
+        data = json.dumps([direction, values], cls=DjangoJSONEncoder,
+                                                        separators=(',',':'))
+        return base64.urlsafe_b64encode(
+                                    data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        "Returns a tuple of (direction, values) from an encoded cursor token."
+        try:
+            data = base64.urlsafe_b64decode(str(cursor).encode('ascii'))
+            direction, values = json.loads(data.decode('utf-8'))
+        except (binascii.Error, UnicodeError, ValueError, TypeError):
+            raise InvalidPage('That page cursor is not valid')
+
+        if direction not in ('n', 'p') or len(values) != len(self.ordering):
+            raise InvalidPage('That page cursor is not valid')
+
+        try:
+            return direction, [self._get_field(f).to_python(v)
+                            for (f, desc), v in zip(self.ordering, values)]
+        except ValidationError:
+            raise InvalidPage('That page cursor is not valid')
+
+    def _get_ordering(self, queryset):
+        """
+        Returns a list of (field_name, is_descending) tuples, based on the
+        queryset's ordering, always ending with the pk.
+        """
+        if queryset.query.order_by:
+            ordering = queryset.query.order_by
+        elif queryset.query.default_ordering:
+            ordering = queryset.model._meta.ordering
+        else:
+            ordering = []
+
+        fields = []
+        for field in ordering:
+            if not isinstance(field, str) or field == '?':
+                raise ImproperlyConfigured(
+                    "KeysetPaginator can only order by field names, not %r"
+                                                                    % field)
+            if field.startswith('-'):
+                fields.append((field[1:], True))
+            else:
+                fields.append((field, False))
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(f in ('pk', pk_name) for f, desc in fields):
+            fields.append(('pk', False))
+
+        # Check they're all real fields:
+        for f, desc in fields:
+            self._get_field(f, queryset.model)
+
+        return fields
+
+    def _get_field(self, name, model=None):
+        "Get the model Field for a name like 'date' or 'series__title_sort'."
+        if model is None:
+            model = self.object_list.model
+        parts = name.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        if parts[-1] == 'pk':
+            return model._meta.pk
+        return model._meta.get_field(parts[-1])
+
+    def _is_nullable(self, name, model):
+        "Whether a name like 'series__title_sort' can be NULL."
+        for part in name.split('__'):
+            field = model._meta.pk if part == 'pk' else \
+                                                model._meta.get_field(part)
+            if field.null:
+                return True
+            model = field.related_model
+        return False
+
+    def _get_value(self, obj, name):
+        for part in name.split('__'):
+            if obj is None:
+                break
+            obj = getattr(obj, part)
+        return obj
+
+    def _order_by(self, field, desc):
+        if field in self.nullable:
+            # NULLs are the smallest values:
+            if desc:
+                return F(field).desc(nulls_last=True)
+            return F(field).asc(nulls_first=True)
+        return '-{}'.format(field) if desc else field
+
+
+class KeysetPage(collections.abc.Sequence):
+    """
+    A page of results from a KeysetPaginator.
+
+    Unlike a standard Page it has no idea how many pages there are, or which
+    number this page is. Instead it has `next_cursor` and `previous_cursor`
+    tokens for fetching the neighbouring pages.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                                                                number=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<KeysetPage of {} items>'.format(len(self))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and len(self.object_list) > 0
+
+    def has_previous(self):
+        return self._has_previous and len(self.object_list) > 0
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.encode_cursor(self.object_list[-1], 'n')
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.encode_cursor(self.object_list[0], 'p')
+
+
 #if __name__ == "__main__":
     #import doctest
     #doctest.testmod()
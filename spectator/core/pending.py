@@ -0,0 +1,77 @@
+"""
+Doing something once when the current transaction is committed, however
+many changes in it ask for it. e.g. purging surrogate keys, updating
+search documents or recalculating Events' titles.
+
+Subclass Pending, to collect what needs doing and do it when called:
+
+    class _PendingKeys(pending.Pending):
+
+        def __init__(self, using):
+            super().__init__(using)
+            self.keys = set()
+
+        def __call__(self):
+            keys = self.keys
+            self.keys = set()
+            get_backend().purge(sorted(keys))
+
+    def purge(keys, using=None):
+        pending = _PendingKeys.get(using)
+        pending.keys.update(keys)
+        pending.schedule()
+
+There's one of each subclass per thread and database connection. If we're
+not in a transaction it's called as soon as it's scheduled. If the
+transaction is rolled back it isn't called, but whatever was collected
+stays, and is done after the next commit.
+"""
+import abc
+import threading
+import weakref
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+_local = threading.local()
+
+
+class Pending(metaclass=abc.ABCMeta):
+    "Something to do when a connection's transaction commits."
+
+    def __init__(self, using):
+        self.using = using
+        # A weak reference to the function passed to on_commit(), if any:
+        self._scheduled = None
+
+    @classmethod
+    def get(cls, using=None):
+        "This thread's instance for the connection `using`."
+        using = using or DEFAULT_DB_ALIAS
+        if not hasattr(_local, 'pending'):
+            _local.pending = {}
+        if (cls, using) not in _local.pending:
+            _local.pending[(cls, using)] = cls(using)
+        return _local.pending[(cls, using)]
+
+    @property
+    def scheduled(self):
+        """
+        Whether we'll be called when the transaction commits. If the
+        transaction, or the savepoint we were scheduled in, is rolled back,
+        Django drops the function it was given, so our reference to it dies.
+        """
+        return self._scheduled is not None and self._scheduled() is not None
+
+    def schedule(self):
+        "Call this when the transaction commits, if it isn't already."
+        if not self.scheduled:
+            def run():
+                self._scheduled = None
+                self()
+            self._scheduled = weakref.ref(run)
+            transaction.on_commit(run, using=self.using)
+
+    @abc.abstractmethod
+    def __call__(self):
+        "Do whatever's been collected, and forget it."
@@ -0,0 +1,16 @@
+from . import autocomplete, counters, credits, exporting, surrogates,\
+        versions
+from .models import Creator
+
+
+counters.register(Creator)
+
+autocomplete.register(Creator, 'name')
+
+versions.register(Creator)
+
+surrogates.register(Creator)
+
+exporting.register(Creator)
+
+credits.connect_signals()
@@ -0,0 +1,195 @@
+"""
+Recalculating the values of NaturalSortFields, which are only set when an
+object is saved. Use after QuerySet.update() or bulk_create(), which don't
+call the field's pre_save(), or after changing how values are naturalized,
+which leaves existing values stale.
+
+Objects are read in order of pk, a batch at a time, and only those whose
+values have changed are written.
+"""
+import collections
+import multiprocessing
+
+import django
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from . import surrogates, versions
+from .fields import NaturalSortField
+
+
+# How many objects to read, and write, at a time:
+BATCH_SIZE = 500
+
+# The result of checking, or rebuilding, a model's sort fields.
+# checked -- the number of objects checked.
+# stale -- a dict mapping each field's name to a list of the pks of objects
+#     whose values were (or, if verifying, are) wrong.
+Result = collections.namedtuple('Result', ['checked', 'stale'])
+
+
+def get_sort_fields(model):
+    "A list of the model's NaturalSortFields."
+    return [f for f in model._meta.concrete_fields
+                                    if isinstance(f, NaturalSortField)]
+
+
+def get_models():
+    "A list of all installed models with NaturalSortFields."
+    return [m for m in apps.get_models() if get_sort_fields(m)]
+
+
+def rebuild(model, batch_size=BATCH_SIZE, verify=False, pk_range=None):
+    """
+    Recalculate the values of all of `model`'s NaturalSortFields, and save
+    those that have changed. Returns a Result.
+
+    verify -- If True, don't save anything, only find the stale values.
+    pk_range -- Optional (first, last) tuple to only rebuild objects with
+        pks between these, inclusive.
+    """
+    result = _rebuild(model, batch_size, verify, pk_range)
+    if not verify:
+        _bump(model, result)
+    return result
+
+
+def rebuild_in_parallel(model, workers, batch_size=BATCH_SIZE, verify=False):
+    """
+    Like rebuild() but splits the objects' pks into `workers` ranges, each
+    rebuilt by its own process. Returns the combined Result.
+    """
+    ranges = get_pk_ranges(model, workers)
+    if len(ranges) < 2:
+        return rebuild(model, batch_size=batch_size, verify=verify,
+                       pk_range=ranges[0] if ranges else None)
+
+    # The processes can't share our database connections, so each makes its
+    # own:
+    connections.close_all()
+    with multiprocessing.Pool(len(ranges), initializer=_init_worker) as pool:
+        results = pool.starmap(_rebuild_range,
+                    [(model._meta.label, pk_range, batch_size, verify)
+                                                    for pk_range in ranges])
+
+    stale = {f.name: [] for f in get_sort_fields(model)}
+    for result in results:
+        for name, pks in result.stale.items():
+            stale[name] += pks
+
+    result = Result(sum(r.checked for r in results), stale)
+    if not verify:
+        _bump(model, result)
+    return result
+
+
+def get_pk_ranges(model, number):
+    """
+    Splits the range of `model`'s pks into up to `number` (first, last)
+    tuples of about equal size. Returns an empty list if there are no
+    objects.
+    """
+    bounds = model._default_manager.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return []
+    first, last = bounds['first'], bounds['last']
+    size = max((last - first + 1) // number, 1)
+
+    ranges = []
+    start = first
+    while start <= last:
+        end = start + size - 1
+        if len(ranges) == number - 1 or end > last:
+            end = last
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def _rebuild(model, batch_size, verify, pk_range):
+    fields = get_sort_fields(model)
+    stale = {f.name: [] for f in fields}
+    checked = 0
+
+    qs = model._default_manager.order_by('pk')
+    if pk_range is not None:
+        qs = qs.filter(pk__gte=pk_range[0], pk__lte=pk_range[1])
+
+    last_pk = None
+    while True:
+        batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+        objects = list(batch_qs[:batch_size])
+        if not objects:
+            break
+
+        changes = {}
+        for field in fields:
+            values = {}
+            for obj in objects:
+                value = field.make_sort_value(obj)
+                if value != getattr(obj, field.attname):
+                    values[obj.pk] = value
+            if values:
+                changes[field.attname] = values
+                stale[field.name] += list(values.keys())
+
+        if changes and not verify:
+            _update(model, changes)
+
+        checked += len(objects)
+        if len(objects) < batch_size:
+            break
+        last_pk = objects[-1].pk
+
+    return Result(checked, stale)
+
+
+def _bump(model, result):
+    """
+    If any values changed, lists of the objects may be in a new order, so
+    change the model's version and purge its lists' surrogate key.
+    """
+    if any(result.stale.values()):
+        if model in versions.registered_models():
+            versions.bump(model)
+        surrogates.purge({surrogates.list_key(model)})
+
+
+def _update(model, changes):
+    """
+    Save new values with one parameterized UPDATE for each field, executed
+    for every changed row. This is much quicker than QuerySet.update() with
+    a CASE for each pk, whose expressions take far longer to build than the
+    query takes to run.
+
+    changes -- A dict mapping field attnames to dicts of {pk: value}.
+    """
+    using = model._default_manager.db
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for attname, values in changes.items():
+            cursor.executemany('UPDATE {} SET {} = %s WHERE {} = %s'.format(
+                                    qn(model._meta.db_table), qn(attname),
+                                    qn(model._meta.pk.column)),
+                               [(value, pk) for pk, value in values.items()])
+
+
+def _init_worker():
+    """
+    Run when each process of rebuild_in_parallel() starts. Processes that
+    are spawned, rather than forked, start without Django set up, and forked
+    ones mustn't use any connections they've inherited.
+    """
+    django.setup()
+    connections.close_all()
+
+
+def _rebuild_range(label, pk_range, batch_size, verify):
+    "Run by each process of rebuild_in_parallel()."
+    try:
+        # Not rebuild(), as rebuild_in_parallel() bumps the version once:
+        return _rebuild(apps.get_model(label), batch_size, verify, pk_range)
+    finally:
+        connections.close_all()
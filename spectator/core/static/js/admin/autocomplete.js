@@ -0,0 +1,143 @@
+/**
+ * For the admin's autocomplete widgets and list filters, which replace
+ * <select>s listing every object.
+ *
+ * Expects HTML like:
+ *
+ *  <span class="spectator-autocomplete" data-autocomplete-url="/url/">
+ *      <input type="text" class="spectator-autocomplete-input">
+ *      <ul class="spectator-autocomplete-results"></ul>
+ *      <select>...only the selected options...</select>
+ *  </span>
+ *
+ * Typing in the input fetches the first page of objects whose names start
+ * with what's typed, from JSON like:
+ *
+ *  {"results": [{"id": 3, "name": "The Long Blondes"}], "more": true}
+ *
+ * Choosing one selects it in the <select>, adding its <option> if needed.
+ *
+ * Or, for a list filter, instead of a <select> the container has
+ * data-filter-url, the changelist's URL without this filter, and
+ * data-filter-parameter, the filter's GET parameter. Choosing an object
+ * goes to the changelist filtered by it.
+ *
+ * Events are handled on the document so that the widgets in inline rows
+ * added after the page loads work too.
+ */
+(function() {
+    // Milliseconds to wait after typing stops before fetching results:
+    var DELAY = 250;
+
+    var timer = null;
+
+    function fetchResults(container, query, page) {
+        var results = container.querySelector('.spectator-autocomplete-results');
+        var url = container.getAttribute('data-autocomplete-url') +
+                    '?q=' + encodeURIComponent(query) + '&page=' + page;
+
+        var xhr = new XMLHttpRequest();
+        xhr.open('GET', url);
+        xhr.setRequestHeader('X-Requested-With', 'XMLHttpRequest');
+        xhr.onload = function() {
+            if (xhr.status !== 200) {
+                return;
+            }
+            var data = JSON.parse(xhr.responseText);
+            if (page === 1) {
+                results.innerHTML = '';
+            } else {
+                var more = results.querySelector('.spectator-autocomplete-more');
+                if (more !== null) {
+                    more.parentNode.removeChild(more);
+                }
+            }
+            data.results.forEach(function(result) {
+                var link = document.createElement('a');
+                link.href = '#';
+                link.textContent = result.name;
+                link.setAttribute('data-id', result.id);
+                var item = document.createElement('li');
+                item.appendChild(link);
+                results.appendChild(item);
+            });
+            if (data.more) {
+                var link = document.createElement('a');
+                link.href = '#';
+                link.textContent = 'More…';
+                link.setAttribute('data-page', page + 1);
+                var item = document.createElement('li');
+                item.className = 'spectator-autocomplete-more';
+                item.appendChild(link);
+                results.appendChild(item);
+            }
+        };
+        xhr.send();
+    }
+
+    function choose(container, id, name) {
+        if (container.hasAttribute('data-filter-url')) {
+            var url = container.getAttribute('data-filter-url');
+            window.location = url + (url.slice(-1) === '?' ? '' : '&') +
+                                container.getAttribute('data-filter-parameter') +
+                                '=' + encodeURIComponent(id);
+            return;
+        }
+
+        var select = container.querySelector('select');
+        var option = select.querySelector('option[value="' + id + '"]');
+        if (option === null) {
+            option = new Option(name, id);
+            select.appendChild(option);
+        }
+        if (select.multiple) {
+            option.selected = true;
+        } else {
+            select.value = id;
+        }
+        select.dispatchEvent(new Event('change', {bubbles: true}));
+
+        container.querySelector('.spectator-autocomplete-input').value = '';
+        container.querySelector('.spectator-autocomplete-results').innerHTML = '';
+    }
+
+    document.addEventListener('input', function(ev) {
+        if (!ev.target.classList.contains('spectator-autocomplete-input')) {
+            return;
+        }
+        var input = ev.target;
+        var container = input.closest('.spectator-autocomplete');
+        window.clearTimeout(timer);
+        timer = window.setTimeout(function() {
+            if (input.value.trim() === '') {
+                container.querySelector('.spectator-autocomplete-results').innerHTML = '';
+            } else {
+                fetchResults(container, input.value, 1);
+            }
+        }, DELAY);
+    });
+
+    document.addEventListener('keydown', function(ev) {
+        if (ev.target.classList.contains('spectator-autocomplete-input') &&
+                                                        ev.key === 'Enter') {
+            // Don't submit the form.
+            ev.preventDefault();
+        }
+    });
+
+    document.addEventListener('click', function(ev) {
+        var link = ev.target.closest('.spectator-autocomplete-results a');
+        if (link === null) {
+            return;
+        }
+        ev.preventDefault();
+        var container = link.closest('.spectator-autocomplete');
+        if (link.hasAttribute('data-page')) {
+            fetchResults(container,
+                container.querySelector('.spectator-autocomplete-input').value,
+                parseInt(link.getAttribute('data-page'), 10));
+        } else {
+            choose(container, link.getAttribute('data-id'), link.textContent);
+        }
+    });
+})();
@@ -0,0 +1,60 @@
+/**
+ * For sections of a detail page that only show their first few items, like
+ * the Events on a Creator's page.
+ *
+ * Expects HTML like:
+ *
+ *  <div class="js-section">
+ *      <div class="js-section-content">...first few items...</div>
+ *      <a class="js-section-more" href="/url/of/section/">See all</a>
+ *  </div>
+ *
+ * When the link is clicked, replaces the content with the first page of the
+ * section, and any of that page's pagination links load further pages in
+ * the same way. Without JavaScript the links go to the section's own pages.
+ */
+(function() {
+    function loadSection(content, url) {
+        var xhr = new XMLHttpRequest();
+        xhr.open('GET', url);
+        xhr.setRequestHeader('X-Requested-With', 'XMLHttpRequest');
+        xhr.onload = function() {
+            if (xhr.status === 200) {
+                content.innerHTML = xhr.responseText;
+                content.setAttribute('data-url', url);
+            } else {
+                window.location = url;
+            }
+        };
+        xhr.onerror = function() {
+            window.location = url;
+        };
+        xhr.send();
+    }
+
+    document.addEventListener('click', function(ev) {
+        var link = ev.target.closest('a');
+        if (link === null) {
+            return;
+        }
+        var section = link.closest('.js-section');
+        if (section === null) {
+            return;
+        }
+        var content = section.querySelector('.js-section-content');
+
+        if (link.classList.contains('js-section-more')) {
+            ev.preventDefault();
+            loadSection(content, link.href);
+            link.parentNode.removeChild(link);
+
+        } else if (content.hasAttribute('data-url') &&
+                    link.classList.contains('page-link')) {
+            // Pagination links are relative to the section's URL, not ours.
+            ev.preventDefault();
+            loadSection(content, new URL(link.getAttribute('href'),
+                    new URL(content.getAttribute('data-url'),
+                            window.location.href)).href);
+        }
+    });
+})();
@@ -0,0 +1,238 @@
+"""
+Surrogate keys, for caching pages in a CDN or caching proxy and purging
+exactly the ones affected when something changes.
+
+Each response from the public views has a header, 'Surrogate-Key' or the
+SPECTATOR_SURROGATE_KEY_HEADER setting, listing keys for everything on the
+page, like:
+
+    event-123 venue-7 creator-42 event-list event-year-2017
+
+When any registered model's object is saved or deleted, the keys of it,
+its model's lists, the objects it has ForeignKeys to (whose pages list it),
+before and after the change, and its year, are passed to the purge backend
+when the transaction is committed. Set SPECTATOR_PURGE_BACKEND to the dotted path of a
+BasePurgeBackend subclass that tells your CDN to purge them. e.g.
+
+    SPECTATOR_PURGE_BACKEND = 'spectator.core.surrogates.LocalPurgeBackend'
+"""
+import abc
+import collections.abc
+
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_init,\
+        post_save
+from django.utils.module_loading import import_string
+
+from . import pending, years
+
+
+# The purge backend instance, and the setting it was made from:
+_backend = None
+_backend_path = None
+
+
+class BasePurgeBackend(metaclass=abc.ABCMeta):
+    "Subclasses should override purge()."
+
+    @abc.abstractmethod
+    def purge(self, keys):
+        """
+        Tell the cache to forget all responses with any of `keys`, a sorted
+        list of strings.
+        """
+
+
+class LocalPurgeBackend(BasePurgeBackend):
+    """
+    Doesn't purge anything, but remembers the keys it was asked to, in
+    `purged`, a list of lists. For tests and development.
+    """
+    def __init__(self):
+        self.purged = []
+
+    def purge(self, keys):
+        self.purged.append(keys)
+
+
+def get_backend():
+    """
+    Returns an instance of the SPECTATOR_PURGE_BACKEND class, the same one
+    each time, or None if the setting is empty.
+    """
+    global _backend, _backend_path
+    path = getattr(settings, 'SPECTATOR_PURGE_BACKEND', None)
+    if not path:
+        return None
+    if path != _backend_path:
+        _backend = import_string(path)()
+        _backend_path = path
+    return _backend
+
+
+def get_header_name():
+    return getattr(settings, 'SPECTATOR_SURROGATE_KEY_HEADER', 'Surrogate-Key')
+
+
+def object_key(model, pk):
+    "e.g. 'event-123'."
+    return '{}-{}'.format(model._meta.model_name, pk)
+
+
+def list_key(model):
+    "For lists of the model's objects. e.g. 'event-list'."
+    return '{}-list'.format(model._meta.model_name)
+
+
+def year_key(model, year=None):
+    """
+    For the archive of a year of the model's objects. e.g. 'event-year-2017'.
+    Or, if `year` is None, for all years. e.g. 'event-years'.
+    """
+    if year is None:
+        return '{}-years'.format(model._meta.model_name)
+    return '{}-year-{}'.format(model._meta.model_name, year)
+
+
+def get_keys(value, depth=3):
+    """
+    Returns a set of the keys for all the model instances in `value`: an
+    instance, or a list, dict, Page or evaluated QuerySet of them, nested.
+    Includes related objects that have already been fetched, by
+    select_related() or prefetch_related(), for instances, but doesn't
+    do any queries.
+    """
+    keys = set()
+    if depth < 0:
+        return keys
+
+    if isinstance(value, models.Model):
+        keys.add(object_key(type(value), value.pk))
+        for field in value._meta.concrete_fields:
+            if field.is_relation and hasattr(value, field.get_cache_name()):
+                keys |= get_keys(getattr(value, field.get_cache_name()),
+                                                                    depth - 1)
+        prefetched = getattr(value, '_prefetched_objects_cache', {})
+        for objects in prefetched.values():
+            keys |= get_keys(objects, depth - 1)
+
+    elif isinstance(value, models.QuerySet):
+        # Only if it's been fetched already:
+        if value._result_cache is not None:
+            keys |= get_keys(value._result_cache, depth)
+
+    elif isinstance(value, dict):
+        keys |= get_keys(list(value.values()), depth)
+
+    elif isinstance(value, collections.abc.Sequence) \
+                                        and hasattr(value, 'object_list'):
+        # A Page, whose object_list might be an unfetched QuerySet.
+        keys |= get_keys(value.object_list, depth)
+
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            keys |= get_keys(item, depth)
+
+    return keys
+
+
+def register(*models):
+    """
+    Purge the keys affected by changes to each of `models`' objects, when
+    they're saved or deleted, or their many-to-many fields are changed.
+    """
+    years.years_changed.connect(_years_changed,
+                                dispatch_uid='spectator.surrogates.years')
+    for model in models:
+        uid = 'spectator.surrogates.{}'.format(model._meta.label_lower)
+        post_init.connect(_remember_keys, sender=model, dispatch_uid=uid)
+        post_save.connect(_object_changed, sender=model, dispatch_uid=uid)
+        post_delete.connect(_object_changed, sender=model, dispatch_uid=uid)
+
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+            if through._meta.auto_created:
+                m2m_changed.connect(_m2m_changed, sender=through,
+                        dispatch_uid='spectator.surrogates.{}'.format(
+                                                through._meta.label_lower))
+
+
+def purge(keys, using=None):
+    """
+    Pass `keys` to the purge backend once the current transaction is
+    committed (or now, if we're not in a transaction). Keys from several
+    changes in one transaction are purged together.
+    """
+    if not keys or get_backend() is None:
+        return
+
+    pending_keys = _PendingKeys.get(using)
+    pending_keys.keys.update(keys)
+    pending_keys.schedule()
+
+
+def _get_instance_keys(instance):
+    """
+    The keys of the objects this one has ForeignKeys to, using the ids in
+    its __dict__ so as not to fetch anything.
+    """
+    keys = set()
+    for field in type(instance)._meta.concrete_fields:
+        if field.many_to_one:
+            pk = instance.__dict__.get(field.attname)
+            if pk is not None:
+                keys.add(object_key(field.related_model, pk))
+    return keys
+
+
+def _remember_keys(sender, instance, **kwargs):
+    instance._spectator_surrogate_keys = _get_instance_keys(instance)
+
+
+def _object_changed(sender, instance, using, **kwargs):
+    keys = {object_key(sender, instance.pk), list_key(sender)}
+    keys |= _get_instance_keys(instance)
+    # Where it was before it changed:
+    keys |= getattr(instance, '_spectator_surrogate_keys', set())
+    purge(keys, using=using)
+    instance._spectator_surrogate_keys = _get_instance_keys(instance)
+
+
+def _years_changed(sender, years, **kwargs):
+    """
+    spectator.core.years tells us which years of a model's objects have
+    changed, including the years objects have moved from.
+    """
+    if years is None:
+        purge({year_key(sender)})
+    else:
+        purge({year_key(sender, year) for year in years})
+
+
+def _m2m_changed(sender, instance, action, model, pk_set, using, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        keys = {object_key(type(instance), instance.pk)}
+        if pk_set is None:
+            keys.add(list_key(model))
+        else:
+            keys |= {object_key(model, pk) for pk in pk_set}
+        purge(keys, using=using)
+
+
+class _PendingKeys(pending.Pending):
+    """
+    The keys to purge when a connection's transaction commits.
+    Call it to do the purge.
+    """
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.keys = set()
+
+    def __call__(self):
+        keys = self.keys
+        self.keys = set()
+        backend = get_backend()
+        if keys and backend is not None:
+            backend.purge(sorted(keys))
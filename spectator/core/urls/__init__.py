@@ -1,3 +1,4 @@
+from django.apps import apps
 from django.conf.urls import include, url
 
 from ..apps import spectator_apps
@@ -26,3 +27,8 @@ if spectator_apps.is_enabled('reading'):
     urlpatterns.append(
         url(r'^reading/', include('spectator.reading.urls', namespace='reading')),
     )
+
+if apps.is_installed('spectator.search'):
+    urlpatterns.append(
+        url(r'^search/', include('spectator.search.urls', namespace='search')),
+    )
@@ -12,5 +12,10 @@ urlpatterns = [
         view=views.HomeView.as_view(),
         name='home'
     ),
+    url(
+        regex=r"^export/$",
+        view=views.ExportView.as_view(),
+        name='export'
+    ),
 ]
 
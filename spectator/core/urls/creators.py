@@ -1,6 +1,7 @@
 from django.conf.urls import url
 
 from .. import views
+from ..models import Creator
 
 # All Creator-specific URLs, so they can be included under whatever path is
 # required.
@@ -20,10 +21,21 @@ urlpatterns = [
         name='creator_list_group',
         kwargs={'kind': 'group',}
     ),
+    url(
+        regex=r"^autocomplete/$",
+        view=views.AutocompleteView.as_view(model=Creator),
+        name='creator_autocomplete'
+    ),
     url(
         regex=r"^(?P<pk>\d+)/$",
         view=views.CreatorDetailView.as_view(),
         name='creator_detail'
     ),
+    # e.g. 'events' or 'movies':
+    url(
+        regex=r"^(?P<pk>\d+)/(?P<section>[a-z]+)/$",
+        view=views.CreatorWorksView.as_view(),
+        name='creator_works'
+    ),
 ]
 
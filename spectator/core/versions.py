@@ -0,0 +1,268 @@
+"""
+Version numbers for models, and their objects, for use in the keys of other
+cached things, like rendered template fragments, and in ETags.
+
+A model's version increases whenever one of its objects is saved, deleted,
+or has its many-to-many relations changed, making everything cached with
+the old version stale, without having to know what those things were.
+
+Versions are read from, and increased in, the cache, so checking or
+changing them doesn't touch the database. Model versions are also stored in
+ModelVersion, which is only used when they're not in the cache: then a new
+version is saved that's bigger than any they might have had there. An
+object's version is the version its model had when the object was last
+changed; if that's not in the cache, the model's current version is used
+instead.
+
+Versions are changed when the transaction they're changed in is
+committed, once each, however many objects changed, so that nothing is
+cached with, or as, a version that's rolled back.
+
+The `version_changed` signal is sent after a model's version changes, with
+`pks`, the pks of the objects that changed, or None if unknown.
+"""
+import collections
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal
+from django.utils.safestring import mark_safe
+
+from . import pending
+from .models import ModelVersion
+
+
+version_changed = Signal(providing_args=['version', 'pks'])
+
+# The registered models:
+_registry = []
+
+
+def register(*models):
+    """
+    Change the version of each of `models`, and of the object, whenever one
+    of its objects is saved or deleted, or its many-to-many fields are
+    changed (when the relation has no custom `through` model; the roles
+    models should be registered themselves).
+
+    Note that QuerySet.update(), QuerySet.delete() and bulk_create() don't
+    send signals, so after using those, use bump().
+    """
+    for model in models:
+        if model not in _registry:
+            _registry.append(model)
+        uid = 'spectator.versions.{}'.format(model._meta.label_lower)
+        post_save.connect(_object_changed, sender=model, dispatch_uid=uid)
+        post_delete.connect(_object_changed, sender=model, dispatch_uid=uid)
+
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+            if through._meta.auto_created:
+                m2m_changed.connect(_m2m_changed, sender=through,
+                        dispatch_uid='spectator.versions.{}'.format(
+                                                through._meta.label_lower))
+
+
+def registered_models():
+    "A list of the models with versions, in order of their labels."
+    return sorted(_registry, key=lambda model: model._meta.label_lower)
+
+
+def get_versions(*models):
+    """
+    Returns a string combining the current versions of all of `models`,
+    fetched from the cache in one go, e.g. '38.1203'.
+    """
+    labels = [model._meta.label_lower for model in models]
+    versions = _get_model_versions(labels)
+    return '.'.join(str(versions[label]) for label in labels)
+
+
+def get_object_version(model, pk):
+    """
+    Returns the version (an int) of the object of `model` with `pk`, which
+    changes whenever that object is changed.
+    """
+    label = model._meta.label_lower
+    object_key = _version_key(label, pk)
+    versions = cache.get_many([object_key, _version_key(label)])
+    if object_key in versions:
+        return versions[object_key]
+    return _get_model_versions([label])[label]
+
+
+def bump(model, pks=None, using=None):
+    """
+    Increase the version of `model`, and of its objects with `pks`, when
+    the current transaction on the connection `using` is committed (or now,
+    if we're not in one), and then send `version_changed`.
+    """
+    pending_versions = _PendingVersions.get(using)
+    pending_versions.pks[model].update(pks or [])
+    pending_versions.schedule()
+
+
+def cached_inclusion_tag(register, template_name, models):
+    """
+    Use like `register.inclusion_tag(template_name)` to register a tag
+    whose rendered HTML is cached, keyed on the tag's arguments, the current
+    URL's name, and the versions of `models`. A cache hit does no queries.
+
+        @cached_inclusion_tag(register, 'myapp/includes/card.html', [Event])
+        def recent_events_card(num=10):
+            return {'event_list': Event.objects.all()[:num]}
+
+    The function itself is returned unchanged, so calling it directly still
+    returns its context dict.
+
+    The HTML is cached for SPECTATOR_CARD_CACHE_TIMEOUT seconds.
+    """
+    def decorator(func):
+        name = func.__name__
+
+        def tag(context, *args, **kwargs):
+            key = _make_tag_key(name, args, kwargs, context, models)
+            html = cache.get(key)
+            if html is None:
+                # As Django's InclusionNode does it:
+                template = context.template.engine.get_template(template_name)
+                html = template.render(context.new(func(*args, **kwargs)))
+                cache.set(key, html, getattr(settings,
+                            'SPECTATOR_CARD_CACHE_TIMEOUT', 60 * 60 * 24))
+            return mark_safe(html)
+
+        register.simple_tag(tag, takes_context=True, name=name)
+        return func
+    return decorator
+
+
+def _make_tag_key(name, args, kwargs, context, models):
+    request = getattr(context, 'request', None)
+    url_name = None
+    if request is not None and request.resolver_match:
+        url_name = request.resolver_match.view_name
+
+    parts = repr((args, sorted(kwargs.items()), url_name)).encode('utf-8')
+    return 'spectator.tag.{}.{}.{}'.format(name,
+                                    hashlib.md5(parts).hexdigest(),
+                                    get_versions(*models))
+
+
+def _get_model_versions(labels):
+    """
+    Returns a dict of the versions of the models with `labels`, from the
+    cache if possible, otherwise saving new ones with _save_new_versions().
+    """
+    keys = {label: _version_key(label) for label in labels}
+    cached = cache.get_many(keys.values())
+    versions = {label: cached[key] for label, key in keys.items()
+                                                        if key in cached}
+
+    missing = [label for label in labels if label not in versions]
+    if missing:
+        for label, version in _save_new_versions(missing).items():
+            # Don't replace a version that's just been changed:
+            if not cache.add(keys[label], version, None):
+                version = cache.get(keys[label], version)
+            versions[label] = version
+
+    return versions
+
+
+def _increment(label, using=None):
+    "Increase the cached version of the model with `label`, and return it."
+    key = _version_key(label)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # It's not in the cache.
+        version = _save_new_versions([label], using)[label]
+        if cache.add(key, version, None):
+            return version
+        return cache.incr(key)
+
+
+def _save_new_versions(labels, using=None):
+    """
+    Saves new versions of the models with `labels` in ModelVersion, for
+    when they're not in the cache, and returns a dict of them. They may have
+    been increased in the cache since they were last saved, so each is the
+    bigger of its saved version plus one and a _new_version().
+    """
+    manager = ModelVersion.objects.using(using)
+    with transaction.atomic(using=using):
+        manager.filter(model_label__in=labels).update(
+                version=Greatest(F('version') + 1, Value(_new_version())))
+        versions = dict(manager.filter(model_label__in=labels)
+                                .values_list('model_label', 'version'))
+        for label in labels:
+            if label not in versions:
+                versions[label] = manager.get_or_create(
+                                model_label=label,
+                                defaults={'version': _new_version()})[0].version
+    return versions
+
+
+def _new_version():
+    # Bigger than any earlier version, in case this model's was lost
+    # while things cached with it are still there:
+    return int(time.time() * 1000000)
+
+
+def _version_key(label, pk=None):
+    if pk is None:
+        return 'spectator.versions.{}'.format(label)
+    return 'spectator.versions.{}.{}'.format(label, pk)
+
+
+class _PendingVersions(pending.Pending):
+    """
+    The models whose versions should change when a connection's
+    transaction commits, mapped to the pks of their objects that have
+    changed. Call it to change them, and send `version_changed`.
+    """
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.pks = collections.defaultdict(set)
+
+    def __call__(self):
+        pks = self.pks
+        self.pks = collections.defaultdict(set)
+        changed = []
+        values = {}
+        for model, model_pks in pks.items():
+            label = model._meta.label_lower
+            version = _increment(label, self.using)
+            changed.append((model, version, sorted(model_pks) or None))
+            for pk in model_pks:
+                values[_version_key(label, pk)] = version
+        cache.set_many(values, None)
+
+        # In one transaction, so that anything the receivers do when it
+        # commits, like updating search documents, is done once:
+        with transaction.atomic(using=self.using):
+            for model, version, model_pks in changed:
+                version_changed.send(sender=model, version=version,
+                                     pks=model_pks)
+
+
+def _object_changed(sender, instance, using, **kwargs):
+    bump(sender, [instance.pk], using=using)
+
+
+def _m2m_changed(sender, instance, action, model, pk_set, using, **kwargs):
+    """
+    `instance` is the object whose relations changed, of either model, and
+    `pk_set` the pks of the objects of `model` on the other side.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump(type(instance), [instance.pk], using=using)
+        # pk_set is None when the relation's been cleared:
+        bump(model, pk_set, using=using)
@@ -1,26 +1,276 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import InvalidPage
-from django.http import Http404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control,\
+        patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.utils.encoding import force_text
+from django.utils.text import capfirst
 from django.utils.translation import ugettext as _
+from django.views.decorators.cache import never_cache
 from django.views.generic import DetailView, ListView, YearArchiveView,\
-        TemplateView
+        TemplateView, View
+from django.views.generic.detail import SingleObjectMixin
 
+from . import autocomplete, counters, credits, exporting, surrogates,\
+        versions, years
 from .models import Creator
-from .paginator import DiggPaginator
+from .paginator import DiggPaginator, KeysetPaginator
 from .apps import spectator_apps
 
 if spectator_apps.is_enabled('events'):
     from spectator.events.models import Event
 
 if spectator_apps.is_enabled('reading'):
-    from spectator.reading.models import Publication
+    from spectator.reading.models import Publication, Reading
+
+
+def get_section_size():
+    """
+    How many items to show in each section of a detail page, like the Events
+    on a Creator's page. The rest are on the section's own paginated pages.
+    """
+    return getattr(settings, 'SPECTATOR_SECTION_SIZE', 10)
+
+
+class FragmentMixin(object):
+    """
+    For views of one section of a detail page, like all of a Creator's
+    Events. Ajax requests get only the section's HTML, using
+    `fragment_template_name`, so it can be loaded into the detail page.
+    Other requests get a full page.
+    """
+    fragment_template_name = None
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        patch_vary_headers(response, ['X-Requested-With'])
+        return response
+
+    def get_template_names(self):
+        if self.fragment_template_name and self.request.is_ajax():
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+
+class YearIndexMixin(object):
+    """
+    For YearArchiveViews of models whose years are indexed by
+    spectator.core.years. The previous and next years, and whether the
+    requested year is before the first one, come from that index with one
+    query, instead of from the model's own table.
+
+    Adds `archive_year` to the context, the ArchiveYear for the year being
+    viewed, or None if there's nothing in it.
+    """
+    def get_dated_items(self):
+        self.previous_archive_year, self.archive_year, \
+            self.next_archive_year = years.get_adjacent_years(
+                                            self.model, int(self.get_year()))
+
+        if self.archive_year is None and self.previous_archive_year is None:
+            # The year is before our first one, or we have nothing.
+            raise Http404(_("No %(verbose_name_plural)s available") % {
+                'verbose_name_plural': force_text(
+                                    self.model._meta.verbose_name_plural)
+            })
+
+        items, qs, info = super().get_dated_items()
+        info['archive_year'] = self.archive_year
+        return items, qs, info
+
+    def get_previous_year(self, date):
+        return self._make_year_date(self.previous_archive_year)
+
+    def get_next_year(self, date):
+        return self._make_year_date(self.next_archive_year)
+
+    def _make_year_date(self, year):
+        return None if year is None else datetime.date(year, 1, 1)
+
+
+class ConditionalResponseMixin(object):
+    """
+    Gives GET responses an ETag, and responds to requests whose
+    If-None-Match matches it with a 304, before doing any queries or
+    rendering any templates.
+
+    The ETag is made from the URL (including its query string, so the page,
+    kind, etc), the current user (whose permissions can change the page),
+    whether it's an Ajax request (see FragmentMixin), and the versions of
+    `versioned_models` (see spectator.core.versions). By default that's all
+    of Spectator's models, as most pages include lists of things, like
+    recent Events, in their sidebars.
+    """
+    versioned_models = None
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            response['ETag'] = etag
+        return response
+
+    def get_etag(self):
+        user = getattr(self.request, 'user', None)
+        parts = [
+            self.request.get_full_path(),
+            str(user.pk) if user is not None and user.is_authenticated else '',
+            'ajax' if self.request.is_ajax() else '',
+            versions.get_versions(*self.get_versioned_models()),
+        ]
+        return '"{}"'.format(
+                    hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+
+    def get_versioned_models(self):
+        if self.versioned_models is None:
+            return versions.registered_models()
+        return self.versioned_models
+
+
+class SurrogateKeyMixin(object):
+    """
+    Adds a header listing surrogate keys for all the objects in the context
+    (see spectator.core.surrogates), once the template has been rendered,
+    so that a CDN can purge exactly the pages a change affects.
+
+    Pages that list objects without being about one object, like the
+    list of Venues, also get a key for that list, e.g. 'venue-list', so
+    they're purged when objects are added. Set `surrogate_list_models`
+    to change which models' lists those are.
+
+    If there's a purge backend, the response also has a Surrogate-Control
+    header so the CDN can keep it for SPECTATOR_SURROGATE_MAX_AGE seconds,
+    four hours by default.
+    """
+    surrogate_list_models = None
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(self._add_surrogate_headers)
+        return response
+
+    def get_surrogate_keys(self, context):
+        "Returns a set of keys for the page made from `context`."
+        keys = surrogates.get_keys(context)
+        for model in self.get_surrogate_list_models():
+            keys.add(surrogates.list_key(model))
+        return keys
+
+    def get_surrogate_list_models(self):
+        if self.surrogate_list_models is not None:
+            return self.surrogate_list_models
+        if getattr(self, 'object', None) is None \
+                        and getattr(self, 'object_list', None) is not None:
+            return [self.object_list.model]
+        return []
+
+    def _add_surrogate_headers(self, response):
+        keys = self.get_surrogate_keys(response.context_data or {})
+        if keys:
+            response[surrogates.get_header_name()] = ' '.join(sorted(keys))
+        if surrogates.get_backend() is not None:
+            response['Surrogate-Control'] = 'max-age={}'.format(getattr(
+                        settings, 'SPECTATOR_SURROGATE_MAX_AGE', 60 * 60 * 4))
+
+
+class YearCacheMixin(ConditionalResponseMixin, SurrogateKeyMixin):
+    """
+    For YearArchiveViews of models whose years are indexed by
+    spectator.core.years, so that pages for past years, which rarely change,
+    can be cached for a long time.
+
+    Adds `year_cache_key` to the context, which changes whenever an object
+    in the year is saved or deleted. Templates can use it to cache the
+    rendered list of objects, for SPECTATOR_YEAR_CACHE_TIMEOUT seconds:
+
+        {% cache year_cache_timeout 'spectator_events_year' year_cache_key %}
+
+    The ETag is made from the same key, as well as the versions of
+    `versioned_models`. Set that to the models the page's sidebar cards
+    show, like recent Events, rather than all the models, so that it changes
+    when the year, or the sidebar, does. Pages for past years can be held by
+    shared caches, like CDNs, for SPECTATOR_YEAR_CDN_MAX_AGE seconds, an
+    hour by default, as the sidebar can still change.
+    """
+    def get(self, request, *args, **kwargs):
+        self.year_cache_key = years.get_cache_version(
+                                            self.model, int(self.get_year()))
+        response = super().get(request, *args, **kwargs)
+        patch_cache_control(response, **self.get_cache_control())
+        return response
+
+    def get_etag(self):
+        parts = [self.year_cache_key, super().get_etag()]
+        return '"{}"'.format(
+                    hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+
+    def get_surrogate_keys(self, context):
+        """
+        Rather than the list of all objects, the page is about one year, and
+        its links to the others.
+        """
+        keys = surrogates.get_keys(context)
+        keys.add(surrogates.year_key(self.model, int(self.get_year())))
+        keys.add(surrogates.year_key(self.model))
+        return keys
+
+    def get_cache_control(self):
+        "Keyword arguments for django.utils.cache.patch_cache_control()."
+        cache_control = {'public': True, 'max_age': 0}
+        max_age = getattr(settings, 'SPECTATOR_YEAR_CDN_MAX_AGE', 60 * 60)
+        if int(self.get_year()) < timezone.now().year and max_age:
+            cache_control['s_maxage'] = max_age
+        return cache_control
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['year_cache_key'] = self.year_cache_key
+        context['year_cache_timeout'] = getattr(settings,
+                            'SPECTATOR_YEAR_CACHE_TIMEOUT', 60 * 60 * 24 * 30)
+        return context
+
+    def get_date_list(self, queryset, date_type=None, ordering='ASC'):
+        """
+        The parent evaluates date_list to check it's not empty, which we
+        don't need to do as allow_empty is True. Leaving it unevaluated means
+        there are no queries for the list when the page is from the cache.
+        """
+        if not self.get_allow_empty():
+            return super().get_date_list(queryset, date_type, ordering)
+        return queryset.dates(self.get_date_field(),
+                            date_type or self.get_date_list_period(), ordering)
+
+
+class PaginatedListView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                                ListView):
+    """Use this instead of ListView to provide standardised pagination.
 
+    Set `keyset_pagination = True` (e.g. in `as_view()`), or the
+    SPECTATOR_KEYSET_PAGINATION setting, to page through the list by seeking
+    on its ordering instead of using OFFSET and COUNT. See KeysetPaginator.
 
-class PaginatedListView(ListView):
-    """Use this instead of ListView to provide standardised pagination."""
+    Or set `count_strategy` to one of the CountStrategy classes in
+    spectator.core.paginator, to change how the DiggPaginator counts the
+    items, e.g. `CachedCount()`, `EstimatedCount()` or `NoCount()`.
+    """
     paginator_class = DiggPaginator
     paginate_by = 50
     page_kwarg = 'p'
 
+    # None means "use the SPECTATOR_KEYSET_PAGINATION setting":
+    keyset_pagination = None
+
+    # None means an exact COUNT every time:
+    count_strategy = None
+
     # See spectator.paginator for what these mean:
     paginator_body = 5
     paginator_margin = 2
@@ -30,6 +280,22 @@ class PaginatedListView(ListView):
     def __init__(self, **kwargs):
         return super().__init__(**kwargs)
 
+    def get_count_strategy(self):
+        "A CountStrategy instance, or None."
+        return self.count_strategy
+
+    def get_keyset_pagination(self):
+        "Should we use a KeysetPaginator instead of the DiggPaginator?"
+        if self.keyset_pagination is None:
+            return getattr(settings, 'SPECTATOR_KEYSET_PAGINATION', False)
+        else:
+            return self.keyset_pagination
+
+    def get_page_value(self):
+        "The requested page; a number, 'last', or a keyset cursor."
+        page_kwarg = self.page_kwarg
+        return self.kwargs.get(page_kwarg) or self.request.GET.get(page_kwarg) or 1
+
     def paginate_queryset(self, queryset, page_size):
         """
         Paginate the queryset, if needed.
@@ -44,6 +310,9 @@ class PaginatedListView(ListView):
         page, not a 404. The softlimit does that, but I can't see how to use
         it without copying all of this...
         """
+        if self.get_keyset_pagination():
+            return self.paginate_queryset_by_keyset(queryset, page_size)
+
         paginator = self.get_paginator(
             queryset,
             page_size,
@@ -53,9 +322,9 @@ class PaginatedListView(ListView):
             margin  = self.paginator_margin,
             padding = self.paginator_padding,
             tail    = self.paginator_tail,
+            count_strategy = self.get_count_strategy(),
         )
-        page_kwarg = self.page_kwarg
-        page = self.kwargs.get(page_kwarg) or self.request.GET.get(page_kwarg) or 1
+        page = self.get_page_value()
         try:
             page_number = int(page)
         except ValueError:
@@ -72,20 +341,45 @@ class PaginatedListView(ListView):
                 'message': str(e)
             })
 
+    def paginate_queryset_by_keyset(self, queryset, page_size):
+        """
+        Like paginate_queryset() but using a KeysetPaginator, so no COUNT is
+        done and every page takes the same time to fetch.
+        The page value can be a cursor token, 'last', or a page number.
+        """
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.get_page_value())
+        except InvalidPage as e:
+            raise Http404(_('Invalid page: %(message)s') % {
+                'message': str(e)
+            })
+        if len(page) == 0 and not self.get_allow_empty():
+            raise Http404(_('Invalid page: That page contains no results'))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
 
-class HomeView(TemplateView):
+class HomeView(ConditionalResponseMixin, SurrogateKeyMixin, TemplateView):
     template_name = 'spectator_core/home.html'
 
+    def get_surrogate_list_models(self):
+        # So that new Events and Readings appear:
+        list_models = []
+        if spectator_apps.is_enabled('reading'):
+            list_models += [Publication, Reading]
+        if spectator_apps.is_enabled('events'):
+            list_models += [Event]
+        return list_models
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if spectator_apps.is_enabled('reading'):
             context['in_progress_publication_list'] = \
                                     Publication.in_progress_objects\
-                                    .select_related('series')\
-                                    .prefetch_related('roles__creator').all()
+                                    .for_display()
         if spectator_apps.is_enabled('events'):
             context['recent_event_list'] = Event.objects\
-                                            .select_related('venue')\
+                                            .for_display()\
                                             .order_by('-date')[:10]
         return context
 
@@ -103,10 +397,9 @@ class CreatorListView(PaginatedListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['creator_kind'] = self.creator_kind
-        context['individual_count'] = Creator.objects.filter(
-                                                    kind='individual').count()
-        context['group_count'] = Creator.objects.filter(
-                                                    kind='group').count()
+        counts = counters.get_counts(Creator)
+        context['individual_count'] = counts['individual']
+        context['group_count'] = counts['group']
         return context
 
     def get_queryset(self):
@@ -115,7 +408,132 @@ class CreatorListView(PaginatedListView):
         return queryset
 
 
-class CreatorDetailView(DetailView):
+class CreatorDetailView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                                DetailView):
+    """
+    Includes `creator_works`, a dict of lists of the first few of each kind
+    of thing the Creator has worked on, fetched via their CreatorCredits. See
+    spectator.core.credits.get_creator_works().
+
+    And `creator_work_counts`, a dict of how many there are of each, so we
+    can link to CreatorWorksView for the rest.
+
+    And `creator_sections`, the same data as a list of dicts, in the order
+    the sections should be displayed.
+    """
     model = Creator
 
+    # The order of sections on the page. Any others go at the end:
+    section_order = ['publications', 'events', 'classicalworks',
+                        'dancepieces', 'movies', 'plays',]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        works = credits.get_creator_works(self.object,
+                                                    limit=get_section_size())
+        counts = credits.get_creator_work_counts(self.object)
+        work_models = credits.get_work_models()
+
+        names = [n for n in self.section_order if n in works]
+        names += sorted(n for n in works if n not in self.section_order)
+
+        context['creator_works'] = works
+        context['creator_work_counts'] = counts
+        context['creator_sections'] = [{
+                'name': name,
+                'title': capfirst(work_models[name]._meta.verbose_name_plural),
+                'work_list': works[name],
+                'count': counts.get(name, len(works[name])),
+            } for name in names]
+        return context
+
+
+class CreatorWorksView(FragmentMixin, SingleObjectMixin, PaginatedListView):
+    """
+    A paginated list of one kind of thing a Creator has worked on, like
+    their 'events' or 'movies'.
+    """
+    template_name = 'spectator_core/creator_works.html'
+    fragment_template_name = 'spectator_core/includes/creator_works.html'
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object(queryset=Creator.objects.all())
+        self.section = self.kwargs.get('section')
+        self.work_model = credits.get_work_models().get(self.section)
+        if self.work_model is None:
+            raise Http404("Invalid section: '%s'" % self.section)
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['creator'] = self.object
+        context['section'] = self.section
+        context['section_title'] = capfirst(
+                                self.work_model._meta.verbose_name_plural)
+        context['work_list'] = credits.add_credits(self.object,
+                                                    context['object_list'])
+        return context
+
+    def get_queryset(self):
+        return credits.get_works_queryset(self.object, self.work_model)
+
+
+class AutocompleteView(View):
+    """
+    Returns JSON listing the objects of `model` whose names start with the
+    'q' GET parameter, e.g.
+
+        {"results": [{"id": 3, "name": "The Long Blondes",
+                      "url": "/creators/3/"}]}
+
+    The model must be registered with spectator.core.autocomplete.
+    """
+    model = None
+
+    def get(self, request, *args, **kwargs):
+        results = autocomplete.complete(self.model, request.GET.get('q', ''))
+        return JsonResponse({'results': results})
+
+
+@method_decorator([never_cache, staff_member_required], name='dispatch')
+class ExportView(View):
+    """
+    Streams all of Spectator's data as JSON Lines, or one model's as CSV,
+    as the spectator_export command does. For staff only. e.g.
+
+        /export/?format=csv&model=spectator_events.event
+
+    GET parameters:
+        format -- 'jsonl' (default) or 'csv'.
+        model -- The label of a model to export. Required for CSV.
+    """
+
+    content_types = {
+        'jsonl': 'application/x-ndjson; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'jsonl')
+        if export_format not in exporting.FORMATS:
+            raise Http404(_("Unknown format: %(format)s") % {
+                                                    'format': export_format})
+        label = request.GET.get('model')
+        try:
+            model = exporting.get_model(label) if label else None
+        except LookupError:
+            raise Http404(_("Unknown model: %(model)s") % {'model': label})
+
+        if export_format == 'csv':
+            if model is None:
+                raise Http404(_("CSV exports need a model."))
+            lines = exporting.export_csv(model)
+        else:
+            lines = exporting.export_jsonl([model] if model else None)
 
+        response = StreamingHttpResponse(
+                        lines, content_type=self.content_types[export_format])
+        name = model._meta.label_lower if model else 'spectator'
+        response['Content-Disposition'] = \
+                'attachment; filename="{}.{}"'.format(name, export_format)
+        return response
@@ -0,0 +1,69 @@
+from django import forms
+from django.core import urlresolvers
+from django.utils.encoding import force_text
+
+
+class AutocompleteMixin(object):
+    """
+    For Select widgets whose choices are a ModelChoiceField's queryset.
+
+    Rather than rendering an <option> for every object, only those that are
+    selected are rendered, with a text input whose typing fetches matching
+    objects from the related model's admin autocomplete URL. See
+    spectator.core.admin.AutocompleteAdminMixin.
+    """
+    template_name = 'spectator_core/widgets/autocomplete_select.html'
+
+    def __init__(self, model, admin_site, attrs=None, choices=()):
+        self.model = model
+        self.admin_site = admin_site
+        super().__init__(attrs, choices)
+
+    class Media:
+        css = {
+            'all': ('css/admin/autocomplete.css',),
+        }
+        js = ('js/admin/autocomplete.js',)
+
+    def get_url(self):
+        return urlresolvers.reverse('{}:{}_{}_autocomplete'.format(
+                                        self.admin_site.name,
+                                        self.model._meta.app_label,
+                                        self.model._meta.model_name))
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['autocomplete_url'] = self.get_url()
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        """
+        Only the empty choice, if any, and the selected objects, fetched with
+        one query, rather than every object in the queryset.
+        """
+        choices = []
+        selected = [v for v in value if v]
+        if hasattr(self.choices, 'queryset'):
+            if self.choices.field.empty_label is not None:
+                choices.append(('', self.choices.field.empty_label))
+            if selected:
+                choices += [self.choices.choice(obj) for obj in
+                            self.choices.queryset.filter(pk__in=selected)]
+        else:
+            choices = [c for c in self.choices
+                        if c[0] == '' or force_text(c[0]) in selected]
+
+        all_choices = self.choices
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
@@ -0,0 +1,240 @@
+import datetime
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import ExtractYear
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal
+
+from . import pending
+from .models import ArchiveYear
+
+
+# Maps models to the name of the date field their years come from:
+_registry = {}
+
+# Sent by touch_years(), with `years` None if all of them changed:
+years_changed = Signal(providing_args=['years'])
+
+
+def register(model, date_field):
+    """
+    Keep an index of the years in which `model` has objects, in ArchiveYear.
+
+    The index is updated whenever an object is saved or deleted, and the
+    cache versions of the years that object was, and is, in are changed.
+    Note that QuerySet.update(), QuerySet.delete() and bulk_create() don't
+    send signals, so after using those, use rebuild().
+
+    model -- e.g. Event.
+    date_field -- The name of the DateField to index, e.g. 'date'.
+    """
+    _registry[model] = date_field
+    uid = 'spectator.years.{}'.format(model._meta.label_lower)
+    post_init.connect(_remember_date, sender=model, dispatch_uid=uid)
+    post_save.connect(_object_saved, sender=model, dispatch_uid=uid)
+    post_delete.connect(_object_deleted, sender=model, dispatch_uid=uid)
+
+
+def registered_models():
+    "A list of the models whose years are indexed."
+    return list(_registry.keys())
+
+
+def get_years(model):
+    """
+    Returns a list of ArchiveYear objects, earliest first, one for each year
+    in which `model` has objects, with one query.
+    """
+    return list(ArchiveYear.objects.filter(
+                        model_label=model._meta.label_lower).order_by('year'))
+
+
+def get_year_dates(model):
+    """
+    Returns a list of date objects, earliest first, one for each year in
+    which `model` has objects. Like QuerySet.dates(date_field, 'year') but
+    without scanning the model's table.
+    """
+    return [datetime.date(y.year, 1, 1) for y in get_years(model)]
+
+
+def get_adjacent_years(model, year):
+    """
+    Returns a tuple of the years (as ints) with objects that are before and
+    after `year`, with None for either if there isn't one. And the ArchiveYear
+    object for `year` itself, or None if it has no objects. e.g.
+
+        (2016, <ArchiveYear: spectator_events.event 2017: 34>, None)
+    """
+    previous_year, this_year, next_year = None, None, None
+    for archive_year in get_years(model):
+        if archive_year.year < year:
+            previous_year = archive_year.year
+        elif archive_year.year == year:
+            this_year = archive_year
+        elif next_year is None:
+            next_year = archive_year.year
+    return previous_year, this_year, next_year
+
+
+def get_cache_version(model, year):
+    """
+    Returns a string that changes whenever an object of `model` in `year`
+    is saved or deleted, or the list of years with objects changes. Use it
+    in the cache keys and ETags of things, like year archive pages, that
+    only depend on one year.
+
+    The versions are kept in the cache, not the database, so this doesn't
+    do any queries.
+    """
+    label = model._meta.label_lower
+    keys = [_version_key(label), _version_key(label, year)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = uuid.uuid4().hex
+            if not cache.add(key, versions[key], None):
+                # Someone else just set it.
+                versions[key] = cache.get(key, versions[key])
+    return '.'.join(versions[key] for key in keys)
+
+
+def touch_years(model, years=None, using=None):
+    """
+    Changes the cache versions of `years` (ints) for `model`, e.g. after
+    a change that alters how its objects in those years are displayed.
+    If `years` is None then the versions of all years are changed.
+
+    The new versions are put in the cache when the current transaction is
+    committed (or now, if we're not in one), so that pages rendered before
+    then, from the old data, aren't cached with them.
+    """
+    label = model._meta.label_lower
+    if years is None:
+        keys = [_version_key(label)]
+    else:
+        keys = [_version_key(label, year) for year in years]
+    pending_versions = _PendingVersions.get(using)
+    pending_versions.keys.update(keys)
+    pending_versions.schedule()
+    years_changed.send(sender=model, years=years)
+
+
+class _PendingVersions(pending.Pending):
+    """
+    The cache keys of the year versions to change when a connection's
+    transaction commits. Call it to change them.
+    """
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.keys = set()
+
+    def __call__(self):
+        keys = self.keys
+        self.keys = set()
+        if keys:
+            cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def _version_key(label, year=None):
+    if year is None:
+        return 'spectator.years.{}'.format(label)
+    return 'spectator.years.{}.{}'.format(label, year)
+
+
+def rebuild(model, date_field=None, year_model=ArchiveYear):
+    """
+    Replace all of `model`'s years with ones made from a single GROUP BY.
+
+    date_field and year_model can be supplied for use in migrations, where
+    we have the historical versions of the models.
+    """
+    if date_field is None:
+        date_field = _registry[model]
+
+    label = model._meta.label_lower
+    rows = model._default_manager.order_by()\
+                        .filter(**{'{}__isnull'.format(date_field): False})\
+                        .annotate(archive_year=ExtractYear(date_field))\
+                        .values('archive_year')\
+                        .annotate(num=Count('pk'), first=Min(date_field),
+                                                    last=Max(date_field))
+
+    with transaction.atomic():
+        year_model.objects.filter(model_label=label).delete()
+        year_model.objects.bulk_create([
+            year_model(model_label=label, year=row['archive_year'],
+                        count=row['num'], first_date=row['first'],
+                        last_date=row['last'])
+            for row in rows
+        ])
+
+    touch_years(model)
+
+
+def _refresh_years(model, years, using):
+    """
+    Recalculate the ArchiveYears for `model` for each of `years`.
+    Each is one aggregate over a single year's range of dates.
+    """
+    date_field = _registry[model]
+    label = model._meta.label_lower
+    years_changed = False
+
+    for year in years:
+        data = model._default_manager.using(using).order_by()\
+                    .filter(**{'{}__year'.format(date_field): year})\
+                    .aggregate(num=Count('pk'), first=Min(date_field),
+                                                last=Max(date_field))
+
+        if data['num'] == 0:
+            deleted, _ = ArchiveYear.objects.using(using).filter(
+                                        model_label=label, year=year).delete()
+            years_changed = years_changed or deleted > 0
+        else:
+            _, created = ArchiveYear.objects.using(using).update_or_create(
+                        model_label=label, year=year,
+                        defaults={'count': data['num'],
+                                  'first_date': data['first'],
+                                  'last_date': data['last']})
+            years_changed = years_changed or created
+
+    if years_changed:
+        # Every year's previous/next years and list of years may change.
+        touch_years(model, using=using)
+
+
+def _get_date(model, value):
+    # In case the date was set as a string, like '2017-01-31':
+    return model._meta.get_field(_registry[model]).to_python(value)
+
+
+def _remember_date(sender, instance, **kwargs):
+    # Avoid fetching the field if it's been deferred:
+    instance._spectator_indexed_date = _get_date(sender,
+                                    instance.__dict__.get(_registry[sender]))
+
+
+def _object_saved(sender, instance, created, using, **kwargs):
+    date = _get_date(sender, getattr(instance, _registry[sender]))
+    old_date = getattr(instance, '_spectator_indexed_date', None)
+
+    years = sorted({d.year for d in (date, old_date) if d is not None})
+    if created or date != old_date:
+        _refresh_years(sender, years, using)
+    touch_years(sender, years, using=using)
+
+    instance._spectator_indexed_date = date
+
+
+def _object_deleted(sender, instance, using, **kwargs):
+    date = getattr(instance, '_spectator_indexed_date', None)
+    if date is None:
+        date = _get_date(sender, getattr(instance, _registry[sender]))
+    if date is not None:
+        _refresh_years(sender, [date.year], using)
+        touch_years(sender, [date.year], using=using)
@@ -4,16 +4,18 @@ from django.core import urlresolvers
 from django.core.exceptions import ValidationError
 from django import forms
 
+from spectator.core.admin import AutocompleteAdminMixin,\
+        AutocompleteFieldsMixin, CountAdminMixin
 from .models import Event, EventRole, ClassicalWork, ClassicalWorkRole,\
         DancePiece, DancePieceRole, Movie, MovieRole, Play, PlayRole, Venue
 
 
 # INLINES.
 
-class RoleInline(admin.TabularInline):
+class RoleInline(AutocompleteFieldsMixin, admin.TabularInline):
     "Parent class for the other *RoleInlines."
     fields = ( 'creator', 'role_name', 'role_order',)
-    raw_id_fields = ('creator',)
+    autocomplete_fields = ('creator',)
     extra = 1
 
 class EventRoleInline(RoleInline):
@@ -93,11 +95,12 @@ class EventAdminForm(forms.ModelForm):
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(AutocompleteFieldsMixin, CountAdminMixin, admin.ModelAdmin):
     form = EventAdminForm
 
     list_display = ('__str__', 'date', 'kind_name', 'venue',)
     list_filter = ('kind', 'date',)
+    list_select_related = ('venue',)
     search_fields = ('title',)
 
     fieldsets = (
@@ -113,14 +116,15 @@ class EventAdmin(admin.ModelAdmin):
         }),
     )
 
-    filter_horizontal = ('classicalworks', 'dancepieces',)
-    raw_id_fields = ('movie', 'play', 'venue',)
+    autocomplete_fields = ('classicalworks', 'dancepieces', 'movie', 'play',
+                           'venue',)
     readonly_fields = ('title_sort', 'time_created', 'time_modified',)
 
     inlines = [EventRoleInline, ]
 
 
-class ProductionAdmin(admin.ModelAdmin):
+class ProductionAdmin(AutocompleteAdminMixin, CountAdminMixin,
+                                                        admin.ModelAdmin):
     """
     A parent class for MovieAdmin and PlayAdmin.
     """
@@ -129,6 +133,10 @@ class ProductionAdmin(admin.ModelAdmin):
 
     readonly_fields = ('title_sort', 'time_created', 'time_modified',)
 
+    def get_queryset(self, request):
+        "For show_creators()."
+        return super().get_queryset(request).prefetch_related('roles__creator')
+
     def show_creators(self, instance):
         names = [ str(r.creator) for r in instance.roles.all() ]
         if len(names) == 0:
@@ -205,7 +213,7 @@ class PlayAdmin(ProductionAdmin):
 
 
 @admin.register(Venue)
-class VenueAdmin(admin.ModelAdmin):
+class VenueAdmin(AutocompleteAdminMixin, CountAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'latitude', 'longitude', 'country',)
     list_filter = ('country',)
     search_fields = ('name',)
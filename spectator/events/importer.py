@@ -0,0 +1,365 @@
+"""
+Importing lots of Events at once from CSV or JSON, e.g. a history of gigs
+kept in a spreadsheet:
+
+    with open('events.csv', newline='') as f:
+        result = import_events(read_csv(f))
+
+Each batch of rows is imported in one transaction, as described in
+spectator.core.importing:
+
+* Venues, Creators, Movies, Plays, ClassicalWorks and DancePieces are found,
+  or created, by Resolvers.
+* The Events, their EventRoles, works, CreatorCredits and ImportRecords are
+  made with bulk_create(). Events' display_title is made from the names of
+  the things found, and so their title_sort too. The few titles that need
+  the Event's pk, like 'Event #123', are recalculated together afterwards.
+
+After the last batch the counts of Events' and Creators' kinds, and
+Events' years, are rebuilt, and the versions, and surrogate keys, of
+everything involved are changed.
+"""
+import collections
+import datetime
+import functools
+import itertools
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from spectator.core import counters, credits, years
+from spectator.core.importing import BATCH_SIZE, CreatorResolver, Resolver,\
+        Result, RowError, add_changed, bulk_create_with_pks,\
+        exclude_imported, get_list, get_text, import_rows, read_csv,\
+        record_imported, touch
+from spectator.core.models import Creator, CreatorCredit
+from . import titles
+from .models import ClassicalWork, DancePiece, Event, EventRole, Movie,\
+        Play, Venue
+
+
+# Identifies rows imported as Events in their hashes:
+LABEL = 'spectator_events.Event'
+
+
+def read_json(f):
+    """
+    Yields (row number, data) for each object in a JSON file. Either JSON
+    Lines, one object per line, which is read a line at a time, or a JSON
+    array of objects, which has to be read all at once.
+    """
+    number = 0
+    for line in f:
+        if not line.strip():
+            continue
+        if number == 0 and line.lstrip().startswith('['):
+            try:
+                objects = json.loads(line + f.read())
+            except ValueError as e:
+                raise ValueError('Invalid JSON: {}'.format(e))
+            for number, data in enumerate(objects, 1):
+                yield number, data
+            return
+        number += 1
+        # parse_row() decodes it, so that an invalid line is only an
+        # invalid row:
+        yield number, line
+
+
+def parse_row(data):
+    """
+    Checks and tidies one row of data, returning a dict like:
+
+        {'kind': 'gig', 'date': '2017-06-01', 'title': '',
+         'venue': {'name': 'Brixton Academy', 'country': 'GB'},
+         'creators': [{'name': 'The Long Blondes', 'role': 'Headliner',
+                       'kind': 'group'}],
+         'movie': None, 'play': None, 'works': []}
+
+    Raises RowError if it can't be imported.
+
+    data -- A dict, or a string of JSON for one, with keys:
+        kind -- One of Event.KIND_CHOICES' keys, e.g. 'gig'. Required.
+        date -- 'YYYY-MM-DD'. Optional.
+        venue -- The Venue's name. Required.
+        venue_country -- The Venue's country code, e.g. 'GB'. Optional.
+        title -- The Event's title. Optional.
+        creators -- A list of Creators' names, or of dicts with 'name' and
+            optional 'role' and 'kind' ('individual' or 'group'). Or a
+            string like 'Name|Role|kind; Name' as in a CSV file. If the kind
+            isn't given, an existing Creator of either kind is used.
+        movie, movie_year -- For 'movie' Events, the Movie's title and
+            optional year.
+        play -- For 'play' Events, the Play's title.
+        works -- For 'concert' and 'dance' Events, a list of the titles of
+            the ClassicalWorks or DancePieces, or a string like
+            'Title; Title'.
+    """
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError as e:
+            raise RowError('Invalid JSON: {}'.format(e))
+    if not isinstance(data, dict):
+        raise RowError('Expected an object, not {!r}.'.format(data))
+
+    kind = get_text(data, 'kind')
+    if kind not in Event.KIND_SLUGS:
+        raise RowError('Unknown kind: {!r}.'.format(kind))
+
+    row = {
+        'kind': kind,
+        'date': _get_date(data),
+        'title': get_text(data, 'title'),
+        'venue': _get_venue(data),
+        'creators': _get_creators(data),
+        'movie': None,
+        'play': None,
+        'works': [],
+    }
+
+    movie = get_text(data, 'movie')
+    if kind == 'movie':
+        if not movie:
+            raise RowError('Movie events need a movie.')
+        row['movie'] = {'title': movie, 'year': _get_year(data)}
+    elif movie:
+        raise RowError('Only movie events can have a movie.')
+
+    play = get_text(data, 'play')
+    if kind == 'play':
+        if not play:
+            raise RowError('Play events need a play.')
+        row['play'] = {'title': play}
+    elif play:
+        raise RowError('Only play events can have a play.')
+
+    works = [{'title': title} for title in get_list(data, 'works')]
+    if kind in ('concert', 'dance'):
+        if not works:
+            raise RowError('{} events need works.'.format(
+                                                Event.get_kind_name(kind)))
+        row['works'] = works
+    elif works:
+        raise RowError('Only concert and dance events can have works.')
+
+    return row
+
+
+def import_events(rows, batch_size=BATCH_SIZE):
+    """
+    Imports Events from `rows`, an iterable of (row number, data) tuples
+    like those from read_csv() or read_json(). Invalid rows, and rows
+    that have already been imported, are skipped. Returns a Result.
+    """
+    resolvers = make_resolvers()
+    changed = collections.defaultdict(set)
+    try:
+        result = import_rows(rows, LABEL, parse_row,
+                             functools.partial(_import_batch,
+                                               resolvers=resolvers,
+                                               changed=changed),
+                             batch_size=batch_size)
+    finally:
+        # Whatever was imported, even if a batch failed:
+        if changed:
+            counters.rebuild(Event)
+            if resolvers['creator'].created:
+                counters.rebuild(Creator)
+            years.rebuild(Event)
+            touch(changed.items())
+
+    return result
+
+
+def make_resolvers():
+    "A dict of a Resolver for each kind of thing an Event refers to."
+    return {
+        'venue': Resolver(Venue, 'name_sort'),
+        'creator': CreatorResolver(),
+        'movie': Resolver(Movie, 'title_sort', extra_fields=('year',)),
+        'play': Resolver(Play, 'title_sort'),
+        'concert': Resolver(ClassicalWork, 'title_sort'),
+        'dance': Resolver(DancePiece, 'title_sort'),
+    }
+
+
+def _import_batch(rows, resolvers, changed):
+    """
+    Imports the Events from `rows`, a list of (hash, row) tuples, skipping
+    any that have already been imported, adding the pks of everything
+    involved to `changed`. Returns how many were imported.
+    """
+    with transaction.atomic():
+        unique = exclude_imported(rows)
+        if not unique:
+            return 0
+        rows = list(unique.values())
+
+        # Lists of pks for each row:
+        venue_pks = resolvers['venue'].resolve([r['venue'] for r in rows])
+        creator_pks = resolvers['creator'].resolve_lists(
+                            [[{'name': c['name'], 'kind': c['kind']}
+                                        for c in r['creators']] for r in rows])
+        movie_pks = resolvers['movie'].resolve_lists(
+                            [[r['movie']] if r['movie'] else [] for r in rows])
+        play_pks = resolvers['play'].resolve_lists(
+                            [[r['play']] if r['play'] else [] for r in rows])
+        work_pks = {kind: resolvers[kind].resolve_lists(
+                            [r['works'] if r['kind'] == kind else []
+                                                            for r in rows])
+                    for kind in ('concert', 'dance')}
+
+        events = []
+        untitled = []
+        for i, row in enumerate(rows):
+            # The things the title is made from, as Event.make_display_title()
+            # does, but using the names the resolvers fetched:
+            if row['kind'] in work_pks:
+                resolver, pks = resolvers[row['kind']], work_pks[row['kind']][i]
+                # Ordered by title_sort, as the works' Meta.ordering is:
+                pks = sorted(pks, key=lambda pk: resolver.sort_values[pk])
+            elif row['kind'] in ('movie', 'play'):
+                resolver = resolvers[row['kind']]
+                pks = (movie_pks if row['kind'] == 'movie' else play_pks)[i]
+            else:
+                resolver, pks = resolvers['creator'], creator_pks[i]
+            names = [resolver.names[pk] for pk in pks]
+
+            event = Event(
+                kind=row['kind'],
+                kind_slug=Event.KIND_SLUGS[row['kind']],
+                date=_parse_date(row['date']),
+                venue_id=venue_pks[i],
+                title=row['title'],
+                display_title=row['title'] or _join(names),
+                movie_id=movie_pks[i][0] if movie_pks[i] else None,
+                play_id=play_pks[i][0] if play_pks[i] else None)
+            if not event.display_title:
+                # e.g. 'Event #123', which needs its pk. For now, something
+                # to make title_sort from without any queries:
+                event.display_title = event.kind_name
+                untitled.append(event)
+            events.append(event)
+        bulk_create_with_pks(Event, events)
+
+        roles = []
+        for i, event in enumerate(events):
+            for order, (creator, pk) in enumerate(
+                            zip(rows[i]['creators'], creator_pks[i]), 1):
+                roles.append(EventRole(event=event, creator_id=pk,
+                                       role_name=creator['role'],
+                                       role_order=order))
+        bulk_create_with_pks(EventRole, roles)
+
+        through_models = {'concert': (Event.classicalworks.through,
+                                                            'classicalwork_id'),
+                          'dance': (Event.dancepieces.through, 'dancepiece_id')}
+        for kind, (through, attname) in through_models.items():
+            through.objects.bulk_create([
+                through(event_id=event.pk, **{attname: pk})
+                for event, pks in zip(events, work_pks[kind]) for pk in pks])
+
+        event_type = ContentType.objects.get_for_model(Event)
+        CreatorCredit.objects.bulk_create(
+                [credits.make_credit(role, event_type) for role in roles])
+
+        record_imported(Event, unique.keys(), [e.pk for e in events])
+
+        if untitled:
+            titles.update_titles([e.pk for e in untitled])
+
+    add_changed(changed, [
+        (Event, [e.pk for e in events]),
+        (EventRole, [r.pk for r in roles]),
+        (Venue, venue_pks),
+        (Creator, _flatten(creator_pks)),
+        (Movie, _flatten(movie_pks)),
+        (Play, _flatten(play_pks)),
+        (ClassicalWork, _flatten(work_pks['concert'])),
+        (DancePiece, _flatten(work_pks['dance'])),
+    ])
+    return len(rows)
+
+
+def _flatten(lists):
+    return list(itertools.chain.from_iterable(lists))
+
+
+def _join(names):
+    "'', or 'a', or 'a and b', or 'a, b and c'."
+    if len(names) < 2:
+        return ''.join(names)
+    return '{} and {}'.format(', '.join(names[:-1]), names[-1])
+
+
+def _parse_date(value):
+    if value is None:
+        return None
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _get_date(data):
+    value = get_text(data, 'date')
+    if not value:
+        return None
+    try:
+        return _parse_date(value).isoformat()
+    except ValueError:
+        raise RowError('Invalid date: {!r}. Use YYYY-MM-DD.'.format(value))
+
+
+def _get_year(data):
+    value = get_text(data, 'movie_year')
+    if not value:
+        return None
+    try:
+        year = int(value)
+    except ValueError:
+        year = 0
+    if not 0 < year < 10000:
+        raise RowError('Invalid movie_year: {!r}.'.format(value))
+    return year
+
+
+def _get_venue(data):
+    name = get_text(data, 'venue')
+    if not name:
+        raise RowError('Events need a venue.')
+    country = get_text(data, 'venue_country').upper()
+    if country and country not in Venue.COUNTRIES:
+        raise RowError('Unknown venue_country: {!r}.'.format(country))
+    return {'name': name, 'country': country}
+
+
+def _get_creators(data):
+    value = data.get('creators')
+    if isinstance(value, str):
+        # e.g. 'The Long Blondes|Headliner|group; The Fall|Support':
+        value = [dict(zip(('name', 'role', 'kind'), entry.split('|')))
+                                    for entry in value.split(';')]
+    elif value is None:
+        value = []
+    elif not isinstance(value, list):
+        raise RowError('creators should be a list.')
+
+    kinds = [k for k, name in Creator.KIND_CHOICES]
+    creators = []
+    for item in value:
+        if isinstance(item, str):
+            item = {'name': item}
+        elif not isinstance(item, dict):
+            raise RowError('Invalid creator: {!r}.'.format(item))
+        name = get_text(item, 'name')
+        if not name:
+            if any(get_text(item, key) for key in ('role', 'kind')):
+                raise RowError('Creators need a name.')
+            continue
+        kind = get_text(item, 'kind').lower() or None
+        if kind is not None and kind not in kinds:
+            raise RowError('Unknown creator kind: {!r}.'.format(kind))
+        creators.append({'name': name,
+                         'role': get_text(item, 'role', max_length=50),
+                         'kind': kind})
+    return creators
@@ -0,0 +1,69 @@
+import csv
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from spectator.events import importer
+
+
+class Command(BaseCommand):
+    help = ("Imports Events, and their Venues, Creators, etc, from a CSV or "
+            "JSON file. Rows that have been imported before are skipped.")
+
+    readers = {
+        'csv': importer.read_csv,
+        'json': importer.read_json,
+    }
+
+    extensions = {
+        '.csv': 'csv',
+        '.json': 'json',
+        '.jsonl': 'json',
+        '.ndjson': 'json',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('path',
+                            help="The file to import, or '-' for stdin.")
+        parser.add_argument('--format', choices=sorted(self.readers.keys()),
+                            help="The file's format, if its extension "
+                                 "doesn't say.")
+        parser.add_argument('--batch-size', type=int,
+                            default=importer.BATCH_SIZE,
+                            help="How many rows to import in each "
+                                 "transaction.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size should be at least 1.')
+
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            extension = os.path.splitext(path)[1].lower()
+            if extension not in self.extensions:
+                raise CommandError('Use --format to say what kind of file '
+                                   'this is.')
+            file_format = self.extensions[extension]
+        read = self.readers[file_format]
+
+        try:
+            if path == '-':
+                result = importer.import_events(read(sys.stdin),
+                                        batch_size=options['batch_size'])
+            else:
+                # utf-8-sig, to ignore any byte order mark from spreadsheets:
+                with open(path, newline='', encoding='utf-8-sig') as f:
+                    result = importer.import_events(read(f),
+                                        batch_size=options['batch_size'])
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+
+        for number, message in result.errors:
+            self.stderr.write('Row {}: {}'.format(number, message))
+        if options['verbosity'] > 0:
+            self.stdout.write('{} imported, {} already imported, {} invalid.'
+                              .format(result.imported, result.skipped,
+                                      len(result.errors)))
+
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class EventQuerySet(models.QuerySet):
+
+    def for_display(self):
+        """
+        Fetches everything the shared templates (like includes/event.html)
+        need to display a list of Events, in one query.
+
+        Events' titles are stored in display_title, so we don't need their
+        works or creators just to show their titles.
+        """
+        return self.select_related('venue', 'movie', 'play')
+
+    def with_creators(self):
+        """
+        Also fetches the Events' roles and their Creators, for templates that
+        list them, like includes/visits_list.html.
+        """
+        return self.prefetch_related('roles__creator')
+
+
+class WorkQuerySet(models.QuerySet):
+
+    def for_display(self):
+        """
+        Fetches everything the shared templates (like
+        includes/m2m_work_list.html) need to display a list of
+        ClassicalWorks, DancePieces, Movies or Plays.
+        """
+        return self.prefetch_related('roles__creator')
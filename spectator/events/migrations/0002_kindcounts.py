@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:45
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from spectator.core.counters import rebuild
+
+
+def count_events(apps, schema_editor):
+    rebuild(apps.get_model('spectator_events', 'Event'),
+            kind_field='kind',
+            count_model=apps.get_model('spectator_core', 'KindCount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_core', '0002_kindcount'),
+        ('spectator_events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:45
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def _join(titles):
+    "'A, B and C'"
+    if len(titles) == 1:
+        return titles[0]
+    return '{} and {}'.format(', '.join(titles[:-1]), titles[-1])
+
+
+def set_display_titles(apps, schema_editor):
+    """
+    A copy of Event.make_display_title() as it is now, because the
+    historical models don't have their methods.
+    """
+    Event = apps.get_model('spectator_events', 'Event')
+
+    events = Event.objects.select_related('movie', 'play')\
+                    .prefetch_related('classicalworks', 'dancepieces',
+                                                            'roles__creator')
+    for event in events:
+        if event.title:
+            title = event.title
+        elif event.kind == 'concert':
+            works = [w.title for w in event.classicalworks.all()]
+            title = _join(works) if works else 'Concert #{}'.format(event.pk)
+        elif event.kind == 'dance':
+            pieces = [p.title for p in event.dancepieces.all()]
+            title = _join(pieces) if pieces else 'Dance #{}'.format(event.pk)
+        elif event.kind == 'movie':
+            if event.movie is None:
+                title = 'None'
+            elif event.movie.year:
+                title = '{} ({})'.format(event.movie.title, event.movie.year)
+            else:
+                title = event.movie.title
+        elif event.kind == 'play':
+            title = event.play.title if event.play else 'None'
+        else:
+            roles = sorted(event.roles.all(),
+                                    key=lambda r: (r.role_order, r.role_name))
+            names = [r.creator.name for r in roles]
+            title = _join(names) if names else 'Event #{}'.format(event.pk)
+
+        Event.objects.filter(pk=event.pk).update(display_title=title)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_events', '0002_kindcounts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='display_title',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Set when the event is saved, or when its creators, works, movie or play change.', max_length=255),
+        ),
+        migrations.RunPython(set_display_titles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:50
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from spectator.core.credits import rebuild
+
+
+def make_credits(apps, schema_editor):
+    rebuild(role_models=[apps.get_model('spectator_events', 'EventRole'),
+                         apps.get_model('spectator_events', 'ClassicalWorkRole'),
+                         apps.get_model('spectator_events', 'DancePieceRole'),
+                         apps.get_model('spectator_events', 'MovieRole'),
+                         apps.get_model('spectator_events', 'PlayRole')],
+            credit_model=apps.get_model('spectator_core', 'CreatorCredit'),
+            content_type_model=apps.get_model('contenttypes', 'ContentType'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_core', '0003_creatorcredit'),
+        ('spectator_events', '0003_event_display_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(make_credits, migrations.RunPython.noop),
+    ]
@@ -13,6 +13,7 @@ except ImportError:
 
 from spectator.core.models import BaseRole, TimeStampedModelMixin
 from spectator.core.fields import NaturalSortField
+from .managers import EventQuerySet, WorkQuerySet
 
 
 class EventRole(BaseRole):
@@ -20,8 +21,9 @@ class EventRole(BaseRole):
     Through model for linking a Creator to an Event, optionally via their role
     (e.g. 'Headliner', 'Support', 'Pianist', 'Actor', etc.)
 
-    Every time one of these is saved/deleted a signal re-saves the Event
-    in case its `title_sort` needs to change.
+    Every time one of these is saved/deleted a signal marks the Event so that
+    its `display_title` and `title_sort` are recalculated when the
+    transaction is committed. See spectator.events.titles.
     """
     creator = models.ForeignKey('spectator_core.Creator', blank=False,
                         on_delete=models.CASCADE, related_name='event_roles')
@@ -71,6 +73,11 @@ class Event(TimeStampedModelMixin, models.Model):
     title_sort = NaturalSortField('title_to_sort', max_length=255, default='',
             help_text="e.g. 'reading festival, the' or 'drifters, the'.")
 
+    display_title = models.CharField(null=False, blank=True, max_length=255,
+            default='', editable=False,
+            help_text="Set when the event is saved, or when its creators, "
+                        "works, movie or play change.")
+
     creators = models.ManyToManyField('spectator_core.Creator',
                                 through='EventRole', related_name='events')
 
@@ -91,10 +98,28 @@ class Event(TimeStampedModelMixin, models.Model):
     kind_slug = models.SlugField(null=False, blank=True,
             help_text="Set when the event is saved.")
 
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date',]
 
     def __str__(self):
+        if self.title:
+            return self.title
+        elif self.display_title:
+            return self.display_title
+        else:
+            return self.make_display_title()
+
+    def make_display_title(self):
+        """
+        Work out the title to display for this Event. Uses its title if it
+        has one. Otherwise, depending on its kind, uses the titles of its
+        works, its Movie or Play, or the names of its Creators.
+
+        This queries the database, so mostly you'll want `display_title`
+        (or `str(event)`) instead, which is set whenever the Event is saved.
+        """
         if self.title:
             return self.title
         else:
@@ -142,9 +167,19 @@ class Event(TimeStampedModelMixin, models.Model):
                                             roles[-1])
 
     def save(self, *args, **kwargs):
+        adding = self.pk is None
         self.kind_slug = self.KIND_SLUGS[self.kind]
+        self.display_title = self.make_display_title()
         super().save(*args, **kwargs)
 
+        if adding and not self.title:
+            # Default titles include the pk, which we didn't have until now.
+            display_title = self.make_display_title()
+            if display_title != self.display_title:
+                self.display_title = display_title
+                super().save(using=kwargs.get('using'),
+                            update_fields=['display_title', 'title_sort'])
+
     def get_absolute_url(self):
         """
         Standard Events behave as you'd expect; their absolute_url is a page
@@ -250,11 +285,14 @@ class Work(TimeStampedModelMixin, models.Model):
         for ev in piece.event_set.all():
             print(ev.venue, ev.date)
     """
-    title = models.CharField(null=False, blank=False, max_length=255)
+    title = models.CharField(null=False, blank=False, max_length=255,
+                                                                db_index=True)
 
     title_sort = NaturalSortField('title', max_length=255, default='',
             help_text="e.g. 'big piece, a' or 'biggest piece, the'.")
 
+    objects = WorkQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -646,7 +684,8 @@ class Venue(TimeStampedModelMixin, models.Model):
 
     COUNTRY_CHOICES = [(k,v) for k,v in COUNTRIES.items()]
 
-    name = models.CharField(null=False, blank=False, max_length=255)
+    name = models.CharField(null=False, blank=False, max_length=255,
+                                                                db_index=True)
 
     name_sort = NaturalSortField('name', max_length=255, default='',
             help_text="e.g. 'venue, a' or 'biggest venue, the'.")
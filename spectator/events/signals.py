@@ -1,15 +1,137 @@
-from django.db.models.signals import post_delete, post_save
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save,\
+        pre_delete
 from django.dispatch import receiver
 
-from .models import EventRole
+from spectator.core import autocomplete, counters, exporting, surrogates,\
+        versions, years
+from spectator.core.models import Creator
+from .models import ClassicalWork, DancePiece, Event, EventRole, Movie, Play,\
+        Venue
+from .titles import mark_events_changed
+
+
+counters.register(Event)
+
+years.register(Event, 'date')
+
+autocomplete.register(Venue, 'name')
+for model in (ClassicalWork, DancePiece, Movie, Play):
+    autocomplete.register(model, 'title')
+
+versions.register(*apps.get_app_config('spectator_events').get_models())
+
+surrogates.register(*apps.get_app_config('spectator_events').get_models())
+
+exporting.register(Venue, Movie, Play, ClassicalWork, DancePiece, Event)
 
 
 @receiver(post_delete, sender=EventRole, dispatch_uid='spectator.delete.event_role')
 @receiver(post_save, sender=EventRole, dispatch_uid='spectator.save.event_role')
-def eventrole_changed(sender, **kwargs):
+def eventrole_changed(sender, instance, using, **kwargs):
     """
-    When an Event's creators are changed we want to re-save the Event
-    itself so that its title_sort can be recreated if necessary
+    When an Event's creators are changed its display_title and title_sort
+    may need recreating. That's done once per Event when the transaction is
+    committed, however many of its roles change.
+
+    We use event_id so as not to fetch Events that are being deleted.
     """
-    kwargs['instance'].event.save()
+    mark_events_changed([instance.event_id], using=using)
+    _touch_event_years(Event.objects.filter(pk=instance.event_id))
+
+    # If we have the Event in memory, make sure it's not showing the old
+    # title in the meantime:
+    event = getattr(instance,
+                EventRole._meta.get_field('event').get_cache_name(), None)
+    if event is not None:
+        event.display_title = ''
+
+
+@receiver(m2m_changed, sender=Event.classicalworks.through,
+                            dispatch_uid='spectator.m2m.event_classicalworks')
+@receiver(m2m_changed, sender=Event.dancepieces.through,
+                            dispatch_uid='spectator.m2m.event_dancepieces')
+def event_works_changed(sender, instance, action, reverse, pk_set, using,
+                                                                    **kwargs):
+    """
+    When an Event's ClassicalWorks or DancePieces are changed its title may
+    need to change.
+
+    `instance` is an Event, or a work if the change was made from the work's
+    side, in which case `pk_set` contains the Events' pks.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            mark_events_changed([instance.pk], using=using)
+            instance.display_title = ''
+
+    elif action == 'pre_clear':
+        # After the clear we won't know which Events were affected.
+        instance._spectator_cleared_event_ids = list(
+                            instance.event_set.values_list('pk', flat=True))
+
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_spectator_cleared_event_ids', [])
+        mark_events_changed(pk_set, using=using)
+
+
+@receiver(pre_delete, sender=ClassicalWork, dispatch_uid='spectator.pre_delete.classical_work')
+@receiver(pre_delete, sender=DancePiece, dispatch_uid='spectator.pre_delete.dance_piece')
+def work_deleting(sender, instance, **kwargs):
+    """
+    Deleting a work deletes its Events' links to it without m2m_changed,
+    and afterwards we won't know which Events they were.
+    """
+    instance._spectator_deleted_event_ids = list(
+                            instance.event_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=ClassicalWork, dispatch_uid='spectator.delete.classical_work')
+@receiver(post_delete, sender=DancePiece, dispatch_uid='spectator.delete.dance_piece')
+def work_deleted(sender, instance, using, **kwargs):
+    "The Events that used a deleted work need new titles."
+    event_ids = getattr(instance, '_spectator_deleted_event_ids', [])
+    mark_events_changed(event_ids, using=using)
+    _touch_event_years(Event.objects.filter(pk__in=event_ids))
+
+
+@receiver(post_save, sender=ClassicalWork, dispatch_uid='spectator.save.classical_work')
+@receiver(post_save, sender=DancePiece, dispatch_uid='spectator.save.dance_piece')
+@receiver(post_save, sender=Movie, dispatch_uid='spectator.save.movie')
+@receiver(post_save, sender=Play, dispatch_uid='spectator.save.play')
+def work_changed(sender, instance, created, using, **kwargs):
+    """
+    When a work's title changes, so do the titles of untitled Events that
+    use it. And it's displayed with all of them on their years' pages.
+    """
+    if not created:
+        mark_events_changed(instance.event_set.filter(title='')\
+                                .values_list('pk', flat=True), using=using)
+        _touch_event_years(instance.event_set.all())
+
+
+@receiver(post_save, sender=Creator, dispatch_uid='spectator.save.event_creator')
+def creator_changed(sender, instance, created, using, **kwargs):
+    """
+    When a Creator is renamed, so are the untitled Events named after them.
+    And they're displayed with all of their Events on their years' pages.
+    """
+    if not created:
+        mark_events_changed(instance.events.filter(title='')\
+                                .values_list('pk', flat=True), using=using)
+        _touch_event_years(instance.events.all())
+
+
+@receiver(post_save, sender=Venue, dispatch_uid='spectator.save.event_venue')
+def venue_changed(sender, instance, created, **kwargs):
+    "A Venue is displayed with its Events on their years' pages."
+    if not created:
+        _touch_event_years(instance.event_set.all())
+
 
+def _touch_event_years(events):
+    "Change the cache versions of the years of these Events."
+    event_years = {d.year for d in events.dates('date', 'year')}
+    if event_years:
+        years.touch_years(Event, event_years)
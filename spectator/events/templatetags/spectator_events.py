@@ -1,6 +1,8 @@
 from django import template
 
-from ..models import Event
+from spectator.core import years
+from spectator.core.versions import cached_inclusion_tag
+from ..models import Event, EventRole, Movie, Venue
 
 
 register = template.Library()
@@ -54,10 +56,12 @@ def recent_events(num=10):
     Returns a QuerySet of Events that happened recently.
     `num` is the number returned.
     """
-    return Event.objects.select_related('venue').order_by('-date')[:num]
+    return Event.objects.for_display().order_by('-date')[:num]
 
 
-@register.inclusion_tag('spectator_events/includes/card_events.html')
+@cached_inclusion_tag(register,
+                'spectator_events/includes/card_events.html',
+                [Event, EventRole, Movie, Venue])
 def recent_events_card(num=10):
     """
     Displays Events that happened recently.
@@ -74,10 +78,12 @@ def day_events(date):
     Returns a QuerySet of Events that happened on the supplied date.
     `date` is a date object.
     """
-    return Event.objects.filter(date=date).select_related('venue')
+    return Event.objects.filter(date=date).for_display()
 
 
-@register.inclusion_tag('spectator_events/includes/card_events.html')
+@cached_inclusion_tag(register,
+                'spectator_events/includes/card_events.html',
+                [Event, EventRole, Movie, Venue])
 def day_events_card(date):
     """
     Displays Events that happened on the supplied date.
@@ -93,13 +99,14 @@ def day_events_card(date):
 @register.assignment_tag
 def events_years():
     """
-    Returns a QuerySet of date objects, one for each year in which there are
+    Returns a list of date objects, one for each year in which there are
     Events.
     """
-    return Event.objects.dates('date', 'year')
+    return years.get_year_dates(Event)
 
 
-@register.inclusion_tag('spectator_events/includes/card_years.html')
+@cached_inclusion_tag(register,
+                'spectator_events/includes/card_years.html', [Event])
 def events_years_card(current_year=None):
     """
     Displays a card showing all years in which we have Events, with a link to
@@ -0,0 +1,141 @@
+"""
+Recalculating Events' display_title and title_sort when the things they're
+made from (roles, works, movies, plays, creators) change.
+
+Rather than re-saving an Event every time one of its EventRoles is saved,
+the signals in spectator.events.signals call mark_events_changed(). The
+Events' ids are collected and their titles are recalculated once, in bulk,
+when the current transaction is committed.
+
+During bulk changes recalculation can be put off until the end:
+
+    with suspended_title_updates():
+        for row in rows:
+            EventRole.objects.create(...)
+"""
+import collections
+import threading
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models import Case, Value, When
+
+from spectator.core import pending, versions, years
+
+
+# How many Events to fetch and update at a time:
+CHUNK_SIZE = 500
+
+_local = threading.local()
+
+
+def mark_events_changed(event_ids, using=None):
+    """
+    Recalculate the titles of the Events with these ids once the current
+    transaction is committed (or now, if we're not in a transaction).
+
+    Ids of Events that have since been deleted are ignored.
+    """
+    event_ids = set(event_ids)
+    if not event_ids:
+        return
+
+    if getattr(_local, 'suspended', 0) > 0:
+        _local.suspended_ids[using or DEFAULT_DB_ALIAS].update(event_ids)
+        return
+
+    pending_events = _PendingEvents.get(using)
+    pending_events.event_ids.update(event_ids)
+    pending_events.schedule()
+
+
+@contextmanager
+def suspended_title_updates():
+    """
+    Don't recalculate any titles until the end of the block, then do them
+    all at once. Can be nested.
+    """
+    if getattr(_local, 'suspended', 0) == 0:
+        # Maps database aliases to sets of Event ids:
+        _local.suspended_ids = collections.defaultdict(set)
+    _local.suspended = getattr(_local, 'suspended', 0) + 1
+    try:
+        yield
+    finally:
+        _local.suspended -= 1
+        if _local.suspended == 0:
+            suspended_ids = _local.suspended_ids
+            _local.suspended_ids = collections.defaultdict(set)
+            for using, event_ids in suspended_ids.items():
+                mark_events_changed(event_ids, using=using)
+
+
+def update_titles(event_ids, using=None):
+    """
+    Recalculate and save the display_title and title_sort of these Events,
+    with one UPDATE for each chunk of Events whose titles have changed.
+    And change Event's cache version, and those of the years the Events
+    are in.
+    """
+    from .models import Event
+
+    using = using or DEFAULT_DB_ALIAS
+    event_ids = sorted(event_ids)
+    sort_field = Event._meta.get_field('title_sort')
+    changed_ids = []
+    changed_years = set()
+
+    for i in range(0, len(event_ids), CHUNK_SIZE):
+        events = Event.objects.using(using)\
+                        .filter(pk__in=event_ids[i:i+CHUNK_SIZE])\
+                        .select_related('movie', 'play')\
+                        .prefetch_related('classicalworks', 'dancepieces',
+                                                            'roles__creator')
+        display_titles = {}
+        title_sorts = {}
+        for event in events:
+            display_title = event.make_display_title()
+            if display_title != event.display_title:
+                event.display_title = display_title
+                display_titles[event.pk] = display_title
+            title_sort = sort_field.pre_save(event, False)
+            if title_sort != event.title_sort:
+                title_sorts[event.pk] = title_sort
+            # A new title_sort alone can move the Event in lists:
+            if event.pk in display_titles or event.pk in title_sorts:
+                changed_ids.append(event.pk)
+                if event.date is not None:
+                    changed_years.add(event.date.year)
+
+        if display_titles:
+            Event.objects.using(using).filter(pk__in=display_titles.keys())\
+                    .update(display_title=_case(display_titles))
+        if title_sorts:
+            Event.objects.using(using).filter(pk__in=title_sorts.keys())\
+                    .update(title_sort=_case(title_sorts))
+
+    if changed_ids:
+        years.touch_years(Event, changed_years, using=using)
+        versions.bump(Event, changed_ids, using=using)
+
+
+def _case(values):
+    "A CASE expression setting each pk in the dict `values` to its value."
+    return Case(*[When(pk=pk, then=Value(v)) for pk, v in values.items()],
+                output_field=models.CharField())
+
+
+class _PendingEvents(pending.Pending):
+    """
+    The ids of Events to update when a connection's transaction commits.
+    Call it to do the update.
+    """
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.event_ids = set()
+
+    def __call__(self):
+        event_ids = self.event_ids
+        self.event_ids = set()
+        update_titles(event_ids, using=self.using)
@@ -1,6 +1,8 @@
 from django.conf.urls import url
 
+from spectator.core.views import AutocompleteView
 from . import views
+from .models import ClassicalWork, DancePiece, Movie, Play, Venue
 
 
 # This should be under the namespace 'spectator:events'.
@@ -17,6 +19,11 @@ urlpatterns = [
         view=views.VenueListView.as_view(),
         name='venue_list',
     ),
+    url(
+        regex=r"^venues/autocomplete/$",
+        view=AutocompleteView.as_view(model=Venue),
+        name='venue_autocomplete'
+    ),
     url(
         regex=r"^venues/(?P<pk>\d+)/$",
         view=views.VenueDetailView.as_view(),
@@ -29,6 +36,17 @@ urlpatterns = [
         name='event_year_archive'
     ),
 
+    url(
+        regex=r"^movies/autocomplete/$",
+        view=AutocompleteView.as_view(model=Movie),
+        name='movie_autocomplete'
+    ),
+    url(
+        regex=r"^plays/autocomplete/$",
+        view=AutocompleteView.as_view(model=Play),
+        name='play_autocomplete'
+    ),
+
     url(
         regex=r"^(?P<kind_slug>[-\w]+)/$",
         view=views.EventListView.as_view(),
@@ -39,28 +57,58 @@ urlpatterns = [
         view=views.EventDetailView.as_view(),
         name='event_detail'
     ),
+    url(
+        regex=r"^movies/(?P<pk>\d+)/events/$",
+        view=views.WorkEventsView.as_view(model=Movie),
+        name='movie_events'
+    ),
+    url(
+        regex=r"^plays/(?P<pk>\d+)/events/$",
+        view=views.WorkEventsView.as_view(model=Play),
+        name='play_events'
+    ),
 
     url(
         regex=r"^concerts/works/$",
         view=views.ClassicalWorkListView.as_view(),
         name='classicalwork_list'
     ),
+    url(
+        regex=r"^concerts/works/autocomplete/$",
+        view=AutocompleteView.as_view(model=ClassicalWork),
+        name='classicalwork_autocomplete'
+    ),
     url(
         regex=r"^concerts/works/(?P<pk>\d+)/$",
         view=views.ClassicalWorkDetailView.as_view(),
         name='classicalwork_detail'
     ),
+    url(
+        regex=r"^concerts/works/(?P<pk>\d+)/events/$",
+        view=views.WorkEventsView.as_view(model=ClassicalWork),
+        name='classicalwork_events'
+    ),
 
     url(
         regex=r"^dance/pieces/$",
         view=views.DancePieceListView.as_view(),
         name='dancepiece_list'
     ),
+    url(
+        regex=r"^dance/pieces/autocomplete/$",
+        view=AutocompleteView.as_view(model=DancePiece),
+        name='dancepiece_autocomplete'
+    ),
     url(
         regex=r"^dance/pieces/(?P<pk>\d+)/$",
         view=views.DancePieceDetailView.as_view(),
         name='dancepiece_detail'
     ),
+    url(
+        regex=r"^dance/pieces/(?P<pk>\d+)/events/$",
+        view=views.WorkEventsView.as_view(model=DancePiece),
+        name='dancepiece_events'
+    ),
 ]
 
 
@@ -1,7 +1,4 @@
-from django.db.models import Min
 from django.http import Http404
-from django.utils.encoding import force_text
-from django.utils.translation import ugettext as _
 from django.conf import settings
 from django.views.generic import DetailView, ListView, YearArchiveView
 from django.views.generic.detail import SingleObjectMixin
@@ -12,8 +9,36 @@ except ImportError:
     # Django < 1.10
     from django.core.urlresolvers import reverse
 
-from spectator.core.views import PaginatedListView
-from .models import ClassicalWork, DancePiece, Event, Movie, Play, Venue
+from spectator.core import counters
+from spectator.core.paginator import CachedCount, NoCount
+from spectator.core.views import ConditionalResponseMixin, FragmentMixin,\
+        PaginatedListView, SurrogateKeyMixin, YearCacheMixin, YearIndexMixin,\
+        get_section_size
+from .models import ClassicalWork, DancePiece, Event, EventRole, Movie,\
+        Play, Venue
+
+
+class VisitsMixin(object):
+    """
+    For detail views of works (ClassicalWorks, DancePieces, Movies, Plays).
+    Adds `visit_list`, the first few Events at which the work was seen,
+    and `more_visits_url`, a link to WorkEventsView, if there are more.
+    """
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        work = self.object
+        if isinstance(work, (ClassicalWork, DancePiece, Movie, Play)):
+            size = get_section_size()
+            # Get one more than we need so we know if there are more:
+            events = list(work.event_set.for_display().with_creators()
+                                                                [:size+1])
+            context['visit_list'] = events[:size]
+            if len(events) > size:
+                context['more_visits_url'] = reverse(
+                        'spectator:events:{}_events'.format(
+                                                    work._meta.model_name),
+                        kwargs={'pk': work.pk})
+        return context
 
 
 class EventListView(PaginatedListView):
@@ -24,6 +49,7 @@ class EventListView(PaginatedListView):
     """
     model = Event
     ordering = ['-date',]
+    count_strategy = CachedCount(models=[Event])
 
     def get(self, request, *args, **kwargs):
         slug = self.kwargs.get('kind_slug', None)
@@ -49,14 +75,9 @@ class EventListView(PaginatedListView):
                 'movie': 12,
                 'gig': 10,
             }}
+        All the counts come from a single query of the counter table.
         """
-        counts = {'all': Event.objects.count(),}
-
-        for k,v in Event.KIND_CHOICES:
-            # e.g. 'movie_count':
-            counts[k] = Event.objects.filter(kind=k).count()
-
-        return {'counts': counts,}
+        return {'counts': counters.get_counts(Event),}
 
     def get_event_kind(self):
         """
@@ -78,12 +99,13 @@ class EventListView(PaginatedListView):
         if kind is not None:
             qs = qs.filter(kind=kind)
 
-        qs = qs.select_related('venue')
+        qs = qs.for_display()
 
         return qs
 
 
-class EventDetailView(DetailView):
+class EventDetailView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                    VisitsMixin, DetailView):
     """
     For simple events, like Gigs and Misc, it's a standard EventDetail view.
 
@@ -118,39 +140,21 @@ class EventDetailView(DetailView):
         return slugs_to_kinds.get(slug, None)
 
 
-class EventYearArchiveView(YearArchiveView):
+class EventYearArchiveView(YearCacheMixin, YearIndexMixin, YearArchiveView):
     allow_empty = True
     date_field = 'date'
     make_object_list = True
     model = Event
     ordering = 'date'
+    # Those shown in the sidebar's cards:
+    versioned_models = [Event, EventRole, Movie, Venue]
 
     def get_queryset(self):
         "Reduce the number of queries and speed things up."
         qs = super().get_queryset()
-        qs = qs.select_related('venue')
+        qs = qs.for_display()
         return qs
 
-    def get_dated_items(self):
-        items, qs, info = super().get_dated_items()
-
-        if 'year' in info and info['year']:
-            # Get the earliest date we have an Event for:
-            date_min = Event.objects.aggregate(Min('date'))['date__min']
-            # Make it a 'yyyy-01-01' date:
-            min_year_date = date_min.replace(month=1, day=1)
-            if info['year'] < min_year_date:
-                # The year we're viewing is before our minimum date, so 404.
-                raise Http404(_("No %(verbose_name_plural)s available") % {
-                    'verbose_name_plural': force_text(qs.model._meta.verbose_name_plural)
-                })
-            elif info['year'] == min_year_date:
-                # This is the earliest year we have events for, so
-                # there is no previous year.
-                info['previous_year'] = None
-
-        return items, qs, info
-
 
 # CLASSICAL WORK, DANCE PIECE, MOVIE AND PLAY LISTS/DETAILS.
 
@@ -160,19 +164,21 @@ class WorkListView(PaginatedListView):
     """
     def get_queryset(self):
         qs = super().get_queryset()
-        qs = qs.prefetch_related('roles__creator')
+        qs = qs.for_display()
         return qs
 
 class MovieListView(WorkListView):
     model = Movie
 
-class MovieDetailView(DetailView):
+class MovieDetailView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                                DetailView):
     model = Movie
 
 class PlayListView(WorkListView):
     model = Play
 
-class PlayDetailView(DetailView):
+class PlayDetailView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                                DetailView):
     model = Play
 
 class ClassicalWorkListView(WorkListView):
@@ -184,7 +190,8 @@ class ClassicalWorkListView(WorkListView):
         context['page_title'] = 'Classical works'
         return context
 
-class ClassicalWorkDetailView(DetailView):
+class ClassicalWorkDetailView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                    VisitsMixin, DetailView):
     model = ClassicalWork
     template_name = 'spectator_events/m2m_work_detail.html'
 
@@ -204,7 +211,8 @@ class DancePieceListView(WorkListView):
         context['page_title'] = 'Dance pieces'
         return context
 
-class DancePieceDetailView(DetailView):
+class DancePieceDetailView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                    VisitsMixin, DetailView):
     model = DancePiece
     template_name = 'spectator_events/m2m_work_detail.html'
 
@@ -216,6 +224,31 @@ class DancePieceDetailView(DetailView):
         return context
 
 
+class WorkEventsView(FragmentMixin, SingleObjectMixin, PaginatedListView):
+    """
+    A paginated list of the Events at which a work was seen.
+    Set `model` to ClassicalWork, DancePiece, Movie or Play in `as_view()`.
+    """
+    template_name = 'spectator_events/work_events.html'
+    fragment_template_name = \
+                        'spectator_events/includes/visits_list_paginated.html'
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object(
+                                queryset=self.model._default_manager.all())
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['work'] = self.object
+        context['event_list'] = context['object_list']
+        return context
+
+    def get_queryset(self):
+        return self.object.event_set.for_display().with_creators()\
+                                                        .order_by('-date')
+
+
 # VENUES
 
 class VenueListView(PaginatedListView):
@@ -225,6 +258,8 @@ class VenueListView(PaginatedListView):
 
 class VenueDetailView(SingleObjectMixin, PaginatedListView):
     template_name = 'spectator_events/venue_detail.html'
+    # There are too many Venues to make caching their counts worthwhile:
+    count_strategy = NoCount()
 
     def get(self, request, *args, **kwargs):
         self.object = self.get_object(queryset=Venue.objects.all())
@@ -240,6 +275,6 @@ class VenueDetailView(SingleObjectMixin, PaginatedListView):
         return context
 
     def get_queryset(self):
-        return self.object.event_set.order_by('-date')
+        return self.object.event_set.for_display().order_by('-date')
 
 
@@ -1,26 +1,31 @@
 from django.contrib import admin
 
+from spectator.core.admin import AutocompleteAdminMixin,\
+        AutocompleteFieldsMixin, AutocompleteListFilter, CountAdminMixin
+from spectator.core.widgets import AutocompleteSelect
 from .models import Publication, PublicationRole, PublicationSeries, Reading
 
 
-class ReadingInline(admin.TabularInline):
+class ReadingInline(AutocompleteFieldsMixin, admin.TabularInline):
     model = Reading
     fields = ('publication', 'start_date', 'end_date', 'is_finished',
                         'start_granularity', 'end_granularity',)
-    raw_id_fields = ('publication',)
+    autocomplete_fields = ('publication',)
     extra = 1
 
 
-class PublicationRoleInline(admin.TabularInline):
+class PublicationRoleInline(AutocompleteFieldsMixin, admin.TabularInline):
     model = PublicationRole
     fields = ( 'creator', 'role_name', 'role_order',)
-    raw_id_fields = ('creator',)
+    autocomplete_fields = ('creator',)
     extra = 1
 
 
 @admin.register(PublicationSeries)
-class PublicationSeriesAdmin(admin.ModelAdmin):
+class PublicationSeriesAdmin(AutocompleteAdminMixin, CountAdminMixin,
+                                                        admin.ModelAdmin):
     list_display = ('title',)
+    search_fields = ('title',)
 
     fieldsets = (
         (None, {
@@ -36,9 +41,10 @@ class PublicationSeriesAdmin(admin.ModelAdmin):
 
 
 @admin.register(Publication)
-class PublicationAdmin(admin.ModelAdmin):
+class PublicationAdmin(AutocompleteAdminMixin, AutocompleteFieldsMixin,
+                                        CountAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'kind', 'show_creators', 'series', )
-    list_filter = ('kind', 'series', )
+    list_filter = ('kind', ('series', AutocompleteListFilter), )
     search_fields = ('title',)
     list_select_related = ('series',)
 
@@ -54,11 +60,21 @@ class PublicationAdmin(admin.ModelAdmin):
         }),
     )
 
+    autocomplete_fields = ('series',)
     radio_fields = {'kind': admin.HORIZONTAL}
     readonly_fields = ('title_sort', 'time_created', 'time_modified',)
 
     inlines = [ PublicationRoleInline, ReadingInline, ]
 
+    class Media:
+        # For the series list filter:
+        css = AutocompleteSelect.Media.css
+        js = AutocompleteSelect.Media.js
+
+    def get_queryset(self, request):
+        "For show_creators()."
+        return super().get_queryset(request).prefetch_related('roles__creator')
+
     def show_creators(self, instance):
         names = [ str(r.creator) for r in instance.roles.all() ]
         if names:
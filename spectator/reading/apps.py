@@ -6,3 +6,5 @@ class SpectatorReadingAppConfig(AppConfig):
     name = 'spectator.reading'
     verbose_name = 'Spectator Reading'
 
+    def ready(self):
+        import spectator.reading.signals
@@ -0,0 +1,532 @@
+"""
+Importing a reading history from a CSV file exported by Goodreads or The
+StoryGraph:
+
+    with open('goodreads_library_export.csv', newline='') as f:
+        reader = csv.DictReader(f)
+        parse_row = PARSERS[detect_format(reader.fieldnames)]
+        result = import_readings(enumerate(reader, 1), parse_row)
+
+Each batch of rows is imported in one transaction, as described in
+spectator.core.importing:
+
+* Publications are found by any of their ISBNs (isbn_uk or isbn_us, in
+  either their 10 or 13 digit forms), or else by their naturalized title if
+  either the row or the Publication has no ISBN.
+  Those that don't exist are created, with their PublicationSeries (from
+  Goodreads titles like 'Leviathan Wakes (The Expanse, #1)'), Creators,
+  PublicationRoles and CreatorCredits. Existing Publications keep their
+  Creators.
+* Readings are made with bulk_create(), except those a Publication already
+  has. A Reading that's in progress is finished if the row has an end date
+  for it.
+
+After the last batch the counts of Publications' and Creators' kinds, and
+Readings' years, are rebuilt, and the versions, and surrogate keys, of
+everything involved are changed.
+"""
+import collections
+import datetime
+import functools
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+
+from spectator.core import counters, credits, years
+from spectator.core.importing import BATCH_SIZE, CHUNK_SIZE, CreatorResolver,\
+        Resolver, Result, RowError, add_changed, bulk_create_with_pks,\
+        exclude_imported, get_text, import_rows, read_csv, record_imported,\
+        touch
+from spectator.core.models import Creator, CreatorCredit
+from .models import Publication, PublicationRole, PublicationSeries, Reading
+
+
+# Identifies rows imported as Publications in their hashes:
+LABEL = 'spectator_reading.Publication'
+
+# Reading.DATE_GRANULARITIES for dates like '2017/06/01', '2017/06', '2017':
+DAY, MONTH, YEAR = 3, 4, 6
+
+_date_re = re.compile(r'^(\d{4})(?:[/-](\d{1,2})(?:[/-](\d{1,2}))?)?$')
+
+# StoryGraph's date ranges, like '2021/05/01-2021/05/20' or '2021/05/01-':
+_range_re = re.compile(r'^([\d/]*)\s*-\s*([\d/]*)$')
+
+# Goodreads' titles include their series, like 'Leviathan Wakes (The
+# Expanse, #1)':
+_series_re = re.compile(r'^(.+?)\s+\(([^()]+?),?\s+#[^()]*\)$')
+
+# StoryGraph's contributors, like 'Jane Doe (Translator)':
+_role_re = re.compile(r'^(.+?)\s*\(([^()]+)\)$')
+
+
+def detect_format(fieldnames):
+    """
+    The key in PARSERS of the format of a CSV file with these column names,
+    or None if we don't recognise it.
+    """
+    fieldnames = set(fieldnames or [])
+    if {'Title', 'Author', 'Exclusive Shelf'} <= fieldnames:
+        return 'goodreads'
+    elif {'Title', 'Authors', 'Read Status'} <= fieldnames:
+        return 'storygraph'
+    return None
+
+
+def parse_goodreads_row(data):
+    """
+    Checks and tidies a row of a Goodreads export, returning a dict like:
+
+        {'title': 'Leviathan Wakes', 'series': 'The Expanse',
+         'isbn': '0316129089',
+         'creators': [{'name': 'James S.A. Corey', 'role': '', 'kind': None}],
+         'readings': [{'start_date': None, 'start_granularity': 3,
+                       'end_date': '2017-06-01', 'end_granularity': 3,
+                       'is_finished': True}]}
+
+    Raises RowError if it can't be imported.
+
+    Books on the 'currently-reading' shelf are started on the date they were
+    added, as Goodreads doesn't export the date they were started.
+    """
+    title, series = _get_title(data)
+    names = [get_text(data, 'Author')]
+    names += get_text(data, 'Additional Authors', max_length=10000).split(',')
+
+    date_read = _parse_date(get_text(data, 'Date Read'))
+    shelf = get_text(data, 'Exclusive Shelf').lower()
+    if shelf == 'read':
+        readings = [_make_reading(end=date_read)]
+    elif shelf == 'currently-reading':
+        start = _parse_date(get_text(data, 'Date Added'))
+        readings = [_make_reading(start=start, is_finished=False)]
+    elif shelf in ('did-not-finish', 'dnf', 'abandoned'):
+        readings = [_make_reading(end=date_read, is_finished=False)]
+    elif shelf == 'to-read':
+        readings = []
+    else:
+        raise RowError('Unknown Exclusive Shelf: {!r}.'.format(shelf))
+
+    return {
+        'title': title,
+        'series': series,
+        'isbn': _get_isbn(data, 'ISBN', 'ISBN13'),
+        'creators': _make_creators([(name, '') for name in names]),
+        'readings': readings,
+    }
+
+
+def parse_storygraph_row(data):
+    """
+    Checks and tidies a row of a StoryGraph export, returning a dict like
+    parse_goodreads_row() does.
+
+    Books that are 'currently-reading' without a start date in 'Dates Read'
+    are started on the date they were added.
+    """
+    title, series = get_text(data, 'Title'), ''
+    if not title:
+        raise RowError('Publications need a title.')
+
+    creators = [(name, '') for name in
+                get_text(data, 'Authors', max_length=10000).split(',')]
+    for contributor in get_text(data, 'Contributors',
+                                            max_length=10000).split(','):
+        match = _role_re.match(contributor.strip())
+        if match:
+            creators.append((match.group(1), match.group(2)))
+        else:
+            creators.append((contributor, ''))
+
+    status = get_text(data, 'Read Status').lower()
+    readings = []
+    if status in ('read', 'currently-reading', 'did-not-finish'):
+        is_finished = (status != 'did-not-finish')
+        for text in get_text(data, 'Dates Read', max_length=10000).split(','):
+            if not text.strip():
+                continue
+            match = _range_re.match(text.strip())
+            if match:
+                start, end = match.groups()
+            else:
+                start, end = '', text
+            readings.append(_make_reading(start=_parse_date(start),
+                                          end=_parse_date(end),
+                                          is_finished=is_finished))
+        if not readings:
+            if status == 'currently-reading':
+                start = _parse_date(get_text(data, 'Date Added'))
+                readings.append(_make_reading(start=start, is_finished=False))
+            else:
+                end = _parse_date(get_text(data, 'Last Date Read'))
+                readings.append(_make_reading(end=end,
+                                              is_finished=is_finished))
+        if status == 'currently-reading':
+            # Only the latest is in progress:
+            readings[-1]['is_finished'] = False
+    elif status != 'to-read':
+        raise RowError('Unknown Read Status: {!r}.'.format(status))
+
+    return {
+        'title': title,
+        'series': series,
+        'isbn': _get_isbn(data, 'ISBN/UID'),
+        'creators': _make_creators(creators),
+        'readings': readings,
+    }
+
+
+# Maps formats from detect_format() to their row parsers:
+PARSERS = {
+    'goodreads': parse_goodreads_row,
+    'storygraph': parse_storygraph_row,
+}
+
+
+def import_readings(rows, parse_row, batch_size=BATCH_SIZE,
+                                                    isbn_field='isbn_uk'):
+    """
+    Imports Publications and their Readings from `rows`, an iterable of
+    (row number, data) tuples like those from read_csv(). Invalid rows, and
+    rows that have already been imported, are skipped. Returns a Result.
+
+    parse_row -- One of the PARSERS, e.g. parse_goodreads_row.
+    isbn_field -- The field in which to save new Publications' ISBNs,
+        'isbn_uk' or 'isbn_us'.
+    """
+    resolvers = {
+        'series': Resolver(PublicationSeries, 'title_sort'),
+        'publication': PublicationResolver(),
+        'creator': CreatorResolver(),
+    }
+    changed = collections.defaultdict(set)
+    try:
+        result = import_rows(rows, LABEL, parse_row,
+                             functools.partial(_import_batch,
+                                               resolvers=resolvers,
+                                               changed=changed,
+                                               isbn_field=isbn_field),
+                             batch_size=batch_size)
+    finally:
+        # Whatever was imported, even if a batch failed:
+        if changed:
+            if resolvers['publication'].created:
+                counters.rebuild(Publication)
+            if resolvers['creator'].created:
+                counters.rebuild(Creator)
+            years.rebuild(Reading)
+            touch(changed.items())
+
+    return result
+
+
+class PublicationResolver(Resolver):
+    """
+    Finds Publications by any of their ISBNs, in either isbn_uk or isbn_us.
+
+    Or else by their naturalized title, but only if the Publication, or the
+    one being looked for, has no ISBN. So two books called 'Poems' with
+    different ISBNs are different books.
+
+    Keys are like:
+        ('isbn', '0356500489')
+        ('title', 'poems') -- Any Publication with that title.
+        ('title-no-isbn', 'poems') -- One with that title and no ISBNs.
+    """
+
+    def __init__(self):
+        super().__init__(Publication, 'title_sort')
+
+    def get_keys(self, values):
+        isbns = get_isbn_variants(self._get_isbn(values))
+        title = self.make_values_key(values)[0]
+        if isbns:
+            return [('isbn', i) for i in isbns] + [('title-no-isbn', title)]
+        return [('title', title)]
+
+    def get_object_keys(self, values):
+        isbns = get_isbn_variants(self._get_isbn(values))
+        title = self.make_values_key(values)[0]
+        keys = [('isbn', i) for i in isbns] + [('title', title)]
+        if not isbns:
+            keys.append(('title-no-isbn', title))
+        return keys
+
+    def fetch(self, keys):
+        isbns = sorted(key[1] for key in keys if key[0] == 'isbn')
+        titles = sorted({key[1] for key in keys if key[0] != 'isbn'})
+        lookups = [Q(isbn_uk__in=chunk) | Q(isbn_us__in=chunk)
+                                            for chunk in _chunks(isbns)]
+        lookups += [Q(title_sort__in=chunk) for chunk in _chunks(titles)]
+        for q in lookups:
+            rows = Publication.objects.filter(q).order_by('pk')\
+                    .values_list('pk', 'title', 'title_sort', 'isbn_uk',
+                                 'isbn_us')
+            for pk, title, title_sort, isbn_uk, isbn_us in rows:
+                row_keys = [('isbn', i) for i in (isbn_uk, isbn_us) if i]
+                row_keys.append(('title', title_sort))
+                if not (isbn_uk or isbn_us):
+                    row_keys.append(('title-no-isbn', title_sort))
+                for key in row_keys:
+                    if key in keys and key not in self.pks:
+                        self.pks[key] = pk
+                        self.names[pk] = title
+                        self.sort_values[pk] = title_sort
+
+    def _get_isbn(self, values):
+        return values.get('isbn_uk') or values.get('isbn_us') or ''
+
+
+def normalize_isbn(value):
+    """
+    Returns a valid 10 or 13 digit ISBN from a string like '0-356-50048-9'
+    or Goodreads' '="0356500489"', or '' if there isn't one.
+    """
+    isbn = re.sub(r'[^0-9X]', '', value.upper())
+    if len(isbn) == 10 and isbn[:9].isdigit():
+        if _isbn10_check_digit(isbn[:9]) == isbn[9]:
+            return isbn
+    elif len(isbn) == 13 and isbn.isdigit():
+        if _isbn13_check_digit(isbn[:12]) == isbn[12]:
+            return isbn
+    return ''
+
+
+def get_isbn_variants(isbn):
+    """
+    A list of a normalized ISBN and, if there is one, its equivalent in the
+    other form. e.g. ['0356500489', '9780356500485'].
+    """
+    if len(isbn) == 10:
+        prefix = '978' + isbn[:9]
+        return [isbn, prefix + _isbn13_check_digit(prefix)]
+    elif len(isbn) == 13 and isbn.startswith('978'):
+        return [isbn, isbn[3:12] + _isbn10_check_digit(isbn[3:12])]
+    elif isbn:
+        return [isbn]
+    return []
+
+
+def _chunks(values):
+    for i in range(0, len(values), CHUNK_SIZE):
+        yield values[i:i+CHUNK_SIZE]
+
+
+def _isbn10_check_digit(digits):
+    total = sum((10 - i) * int(d) for i, d in enumerate(digits))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def _isbn13_check_digit(digits):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return str((10 - total % 10) % 10)
+
+
+def _import_batch(rows, resolvers, changed, isbn_field):
+    """
+    Imports the Publications and Readings from `rows`, a list of (hash,
+    row) tuples, skipping any that have already been imported, adding the
+    pks of everything involved to `changed`. Returns how many were
+    imported.
+    """
+    with transaction.atomic():
+        unique = exclude_imported(rows)
+        if not unique:
+            return 0
+        rows = list(unique.values())
+
+        series_pks = resolvers['series'].resolve_lists(
+                    [[{'title': r['series']}] if r['series'] else []
+                                                            for r in rows])
+        resolver = resolvers['publication']
+        num_created = len(resolver.created)
+        publication_pks = resolver.resolve([
+                {'title': r['title'], 'kind': 'book',
+                 'series_id': series_pks[i][0] if series_pks[i] else None,
+                 isbn_field: r['isbn']}
+                for i, r in enumerate(rows)])
+        new_pks = set(resolver.created[num_created:])
+
+        # Only new Publications get Creators, once each:
+        creator_rows = []
+        for row, pk in zip(rows, publication_pks):
+            if pk in new_pks:
+                creator_rows.append(row)
+                new_pks.remove(pk)
+            else:
+                creator_rows.append({'creators': []})
+        creator_pks = resolvers['creator'].resolve_lists(
+                            [[{'name': c['name'], 'kind': c['kind']}
+                                    for c in r['creators']]
+                                                    for r in creator_rows])
+
+        roles = []
+        for row, publication_pk, pks in zip(creator_rows, publication_pks,
+                                                                creator_pks):
+            publication = Publication(pk=publication_pk)
+            for order, (creator, pk) in enumerate(
+                                            zip(row['creators'], pks), 1):
+                roles.append(PublicationRole(publication=publication,
+                                             creator_id=pk,
+                                             role_name=creator['role'],
+                                             role_order=order))
+        bulk_create_with_pks(PublicationRole, roles)
+
+        publication_type = ContentType.objects.get_for_model(Publication)
+        CreatorCredit.objects.bulk_create(
+                [credits.make_credit(role, publication_type) for role in roles])
+
+        readings, finished = _make_readings(rows, publication_pks)
+        bulk_create_with_pks(Reading, readings)
+        for reading in finished:
+            Reading.objects.filter(pk=reading.pk).update(
+                                    end_date=reading.end_date,
+                                    end_granularity=reading.end_granularity,
+                                    is_finished=reading.is_finished)
+
+        record_imported(Publication, unique.keys(), publication_pks)
+
+    add_changed(changed, [
+        (Publication, publication_pks),
+        (PublicationSeries, [pk for pks in series_pks for pk in pks]),
+        (PublicationRole, [r.pk for r in roles]),
+        (Creator, [pk for pks in creator_pks for pk in pks]),
+        (Reading, [r.pk for r in readings + finished]),
+    ])
+    return len(rows)
+
+
+def _make_readings(rows, publication_pks):
+    """
+    Returns a list of unsaved Readings for `rows`, not including those
+    their Publications already have, and a list of existing Readings that
+    were in progress, changed to be finished.
+    """
+    existing = collections.defaultdict(list)
+    pks = sorted(set(publication_pks))
+    for i in range(0, len(pks), CHUNK_SIZE):
+        for reading in Reading.objects.filter(
+                            publication_id__in=pks[i:i+CHUNK_SIZE]).order_by():
+            existing[reading.publication_id].append(reading)
+
+    readings = []
+    finished = []
+    for row, publication_pk in zip(rows, publication_pks):
+        for values in row['readings']:
+            new = Reading(publication_id=publication_pk,
+                          start_date=_to_date(values['start_date']),
+                          start_granularity=values['start_granularity'],
+                          end_date=_to_date(values['end_date']),
+                          end_granularity=values['end_granularity'],
+                          is_finished=values['is_finished'])
+            old = _find_reading(new, existing[publication_pk])
+            if old is None:
+                readings.append(new)
+                existing[publication_pk].append(new)
+            elif old.end_date is None and new.end_date is not None:
+                old.end_date = new.end_date
+                old.end_granularity = new.end_granularity
+                old.is_finished = new.is_finished
+                if old.pk is not None and old not in finished:
+                    finished.append(old)
+    return readings, finished
+
+
+def _find_reading(new, readings):
+    """
+    Of `readings`, the one that `new` is a copy of: with the same start or
+    end date, or one in progress that `new` finishes, or, if `new` has no
+    dates, one without dates. Or None.
+    """
+    for old in readings:
+        if new.start_date is not None and new.start_date == old.start_date:
+            return old
+        if new.end_date is not None and new.end_date == old.end_date:
+            return old
+        if old.end_date is None and new.end_date is not None and\
+                            old.start_date is not None and new.start_date is None:
+            return old
+        if new.start_date is None and new.end_date is None and\
+                            old.start_date is None and old.end_date is None:
+            return old
+    return None
+
+
+def _get_title(data):
+    "Goodreads' title, and the series it may include."
+    title = get_text(data, 'Title')
+    if not title:
+        raise RowError('Publications need a title.')
+    match = _series_re.match(title)
+    if match:
+        return match.group(1), match.group(2)
+    return title, ''
+
+
+def _get_isbn(data, *keys):
+    "The first valid ISBN in the columns `keys`, or ''."
+    for key in keys:
+        isbn = normalize_isbn(get_text(data, key))
+        if isbn:
+            return isbn
+    return ''
+
+
+def _make_creators(creators):
+    """
+    A list of dicts for the (name, role) tuples in `creators`, without blank
+    names or repeats. Their kinds are unknown.
+    """
+    result = []
+    seen = set()
+    for name, role in creators:
+        # Goodreads has names like 'Iain M.  Banks':
+        name = ' '.join(name.split())
+        role = role.strip()
+        if name and name not in seen:
+            if len(name) > 255:
+                raise RowError("Creators' names should be at most 255 "
+                               "characters.")
+            if len(role) > 50:
+                raise RowError('Roles should be at most 50 characters.')
+            seen.add(name)
+            result.append({'name': name, 'role': role, 'kind': None})
+    return result
+
+
+def _make_reading(start=None, end=None, is_finished=True):
+    "A dict for a Reading, from (date, granularity) tuples."
+    start_date, start_granularity = start or (None, DAY)
+    end_date, end_granularity = end or (None, DAY)
+    return {'start_date': start_date, 'start_granularity': start_granularity,
+            'end_date': end_date, 'end_granularity': end_granularity,
+            'is_finished': is_finished}
+
+
+def _parse_date(value):
+    """
+    From '2017/06/01', '2017/06' or '2017' returns a tuple like
+    ('2017-06-01', DAY), or None if `value` is blank.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    match = _date_re.match(value)
+    if match is None:
+        raise RowError('Invalid date: {!r}.'.format(value))
+    year, month, day = match.groups()
+    try:
+        date = datetime.date(int(year), int(month or 1), int(day or 1))
+    except ValueError:
+        raise RowError('Invalid date: {!r}.'.format(value))
+    granularity = DAY if day else (MONTH if month else YEAR)
+    return date.isoformat(), granularity
+
+
+def _to_date(value):
+    if value is None:
+        return None
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
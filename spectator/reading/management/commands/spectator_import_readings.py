@@ -0,0 +1,51 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from spectator.reading import importer
+
+
+class Command(BaseCommand):
+    help = ("Imports Publications, and when they were read, from a CSV file "
+            "exported from Goodreads or The StoryGraph. Rows that have been "
+            "imported before are skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The CSV file to import.")
+        parser.add_argument('--format', choices=sorted(importer.PARSERS.keys()),
+                            help="Where the file was exported from, if it "
+                                 "can't be detected from its columns.")
+        parser.add_argument('--isbn-field', choices=['uk', 'us'], default='uk',
+                            help="Whether to save new Publications' ISBNs as "
+                                 "their UK or US ISBN.")
+        parser.add_argument('--batch-size', type=int,
+                            default=importer.BATCH_SIZE,
+                            help="How many rows to import in each "
+                                 "transaction.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size should be at least 1.')
+
+        try:
+            # utf-8-sig, to ignore any byte order mark:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                file_format = options['format'] or \
+                                    importer.detect_format(reader.fieldnames)
+                if file_format is None:
+                    raise CommandError("Can't tell where this file was "
+                                       "exported from. Use --format.")
+                result = importer.import_readings(enumerate(reader, 1),
+                            importer.PARSERS[file_format],
+                            batch_size=options['batch_size'],
+                            isbn_field='isbn_{}'.format(options['isbn_field']))
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+
+        for number, message in result.errors:
+            self.stderr.write('Row {}: {}'.format(number, message))
+        if options['verbosity'] > 0:
+            self.stdout.write('{} imported, {} already imported, {} invalid.'
+                              .format(result.imported, result.skipped,
+                                      len(result.errors)))
@@ -2,7 +2,22 @@ from django.db import models
 from django.db.models import F, Min
 
 
-class InProgressPublicationsManager(models.Manager):
+class PublicationQuerySet(models.QuerySet):
+
+    def for_display(self):
+        """
+        Fetches everything the shared templates (like
+        includes/publication.html) need to display a list of Publications,
+        including their Readings for get_current_reading().
+        """
+        return self.select_related('series')\
+                    .prefetch_related('roles__creator', 'reading_set')
+
+
+PublicationManager = models.Manager.from_queryset(PublicationQuerySet)
+
+
+class InProgressPublicationsManager(PublicationManager):
     """
     Returns Publications that are currently being read, ordered with the
     most-recently-started last.
@@ -17,7 +32,7 @@ class InProgressPublicationsManager(models.Manager):
                 .order_by('min_start_date')
 
 
-class UnreadPublicationsManager(models.Manager):
+class UnreadPublicationsManager(PublicationManager):
     """
     Returns Publications that haven't been started (have no Readings).
     """
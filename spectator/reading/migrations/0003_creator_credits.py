@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:50
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from spectator.core.credits import rebuild
+
+
+def make_credits(apps, schema_editor):
+    rebuild(role_models=[apps.get_model('spectator_reading', 'PublicationRole')],
+            credit_model=apps.get_model('spectator_core', 'CreatorCredit'),
+            content_type_model=apps.get_model('contenttypes', 'ContentType'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_core', '0003_creatorcredit'),
+        ('spectator_reading', '0002_kindcounts'),
+    ]
+
+    operations = [
+        migrations.RunPython(make_credits, migrations.RunPython.noop),
+    ]
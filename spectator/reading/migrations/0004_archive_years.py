@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 17:56
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from spectator.core.years import rebuild
+
+
+def index_reading_years(apps, schema_editor):
+    rebuild(apps.get_model('spectator_reading', 'Reading'),
+            date_field='end_date',
+            year_model=apps.get_model('spectator_core', 'ArchiveYear'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_core', '0004_archiveyear'),
+        ('spectator_reading', '0003_creator_credits'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_reading_years, migrations.RunPython.noop),
+    ]
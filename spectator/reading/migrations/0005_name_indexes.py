@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:22
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_reading', '0004_archive_years'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publication',
+            name='title',
+            field=models.CharField(db_index=True, help_text="e.g. 'Aurora' or 'Vol. 39 No. 4, 16 February 2017'.", max_length=255),
+        ),
+    ]
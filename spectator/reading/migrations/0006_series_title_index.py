@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:28
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_reading', '0005_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publicationseries',
+            name='title',
+            field=models.CharField(db_index=True, help_text="e.g. 'The London Review of Books'.", max_length=255),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:55
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_reading', '0006_series_title_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publication',
+            name='isbn_uk',
+            field=models.CharField(blank=True, db_index=True, help_text="e.g. '0356500489'.", max_length=20, verbose_name='UK ISBN'),
+        ),
+        migrations.AlterField(
+            model_name='publication',
+            name='isbn_us',
+            field=models.CharField(blank=True, db_index=True, help_text="e.g. '0316098094'.", max_length=20, verbose_name='US ISBN'),
+        ),
+    ]
@@ -22,6 +22,7 @@ class PublicationSeries(TimeStampedModelMixin, models.Model):
         series.publication_set.all()
     """
     title = models.CharField(null=False, blank=False, max_length=255,
+            db_index=True,
             help_text="e.g. 'The London Review of Books'.")
 
     title_sort = NaturalSortField('title', max_length=255, default='',
@@ -80,6 +81,7 @@ class Publication(TimeStampedModelMixin, models.Model):
     )
 
     title = models.CharField(null=False, blank=False, max_length=255,
+            db_index=True,
             help_text="e.g. 'Aurora' or 'Vol. 39 No. 4, 16 February 2017'.")
 
     title_sort = NaturalSortField('title', max_length=255, default='',
@@ -96,9 +98,11 @@ class Publication(TimeStampedModelMixin, models.Model):
             help_text="Official URL for this book/issue.")
 
     isbn_uk = models.CharField(null=False, blank=True, max_length=20,
+            db_index=True,
             verbose_name='UK ISBN', help_text="e.g. '0356500489'.")
 
     isbn_us = models.CharField(null=False, blank=True, max_length=20,
+            db_index=True,
             verbose_name='US ISBN', help_text="e.g. '0316098094'.")
 
     notes_url = models.URLField(null=False, blank=True, max_length=255,
@@ -107,7 +111,7 @@ class Publication(TimeStampedModelMixin, models.Model):
     creators = models.ManyToManyField('spectator_core.Creator',
                     through='PublicationRole', related_name='publications')
 
-    objects = models.Manager()
+    objects = managers.PublicationManager()
     # Publications that are currently being read:
     in_progress_objects = managers.InProgressPublicationsManager()
     # Publications that haven't been started (have no Readings):
@@ -124,6 +128,14 @@ class Publication(TimeStampedModelMixin, models.Model):
                                                         kwargs={'pk':self.pk})
 
     def get_current_reading(self):
+        "The unfinished Reading of this Publication, if any."
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if self.reading_set.field.related_query_name() in prefetched:
+            # Use the Readings from PublicationQuerySet.for_display():
+            for reading in self.reading_set.all():
+                if reading.end_date is None:
+                    return reading
+            return None
         try:
             return self.reading_set.filter(end_date__isnull=True)[0]
         except IndexError:
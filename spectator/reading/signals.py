@@ -0,0 +1,48 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from spectator.core import autocomplete, counters, exporting, surrogates,\
+        versions, years
+from .models import Publication, PublicationRole, PublicationSeries,\
+        Reading
+
+
+counters.register(Publication)
+
+years.register(Reading, 'end_date')
+
+autocomplete.register(Publication, 'title')
+autocomplete.register(PublicationSeries, 'title')
+
+versions.register(*apps.get_app_config('spectator_reading').get_models())
+
+surrogates.register(*apps.get_app_config('spectator_reading').get_models())
+
+exporting.register(PublicationSeries, Publication, Reading)
+
+
+@receiver(post_save, sender=Publication, dispatch_uid='spectator.save.publication')
+def publication_changed(sender, instance, created, **kwargs):
+    """
+    A Publication's title, series, etc are displayed on the year archive
+    pages of the years in which it was read.
+    """
+    if not created:
+        _touch_reading_years(instance.pk)
+
+
+@receiver(post_delete, sender=PublicationRole, dispatch_uid='spectator.delete.publication_role')
+@receiver(post_save, sender=PublicationRole, dispatch_uid='spectator.save.publication_role')
+def publicationrole_changed(sender, instance, **kwargs):
+    "As are its creators."
+    _touch_reading_years(instance.publication_id)
+
+
+def _touch_reading_years(publication_id):
+    dates = Reading.objects.filter(publication_id=publication_id,
+                                    end_date__isnull=False)\
+                            .values_list('end_date', flat=True)
+    reading_years = {d.year for d in dates}
+    if reading_years:
+        years.touch_years(Reading, reading_years)
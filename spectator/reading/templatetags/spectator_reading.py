@@ -2,7 +2,10 @@ from django import template
 from django.db.models import Q
 from django.utils.html import format_html
 
-from ..models import Publication, Reading
+from spectator.core import years
+from spectator.core.models import Creator
+from spectator.core.versions import cached_inclusion_tag
+from ..models import Publication, PublicationRole, PublicationSeries, Reading
 
 register = template.Library()
 
@@ -13,12 +16,14 @@ def in_progress_publications():
     Returns a QuerySet of any Publications that are currently being read.
     """
     return Publication.in_progress_objects\
-                        .select_related('series')\
-                        .prefetch_related('roles__creator')\
+                        .for_display()\
                         .order_by('time_created')
 
 
-@register.inclusion_tag('spectator_reading/includes/card_publications.html')
+@cached_inclusion_tag(register,
+                'spectator_reading/includes/card_publications.html',
+                [Creator, Publication, PublicationRole, PublicationSeries,
+                                                                    Reading])
 def in_progress_publications_card():
     """
     Displays Publications that are currently being read.
@@ -42,11 +47,13 @@ def day_publications(date):
                             |
                             Q(reading__end_date__isnull=True)
                         )\
-                        .select_related('series')\
-                        .prefetch_related('roles__creator')
+                        .for_display()
 
 
-@register.inclusion_tag('spectator_reading/includes/card_publications.html')
+@cached_inclusion_tag(register,
+                'spectator_reading/includes/card_publications.html',
+                [Creator, Publication, PublicationRole, PublicationSeries,
+                                                                    Reading])
 def day_publications_card(date):
     """
     Displays Publications that were being read on `date`.
@@ -62,13 +69,14 @@ def day_publications_card(date):
 @register.assignment_tag
 def reading_years():
     """
-    Returns a QuerySet of date objects, one for each year in which there are
+    Returns a list of date objects, one for each year in which there are
     Readings.
     """
-    return Reading.objects.dates('end_date', 'year')
+    return years.get_year_dates(Reading)
 
 
-@register.inclusion_tag('spectator_reading/includes/card_years.html')
+@cached_inclusion_tag(register,
+                'spectator_reading/includes/card_years.html', [Reading])
 def reading_years_card(current_year=None):
     """
     Displays the years in which there are Readings.
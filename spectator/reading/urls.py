@@ -1,6 +1,8 @@
 from django.conf.urls import url
 
+from spectator.core.views import AutocompleteView
 from . import views
+from .models import Publication
 
 
 # This should be under the namespace 'spectator:reading'.
@@ -32,6 +34,11 @@ urlpatterns = [
         name='publication_list_periodical',
         kwargs={'kind': 'periodical',}
     ),
+    url(
+        regex=r"^publications/autocomplete/$",
+        view=AutocompleteView.as_view(model=Publication),
+        name='publication_autocomplete'
+    ),
     url(
         regex=r"^publications/(?P<pk>\d+)/$",
         view=views.PublicationDetailView.as_view(),
@@ -1,33 +1,33 @@
-from django.db.models import Min
-from django.http import Http404
-from django.utils.encoding import force_text
-from django.utils.translation import ugettext as _
 from django.views.generic import DetailView, ListView, YearArchiveView
 from django.views.generic.detail import SingleObjectMixin
 
-from spectator.core.views import PaginatedListView
-from .models import Publication, PublicationSeries, Reading
+from spectator.core import counters
+from spectator.core.paginator import CachedCount
+from spectator.core.views import ConditionalResponseMixin,\
+        PaginatedListView, SurrogateKeyMixin, YearCacheMixin, YearIndexMixin
+from spectator.core.models import Creator
+from .models import Publication, PublicationRole, PublicationSeries, Reading
 
 
-class ReadingHomeView(ListView):
+class ReadingHomeView(ConditionalResponseMixin, SurrogateKeyMixin, ListView):
     model = Publication
     template_name = 'spectator_reading/home.html'
-    queryset = Publication.unread_objects.select_related('series')\
-                            .prefetch_related('roles__creator').all()
+    # Starting or finishing a Reading moves its Publication between lists:
+    surrogate_list_models = [Publication, Reading]
+    queryset = Publication.unread_objects.for_display()
     ordering = ['time_created',]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['in_progress_publication_list'] = \
                                             Publication.in_progress_objects\
-                                            .select_related('series')\
-                                            .prefetch_related('roles')\
-                                            .all()\
+                                            .for_display()\
                                             .order_by('time_created')
         return context
 
 
-class PublicationSeriesListView(ListView):
+class PublicationSeriesListView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                                ListView):
     model = PublicationSeries
 
 
@@ -45,13 +45,13 @@ class PublicationSeriesDetailView(SingleObjectMixin, PaginatedListView):
         return context
 
     def get_queryset(self):
-        return self.object.publication_set.select_related('series')\
-                            .prefetch_related('roles__creator').all()
+        return self.object.publication_set.for_display()
 
 
 class PublicationListView(PaginatedListView):
     model = Publication
     publication_kind = 'book'
+    count_strategy = CachedCount(models=[Publication])
 
     def get(self, request, *args, **kwargs):
         # Are we should 'book's (default) or 'periodical's?
@@ -62,16 +62,14 @@ class PublicationListView(PaginatedListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['publication_kind'] = self.publication_kind
-        context['book_count'] = Publication.objects.filter(kind='book').count()
-        context['periodical_count'] = Publication.objects.filter(
-                                                    kind='periodical').count()
+        counts = counters.get_counts(Publication)
+        context['book_count'] = counts['book']
+        context['periodical_count'] = counts['periodical']
         return context
 
     def get_queryset(self):
         qs = super().get_queryset()
-        qs = qs.filter(kind=self.publication_kind)\
-                .select_related('series')\
-                .prefetch_related('roles__creator')
+        qs = qs.filter(kind=self.publication_kind).for_display()
         return qs
 
     def get_ordering(self):
@@ -81,16 +79,20 @@ class PublicationListView(PaginatedListView):
             return ('title_sort',)
 
 
-class PublicationDetailView(DetailView):
+class PublicationDetailView(ConditionalResponseMixin, SurrogateKeyMixin,
+                                                                DetailView):
     model = Publication
 
 
-class ReadingYearArchiveView(YearArchiveView):
+class ReadingYearArchiveView(YearCacheMixin, YearIndexMixin, YearArchiveView):
     allow_empty = True
     date_field = 'end_date'
     make_object_list = True
     model = Reading
     ordering = 'end_date'
+    # Those shown in the sidebar's cards:
+    versioned_models = [Creator, Publication, PublicationRole,
+                        PublicationSeries, Reading]
 
     def get_queryset(self):
         "Reduce the number of queries and speed things up."
@@ -98,25 +100,3 @@ class ReadingYearArchiveView(YearArchiveView):
         qs = qs.select_related('publication__series')\
                 .prefetch_related('publication__roles__creator')
         return qs
-
-    def get_dated_items(self):
-        items, qs, info = super().get_dated_items()
-
-        if 'year' in info and info['year']:
-            # Get the earliest date we have a Reading for:
-            end_date_min = Reading.objects.aggregate(
-                                            Min('end_date'))['end_date__min']
-            # Make it a 'yyyy-01-01' date:
-            min_year_date = end_date_min.replace(month=1, day=1)
-            if info['year'] < min_year_date:
-                # The year we're viewing is before our minimum date, so 404.
-                raise Http404(_("No %(verbose_name_plural)s available") % {
-                    'verbose_name_plural': force_text(qs.model._meta.verbose_name_plural)
-                })
-            elif info['year'] == min_year_date:
-                # This is the earliest year we have readings for, so
-                # there is no previous year.
-                info['previous_year'] = None
-
-        return items, qs, info
-
@@ -0,0 +1 @@
+default_app_config = 'spectator.search.apps.SpectatorSearchAppConfig'
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SpectatorSearchAppConfig(AppConfig):
+    label = 'spectator_search'
+    name = 'spectator.search'
+    verbose_name = 'Spectator Search'
+
+    def ready(self):
+        import spectator.search.signals
@@ -0,0 +1,195 @@
+"""
+Ways of searching the SearchDocuments made by spectator.search.index.
+
+Every backend searches the same documents, whose `primary_text` and
+`secondary_text` are their words already lowercased and without accents,
+and returns them the same way, so templates and views don't need to know
+which is in use:
+
+* PostingsBackend, our own inverted index, in the SearchTerm and
+  SearchPosting tables. Works on any database.
+* SQLiteFTSBackend, an FTS5 table that's kept in sync with the documents
+  by triggers.
+* PostgreSQLBackend, a `tsvector` column on the documents, with a GIN
+  index, that's kept in sync by a trigger.
+
+The FTS5 table, and the tsvector column, are made by a migration, if the
+database supports them. By default the native backend for the database is
+used, falling back to PostingsBackend. Or set SPECTATOR_SEARCH_BACKEND to
+the dotted path of a BaseSearchBackend subclass. After changing backends,
+run the spectator_rebuild_search command.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections,\
+        transaction
+from django.db.models import Count, Sum
+from django.utils.module_loading import import_string
+
+from .models import SearchDocument, SearchPosting, SearchTerm
+
+
+# Keeps the number of variables in each query under SQLite's limit of 999:
+BATCH_SIZE = 500
+
+# Whether each database has its FTS5 table, by alias and name:
+_has_fts_table = {}
+
+
+class BaseSearchBackend(object):
+    "Subclasses should override search()."
+
+    def search(self, queryset, words):
+        """
+        Returns `queryset`, of SearchDocuments, filtered to those containing
+        all of `words`, annotated with a `score` (higher is better) and
+        ordered best first.
+
+        words -- A list of words made by spectator.search.index.tokenize().
+        """
+        raise NotImplementedError
+
+    def index_documents(self, model, weights):
+        """
+        Called, in a transaction, after creating the documents of objects
+        of `model`. `weights` maps each object's pk to a dict of its words
+        and their weights.
+
+        Backends that are kept in sync by the database don't need to do
+        anything.
+        """
+        pass
+
+
+class PostingsBackend(BaseSearchBackend):
+    """
+    A SearchTerm for each word, and a SearchPosting for each word in each
+    document. A search reads the postings of the query's terms from the
+    (term, document) index and groups them by document.
+    """
+
+    def search(self, queryset, words):
+        term_ids = list(SearchTerm.objects.filter(term__in=words)
+                                            .values_list('pk', flat=True))
+        if len(term_ids) < len(words):
+            # At least one word isn't in any documents.
+            return queryset.none()
+
+        # Each document has one posting per term, so those with as many
+        # postings for the query's terms as there are terms have them all:
+        return queryset.filter(postings__term_id__in=term_ids)\
+                       .annotate(score=Sum('postings__weight'),
+                                 matches=Count('postings'))\
+                       .filter(matches=len(term_ids))\
+                       .order_by('-score', 'length', 'title', 'pk')
+
+    def index_documents(self, model, weights):
+        # bulk_create() doesn't set pks on all databases:
+        document_ids = dict(SearchDocument.objects.filter(
+                                model_label=model._meta.label_lower,
+                                object_id__in=list(weights.keys()))
+                            .values_list('object_id', 'pk'))
+
+        term_ids = self._get_term_ids({word for counts in weights.values()
+                                                        for word in counts})
+        SearchPosting.objects.bulk_create([
+            SearchPosting(term_id=term_ids[word],
+                          document_id=document_ids[object_id],
+                          weight=min(weight, 32767))
+            for object_id, counts in weights.items()
+            for word, weight in counts.items()
+        ], batch_size=BATCH_SIZE)
+
+    def _get_term_ids(self, words):
+        "Returns a dict mapping each of `words` to its SearchTerm's pk."
+        words = sorted(words)
+        term_ids = {}
+        for start in range(0, len(words), BATCH_SIZE):
+            batch = words[start:start + BATCH_SIZE]
+            term_ids.update(SearchTerm.objects.filter(term__in=batch)
+                                            .values_list('term', 'pk'))
+            missing = [word for word in batch if word not in term_ids]
+            if missing:
+                try:
+                    with transaction.atomic():
+                        SearchTerm.objects.bulk_create(
+                                [SearchTerm(term=word) for word in missing])
+                except IntegrityError:
+                    # Someone else has just created some of them.
+                    for word in missing:
+                        SearchTerm.objects.get_or_create(term=word)
+                term_ids.update(SearchTerm.objects.filter(term__in=missing)
+                                                .values_list('term', 'pk'))
+        return term_ids
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Searches an FTS5 table whose rows are the documents' texts. Results
+    are ranked with bm25(), with primary text counting for
+    `primary_weight` times as much as secondary text.
+    """
+    table = 'spectator_search_fts'
+
+    primary_weight = 3.0
+
+    def search(self, queryset, words):
+        # Each word is quoted so none can be taken as FTS5 syntax:
+        match = ' '.join('"{}"'.format(word.replace('"', '""'))
+                                                            for word in words)
+        return queryset.extra(
+            select={'score': '-bm25({}, %s, 1.0)'.format(self.table)},
+            select_params=[self.primary_weight],
+            tables=[self.table],
+            where=['{}.rowid = {}.id'.format(self.table,
+                                             queryset.model._meta.db_table),
+                   '{} MATCH %s'.format(self.table)],
+            params=[match],
+        ).order_by('-score', 'length', 'title', 'pk')
+
+
+class PostgreSQLBackend(BaseSearchBackend):
+    """
+    Searches the documents' `search_vector` column, in which primary text
+    has weight 'A' and secondary text weight 'B'. Results are ranked with
+    ts_rank().
+    """
+
+    def search(self, queryset, words):
+        column = '{}.search_vector'.format(queryset.model._meta.db_table)
+        # The words are already normalised, so use the 'simple' config:
+        tsquery = "plainto_tsquery('simple', %s)"
+        text = ' '.join(words)
+        return queryset.extra(
+            select={'score': 'ts_rank({}, {})'.format(column, tsquery)},
+            select_params=[text],
+            where=['{} @@ {}'.format(column, tsquery)],
+            params=[text],
+        ).order_by('-score', 'length', 'title', 'pk')
+
+
+def get_backend(using=None):
+    """
+    Returns an instance of the SPECTATOR_SEARCH_BACKEND class or, if that's
+    not set, of the best backend for the database.
+    """
+    path = getattr(settings, 'SPECTATOR_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if connection.vendor == 'postgresql':
+        return PostgreSQLBackend()
+    elif connection.vendor == 'sqlite' and has_fts_table(connection):
+        return SQLiteFTSBackend()
+    return PostingsBackend()
+
+
+def has_fts_table(connection):
+    "Has the migration made the FTS5 table in this SQLite database?"
+    # By name too, as the test runner switches databases:
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _has_fts_table:
+        with connection.cursor() as cursor:
+            _has_fts_table[key] = SQLiteFTSBackend.table in \
+                            connection.introspection.table_names(cursor)
+    return _has_fts_table[key]
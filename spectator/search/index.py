@@ -0,0 +1,256 @@
+"""
+An inverted index of the words in registered models' titles and names, for
+searching them without scanning every table with `icontains`.
+
+Each indexed object has a SearchDocument, with its words. A search finds
+the documents that have all of the query's words, best first, using one of
+the backends in spectator.search.backends: an FTS5 table on SQLite, a
+tsvector column on PostgreSQL, or, on other databases, our own SearchTerm
+and SearchPosting tables.
+
+Documents are updated whenever an object's version changes (see
+spectator.core.versions), which includes when Event titles are
+recalculated. The updates are made when the transaction is committed, all
+the objects of a model changed in one transaction together. Use rebuild(),
+or the spectator_rebuild_search command, after bulk changes, or to index
+existing data.
+"""
+import collections
+import re
+import unicodedata
+
+from django.db import transaction
+from django.utils.text import capfirst
+
+from spectator.core import pending, versions
+from . import backends
+from .models import SearchDocument, SearchPosting, SearchTerm
+
+
+# Maps models to dicts of 'fields' and 'dependents' (see register()):
+_registry = collections.OrderedDict()
+
+# Longer words are truncated to this:
+MAX_TERM_LENGTH = 100
+
+# Only this many words of a query are used:
+MAX_QUERY_TERMS = 10
+
+# How many objects to index at a time:
+BATCH_SIZE = backends.BATCH_SIZE
+
+# Fields with at least this weight are the documents' primary text, which
+# counts for more in the native backends' rankings:
+PRIMARY_WEIGHT = 2
+
+_word_re = re.compile(r'\w+')
+
+
+def register(model, fields, dependents=None):
+    """
+    Index objects of `model`.
+
+    fields -- A dict mapping names of the object's attributes to weights,
+        e.g. {'title': 3, 'series.title': 1}. Attributes of ForeignKeys, like
+        'series.title', are fetched with select_related().
+    dependents -- Optional dict of other registered models whose documents
+        include this model's fields, mapped to the name of their ForeignKey
+        to it, e.g. {Publication: 'series'}. Their documents are updated
+        when this model's objects change.
+
+    Models must also be registered with spectator.core.versions.
+    """
+    _registry[model] = {'fields': fields, 'dependents': dependents or {}}
+    versions.version_changed.connect(_version_changed,
+                                     dispatch_uid='spectator.search.versions')
+
+
+def registered_models():
+    "A list of the models that are indexed."
+    return list(_registry.keys())
+
+
+def tokenize(text):
+    """
+    Returns a list of the words in `text`, lowercase and without accents,
+    e.g. 'Café Oto' becomes ['cafe', 'oto'].
+    """
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [word[:MAX_TERM_LENGTH] for word in _word_re.findall(text)]
+
+
+def search(query, models=None):
+    """
+    Returns a QuerySet of SearchDocuments that contain all the words in
+    `query`, best first, each annotated with its `score`.
+
+    models -- Optional list of models to restrict the results to.
+    """
+    words = []
+    for word in tokenize(query):
+        if word not in words:
+            words.append(word)
+    words = words[:MAX_QUERY_TERMS]
+    if not words:
+        return SearchDocument.objects.none()
+
+    qs = SearchDocument.objects.all()
+    if models is not None:
+        qs = qs.filter(model_label__in=[m._meta.label_lower for m in models])
+    return backends.get_backend().search(qs, words)
+
+
+def mark_changed(model, pks, using=None):
+    """
+    Update the documents of the objects of `model` with `pks` once the
+    current transaction is committed (or now, if we're not in one).
+    """
+    if not pks:
+        return
+
+    pending_updates = _PendingUpdates.get(using)
+    pending_updates.pks[model].update(pks)
+    pending_updates.schedule()
+
+
+def update(model, pks):
+    """
+    Update the documents of the objects of `model` with `pks`, removing
+    those for objects that no longer exist.
+    """
+    pks = list(pks)
+    for start in range(0, len(pks), BATCH_SIZE):
+        batch = pks[start:start + BATCH_SIZE]
+        objects = list(_get_queryset(model).filter(pk__in=batch))
+        index_objects(model, objects)
+        found = {obj.pk for obj in objects}
+        remove(model, [pk for pk in batch if pk not in found])
+
+
+def remove(model, pks):
+    "Remove the documents of the objects of `model` with `pks`."
+    if pks:
+        _delete_documents(SearchDocument.objects.filter(
+                    model_label=model._meta.label_lower, object_id__in=pks))
+
+
+def rebuild(model, batch_size=BATCH_SIZE):
+    """
+    Replace all of `model`'s documents, indexing `batch_size` objects at
+    a time, in order of pk. Returns the number of objects indexed.
+    """
+    batch_size = min(batch_size, BATCH_SIZE)
+    _delete_documents(SearchDocument.objects.filter(
+                                        model_label=model._meta.label_lower))
+
+    count = 0
+    last_pk = None
+    qs = _get_queryset(model).order_by('pk')
+    while True:
+        batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+        objects = list(batch_qs[:batch_size])
+        if not objects:
+            break
+        index_objects(model, objects)
+        count += len(objects)
+        last_pk = objects[-1].pk
+    return count
+
+
+def remove_unused_terms():
+    "Delete SearchTerms that are no longer in any documents."
+    SearchTerm.objects.filter(postings__isnull=True).delete()
+
+
+def index_objects(model, objects):
+    """
+    Create or replace the documents for `objects`, all of `model`, with
+    a handful of queries however many objects there are (up to BATCH_SIZE).
+    """
+    if not objects:
+        return
+    label = model._meta.label_lower
+    fields = _registry[model]['fields']
+    kind = capfirst(model._meta.verbose_name)
+
+    documents = []
+    weights = {}
+    for obj in objects:
+        counts = collections.Counter()
+        texts = {'primary': [], 'secondary': []}
+        for field, weight in fields.items():
+            words = tokenize(_get_value(obj, field))
+            for word in words:
+                counts[word] += weight
+            if weight >= PRIMARY_WEIGHT:
+                texts['primary'] += words
+            else:
+                texts['secondary'] += words
+        weights[obj.pk] = counts
+        documents.append(SearchDocument(model_label=label, object_id=obj.pk,
+                            title=str(obj)[:255],
+                            url=obj.get_absolute_url(), kind=kind,
+                            primary_text=' '.join(texts['primary']),
+                            secondary_text=' '.join(texts['secondary']),
+                            length=min(sum(map(len, texts.values())), 32767)))
+
+    with transaction.atomic():
+        remove(model, list(weights.keys()))
+        SearchDocument.objects.bulk_create(documents)
+        backends.get_backend().index_documents(model, weights)
+
+
+def _get_queryset(model):
+    related = {field.rsplit('.', 1)[0].replace('.', '__')
+                for field in _registry[model]['fields'] if '.' in field}
+    qs = model._default_manager.all()
+    if related:
+        qs = qs.select_related(*related)
+    return qs
+
+
+def _get_value(obj, field):
+    "e.g. for 'series.title' returns obj.series.title, or '' if no series."
+    value = obj
+    for attr in field.split('.'):
+        value = getattr(value, attr, None)
+        if value is None:
+            return ''
+    return value
+
+
+def _delete_documents(qs):
+    "Delete the documents in `qs`, and their postings, without fetching them."
+    with transaction.atomic():
+        SearchPosting.objects.filter(document__in=qs.values('pk')).delete()
+        qs.delete()
+
+
+def _version_changed(sender, pks, **kwargs):
+    "`pks` is None if we don't know which objects changed."
+    if not pks:
+        return
+    if sender in _registry:
+        mark_changed(sender, pks)
+        for model, field in _registry[sender]['dependents'].items():
+            mark_changed(model, model._default_manager.filter(
+                                        **{'{}__in'.format(field): pks})
+                                    .values_list('pk', flat=True))
+
+
+class _PendingUpdates(pending.Pending):
+    """
+    The pks of objects, by model, whose documents should be updated when a
+    connection's transaction commits. Call it to do the updates.
+    """
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.pks = collections.defaultdict(set)
+
+    def __call__(self):
+        pks = self.pks
+        self.pks = collections.defaultdict(set)
+        for model, model_pks in pks.items():
+            update(model, sorted(model_pks))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from spectator.search import index
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the search index of Creators, Events, Publications, "
+            "etc. Use after installing spectator.search, or after bulk "
+            "changes that bypass the models' signals.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=index.BATCH_SIZE,
+                            help="How many objects to index at a time.")
+
+    def handle(self, *args, **options):
+        for model in index.registered_models():
+            count = index.rebuild(model, batch_size=options['batch_size'])
+            if options['verbosity'] > 0:
+                self.stdout.write('Indexed {} {}'.format(count,
+                                    model._meta.verbose_name_plural))
+        index.remove_unused_terms()
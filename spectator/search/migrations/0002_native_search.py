@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:16
+from __future__ import unicode_literals
+
+from django.db import OperationalError, migrations, models
+
+
+SQLITE_CREATE = [
+    """CREATE VIRTUAL TABLE spectator_search_fts USING fts5(
+        primary_text, secondary_text,
+        content='spectator_search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 1')""",
+    """CREATE TRIGGER spectator_search_fts_insert
+        AFTER INSERT ON spectator_search_searchdocument BEGIN
+            INSERT INTO spectator_search_fts(rowid, primary_text, secondary_text)
+            VALUES (new.id, new.primary_text, new.secondary_text);
+        END""",
+    """CREATE TRIGGER spectator_search_fts_delete
+        AFTER DELETE ON spectator_search_searchdocument BEGIN
+            INSERT INTO spectator_search_fts(spectator_search_fts, rowid,
+                                             primary_text, secondary_text)
+            VALUES ('delete', old.id, old.primary_text, old.secondary_text);
+        END""",
+    """CREATE TRIGGER spectator_search_fts_update
+        AFTER UPDATE ON spectator_search_searchdocument BEGIN
+            INSERT INTO spectator_search_fts(spectator_search_fts, rowid,
+                                             primary_text, secondary_text)
+            VALUES ('delete', old.id, old.primary_text, old.secondary_text);
+            INSERT INTO spectator_search_fts(rowid, primary_text, secondary_text)
+            VALUES (new.id, new.primary_text, new.secondary_text);
+        END""",
+    "INSERT INTO spectator_search_fts(spectator_search_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS spectator_search_fts_insert",
+    "DROP TRIGGER IF EXISTS spectator_search_fts_delete",
+    "DROP TRIGGER IF EXISTS spectator_search_fts_update",
+    "DROP TABLE IF EXISTS spectator_search_fts",
+]
+
+POSTGRESQL_CREATE = [
+    "ALTER TABLE spectator_search_searchdocument ADD COLUMN search_vector tsvector",
+    """CREATE INDEX spectator_search_searchdocument_search_vector
+        ON spectator_search_searchdocument USING GIN (search_vector)""",
+    """CREATE FUNCTION spectator_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('simple', NEW.primary_text), 'A') ||
+                setweight(to_tsvector('simple', NEW.secondary_text), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER spectator_search_vector_update
+        BEFORE INSERT OR UPDATE ON spectator_search_searchdocument
+        FOR EACH ROW EXECUTE PROCEDURE spectator_search_vector_update()""",
+    # Fill it in for existing documents, via the trigger:
+    "UPDATE spectator_search_searchdocument SET primary_text = primary_text",
+]
+
+POSTGRESQL_DROP = [
+    """DROP TRIGGER IF EXISTS spectator_search_vector_update
+        ON spectator_search_searchdocument""",
+    "DROP FUNCTION IF EXISTS spectator_search_vector_update()",
+    "ALTER TABLE spectator_search_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_native_search(apps, schema_editor):
+    """
+    Make the FTS5 table, or tsvector column, used by the database's
+    backend in spectator.search.backends, if the database has them.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(SQLITE_CREATE[0])
+        except OperationalError:
+            # This SQLite was compiled without FTS5; PostingsBackend is used.
+            return
+        for sql in SQLITE_CREATE[1:]:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        for sql in POSTGRESQL_CREATE:
+            schema_editor.execute(sql)
+
+
+def drop_native_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        for sql in POSTGRESQL_DROP:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectator_search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchdocument',
+            name='primary_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='searchdocument',
+            name='secondary_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(create_native_search, drop_native_search),
+    ]
@@ -0,0 +1,83 @@
+from django.apps import apps
+from django.db import models
+
+
+class SearchTerm(models.Model):
+    """
+    A word that appears in at least one SearchDocument. Only used by
+    spectator.search.backends.PostingsBackend.
+    """
+    term = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('term',)
+
+    def __str__(self):
+        return self.term
+
+
+class SearchDocument(models.Model):
+    """
+    An indexed object, like an Event or a Creator, with enough about it to
+    display in search results without fetching the object itself.
+
+    These are kept up to date by spectator.search.index.
+    """
+    # e.g. 'spectator_events.event':
+    model_label = models.CharField(max_length=100)
+
+    object_id = models.PositiveIntegerField()
+
+    title = models.CharField(max_length=255)
+
+    url = models.CharField(max_length=255)
+
+    # e.g. 'Event' or 'Publication series':
+    kind = models.CharField(max_length=100)
+
+    # The indexed words, lowercase and without accents. See
+    # spectator.search.backends:
+    primary_text = models.TextField(blank=True, default='')
+
+    secondary_text = models.TextField(blank=True, default='')
+
+    # How many words were indexed; shorter documents rank higher:
+    length = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ('title',)
+        unique_together = (('model_label', 'object_id'),)
+
+    def __str__(self):
+        return self.title
+
+    def get_absolute_url(self):
+        return self.url
+
+    @property
+    def model(self):
+        "The class of the indexed object, e.g. Event."
+        return apps.get_model(self.model_label)
+
+
+class SearchPosting(models.Model):
+    """
+    Records that a SearchTerm appears in a SearchDocument, and how much
+    it counts for when ranking results.
+    """
+    term = models.ForeignKey('spectator_search.SearchTerm',
+                            on_delete=models.CASCADE, related_name='postings')
+
+    # DO_NOTHING so that documents can be deleted in bulk without fetching
+    # them; spectator.search.index deletes their postings first.
+    document = models.ForeignKey('spectator_search.SearchDocument',
+                        on_delete=models.DO_NOTHING, related_name='postings')
+
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        # Also the index used to find a term's documents:
+        unique_together = (('term', 'document'),)
+
+    def __str__(self):
+        return '{} in {}'.format(self.term_id, self.document_id)
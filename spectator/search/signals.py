@@ -0,0 +1,22 @@
+from spectator.core.apps import spectator_apps
+from spectator.core.models import Creator
+from . import index
+
+
+index.register(Creator, {'name': 3})
+
+if spectator_apps.is_enabled('events'):
+    from spectator.events.models import ClassicalWork, DancePiece, Event,\
+            Movie, Play, Venue
+
+    index.register(Event, {'display_title': 3})
+    index.register(Venue, {'name': 3})
+    for model in (ClassicalWork, DancePiece, Movie, Play):
+        index.register(model, {'title': 3})
+
+if spectator_apps.is_enabled('reading'):
+    from spectator.reading.models import Publication, PublicationSeries
+
+    index.register(Publication, {'title': 3, 'series.title': 1})
+    index.register(PublicationSeries, {'title': 3},
+                                        dependents={Publication: 'series'})
@@ -0,0 +1,14 @@
+from django.conf.urls import url
+
+from . import views
+
+
+# This should be under the namespace 'spectator:search'.
+
+urlpatterns = [
+    url(
+        regex=r"^$",
+        view=views.SearchView.as_view(),
+        name='search'
+    ),
+]
@@ -0,0 +1,42 @@
+from spectator.core import surrogates
+from spectator.core.views import PaginatedListView
+from . import index
+from .models import SearchDocument
+
+
+class SearchView(PaginatedListView):
+    """
+    Lists the SearchDocuments matching the 'q' GET parameter, best first.
+    """
+    model = SearchDocument
+    template_name = 'spectator_search/search.html'
+    context_object_name = 'document_list'
+    paginate_by = 20
+    # Results are ordered by score, which we can't seek on:
+    keyset_pagination = False
+
+    def get_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        query = self.get_query()
+        if not query:
+            return SearchDocument.objects.none()
+        return index.search(query)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search_query'] = self.get_query()
+        return context
+
+    def get_surrogate_list_models(self):
+        # New objects might match the query:
+        return index.registered_models()
+
+    def get_surrogate_keys(self, context):
+        "The keys of the objects found, rather than of their documents."
+        keys = {surrogates.object_key(document.model, document.object_id)
+                            for document in context.get('document_list', [])}
+        for model in self.get_surrogate_list_models():
+            keys.add(surrogates.list_key(model))
+        return keys
@@ -1,5 +1,19 @@
+from django import forms
 from django.contrib.admin.sites import AdminSite
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from spectator.core.admin import AdminPaginator, CreatorAdmin
+from spectator.core.factories import IndividualCreatorFactory
+from spectator.core.models import Creator
+from spectator.core.paginator import CachedCount, CountStrategy,\
+        EstimatedCount
+from spectator.core.widgets import AutocompleteSelect,\
+        AutocompleteSelectMultiple
 
 
 class AdminTestCase(TestCase):
@@ -8,3 +22,197 @@ class AdminTestCase(TestCase):
     def setUp(self):
         self.site = AdminSite()
 
+
+# The test settings have none, but the admin needs these:
+ADMIN_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+
+@override_settings(MIDDLEWARE=ADMIN_MIDDLEWARE)
+class AdminViewTestCase(TransactionTestCase):
+    """
+    For admin test cases that request pages as a logged-in superuser.
+    TransactionTestCase because cached counts are changed when transactions
+    commit.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+                                        'admin', 'admin@example.com', 'pass')
+        self.client.force_login(self.user)
+
+    def assertChangelistQueriesConstant(self, url, make_object):
+        """
+        Rendering the changelist at `url` should use as many queries with
+        many objects as with one. Each call to `make_object` should create
+        one object for the changelist, with any related objects it displays.
+        """
+        make_object()
+        with CaptureQueriesContext(connection) as one:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        for i in range(4):
+            make_object()
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(response.context['cl'].result_count, 5)
+        self.assertEqual(len(many), len(one),
+                '\n'.join(q['sql'] for q in many.captured_queries))
+
+
+class CreatorAdminTestCase(AdminViewTestCase):
+
+    def test_changelist_queries(self):
+        self.assertChangelistQueriesConstant(
+                            '/admin/spectator_core/creator/',
+                            IndividualCreatorFactory)
+
+
+class CountAdminMixinTestCase(AdminViewTestCase):
+
+    url = '/admin/spectator_core/creator/'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        IndividualCreatorFactory.create_batch(3)
+
+    def count_queries(self, params={}):
+        "Returns the number of COUNT queries used to render the changelist."
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len([q for q in queries.captured_queries
+                                            if 'COUNT(' in q['sql'].upper()])
+
+    def test_no_full_count(self):
+        "It should only count the filtered objects."
+        self.assertEqual(self.count_queries({'kind__exact': 'individual'}), 1)
+
+    def test_cached_count(self):
+        self.assertEqual(self.count_queries(), 1)
+        self.assertEqual(self.count_queries(), 0)
+
+    def test_cached_count_changed(self):
+        "The count should be redone when a Creator changes."
+        self.count_queries()
+        IndividualCreatorFactory()
+        self.assertEqual(self.count_queries(), 1)
+
+    @override_settings(SPECTATOR_ADMIN_COUNTS={'spectator_core.Creator': 'exact'})
+    def test_exact_count(self):
+        self.assertEqual(self.count_queries(), 1)
+        self.assertEqual(self.count_queries(), 1)
+
+    def test_get_count_strategy(self):
+        ma = CreatorAdmin(Creator, AdminSite())
+        self.assertIsInstance(ma.get_count_strategy(None), CachedCount)
+        for name, cls in (('exact', CountStrategy),
+                          ('estimated', EstimatedCount)):
+            with override_settings(
+                        SPECTATOR_ADMIN_COUNTS={'spectator_core.creator': name}):
+                self.assertIsInstance(ma.get_count_strategy(None), cls)
+
+    @override_settings(SPECTATOR_ADMIN_COUNTS={'spectator_core.creator': 'x'})
+    def test_invalid_count_strategy(self):
+        ma = CreatorAdmin(Creator, AdminSite())
+        with self.assertRaises(ImproperlyConfigured):
+            ma.get_count_strategy(None)
+
+    def test_paginator_softlimit(self):
+        "A page beyond the end should be the last page."
+        paginator = AdminPaginator(Creator.objects.all(), 2)
+        self.assertEqual(paginator.page(5).number, 2)
+
+
+@override_settings(SPECTATOR_AUTOCOMPLETE_LIMIT=2)
+class AutocompleteAdminMixinTestCase(AdminViewTestCase):
+
+    url = '/admin/spectator_core/creator/autocomplete/'
+
+    def setUp(self):
+        super().setUp()
+        IndividualCreatorFactory(pk=1, name='Bob Dylan')
+        IndividualCreatorFactory(pk=2, name='Bob Marley')
+        IndividualCreatorFactory(pk=3, name='Bobby Womack')
+        IndividualCreatorFactory(pk=4, name='Terry Hall')
+
+    def test_first_page(self):
+        data = self.client.get(self.url, {'q': 'bob'}).json()
+        self.assertEqual([r['name'] for r in data['results']],
+                         ['Bob Dylan', 'Bob Marley'])
+        self.assertTrue(data['more'])
+
+    def test_second_page(self):
+        data = self.client.get(self.url, {'q': 'bob', 'page': 2}).json()
+        self.assertEqual([r['name'] for r in data['results']],
+                         ['Bobby Womack'])
+        self.assertFalse(data['more'])
+
+    def test_invalid_page(self):
+        data = self.client.get(self.url, {'q': 'bob', 'page': 'x'}).json()
+        self.assertEqual(len(data['results']), 2)
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(self.url, {'q': 'bob'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_requires_permission(self):
+        User.objects.create_user('staff', 'staff@example.com', 'pass',
+                                 is_staff=True)
+        self.client.login(username='staff', password='pass')
+        response = self.client.get(self.url, {'q': 'bob'})
+        self.assertEqual(response.status_code, 403)
+
+
+class AutocompleteWidgetTestCase(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bob = IndividualCreatorFactory(pk=1, name='Bob')
+        self.terry = IndividualCreatorFactory(pk=2, name='Terry')
+
+    def test_renders_only_selected(self):
+        field = forms.ModelChoiceField(Creator.objects.all(),
+                                widget=AutocompleteSelect(Creator, self.site))
+        with self.assertNumQueries(1):
+            html = field.widget.render('creator', 2)
+        self.assertIn('<option value="2" selected>Terry</option>', html)
+        self.assertNotIn('Bob', html)
+        self.assertIn('<option value="">---------</option>', html)
+        self.assertIn(
+            'data-autocomplete-url="/admin/spectator_core/creator/autocomplete/"',
+            html)
+
+    def test_renders_nothing_selected(self):
+        field = forms.ModelChoiceField(Creator.objects.all(),
+                                widget=AutocompleteSelect(Creator, self.site))
+        with self.assertNumQueries(0):
+            html = field.widget.render('creator', None)
+        self.assertNotIn('Bob', html)
+        self.assertNotIn('Terry', html)
+
+    def test_renders_multiple_selected(self):
+        IndividualCreatorFactory(pk=3, name='Thelma')
+        field = forms.ModelMultipleChoiceField(Creator.objects.all(),
+                        widget=AutocompleteSelectMultiple(Creator, self.site))
+        with self.assertNumQueries(1):
+            html = field.widget.render('creators', [1, 3])
+        self.assertIn('<option value="1" selected>Bob</option>', html)
+        self.assertIn('<option value="3" selected>Thelma</option>', html)
+        self.assertNotIn('Terry', html)
+        self.assertIn('data-multiple="true"', html)
+
+    def test_form_validates_unrendered_choice(self):
+        "Objects that weren't rendered as options can still be chosen."
+        class CreatorForm(forms.Form):
+            creator = forms.ModelChoiceField(Creator.objects.all(),
+                                widget=AutocompleteSelect(Creator, self.site))
+        form = CreatorForm({'creator': 1})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['creator'], self.bob)
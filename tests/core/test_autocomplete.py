@@ -0,0 +1,159 @@
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from spectator.core import autocomplete
+from spectator.core.factories import GroupCreatorFactory,\
+        IndividualCreatorFactory
+from spectator.core.models import Creator
+from spectator.events.factories import MovieFactory, VenueFactory
+from spectator.events.models import Movie, Venue
+from spectator.reading.factories import PublicationFactory
+from spectator.reading.models import Publication
+
+
+class AutocompleteTestCase(TransactionTestCase):
+    "TransactionTestCase as versions are cached when transactions commit."
+
+    def setUp(self):
+        cache.clear()
+        autocomplete._tries.clear()
+
+    def names(self, model, query, **kwargs):
+        return [r['name'] for r in autocomplete.complete(model, query,
+                                                                **kwargs)]
+
+    def test_registered_models(self):
+        models = autocomplete.registered_models()
+        for model in (Creator, Venue, Movie, Publication):
+            self.assertIn(model, models)
+
+    def test_naturalize(self):
+        field = Creator._meta.get_field('name_sort')
+        self.assertEqual(autocomplete.naturalize('the long bl', field),
+                         'long bl')
+        self.assertEqual(autocomplete.naturalize('the ', field), 'the ')
+        self.assertEqual(autocomplete.naturalize('vol. 2 no. 1', field),
+                         'vol. 00000002 no. 1')
+
+    def test_variants(self):
+        self.assertEqual(autocomplete.get_variants('david fos'),
+                         ['david fos', 'David fos', 'David Fos'])
+
+    def test_naturalized_prefix(self):
+        GroupCreatorFactory(name='The Long Blondes')
+        GroupCreatorFactory(name='Long Fin Killie')
+        self.assertEqual(self.names(Creator, 'long bl'), ['The Long Blondes'])
+        self.assertEqual(self.names(Creator, 'Long BL'), ['The Long Blondes'])
+        self.assertEqual(self.names(Creator, 'the long bl'),
+                         ['The Long Blondes'])
+
+    def test_raw_prefix(self):
+        "People's names are naturalized surname first."
+        IndividualCreatorFactory(name='David Foster Wallace')
+        self.assertEqual(self.names(Creator, 'david fos'),
+                         ['David Foster Wallace'])
+        self.assertEqual(self.names(Creator, 'wallace'),
+                         ['David Foster Wallace'])
+
+    def test_ordered_by_sort_field(self):
+        GroupCreatorFactory(name='The Longpigs')
+        GroupCreatorFactory(name='Long Fin Killie')
+        GroupCreatorFactory(name='The Long Blondes')
+        self.assertEqual(self.names(Creator, 'long'),
+                         ['The Long Blondes', 'Long Fin Killie',
+                          'The Longpigs'])
+
+    def test_limit(self):
+        for n in range(5):
+            VenueFactory(name='Venue {}'.format(n))
+        self.assertEqual(len(self.names(Venue, 'venue', limit=3)), 3)
+
+    @override_settings(SPECTATOR_AUTOCOMPLETE_LIMIT=2)
+    def test_limit_setting(self):
+        for n in range(5):
+            VenueFactory(name='Venue {}'.format(n))
+        self.assertEqual(len(self.names(Venue, 'venue')), 2)
+
+    def test_numbers(self):
+        PublicationFactory(title='Vol. 2 No. 11')
+        PublicationFactory(title='Vol. 2 No. 3')
+        self.assertEqual(self.names(Publication, 'vol. 2 no. 1'),
+                         ['Vol. 2 No. 11'])
+
+    def test_empty(self):
+        VenueFactory(name='Bush Hall')
+        self.assertEqual(self.names(Venue, '  '), [])
+
+    def test_results(self):
+        movie = MovieFactory(title='Vertigo', year=1958)
+        self.assertEqual(autocomplete.complete(Movie, 'vert'),
+                         [{'id': movie.pk, 'name': 'Vertigo (1958)',
+                           'url': movie.get_absolute_url()}])
+
+    def test_trie_caches_short_prefixes(self):
+        VenueFactory(name='Bush Hall')
+        autocomplete.complete(Venue, 'bu')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(Venue, 'bu'), ['Bush Hall'])
+
+    def test_trie_answers_longer_prefixes(self):
+        "If a short prefix had all the matches, longer ones need no queries."
+        VenueFactory(name='Bush Hall')
+        VenueFactory(name='Butterfly House')
+        autocomplete.complete(Venue, 'b')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(Venue, 'bush h'), ['Bush Hall'])
+            self.assertEqual(self.names(Venue, 'butter'), ['Butterfly House'])
+            self.assertEqual(self.names(Venue, 'bx'), [])
+
+    def test_trie_articles(self):
+        "'the l' can't be answered from 'the', as it matches more names."
+        GroupCreatorFactory(name='The Long Blondes')
+        GroupCreatorFactory(name='Lemon Jelly')
+        autocomplete.complete(Creator, 'the')
+        self.assertEqual(self.names(Creator, 'the l'),
+                         ['Lemon Jelly', 'The Long Blondes'])
+
+    def test_trie_rebuilt_on_change(self):
+        VenueFactory(name='Bush Hall')
+        autocomplete.complete(Venue, 'b')
+        VenueFactory(name='Barbican')
+        self.assertEqual(self.names(Venue, 'b'), ['Barbican', 'Bush Hall'])
+
+    @override_settings(SPECTATOR_AUTOCOMPLETE_TRIE_DEPTH=0)
+    def test_no_trie(self):
+        VenueFactory(name='Bush Hall')
+        autocomplete.complete(Venue, 'bu')
+        # One each for 'bu' in name_sort, and 'bu' and 'Bu' in name:
+        with self.assertNumQueries(3):
+            self.assertEqual(self.names(Venue, 'bu'), ['Bush Hall'])
+        self.assertNotIn(Venue, autocomplete._tries)
+
+
+class AutocompleteViewTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        autocomplete._tries.clear()
+
+    def test_json(self):
+        creator = GroupCreatorFactory(name='The Long Blondes')
+        response = self.client.get('/creators/autocomplete/', {'q': 'long'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), {'results': [
+            {'id': creator.pk, 'name': 'The Long Blondes',
+             'url': creator.get_absolute_url()}]})
+
+    def test_no_query(self):
+        response = self.client.get('/creators/autocomplete/')
+        self.assertEqual(response.json(), {'results': []})
+
+    def test_other_models(self):
+        VenueFactory(name='Bush Hall')
+        PublicationFactory(title='Bush Tucker')
+        response = self.client.get('/events/venues/autocomplete/',
+                                   {'q': 'bush'})
+        self.assertEqual(response.json()['results'][0]['name'], 'Bush Hall')
+        response = self.client.get('/reading/publications/autocomplete/',
+                                   {'q': 'bush'})
+        self.assertEqual(response.json()['results'][0]['name'], 'Bush Tucker')
@@ -0,0 +1,93 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from spectator.core import counters
+from spectator.core.factories import *
+from spectator.core.models import Creator, KindCount
+from spectator.events.factories import *
+from spectator.events.models import Event
+from spectator.reading.factories import *
+from spectator.reading.models import Publication
+
+
+class CountersTestCase(TestCase):
+
+    def test_registered_models(self):
+        models = counters.registered_models()
+        self.assertIn(Creator, models)
+        self.assertIn(Event, models)
+        self.assertIn(Publication, models)
+
+    def test_counts_on_create(self):
+        IndividualCreatorFactory.create_batch(2)
+        GroupCreatorFactory()
+        counts = counters.get_counts(Creator)
+        self.assertEqual(counts, {'all': 3, 'individual': 2, 'group': 1})
+
+    def test_counts_include_all_kinds(self):
+        "Kinds with no objects should be 0."
+        MovieEventFactory()
+        counts = counters.get_counts(Event)
+        self.assertEqual(counts['movie'], 1)
+        self.assertEqual(counts['gig'], 0)
+        self.assertEqual(counts['all'], 1)
+
+    def test_counts_on_kind_change(self):
+        pub = PublicationFactory(kind='book')
+        pub.kind = 'periodical'
+        pub.save()
+        counts = counters.get_counts(Publication)
+        self.assertEqual(counts['book'], 0)
+        self.assertEqual(counts['periodical'], 1)
+
+    def test_counts_on_kind_change_of_fetched_object(self):
+        PublicationFactory(kind='book')
+        pub = Publication.objects.get()
+        pub.kind = 'periodical'
+        pub.save()
+        counts = counters.get_counts(Publication)
+        self.assertEqual(counts['book'], 0)
+        self.assertEqual(counts['periodical'], 1)
+
+    def test_counts_on_resave(self):
+        pub = PublicationFactory(kind='book')
+        pub.save()
+        self.assertEqual(counters.get_counts(Publication)['book'], 1)
+
+    def test_counts_on_delete(self):
+        GigEventFactory.create_batch(2)
+        Event.objects.first().delete()
+        self.assertEqual(counters.get_counts(Event)['gig'], 1)
+
+    def test_counts_dont_go_below_zero(self):
+        gig = GigEventFactory()
+        KindCount.objects.all().delete()
+        gig.delete()
+        self.assertEqual(counters.get_counts(Event)['gig'], 0)
+
+    def test_get_counts_is_one_query(self):
+        GigEventFactory()
+        with self.assertNumQueries(1):
+            counters.get_counts(Event)
+
+    def test_rebuild(self):
+        IndividualCreatorFactory.create_batch(2)
+        GroupCreatorFactory()
+        # Bypasses the signals:
+        Creator.objects.filter(kind='individual').update(kind='group')
+        counters.rebuild(Creator)
+        counts = counters.get_counts(Creator)
+        self.assertEqual(counts['individual'], 0)
+        self.assertEqual(counts['group'], 3)
+
+    def test_rebuild_command(self):
+        MovieEventFactory()
+        PlayEventFactory()
+        KindCount.objects.all().delete()
+        out = StringIO()
+        call_command('spectator_rebuild_counts', stdout=out)
+        counts = counters.get_counts(Event)
+        self.assertEqual(counts['movie'], 1)
+        self.assertEqual(counts['play'], 1)
+        self.assertIn('spectator_events.event', out.getvalue())
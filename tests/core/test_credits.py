@@ -0,0 +1,131 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from .. import make_date
+from spectator.core import credits
+from spectator.core.factories import *
+from spectator.core.models import CreatorCredit
+from spectator.events.factories import *
+from spectator.events.models import Event, EventRole, MovieRole
+from spectator.reading.factories import *
+from spectator.reading.models import PublicationRole
+
+
+class CreditsTestCase(TestCase):
+
+    def test_role_models(self):
+        role_models = credits.get_role_models()
+        self.assertIn(EventRole, role_models)
+        self.assertIn(MovieRole, role_models)
+        self.assertIn(PublicationRole, role_models)
+
+    def test_object_field(self):
+        self.assertEqual(credits.get_object_field(EventRole).name, 'event')
+        self.assertEqual(
+            credits.get_object_field(PublicationRole).name, 'publication')
+
+    def test_credit_created(self):
+        event = GigEventFactory(date=make_date('2017-02-01'))
+        role = EventRoleFactory(event=event, role_name='Headliner',
+                                                                role_order=2)
+        credit = CreatorCredit.objects.get()
+        self.assertEqual(credit.creator, role.creator)
+        self.assertEqual(credit.content_object, event)
+        self.assertEqual(credit.role_id, role.pk)
+        self.assertEqual(credit.role_name, 'Headliner')
+        self.assertEqual(credit.role_order, 2)
+        self.assertEqual(credit.date, make_date('2017-02-01'))
+
+    def test_credit_updated(self):
+        role = PublicationRoleFactory(role_name='Author')
+        creator = IndividualCreatorFactory()
+        role.role_name = 'Editor'
+        role.creator = creator
+        role.save()
+        credit = CreatorCredit.objects.get()
+        self.assertEqual(credit.role_name, 'Editor')
+        self.assertEqual(credit.creator, creator)
+
+    def test_credit_updated_without_object(self):
+        "Changing only the role's own fields shouldn't fetch its Event."
+        role = EventRoleFactory(event=GigEventFactory())
+        role = EventRole.objects.get(pk=role.pk)
+        role.role_name = 'Support'
+        with CaptureQueriesContext(connection) as queries:
+            role.save()
+        self.assertEqual(CreatorCredit.objects.get().role_name, 'Support')
+        fetch = 'SELECT "{}"."id"'.format(Event._meta.db_table)
+        self.assertFalse([q for q in queries.captured_queries
+                                            if q['sql'].startswith(fetch)])
+
+    def test_credit_moved_to_other_object(self):
+        "The credit should have the date of the role's new Event."
+        role = EventRoleFactory(event=GigEventFactory(
+                                                date=make_date('2017-02-01')))
+        role.event = GigEventFactory(date=make_date('2017-03-01'))
+        role.save()
+        credit = CreatorCredit.objects.get()
+        self.assertEqual(credit.object_id, role.event.pk)
+        self.assertEqual(credit.date, make_date('2017-03-01'))
+
+    def test_credit_date_updated(self):
+        event = GigEventFactory(date=make_date('2017-02-01'))
+        EventRoleFactory(event=event)
+        event.date = make_date('2017-03-01')
+        event.save()
+        self.assertEqual(CreatorCredit.objects.get().date,
+                                                    make_date('2017-03-01'))
+
+    def test_credit_deleted(self):
+        role = MovieRoleFactory()
+        role.delete()
+        self.assertEqual(CreatorCredit.objects.count(), 0)
+
+    def test_credit_deleted_with_object(self):
+        role = PlayRoleFactory()
+        role.play.delete()
+        self.assertEqual(CreatorCredit.objects.count(), 0)
+
+    def test_rebuild_command(self):
+        EventRoleFactory(event=GigEventFactory())
+        PublicationRoleFactory()
+        CreatorCredit.objects.all().delete()
+        out = StringIO()
+        call_command('spectator_rebuild_credits', stdout=out)
+        self.assertEqual(CreatorCredit.objects.count(), 2)
+        self.assertIn('spectator_events.eventrole', out.getvalue())
+
+
+class GetCreatorWorksTestCase(TestCase):
+
+    def setUp(self):
+        self.bob = IndividualCreatorFactory()
+        for pub in PublicationFactory.create_batch(3):
+            PublicationRoleFactory(publication=pub, creator=self.bob)
+        for event in GigEventFactory.create_batch(3):
+            EventRoleFactory(event=event, creator=self.bob)
+        self.movie = MovieFactory()
+        MovieRoleFactory(movie=self.movie, creator=self.bob,
+                                        role_name='Director', role_order=1)
+        MovieRoleFactory(movie=self.movie, creator=self.bob,
+                                        role_name='', role_order=2)
+
+    def test_works(self):
+        works = credits.get_creator_works(self.bob)
+        self.assertEqual(sorted(works.keys()),
+                                        ['events', 'movies', 'publications'])
+        self.assertEqual(len(works['publications']), 3)
+        self.assertEqual(len(works['events']), 3)
+        self.assertEqual(works['movies'], [self.movie])
+        self.assertEqual(len(works['movies'][0].creator_credits), 2)
+        self.assertEqual(works['movies'][0].creator_role_names, ['Director'])
+
+    def test_queries(self):
+        "The number of queries shouldn't depend on the number of works."
+        # 1 for all the credits, then 4 for Publications, 3 for Movies and 1
+        # for Events:
+        with self.assertNumQueries(9):
+            credits.get_creator_works(self.bob)
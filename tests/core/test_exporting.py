@@ -0,0 +1,171 @@
+import csv
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from spectator.core import exporting
+from spectator.core.factories import GroupCreatorFactory,\
+        IndividualCreatorFactory
+from spectator.core.models import Creator
+from spectator.events.factories import ClassicalWorkFactory,\
+        ConcertEventFactory, EventRoleFactory, VenueFactory
+from spectator.events.models import ClassicalWork, DancePiece, Event,\
+        Movie, Play, Venue
+from spectator.reading.factories import PublicationFactory,\
+        PublicationRoleFactory, PublicationSeriesFactory, ReadingFactory
+from spectator.reading.models import Publication, PublicationSeries, Reading
+
+
+class RegistryTestCase(TestCase):
+
+    def test_registered_models(self):
+        "Each model comes after those it refers to."
+        self.assertEqual(exporting.registered_models(), [
+            Creator, Venue, Movie, Play, ClassicalWork, DancePiece, Event,
+            PublicationSeries, Publication, Reading])
+
+    def test_get_model(self):
+        self.assertEqual(exporting.get_model('spectator_events.Event'), Event)
+        with self.assertRaises(LookupError):
+            exporting.get_model('spectator_events.eventrole')
+
+    def test_get_field_names(self):
+        names = exporting.get_field_names(Event)
+        self.assertIn('venue', names)
+        self.assertNotIn('id', names)
+        # Roles, not the ManyToManyField through them:
+        self.assertNotIn('creators', names)
+        self.assertEqual(names[-3:], ['roles', 'classicalworks',
+                                      'dancepieces'])
+
+
+class IterObjectsTestCase(TestCase):
+
+    def test_inlines_roles_and_works(self):
+        band = GroupCreatorFactory(name='The Fall')
+        singer = IndividualCreatorFactory(name='Mark E. Smith')
+        work = ClassicalWorkFactory()
+        event = ConcertEventFactory(date=datetime.date(2017, 6, 1))
+        event.classicalworks.add(work)
+        role2 = EventRoleFactory(event=event, creator=singer, role_order=2,
+                                 role_name='')
+        role1 = EventRoleFactory(event=event, creator=band, role_order=1,
+                                 role_name='Headliner')
+        ConcertEventFactory()
+
+        objects = list(exporting.iter_objects(Event))
+        self.assertEqual([pk for pk, fields in objects],
+                         sorted(Event.objects.values_list('pk', flat=True)))
+
+        pk, fields = objects[0]
+        self.assertEqual(pk, event.pk)
+        self.assertEqual(fields['venue'], event.venue_id)
+        self.assertEqual(fields['date'], datetime.date(2017, 6, 1))
+        self.assertEqual(fields['classicalworks'], [work.pk])
+        self.assertEqual(fields['dancepieces'], [])
+        self.assertEqual([(r['pk'], r['creator'], r['role_name'])
+                          for r in fields['roles']],
+                         [(role1.pk, band.pk, 'Headliner'),
+                          (role2.pk, singer.pk, '')])
+        self.assertNotIn('event', fields['roles'][0])
+        self.assertEqual(objects[1][1]['roles'], [])
+
+    def test_chunks(self):
+        "The number of queries depends on the number of chunks."
+        for i in range(5):
+            PublicationRoleFactory()
+        # A chunk of 2, 2 and 1, and an empty one to finish. Each with one
+        # query for the Publications and one for their roles:
+        with self.assertNumQueries(7):
+            objects = list(exporting.iter_objects(Publication, chunk_size=2))
+        self.assertEqual(len(objects), 5)
+        self.assertTrue(all(len(fields['roles']) == 1
+                            for pk, fields in objects))
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        series = PublicationSeriesFactory(title='The Expanse')
+        self.publication = PublicationFactory(title='Leviathan Wakes',
+                                              series=series)
+        PublicationRoleFactory(publication=self.publication)
+        ReadingFactory(publication=self.publication,
+                       end_date=datetime.date(2017, 6, 1))
+
+    def test_export_jsonl(self):
+        objects = [json.loads(line) for line in exporting.export_jsonl()]
+        # In the order they'd be reloaded:
+        self.assertEqual([o['model'] for o in objects], [
+            'spectator_core.creator', 'spectator_reading.publicationseries',
+            'spectator_reading.publication', 'spectator_reading.reading'])
+        publication = objects[2]
+        self.assertEqual(publication['pk'], self.publication.pk)
+        self.assertEqual(publication['fields']['title'], 'Leviathan Wakes')
+        self.assertEqual(publication['fields']['series'], objects[1]['pk'])
+        self.assertEqual(publication['fields']['roles'][0]['creator'],
+                         objects[0]['pk'])
+        self.assertEqual(objects[3]['fields']['end_date'], '2017-06-01')
+
+    def test_export_jsonl_models(self):
+        lines = list(exporting.export_jsonl([Reading]))
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith('\n'))
+
+    def test_export_csv(self):
+        rows = list(csv.reader(exporting.export_csv(Publication)))
+        self.assertEqual(rows[0],
+                         ['pk'] + exporting.get_field_names(Publication))
+        self.assertEqual(len(rows), 2)
+        row = dict(zip(rows[0], rows[1]))
+        self.assertEqual(row['pk'], str(self.publication.pk))
+        self.assertEqual(row['title'], 'Leviathan Wakes')
+        self.assertEqual(row['isbn_uk'], '')
+        roles = json.loads(row['roles'])
+        self.assertEqual(roles[0]['role_order'], 1)
+
+
+class ExportCommandTestCase(TestCase):
+
+    def setUp(self):
+        VenueFactory(name='Academy')
+        IndividualCreatorFactory(name='Bob Dylan')
+
+    def test_jsonl(self):
+        out = StringIO()
+        call_command('spectator_export', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([json.loads(line)['model'] for line in lines],
+                         ['spectator_core.creator', 'spectator_events.venue'])
+
+    def test_models(self):
+        out = StringIO()
+        call_command('spectator_export', 'spectator_events.venue',
+                     stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+
+    def test_csv_output(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            call_command('spectator_export', 'spectator_events.venue',
+                         format='csv', output=path)
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        finally:
+            os.remove(path)
+        self.assertEqual([row['name'] for row in rows], ['Academy'])
+
+    def test_csv_needs_one_model(self):
+        with self.assertRaisesRegex(CommandError, 'exactly one model'):
+            call_command('spectator_export', format='csv')
+
+    def test_unknown_model(self):
+        with self.assertRaisesRegex(CommandError, 'Unknown model'):
+            call_command('spectator_export', 'auth.user')
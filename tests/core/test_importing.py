@@ -0,0 +1,138 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from spectator.core import importing, versions
+from spectator.core.factories import GroupCreatorFactory,\
+        IndividualCreatorFactory
+from spectator.core.models import Creator, ImportRecord
+from spectator.events.factories import VenueFactory
+from spectator.events.models import Movie, Venue
+
+
+class ImportRowsTestCase(TestCase):
+
+    def test_batches_and_counts(self):
+        batches = []
+
+        def parse_row(data):
+            if data == 'bad':
+                raise importing.RowError('Bad row.')
+            return {'value': data}
+
+        def import_batch(rows):
+            batches.append([row for content_hash, row in rows])
+            return len(rows) - 1
+
+        result = importing.import_rows(
+                    enumerate(['a', 'bad', 'b', 'c'], 1), 'test',
+                    parse_row, import_batch, batch_size=2)
+        self.assertEqual(result, importing.Result(1, 2, [(2, 'Bad row.')]))
+        self.assertEqual(batches, [[{'value': 'a'}, {'value': 'b'}],
+                                   [{'value': 'c'}]])
+
+    def test_make_hash(self):
+        self.assertEqual(importing.make_hash('test', {'a': 1, 'b': 2}),
+                         importing.make_hash('test', {'b': 2, 'a': 1}))
+        self.assertNotEqual(importing.make_hash('test', {'a': 1}),
+                            importing.make_hash('other', {'a': 1}))
+
+
+class ImportRecordsTestCase(TestCase):
+
+    def test_exclude_imported(self):
+        venue = VenueFactory()
+        importing.record_imported(Venue, ['a'], [venue.pk])
+        record = ImportRecord.objects.get()
+        self.assertEqual(record.content_object, venue)
+
+        unique = importing.exclude_imported(
+                        [('a', {}), ('b', {'x': 1}), ('b', {'x': 1}),
+                         ('c', {})])
+        self.assertEqual(list(unique.items()), [('b', {'x': 1}), ('c', {})])
+
+
+class BulkCreateWithPksTestCase(TestCase):
+
+    def test_sets_pks(self):
+        VenueFactory()
+        venues = [Venue(name='One'), Venue(name='Two')]
+        importing.bulk_create_with_pks(Venue, venues)
+        self.assertEqual([Venue.objects.get(pk=v.pk).name for v in venues],
+                         ['One', 'Two'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Locking differs by database.')
+    def test_locks_before_finding_last_pk(self):
+        "On SQLite a write that changes nothing takes the database's lock."
+        with CaptureQueriesContext(connection) as queries:
+            importing.bulk_create_with_pks(Venue, [Venue(name='One')])
+        sqls = [q['sql'].split()[0] for q in queries.captured_queries
+                                    if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(sqls, ['UPDATE', 'SELECT', 'INSERT', 'SELECT'])
+
+
+class TouchTestCase(TransactionTestCase):
+    "TransactionTestCase as versions are cached when transactions commit."
+
+    def test_bumps_versions(self):
+        venue = VenueFactory()
+        version = versions.get_object_version(Venue, venue.pk)
+        importing.touch([(Venue, [venue.pk, venue.pk]), (Movie, [])])
+        self.assertNotEqual(versions.get_object_version(Venue, venue.pk),
+                            version)
+
+
+class ResolverTestCase(TestCase):
+
+    def test_finds_and_creates(self):
+        venue = VenueFactory(name='The Academy')
+        resolver = importing.Resolver(Venue, 'name_sort')
+        pks = resolver.resolve([{'name': 'the academy'}, {'name': 'Hall'},
+                                {'name': 'HALL'}])
+        hall = Venue.objects.get(name='Hall')
+        self.assertEqual(pks, [venue.pk, hall.pk, hall.pk])
+        self.assertEqual(resolver.created, [hall.pk])
+        self.assertEqual(resolver.names[venue.pk], 'The Academy')
+        self.assertEqual(resolver.sort_values,
+                         {venue.pk: 'academy, the', hall.pk: 'hall'})
+
+    def test_remembers(self):
+        resolver = importing.Resolver(Venue, 'name_sort')
+        resolver.resolve([{'name': 'Hall'}])
+        with self.assertNumQueries(0):
+            resolver.resolve([{'name': 'hall'}])
+
+    def test_extra_fields(self):
+        resolver = importing.Resolver(Movie, 'title_sort',
+                                      extra_fields=('year',))
+        pks = resolver.resolve([{'title': 'Alien', 'year': 1979},
+                                {'title': 'Alien', 'year': None},
+                                {'title': 'alien', 'year': 1979}])
+        self.assertEqual(Movie.objects.count(), 2)
+        self.assertEqual(pks[0], pks[2])
+        self.assertNotEqual(pks[0], pks[1])
+
+    def test_resolve_lists(self):
+        resolver = importing.Resolver(Venue, 'name_sort')
+        pks = resolver.resolve_lists([[{'name': 'A'}, {'name': 'B'}], [],
+                                      [{'name': 'a'}]])
+        a, b = Venue.objects.get(name='A').pk, Venue.objects.get(name='B').pk
+        self.assertEqual(pks, [[a, b], [], [a]])
+
+
+class CreatorResolverTestCase(TestCase):
+
+    def test_either_kind(self):
+        "A Creator of unknown kind can be a group or an individual."
+        band = GroupCreatorFactory(name='The Long Blondes')
+        bob = IndividualCreatorFactory(name='Bob Dylan')
+        resolver = importing.CreatorResolver()
+        pks = resolver.resolve([{'name': 'the long blondes', 'kind': None},
+                                {'name': 'Bob Dylan', 'kind': None},
+                                {'name': 'The Fall', 'kind': 'group'},
+                                {'name': 'Jane Doe', 'kind': None}])
+        self.assertEqual(pks[:2], [band.pk, bob.pk])
+        self.assertEqual(Creator.objects.get(pk=pks[2]).kind, 'group')
+        self.assertEqual(Creator.objects.get(pk=pks[3]).kind, 'individual')
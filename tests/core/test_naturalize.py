@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+
+from spectator.core import naturalize
+
+
+class NaturalizeTestCase(SimpleTestCase):
+
+    def setUp(self):
+        naturalize.naturalize.cache_clear()
+
+    def test_thing(self):
+        self.assertEqual(naturalize.naturalize(' The Long Blondes '),
+                         'long blondes, the')
+
+    def test_thing_repeated_article(self):
+        self.assertEqual(naturalize.naturalize('The The'), 'the the')
+
+    def test_person(self):
+        self.assertEqual(
+                naturalize.naturalize('David Foster Wallace', 'person'),
+                'wallace, david foster')
+
+    def test_person_particle_and_suffix(self):
+        self.assertEqual(naturalize.naturalize('Fred Le Carré Jr', 'person'),
+                         'le carré, fred jr')
+
+    def test_numbers(self):
+        self.assertEqual(naturalize.naturalize('Vol. 2 No. 11'),
+                         'vol. 00000002 no. 00000011')
+
+    def test_cached_by_string_and_sort_as(self):
+        naturalize.naturalize('Bob Dylan', 'person')
+        naturalize.naturalize('Bob Dylan', 'person')
+        self.assertEqual(naturalize.naturalize.cache_info().hits, 1)
+        self.assertEqual(naturalize.naturalize('Bob Dylan', 'thing'),
+                         'bob dylan')
+        self.assertEqual(naturalize.naturalize.cache_info().misses, 2)
+
+    def test_naturalize_many(self):
+        self.assertEqual(
+            naturalize.naturalize_many(['The Wire', 'Vol. 2', 'The Wire']),
+            ['wire, the', 'vol. 00000002', 'wire, the'])
+        self.assertEqual(naturalize.naturalize.cache_info().hits, 1)
+
+    def test_naturalize_many_person(self):
+        self.assertEqual(
+            naturalize.naturalize_many(['Bob Dylan', 'Prince'], 'person'),
+            ['dylan, bob', 'prince'])
+
+    def test_lookups_are_frozen(self):
+        for lookups in (naturalize.ARTICLES, naturalize.SUFFIXES,
+                        naturalize.PARTICLES):
+            self.assertIsInstance(lookups, frozenset)
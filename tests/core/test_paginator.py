@@ -1,8 +1,20 @@
 # coding: utf-8
+import base64
+
 from django.core import paginator as django_paginator
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
 
-from spectator.core.paginator import DiggPaginator
+from .. import make_date
+from spectator.core.factories import IndividualCreatorFactory
+from spectator.core.models import Creator
+from spectator.core.paginator import CachedCount, DiggPaginator,\
+        EstimatedCount, KeysetPaginator, NoCount
+from spectator.events.factories import GigEventFactory
+from spectator.events.models import Event
+from spectator.reading.factories import PublicationFactory,\
+        PublicationSeriesFactory
+from spectator.reading.models import Publication
 
 
 class PaginatorTestCase(TestCase):
@@ -185,3 +197,213 @@ class PaginatorTestCase(TestCase):
             DiggPaginator(range(1,1000), 10, body=5, padding=3)
 
 
+
+
+class KeysetPaginatorTestCase(TestCase):
+
+    def setUp(self):
+        # Creators are ordered by name_sort:
+        self.creators = [IndividualCreatorFactory(name='Person {}'.format(n))
+                                                        for n in range(1, 8)]
+
+    def paginator(self):
+        return KeysetPaginator(Creator.objects.all(), 3)
+
+    def test_ordering(self):
+        "It should use the model's ordering, with the pk added."
+        self.assertEqual(self.paginator().ordering,
+                            [('name_sort', False), ('pk', False)])
+
+    def test_first_page(self):
+        page = self.paginator().page()
+        self.assertEqual(list(page), self.creators[:3])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+        self.assertIsNone(page.previous_cursor)
+
+    def test_next_pages(self):
+        paginator = self.paginator()
+        page = paginator.page(paginator.page().next_cursor)
+        self.assertEqual(list(page), self.creators[3:6])
+        self.assertTrue(page.has_previous())
+        self.assertTrue(page.has_next())
+        page = paginator.page(page.next_cursor)
+        self.assertEqual(list(page), self.creators[6:])
+        self.assertFalse(page.has_next())
+        self.assertIsNone(page.next_cursor)
+
+    def test_previous_page(self):
+        paginator = self.paginator()
+        page2 = paginator.page(paginator.page().next_cursor)
+        page3 = paginator.page(page2.next_cursor)
+        page = paginator.page(page3.previous_cursor)
+        self.assertEqual(list(page), self.creators[3:6])
+        self.assertTrue(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_last_page(self):
+        page = self.paginator().page('last')
+        self.assertEqual(list(page), self.creators[4:])
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_numbered_page(self):
+        "It falls back to an offset for page numbers other than 1."
+        page = self.paginator().page(2)
+        self.assertEqual(list(page), self.creators[3:6])
+        self.assertEqual(page.number, 2)
+
+    def test_descending_ordering(self):
+        "It should seek correctly on a descending field with duplicates."
+        e1 = GigEventFactory(date=make_date('2017-02-01'))
+        e2 = GigEventFactory(date=make_date('2017-02-03'))
+        e3 = GigEventFactory(date=make_date('2017-02-03'))
+        e4 = GigEventFactory(date=make_date('2017-02-05'))
+        paginator = KeysetPaginator(Event.objects.order_by('-date'), 2)
+        page = paginator.page()
+        self.assertEqual(list(page), [e4, e2])
+        page = paginator.page(page.next_cursor)
+        self.assertEqual(list(page), [e3, e1])
+
+    def walk(self, paginator):
+        "All the pages' objects, going forwards, and then backwards."
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        forwards = [obj for page in pages for obj in page]
+
+        pages = [paginator.page('last')]
+        while pages[-1].has_previous():
+            pages.append(paginator.page(pages[-1].previous_cursor))
+        backwards = [obj for page in reversed(pages) for obj in page]
+        return forwards, backwards
+
+    def test_nullable_ordering(self):
+        "Events without dates come after those with, going by -date."
+        e1 = GigEventFactory(date=None)
+        e2 = GigEventFactory(date=make_date('2017-02-03'))
+        e3 = GigEventFactory(date=None)
+        e4 = GigEventFactory(date=make_date('2017-02-05'))
+        e5 = GigEventFactory(date=None)
+        e6 = GigEventFactory(date=make_date('2017-02-03'))
+        paginator = KeysetPaginator(Event.objects.order_by('-date'), 2)
+        forwards, backwards = self.walk(paginator)
+        self.assertEqual(forwards, [e4, e2, e6, e1, e3, e5])
+        self.assertEqual(backwards, forwards)
+
+    def test_nullable_relation_ordering(self):
+        "Publications without a series come before those with."
+        p1 = PublicationFactory(kind='periodical', series=None)
+        p2 = PublicationFactory(kind='periodical',
+                            series=PublicationSeriesFactory(title='Banana'))
+        p3 = PublicationFactory(kind='periodical', series=None)
+        p4 = PublicationFactory(kind='periodical',
+                            series=PublicationSeriesFactory(title='Apple'))
+        p5 = PublicationFactory(kind='periodical', series=None)
+        p6 = PublicationFactory(kind='periodical', series=None)
+        paginator = KeysetPaginator(
+                Publication.objects.order_by('series__title_sort'), 2)
+        forwards, backwards = self.walk(paginator)
+        self.assertEqual(forwards, [p1, p3, p5, p6, p4, p2])
+        self.assertEqual(backwards, forwards)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(django_paginator.InvalidPage):
+            self.paginator().page('not-a-cursor')
+
+    def test_tampered_cursor(self):
+        "Values that can't be converted to the field type are invalid."
+        cursor = base64.urlsafe_b64encode(b'["n",["a","b"]]').decode('ascii')
+        with self.assertRaises(django_paginator.InvalidPage):
+            self.paginator().page(cursor)
+
+    def test_no_count(self):
+        "It should fetch a page without doing a COUNT."
+        paginator = self.paginator()
+        with self.assertNumQueries(1):
+            list(paginator.page('last'))
+
+
+class CountStrategyTestCase(TransactionTestCase):
+    "TransactionTestCase as versions are cached when transactions commit."
+
+    def setUp(self):
+        cache.clear()
+        IndividualCreatorFactory.create_batch(5)
+
+    def test_default(self):
+        "With no strategy it should do an exact count."
+        paginator = DiggPaginator(Creator.objects.all(), 2, body=5)
+        self.assertEqual(paginator.count, 5)
+
+    def test_cached_count(self):
+        "It should only count once for the same filters."
+        strategy = CachedCount()
+        qs = Creator.objects.filter(kind='individual')
+        self.assertEqual(DiggPaginator(qs, 2, count_strategy=strategy).count, 5)
+        IndividualCreatorFactory()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                DiggPaginator(qs.order_by('-pk'), 2,
+                                        count_strategy=strategy).count, 5)
+
+    def test_cached_count_filters(self):
+        "Different filters should have different counts."
+        strategy = CachedCount()
+        qs = Creator.objects.all()
+        self.assertEqual(DiggPaginator(qs, 2, count_strategy=strategy).count, 5)
+        qs = Creator.objects.filter(kind='group')
+        self.assertEqual(DiggPaginator(qs, 2, count_strategy=strategy).count, 0)
+
+    def test_cached_count_versions(self):
+        "With models, it should count again when their objects change."
+        strategy = CachedCount(models=[Creator])
+        qs = Creator.objects.all()
+        self.assertEqual(DiggPaginator(qs, 2, count_strategy=strategy).count, 5)
+        with self.assertNumQueries(0):
+            DiggPaginator(qs, 2, count_strategy=strategy).count
+        IndividualCreatorFactory()
+        self.assertEqual(DiggPaginator(qs, 2, count_strategy=strategy).count, 6)
+
+    def test_estimated_count_threshold(self):
+        "It should count exactly below the threshold."
+        paginator = DiggPaginator(Creator.objects.all(), 2,
+                                    count_strategy=EstimatedCount())
+        self.assertEqual(paginator.count, 5)
+
+    def test_no_count(self):
+        "It should work out has_next without a COUNT query."
+        paginator = DiggPaginator(Creator.objects.all(), 2, body=5,
+                                    count_strategy=NoCount())
+        with self.assertNumQueries(1):
+            page = paginator.page(2)
+            self.assertEqual(len(page), 2)
+            self.assertTrue(page.has_next())
+            self.assertTrue(page.has_previous())
+        self.assertEqual(page.page_range, [1, 2, 3])
+
+    def test_no_count_last_page(self):
+        paginator = DiggPaginator(Creator.objects.all(), 2, body=5,
+                                    count_strategy=NoCount())
+        page = paginator.page(3)
+        self.assertEqual(len(page), 1)
+        self.assertFalse(page.has_next())
+
+    def test_no_count_empty_page(self):
+        paginator = DiggPaginator(Creator.objects.all(), 2, body=5,
+                                    count_strategy=NoCount())
+        with self.assertRaises(django_paginator.EmptyPage):
+            paginator.page(4)
+
+    def test_no_count_softlimit(self):
+        "With softlimit it should count after all, to get the last page."
+        paginator = DiggPaginator(Creator.objects.all(), 2, body=5,
+                                    count_strategy=NoCount())
+        page = paginator.page(10, softlimit=True)
+        self.assertEqual(page.number, 3)
+
+    def test_no_count_num_pages(self):
+        "If we need num_pages before getting a page, it has to count."
+        paginator = DiggPaginator(Creator.objects.all(), 2, body=5,
+                                    count_strategy=NoCount())
+        self.assertEqual(paginator.num_pages, 3)
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from spectator.core import pending
+
+
+class _PendingNames(pending.Pending):
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.names = []
+        self.done = []
+
+    def __call__(self):
+        self.done.append(self.names)
+        self.names = []
+
+
+class PendingTestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.pending = _PendingNames.get()
+        self.pending.names = []
+        self.pending.done = []
+
+    def add(self, name):
+        p = _PendingNames.get()
+        p.names.append(name)
+        p.schedule()
+
+    def test_get(self):
+        self.assertIs(_PendingNames.get(), self.pending)
+        self.assertIs(_PendingNames.get('default'), self.pending)
+        self.assertEqual(self.pending.using, 'default')
+
+    def test_not_in_transaction(self):
+        self.add('a')
+        self.assertEqual(self.pending.done, [['a']])
+
+    def test_once_per_transaction(self):
+        with transaction.atomic():
+            self.add('a')
+            with transaction.atomic():
+                self.add('b')
+            self.assertTrue(self.pending.scheduled)
+            self.assertEqual(self.pending.done, [])
+        self.assertEqual(self.pending.done, [['a', 'b']])
+        self.assertFalse(self.pending.scheduled)
+
+    def test_rollback(self):
+        "After a rollback it's rescheduled by the next change."
+        try:
+            with transaction.atomic():
+                self.add('a')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self.pending.done, [])
+        self.add('b')
+        self.assertEqual(self.pending.done, [['a', 'b']])
+
+    def test_rollback_then_transaction(self):
+        "A change in the next transaction reschedules it."
+        try:
+            with transaction.atomic():
+                self.add('a')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(self.pending.scheduled)
+        with transaction.atomic():
+            self.add('b')
+        self.assertEqual(self.pending.done, [['a', 'b']])
+
+    def test_savepoint_rollback(self):
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self.add('a')
+                    raise ValueError
+            except ValueError:
+                pass
+            self.assertFalse(self.pending.scheduled)
+            self.add('b')
+        self.assertEqual(self.pending.done, [['a', 'b']])
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            pending.Pending('default')
@@ -0,0 +1,156 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from spectator.core import sorting, surrogates, versions
+from spectator.core.factories import GroupCreatorFactory,\
+        IndividualCreatorFactory
+from spectator.core.models import Creator
+from spectator.events.models import Venue
+from spectator.reading.models import Publication, PublicationSeries
+from .test_surrogates import PURGE_BACKEND
+
+
+class SortingTestCase(TransactionTestCase):
+    "TransactionTestCase as versions are cached when transactions commit."
+
+    def setUp(self):
+        self.bob = IndividualCreatorFactory(name='Bob Dylan')
+        self.band = GroupCreatorFactory(name='The Long Blondes')
+        # As if made by bulk_create() or update():
+        Creator.objects.filter(pk=self.bob.pk).update(name_sort='')
+
+    def test_get_sort_fields(self):
+        self.assertEqual([f.name for f in sorting.get_sort_fields(Creator)],
+                         ['name_sort'])
+
+    def test_get_models(self):
+        models = sorting.get_models()
+        for model in (Creator, Venue, Publication, PublicationSeries):
+            self.assertIn(model, models)
+
+    def test_rebuild(self):
+        result = sorting.rebuild(Creator)
+        self.assertEqual(result.checked, 2)
+        self.assertEqual(result.stale, {'name_sort': [self.bob.pk]})
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.name_sort, 'dylan, bob')
+
+    def test_rebuild_batches(self):
+        for i in range(5):
+            pk = IndividualCreatorFactory(name='Person {}'.format(i)).pk
+            Creator.objects.filter(pk=pk).update(name_sort='x')
+        result = sorting.rebuild(Creator, batch_size=2)
+        self.assertEqual(result.checked, 7)
+        self.assertEqual(len(result.stale['name_sort']), 6)
+        self.assertFalse(Creator.objects.filter(name_sort='x').exists())
+
+    def test_rebuild_only_writes_changes(self):
+        sorting.rebuild(Creator)
+        with self.assertNumQueries(1):
+            result = sorting.rebuild(Creator)
+        self.assertEqual(result.stale, {'name_sort': []})
+
+    def test_rebuild_bumps_version(self):
+        version = versions.get_versions(Creator)
+        sorting.rebuild(Creator)
+        self.assertNotEqual(versions.get_versions(Creator), version)
+
+    @override_settings(SPECTATOR_PURGE_BACKEND=PURGE_BACKEND)
+    def test_rebuild_purges_list(self):
+        # A fresh LocalPurgeBackend:
+        surrogates._backend_path = None
+        sorting.rebuild(Creator)
+        self.assertEqual(surrogates.get_backend().purged, [['creator-list']])
+        # Nothing changed this time:
+        sorting.rebuild(Creator)
+        self.assertEqual(len(surrogates.get_backend().purged), 1)
+
+    def test_verify(self):
+        result = sorting.rebuild(Creator, verify=True)
+        self.assertEqual(result.stale, {'name_sort': [self.bob.pk]})
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.name_sort, '')
+
+    def test_pk_range(self):
+        result = sorting.rebuild(Creator, pk_range=(self.band.pk, self.band.pk))
+        self.assertEqual(result.checked, 1)
+        self.assertEqual(result.stale, {'name_sort': []})
+
+    def test_get_pk_ranges(self):
+        for i in range(8):
+            IndividualCreatorFactory()
+        first = Creator.objects.order_by('pk').first().pk
+        self.assertEqual(sorting.get_pk_ranges(Creator, 3),
+                         [(first, first + 2), (first + 3, first + 5),
+                          (first + 6, first + 9)])
+
+    def test_get_pk_ranges_more_than_objects(self):
+        ranges = sorting.get_pk_ranges(Creator, 10)
+        self.assertEqual(ranges, [(self.bob.pk, self.bob.pk),
+                                  (self.band.pk, self.band.pk)])
+
+    def test_get_pk_ranges_empty(self):
+        self.assertEqual(sorting.get_pk_ranges(Venue, 3), [])
+
+    def test_rebuild_in_parallel_verify(self):
+        "Each process should check its own range."
+        result = sorting.rebuild_in_parallel(Creator, workers=2, verify=True)
+        self.assertEqual(result.checked, 2)
+        self.assertEqual(result.stale, {'name_sort': [self.bob.pk]})
+
+    def test_init_worker(self):
+        "Worker processes set up Django and drop inherited connections."
+        with mock.patch('django.setup') as setup,\
+                mock.patch.object(sorting.connections, 'close_all') as close:
+            sorting._init_worker()
+        setup.assert_called_once_with()
+        close.assert_called_once_with()
+
+
+class CommandTestCase(TestCase):
+
+    def setUp(self):
+        self.bob = IndividualCreatorFactory(name='Bob Dylan')
+        Creator.objects.filter(pk=self.bob.pk).update(name_sort='')
+
+    def test_rebuild(self):
+        out = StringIO()
+        call_command('spectator_rebuild_sort_fields', 'spectator_core.Creator',
+                     stdout=out)
+        self.assertIn('spectator_core.Creator.name_sort: 1 of 1 updated',
+                      out.getvalue())
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.name_sort, 'dylan, bob')
+
+    def test_all_models(self):
+        out = StringIO()
+        call_command('spectator_rebuild_sort_fields', stdout=out)
+        self.assertIn('spectator_events.Venue.name_sort', out.getvalue())
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.name_sort, 'dylan, bob')
+
+    def test_verify(self):
+        out = StringIO()
+        call_command('spectator_rebuild_sort_fields', 'spectator_core.Creator',
+                     '--verify', verbosity=2, stdout=out)
+        self.assertIn('1 of 1 stale', out.getvalue())
+        self.assertIn('pks: {}'.format(self.bob.pk), out.getvalue())
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.name_sort, '')
+
+    def test_unknown_model(self):
+        with self.assertRaises(CommandError):
+            call_command('spectator_rebuild_sort_fields', 'spectator_core.Nope')
+
+    def test_model_without_sort_fields(self):
+        with self.assertRaises(CommandError):
+            call_command('spectator_rebuild_sort_fields',
+                         'spectator_reading.Reading')
+
+    def test_invalid_workers(self):
+        with self.assertRaises(CommandError):
+            call_command('spectator_rebuild_sort_fields', '--workers=0')
@@ -0,0 +1,186 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .. import make_date
+from spectator.core import surrogates
+from spectator.core.factories import IndividualCreatorFactory
+from spectator.events.factories import *
+from spectator.events.models import Event, Venue
+from spectator.reading.factories import *
+
+
+PURGE_BACKEND = 'spectator.core.surrogates.LocalPurgeBackend'
+
+
+class KeysTestCase(TestCase):
+
+    def test_object_key(self):
+        self.assertEqual(surrogates.object_key(Event, 123), 'event-123')
+
+    def test_list_key(self):
+        self.assertEqual(surrogates.list_key(Venue), 'venue-list')
+
+    def test_year_keys(self):
+        self.assertEqual(surrogates.year_key(Event, 2017), 'event-year-2017')
+        self.assertEqual(surrogates.year_key(Event), 'event-years')
+
+    def test_get_keys_includes_related(self):
+        "It should include objects fetched by select/prefetch_related."
+        event = GigEventFactory(pk=5, venue=VenueFactory(pk=7))
+        EventRoleFactory(event=event, creator=IndividualCreatorFactory(pk=3))
+        event = Event.objects.select_related('venue')\
+                            .prefetch_related('roles__creator').get(pk=5)
+        with self.assertNumQueries(0):
+            keys = surrogates.get_keys({'event': event})
+        self.assertIn('event-5', keys)
+        self.assertIn('venue-7', keys)
+        self.assertIn('creator-3', keys)
+
+    def test_get_keys_ignores_unfetched_querysets(self):
+        GigEventFactory()
+        with self.assertNumQueries(0):
+            keys = surrogates.get_keys({'event_list': Event.objects.all()})
+        self.assertEqual(keys, set())
+
+
+class SurrogateKeyMixinTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_detail_header(self):
+        event = GigEventFactory(pk=5, venue=VenueFactory(pk=7))
+        response = self.client.get(event.get_absolute_url())
+        keys = response['Surrogate-Key'].split()
+        self.assertIn('event-5', keys)
+        self.assertIn('venue-7', keys)
+        self.assertNotIn('event-list', keys)
+
+    def test_list_header(self):
+        VenueFactory(pk=7)
+        response = self.client.get('/events/venues/')
+        keys = response['Surrogate-Key'].split()
+        self.assertIn('venue-7', keys)
+        self.assertIn('venue-list', keys)
+
+    def test_year_header(self):
+        GigEventFactory(pk=5, date=make_date('2017-02-01'))
+        response = self.client.get('/events/2017/')
+        keys = response['Surrogate-Key'].split()
+        self.assertIn('event-year-2017', keys)
+        self.assertIn('event-years', keys)
+        self.assertNotIn('event-list', keys)
+
+    @override_settings(SPECTATOR_SURROGATE_KEY_HEADER='Cache-Tag')
+    def test_header_name(self):
+        response = self.client.get('/events/venues/')
+        self.assertIn('Cache-Tag', response)
+        self.assertNotIn('Surrogate-Key', response)
+
+    def test_no_surrogate_control_without_backend(self):
+        response = self.client.get('/events/venues/')
+        self.assertNotIn('Surrogate-Control', response)
+
+    @override_settings(SPECTATOR_PURGE_BACKEND=PURGE_BACKEND,
+                       SPECTATOR_SURROGATE_MAX_AGE=600)
+    def test_surrogate_control_with_backend(self):
+        response = self.client.get('/events/venues/')
+        self.assertEqual(response['Surrogate-Control'], 'max-age=600')
+
+
+@override_settings(SPECTATOR_PURGE_BACKEND=PURGE_BACKEND)
+class PurgeTestCase(TransactionTestCase):
+    "TransactionTestCase because purging happens when transactions commit."
+
+    def setUp(self):
+        cache.clear()
+        # A fresh LocalPurgeBackend for each test:
+        surrogates._backend_path = None
+
+    def purged_keys(self):
+        keys = set()
+        for purge in surrogates.get_backend().purged:
+            keys.update(purge)
+        return keys
+
+    def test_base_backend_abstract(self):
+        "Backends must implement purge()."
+        with self.assertRaises(TypeError):
+            surrogates.BasePurgeBackend()
+
+    def test_no_backend(self):
+        with override_settings(SPECTATOR_PURGE_BACKEND=None):
+            self.assertIsNone(surrogates.get_backend())
+            VenueFactory()
+
+    def test_purges_object_and_list(self):
+        venue = VenueFactory(pk=7)
+        surrogates.get_backend().purged = []
+        venue.name = 'New Name'
+        venue.save()
+        self.assertEqual(surrogates.get_backend().purged,
+                         [['venue-7', 'venue-list']])
+
+    def test_purges_on_delete(self):
+        venue = VenueFactory(pk=7)
+        surrogates.get_backend().purged = []
+        venue.delete()
+        self.assertIn('venue-7', self.purged_keys())
+
+    def test_purges_foreign_keys(self):
+        "It should purge the pages of the Venue an Event was, and is, at."
+        event = GigEventFactory(pk=5, venue=VenueFactory(pk=7))
+        VenueFactory(pk=8)
+        event = Event.objects.get(pk=5)
+        surrogates.get_backend().purged = []
+        event.venue_id = 8
+        event.save()
+        keys = self.purged_keys()
+        self.assertIn('event-5', keys)
+        self.assertIn('venue-7', keys)
+        self.assertIn('venue-8', keys)
+
+    def test_purges_years(self):
+        event = GigEventFactory(pk=5, date=make_date('2016-06-01'))
+        surrogates.get_backend().purged = []
+        event.date = make_date('2017-06-01')
+        event.save()
+        keys = self.purged_keys()
+        self.assertIn('event-year-2016', keys)
+        self.assertIn('event-year-2017', keys)
+
+    def test_purges_roles_creator(self):
+        "Adding a role should purge its creator's page."
+        creator = IndividualCreatorFactory(pk=3)
+        surrogates.get_backend().purged = []
+        PublicationRoleFactory(creator=creator)
+        self.assertIn('creator-3', self.purged_keys())
+
+    def test_purges_many_to_many(self):
+        event = DanceEventFactory(pk=5)
+        piece = DancePieceFactory(pk=9)
+        surrogates.get_backend().purged = []
+        event.dancepieces.add(piece)
+        keys = self.purged_keys()
+        self.assertIn('event-5', keys)
+        self.assertIn('dancepiece-9', keys)
+
+    def test_purges_once_per_transaction(self):
+        surrogates.get_backend().purged = []
+        with transaction.atomic():
+            VenueFactory(pk=7)
+            VenueFactory(pk=8)
+            self.assertEqual(surrogates.get_backend().purged, [])
+        self.assertEqual(len(surrogates.get_backend().purged), 1)
+        self.assertIn('venue-8', self.purged_keys())
+
+    def test_no_purge_on_rollback(self):
+        surrogates.get_backend().purged = []
+        try:
+            with transaction.atomic():
+                VenueFactory(pk=7)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(surrogates.get_backend().purged, [])
@@ -24,6 +24,13 @@ class CoreUrlsTestCase(TestCase):
         self.assertEqual(resolve('/').func.__name__,
                          views.HomeView.__name__)
 
+    def test_export_url(self):
+        self.assertEqual(reverse('spectator:core:export'), '/export/')
+
+    def test_export_view(self):
+        "Should use the correct view."
+        self.assertEqual(resolve('/export/').func.__name__,
+                         views.ExportView.__name__)
 
     def test_creator_list_url(self):
         self.assertEqual(reverse('spectator:creators:creator_list'),
@@ -55,3 +62,23 @@ class CoreUrlsTestCase(TestCase):
         self.assertEqual(resolve('/creators/3/').func.__name__,
                          views.CreatorDetailView.__name__)
 
+
+    def test_creator_works_url(self):
+        self.assertEqual(
+            reverse('spectator:creators:creator_works',
+                    kwargs={'pk': 3, 'section': 'events'}),
+            '/creators/3/events/')
+
+    def test_creator_works_view(self):
+        "Should use the correct view."
+        self.assertEqual(resolve('/creators/3/events/').func.__name__,
+                         views.CreatorWorksView.__name__)
+
+    def test_creator_autocomplete_url(self):
+        self.assertEqual(reverse('spectator:creators:creator_autocomplete'),
+                         '/creators/autocomplete/')
+
+    def test_creator_autocomplete_view(self):
+        "Should use the correct view."
+        self.assertEqual(resolve('/creators/autocomplete/').func.__name__,
+                         views.AutocompleteView.__name__)
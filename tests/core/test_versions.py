@@ -0,0 +1,239 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.template import RequestContext, Template
+from django.test import RequestFactory, TransactionTestCase,\
+        override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .. import make_date
+from spectator.core import versions
+from spectator.core.factories import IndividualCreatorFactory
+from spectator.core.models import Creator, ModelVersion
+from spectator.events.factories import *
+from spectator.events.models import ClassicalWork, Event, Venue
+from spectator.reading.factories import *
+from spectator.reading.models import Publication, PublicationRole
+
+
+class VersionsTestCase(TransactionTestCase):
+    "TransactionTestCase as versions are cached when transactions commit."
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_is_stable(self):
+        self.assertEqual(versions.get_versions(Event),
+                         versions.get_versions(Event))
+
+    def test_get_versions_does_no_queries(self):
+        "Once they're in the cache."
+        versions.get_versions(Event, Venue)
+        with self.assertNumQueries(0):
+            versions.get_versions(Event, Venue)
+
+    def test_get_versions_uses_database(self):
+        """
+        If they're not in the cache, bigger ones than any they might have had
+        there are saved in the database.
+        """
+        version = int(versions.get_versions(Event))
+        versions.bump(Event)
+        cache.clear()
+        new_version = int(versions.get_versions(Event))
+        self.assertGreater(new_version, version + 1)
+        self.assertEqual(ModelVersion.objects.get(
+                                model_label='spectator_events.event').version,
+                         new_version)
+
+    def test_versions_stored_in_database(self):
+        VenueFactory()
+        self.assertEqual(str(ModelVersion.objects.get(
+                                model_label='spectator_events.venue').version),
+                         versions.get_versions(Venue))
+
+    def test_versions_increase(self):
+        venue = VenueFactory()
+        version = int(versions.get_versions(Venue))
+        venue.save()
+        self.assertEqual(int(versions.get_versions(Venue)), version + 1)
+
+    def test_object_versions(self):
+        "Only the changed object's version should change."
+        venue1 = VenueFactory()
+        venue2 = VenueFactory()
+        v1 = versions.get_object_version(Venue, venue1.pk)
+        v2 = versions.get_object_version(Venue, venue2.pk)
+        venue1.save()
+        self.assertGreater(versions.get_object_version(Venue, venue1.pk), v1)
+        self.assertEqual(versions.get_object_version(Venue, venue2.pk), v2)
+
+    def test_object_version_falls_back_to_model(self):
+        venue = VenueFactory()
+        cache.clear()
+        self.assertEqual(versions.get_object_version(Venue, venue.pk),
+                         int(versions.get_versions(Venue)))
+
+    def test_m2m_changes(self):
+        "Both sides of a many-to-many relation should change."
+        event = ConcertEventFactory()
+        work = ClassicalWorkFactory()
+        event_version = versions.get_object_version(Event, event.pk)
+        work_version = versions.get_object_version(ClassicalWork, work.pk)
+        event.classicalworks.add(work)
+        self.assertGreater(versions.get_object_version(Event, event.pk),
+                                                                event_version)
+        self.assertGreater(versions.get_object_version(ClassicalWork, work.pk),
+                                                                work_version)
+
+    def test_version_changed_signal(self):
+        received = []
+        def receiver(sender, version, pks, **kwargs):
+            received.append((sender, version, pks))
+        versions.version_changed.connect(receiver)
+        try:
+            venue = VenueFactory()
+        finally:
+            versions.version_changed.disconnect(receiver)
+        self.assertEqual(received, [(Venue, int(versions.get_versions(Venue)),
+                                                                [venue.pk])])
+
+    def test_bump(self):
+        event_version = versions.get_versions(Event)
+        venue_version = versions.get_versions(Venue)
+        versions.bump(Event)
+        self.assertNotEqual(versions.get_versions(Event), event_version)
+        self.assertEqual(versions.get_versions(Venue), venue_version)
+
+    def test_bump_on_commit(self):
+        "The version changes, once, when the transaction commits."
+        version = int(versions.get_versions(Event))
+        with transaction.atomic():
+            versions.bump(Event, [1])
+            versions.bump(Event, [2])
+            self.assertEqual(versions.get_versions(Event), str(version))
+        self.assertEqual(versions.get_versions(Event), str(version + 1))
+        self.assertEqual(versions.get_object_version(Event, 2), version + 1)
+
+    def test_bump_rolled_back(self):
+        "Versions that were rolled back aren't cached."
+        version = versions.get_object_version(Event, 1)
+        try:
+            with transaction.atomic():
+                versions.bump(Event, [1])
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(versions.get_object_version(Event, 1), version)
+
+    def test_bump_uses_cache(self):
+        "Cached versions are changed without touching ModelVersion."
+        version = int(versions.get_versions(Event))
+        with CaptureQueriesContext(connection) as queries:
+            versions.bump(Event, [1])
+        self.assertEqual(versions.get_versions(Event), str(version + 1))
+        self.assertFalse([q for q in queries.captured_queries
+                                    if ModelVersion._meta.db_table in q['sql']])
+
+    def test_bump_signal_on_commit(self):
+        "version_changed is sent once, with all the pks, after the commit."
+        received = []
+        def receiver(sender, version, pks, **kwargs):
+            received.append((sender, version, pks))
+        versions.version_changed.connect(receiver)
+        try:
+            with transaction.atomic():
+                versions.bump(Event, [2])
+                versions.bump(Event, [1])
+                self.assertEqual(received, [])
+        finally:
+            versions.version_changed.disconnect(receiver)
+        self.assertEqual(received, [(Event, int(versions.get_versions(Event)),
+                                                                    [1, 2])])
+
+    def test_bump_when_not_cached(self):
+        "The new version should be bigger than any it might have been."
+        version = versions.get_versions(Event)
+        cache.clear()
+        versions.bump(Event)
+        self.assertGreater(int(versions.get_versions(Event)), int(version))
+
+    def test_changes_on_save(self):
+        version = versions.get_versions(Venue)
+        VenueFactory()
+        self.assertNotEqual(versions.get_versions(Venue), version)
+
+    def test_changes_on_delete(self):
+        creator = IndividualCreatorFactory()
+        version = versions.get_versions(Creator)
+        creator.delete()
+        self.assertNotEqual(versions.get_versions(Creator), version)
+
+    def test_role_changes(self):
+        version = versions.get_versions(Publication)
+        role_version = versions.get_versions(PublicationRole)
+        PublicationRoleFactory()
+        # The Publication is created too:
+        self.assertNotEqual(versions.get_versions(Publication), version)
+        self.assertNotEqual(versions.get_versions(PublicationRole),
+                                                                role_version)
+
+
+class CachedInclusionTagTestCase(TransactionTestCase):
+    "TransactionTestCase as versions are cached when transactions commit."
+
+    def setUp(self):
+        cache.clear()
+        self.event = GigEventFactory(title='My Gig')
+
+    def render(self, num=5):
+        request = RequestFactory().get('/fake-path/')
+        return Template("{% load spectator_events %}{% recent_events_card num %}"
+                        ).render(RequestContext(request, {'num': num}))
+
+    def test_function_is_unchanged(self):
+        "Calling the function directly should return its context."
+        from spectator.events.templatetags.spectator_events import \
+                recent_events_card
+        self.assertEqual(recent_events_card(3)['card_title'], 'Recent events')
+
+    def test_renders(self):
+        html = self.render()
+        self.assertIn('Recent events', html)
+        self.assertIn('My Gig', html)
+
+    def test_not_escaped(self):
+        "The cached HTML shouldn't be escaped when output."
+        self.render()
+        self.assertIn('<div class="card', self.render())
+
+    def test_cached(self):
+        "A second render should come from the cache with no queries."
+        first = self.render()
+        with self.assertNumQueries(0):
+            second = self.render()
+        self.assertEqual(first, second)
+
+    def test_key_includes_arguments(self):
+        GigEventFactory(title='Other Gig', date=make_date('2017-01-01'))
+        self.event.date = make_date('2017-02-01')
+        self.event.save()
+        self.assertNotIn('Other Gig', self.render(1))
+        self.assertIn('Other Gig', self.render(2))
+
+    def test_changes_appear_immediately(self):
+        self.render()
+        self.event.title = 'Your Gig'
+        self.event.save()
+        self.assertIn('Your Gig', self.render())
+
+    def test_related_changes_appear_immediately(self):
+        self.render()
+        self.event.venue.name = 'The New Venue'
+        self.event.venue.save()
+        self.assertIn('The New Venue', self.render())
+
+    @override_settings(SPECTATOR_CARD_CACHE_TIMEOUT=0)
+    def test_timeout_setting(self):
+        self.render()
+        with self.assertNumQueries(1):
+            self.render()
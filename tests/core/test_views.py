@@ -1,26 +1,100 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.http.response import Http404
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, TransactionTestCase,\
+        override_settings
+try:
+    # Django >= 1.10
+    from django.urls import reverse
+except ImportError:
+    # Django < 1.10
+    from django.core.urlresolvers import reverse
 
 from .. import make_date
+from .test_admin import ADMIN_MIDDLEWARE
 from spectator.core import views
 from spectator.core.factories import GroupCreatorFactory,\
         IndividualCreatorFactory
+from spectator.core.models import Creator
 from spectator.events.factories import GigEventFactory, MovieEventFactory
-from spectator.reading.factories import ReadingFactory
+from spectator.reading.factories import PublicationRoleFactory,\
+        ReadingFactory
 
 
-class ViewTestCase(TestCase):
+class ViewTestCase(TransactionTestCase):
     """
     Parent class to use with all the other view test cases.
+
+    TransactionTestCase because the versions in ETags, cached counts, etc
+    are cached when transactions commit.
     """
 
     def setUp(self):
+        # Some views cache counts, etc:
+        cache.clear()
         self.factory = RequestFactory()
         # We use '/fake-path/' for all tests because not testing URLs here,
         # and the views don't care what the URL is.
         self.request = self.factory.get('/fake-path/')
 
 
+class ConditionalResponseMixinTestCase(ViewTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.creator = IndividualCreatorFactory(pk=3)
+
+    def get(self, view, path='/fake-path/', **kwargs):
+        request = self.factory.get(path, **kwargs)
+        return view(request, pk=3)
+
+    def test_etag(self):
+        response = self.get(views.CreatorDetailView.as_view())
+        self.assertIn('ETag', response)
+
+    def test_not_modified(self):
+        "It should 304, with no queries, if the ETag matches."
+        view = views.CreatorDetailView.as_view()
+        etag = self.get(view)['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(view, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified(self):
+        "It should respond in full if something's changed since."
+        view = views.CreatorDetailView.as_view()
+        etag = self.get(view)['ETag']
+        self.creator.name = 'New Name'
+        self.creator.save()
+        response = self.get(view, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_modified_related(self):
+        "Changes to other models, like roles, should also change the ETag."
+        view = views.CreatorDetailView.as_view()
+        etag = self.get(view)['ETag']
+        PublicationRoleFactory(creator=self.creator)
+        self.assertNotEqual(self.get(view)['ETag'], etag)
+
+    def test_etag_varies_on_query_string(self):
+        "Different pages of a list should have different ETags."
+        view = views.CreatorListView.as_view()
+        self.assertNotEqual(self.get(view, '/fake-path/')['ETag'],
+                            self.get(view, '/fake-path/?p=1')['ETag'])
+
+    def test_etag_varies_on_ajax(self):
+        view = views.CreatorWorksView.as_view()
+        request = self.factory.get('/fake-path/')
+        ajax_request = self.factory.get('/fake-path/',
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertNotEqual(
+                view(request, pk=3, section='publications')['ETag'],
+                view(ajax_request, pk=3, section='publications')['ETag'])
+
+
 class HomeViewTestCase(ViewTestCase):
 
     def test_response_200(self):
@@ -113,6 +187,39 @@ class CreatorListViewTestCase(ViewTestCase):
         self.assertEqual(response.context_data['creator_list'][0], group)
 
 
+    def test_keyset_pagination(self):
+        "With keyset_pagination it should page using cursors."
+        creators = IndividualCreatorFactory.create_batch(3)
+        view = views.CreatorListView.as_view(keyset_pagination=True,
+                                             paginate_by=2)
+        response = view(self.request)
+        page = response.context_data['page_obj']
+        self.assertTrue(page.is_keyset)
+        self.assertEqual(list(response.context_data['creator_list']),
+                         creators[:2])
+
+        request = self.factory.get('/fake-path/', {'p': page.next_cursor})
+        response = view(request)
+        self.assertEqual(list(response.context_data['creator_list']),
+                         creators[2:])
+
+    def test_keyset_pagination_last(self):
+        creators = IndividualCreatorFactory.create_batch(3)
+        view = views.CreatorListView.as_view(keyset_pagination=True,
+                                             paginate_by=2)
+        request = self.factory.get('/fake-path/', {'p': 'last'})
+        response = view(request)
+        self.assertEqual(list(response.context_data['creator_list']),
+                         creators[1:])
+        response.render()
+
+    def test_keyset_pagination_404(self):
+        view = views.CreatorListView.as_view(keyset_pagination=True)
+        request = self.factory.get('/fake-path/', {'p': 'nope'})
+        with self.assertRaises(Http404):
+            view(request)
+
+
 class CreatorDetailViewTestCase(ViewTestCase):
 
     def setUp(self):
@@ -134,3 +241,131 @@ class CreatorDetailViewTestCase(ViewTestCase):
         self.assertEqual(response.template_name[0],
                 'spectator_core/creator_detail.html')
 
+    def test_context_creator_works(self):
+        "It should include the things the Creator worked on."
+        PublicationRoleFactory(creator=Creator.objects.get(pk=3))
+        response = views.CreatorDetailView.as_view()(self.request, pk=3)
+        works = response.context_data['creator_works']
+        self.assertEqual(len(works['publications']), 1)
+        self.assertNotIn('events', works)
+
+
+    @override_settings(SPECTATOR_SECTION_SIZE=2)
+    def test_context_creator_sections(self):
+        "It should include only the first few of each section, with counts."
+        creator = Creator.objects.get(pk=3)
+        for i in range(3):
+            PublicationRoleFactory(creator=creator)
+        response = views.CreatorDetailView.as_view()(self.request, pk=3)
+        sections = response.context_data['creator_sections']
+        self.assertEqual(len(sections), 1)
+        self.assertEqual(sections[0]['name'], 'publications')
+        self.assertEqual(sections[0]['title'], 'Publications')
+        self.assertEqual(len(sections[0]['work_list']), 2)
+        self.assertEqual(sections[0]['count'], 3)
+
+
+class CreatorWorksViewTestCase(ViewTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.creator = IndividualCreatorFactory(pk=3)
+        PublicationRoleFactory(creator=self.creator)
+
+    def test_response_200(self):
+        "It should respond with 200 for a valid Creator and section."
+        response = views.CreatorWorksView.as_view()(
+                                    self.request, pk=3, section='publications')
+        self.assertEqual(response.status_code, 200)
+
+    def test_response_404_creator(self):
+        "It should raise 404 if there's no Creator with that pk."
+        with self.assertRaises(Http404):
+            views.CreatorWorksView.as_view()(
+                                    self.request, pk=5, section='publications')
+
+    def test_response_404_section(self):
+        "It should raise 404 if the section isn't valid."
+        with self.assertRaises(Http404):
+            views.CreatorWorksView.as_view()(
+                                    self.request, pk=3, section='cheeses')
+
+    def test_templates(self):
+        response = views.CreatorWorksView.as_view()(
+                                    self.request, pk=3, section='publications')
+        self.assertEqual(response.template_name[0],
+                'spectator_core/creator_works.html')
+
+    def test_templates_ajax(self):
+        "Ajax requests should only get the section's HTML."
+        request = self.factory.get('/fake-path/',
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        response = views.CreatorWorksView.as_view()(
+                                    request, pk=3, section='publications')
+        self.assertEqual(response.template_name[0],
+                'spectator_core/includes/creator_works.html')
+
+    def test_context(self):
+        response = views.CreatorWorksView.as_view()(
+                                    self.request, pk=3, section='publications')
+        context = response.context_data
+        self.assertEqual(context['creator'], self.creator)
+        self.assertEqual(context['section'], 'publications')
+        self.assertEqual(context['section_title'], 'Publications')
+        self.assertEqual(len(context['work_list']), 1)
+
+    def test_pagination(self):
+        "It should paginate the works."
+        PublicationRoleFactory(creator=self.creator)
+        PublicationRoleFactory(creator=self.creator)
+        response = views.CreatorWorksView.as_view(paginate_by=2)(
+                                    self.request, pk=3, section='publications')
+        self.assertEqual(len(response.context_data['work_list']), 2)
+        self.assertTrue(response.context_data['is_paginated'])
+
+
+@override_settings(MIDDLEWARE=ADMIN_MIDDLEWARE)
+class ExportViewTestCase(TestCase):
+
+    def setUp(self):
+        IndividualCreatorFactory(pk=3, name='Bob Dylan')
+        self.staff = User.objects.create_user('staff', password='pass',
+                                              is_staff=True)
+
+    def get(self, **data):
+        return self.client.get(reverse('spectator:core:export'), data)
+
+    def test_staff_only(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('admin:login'), response['Location'])
+
+    def test_jsonl(self):
+        self.client.force_login(self.staff)
+        response = self.get()
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="spectator.jsonl"')
+        self.assertIn('no-cache', response['Cache-Control'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['pk'], 3)
+
+    def test_csv(self):
+        self.client.force_login(self.staff)
+        response = self.get(format='csv', model='spectator_core.creator')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'],
+                    'attachment; filename="spectator_core.creator.csv"')
+        content = b''.join(response.streaming_content).decode()
+        self.assertTrue(content.startswith('pk,'))
+        self.assertIn('Bob Dylan', content)
+
+    def test_404s(self):
+        self.client.force_login(self.staff)
+        for data in ({'format': 'xml'}, {'model': 'auth.user'},
+                     {'format': 'csv'}):
+            with self.subTest(data=data):
+                self.assertEqual(self.get(**data).status_code, 404)
@@ -0,0 +1,217 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils.six import StringIO
+
+from .. import make_date
+from spectator.core import years
+from spectator.core.models import ArchiveYear
+from spectator.events.factories import *
+from spectator.events.models import Event
+from spectator.reading.factories import *
+from spectator.reading.models import Reading
+
+
+class YearsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_registered_models(self):
+        models = years.registered_models()
+        self.assertIn(Event, models)
+        self.assertIn(Reading, models)
+
+    def test_years_on_create(self):
+        GigEventFactory(date=make_date('2017-03-01'))
+        GigEventFactory(date=make_date('2017-01-15'))
+        GigEventFactory(date=make_date('2015-06-01'))
+        result = years.get_years(Event)
+        self.assertEqual([y.year for y in result], [2015, 2017])
+        self.assertEqual(result[1].count, 2)
+        self.assertEqual(result[1].first_date, make_date('2017-01-15'))
+        self.assertEqual(result[1].last_date, make_date('2017-03-01'))
+
+    def test_ignores_empty_dates(self):
+        "Readings without an end_date aren't in any year."
+        ReadingFactory(end_date=None)
+        self.assertEqual(years.get_years(Reading), [])
+
+    def test_years_on_date_change(self):
+        GigEventFactory(date=make_date('2016-12-31'))
+        event = Event.objects.get()
+        event.date = make_date('2017-01-01')
+        event.save()
+        self.assertEqual(years.get_year_dates(Event), [make_date('2017-01-01')])
+
+    def test_years_on_date_change_in_year(self):
+        "first_date and last_date should be updated."
+        GigEventFactory(date=make_date('2017-02-01'))
+        event = GigEventFactory(date=make_date('2017-03-01'))
+        event.date = make_date('2017-01-01')
+        event.save()
+        archive_year = years.get_years(Event)[0]
+        self.assertEqual(archive_year.count, 2)
+        self.assertEqual(archive_year.first_date, make_date('2017-01-01'))
+        self.assertEqual(archive_year.last_date, make_date('2017-02-01'))
+
+    def test_years_on_resave(self):
+        "Saving with an unchanged date shouldn't touch the index."
+        event = GigEventFactory(date=make_date('2017-02-01'))
+        ArchiveYear.objects.all().delete()
+        event.save()
+        self.assertEqual(years.get_years(Event), [])
+
+    def test_years_on_delete(self):
+        event = GigEventFactory(date=make_date('2016-02-01'))
+        GigEventFactory(date=make_date('2017-02-01'))
+        event.delete()
+        self.assertEqual(years.get_year_dates(Event), [make_date('2017-01-01')])
+
+    def test_years_are_separate_for_models(self):
+        GigEventFactory(date=make_date('2016-02-01'))
+        ReadingFactory(end_date=make_date('2017-02-01'))
+        self.assertEqual(years.get_year_dates(Event), [make_date('2016-01-01')])
+        self.assertEqual(years.get_year_dates(Reading),
+                                                    [make_date('2017-01-01')])
+
+    def test_get_years_is_one_query(self):
+        GigEventFactory(date=make_date('2017-02-01'))
+        with self.assertNumQueries(1):
+            years.get_years(Event)
+
+    def test_get_adjacent_years(self):
+        for d in ['2014-01-01', '2015-01-01', '2017-01-01', '2019-01-01']:
+            GigEventFactory(date=make_date(d))
+        previous_year, this_year, next_year = years.get_adjacent_years(
+                                                                Event, 2017)
+        self.assertEqual(previous_year, 2015)
+        self.assertEqual(this_year.year, 2017)
+        self.assertEqual(next_year, 2019)
+
+    def test_get_adjacent_years_empty_year(self):
+        GigEventFactory(date=make_date('2015-01-01'))
+        self.assertEqual(years.get_adjacent_years(Event, 2016),
+                                                            (2015, None, None))
+
+    def test_rebuild(self):
+        GigEventFactory(date=make_date('2016-02-01'))
+        GigEventFactory(date=make_date('2017-02-01'))
+        # Bypasses the signals:
+        Event.objects.update(date=make_date('2015-05-01'))
+        years.rebuild(Event)
+        result = years.get_years(Event)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].year, 2015)
+        self.assertEqual(result[0].count, 2)
+        self.assertEqual(result[0].first_date, make_date('2015-05-01'))
+
+    def test_rebuild_command(self):
+        ReadingFactory(end_date=make_date('2017-02-01'))
+        ArchiveYear.objects.all().delete()
+        out = StringIO()
+        call_command('spectator_rebuild_counts', stdout=out)
+        self.assertEqual(years.get_year_dates(Reading),
+                                                    [make_date('2017-01-01')])
+        self.assertIn('Rebuilt years for spectator_reading.reading',
+                                                            out.getvalue())
+
+
+class CacheVersionTestCase(TransactionTestCase):
+    "TransactionTestCase as versions are cached when transactions commit."
+
+    def setUp(self):
+        cache.clear()
+        self.event = GigEventFactory(date=make_date('2016-02-01'))
+        GigEventFactory(date=make_date('2017-02-01'))
+
+    def test_version_is_stable(self):
+        self.assertEqual(years.get_cache_version(Event, 2016),
+                         years.get_cache_version(Event, 2016))
+
+    def test_get_version_does_no_queries(self):
+        with self.assertNumQueries(0):
+            years.get_cache_version(Event, 2016)
+
+    def test_versions_differ_for_years_and_models(self):
+        self.assertNotEqual(years.get_cache_version(Event, 2016),
+                            years.get_cache_version(Event, 2017))
+        self.assertNotEqual(years.get_cache_version(Event, 2016),
+                            years.get_cache_version(Reading, 2016))
+
+    def test_changes_on_save(self):
+        "Saving an object should only change its year's version."
+        v2016 = years.get_cache_version(Event, 2016)
+        v2017 = years.get_cache_version(Event, 2017)
+        self.event.title = 'New title'
+        self.event.save()
+        self.assertNotEqual(years.get_cache_version(Event, 2016), v2016)
+        self.assertEqual(years.get_cache_version(Event, 2017), v2017)
+
+    def test_changes_on_date_change(self):
+        "Both the old and new years should change."
+        v2016 = years.get_cache_version(Event, 2016)
+        v2017 = years.get_cache_version(Event, 2017)
+        self.event.date = make_date('2017-03-01')
+        self.event.save()
+        self.assertNotEqual(years.get_cache_version(Event, 2016), v2016)
+        self.assertNotEqual(years.get_cache_version(Event, 2017), v2017)
+
+    def test_changes_on_delete(self):
+        GigEventFactory(date=make_date('2016-03-01'))
+        v2016 = years.get_cache_version(Event, 2016)
+        v2017 = years.get_cache_version(Event, 2017)
+        self.event.delete()
+        self.assertNotEqual(years.get_cache_version(Event, 2016), v2016)
+        self.assertEqual(years.get_cache_version(Event, 2017), v2017)
+
+    def test_all_change_on_new_year(self):
+        "Adding a year changes every year's previous/next links, so version."
+        v2016 = years.get_cache_version(Event, 2016)
+        GigEventFactory(date=make_date('2018-02-01'))
+        self.assertNotEqual(years.get_cache_version(Event, 2016), v2016)
+
+    def test_touch_years(self):
+        v2016 = years.get_cache_version(Event, 2016)
+        v2017 = years.get_cache_version(Event, 2017)
+        years.touch_years(Event, [2017])
+        self.assertEqual(years.get_cache_version(Event, 2016), v2016)
+        self.assertNotEqual(years.get_cache_version(Event, 2017), v2017)
+
+    def test_touch_years_on_commit(self):
+        "The new versions are cached when the transaction commits."
+        v2016 = years.get_cache_version(Event, 2016)
+        with transaction.atomic():
+            years.touch_years(Event, [2016])
+            self.assertEqual(years.get_cache_version(Event, 2016), v2016)
+        self.assertNotEqual(years.get_cache_version(Event, 2016), v2016)
+
+    def test_touch_years_rolled_back(self):
+        v2016 = years.get_cache_version(Event, 2016)
+        try:
+            with transaction.atomic():
+                years.touch_years(Event, [2016])
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(years.get_cache_version(Event, 2016), v2016)
+
+    def test_touch_all_years(self):
+        v2016 = years.get_cache_version(Event, 2016)
+        years.touch_years(Event)
+        self.assertNotEqual(years.get_cache_version(Event, 2016), v2016)
+
+    def test_publication_change(self):
+        "Changing a Publication changes the years in which it was read."
+        reading = ReadingFactory(end_date=make_date('2016-02-01'))
+        v2016 = years.get_cache_version(Reading, 2016)
+        reading.publication.title = 'New title'
+        reading.publication.save()
+        self.assertNotEqual(years.get_cache_version(Reading, 2016), v2016)
+
+    def test_publication_role_change(self):
+        reading = ReadingFactory(end_date=make_date('2016-02-01'))
+        v2016 = years.get_cache_version(Reading, 2016)
+        PublicationRoleFactory(publication=reading.publication)
+        self.assertNotEqual(years.get_cache_version(Reading, 2016), v2016)
@@ -2,12 +2,14 @@ from django.core.exceptions import ValidationError
 from django.test import TestCase
 
 from .. import make_date
-from ..core.test_admin import AdminTestCase
+from ..core.test_admin import AdminTestCase, AdminViewTestCase
 from spectator.core.factories import IndividualCreatorFactory
 from spectator.events.admin import EventAdminForm, MovieAdmin, PlayAdmin
 from spectator.events.factories import ClassicalWorkFactory,\
-        DancePieceFactory, MovieFactory, MovieRoleFactory, PlayFactory,\
-        PlayRoleFactory, VenueFactory
+        ClassicalWorkRoleFactory, ConcertEventFactory, DancePieceFactory,\
+        DancePieceRoleFactory, EventRoleFactory, GigEventFactory,\
+        MovieFactory, MovieRoleFactory, PlayFactory, PlayRoleFactory,\
+        VenueFactory
 from spectator.events.models import Movie, Play
 
 
@@ -174,3 +176,82 @@ class PlayAdminTestCase(AdminTestCase):
         pa = PlayAdmin(Play, self.site)
         self.assertEqual(pa.show_creators(play), 'Bob et al.')
 
+
+
+class EventAdminViewTestCase(AdminViewTestCase):
+
+    def test_add_form_lists_no_works(self):
+        "The form shouldn't list every work, movie, play or venue."
+        ClassicalWorkFactory(title='Unchosen Work')
+        DancePieceFactory(title='Unchosen Piece')
+        MovieFactory(title='Unchosen Movie')
+        PlayFactory(title='Unchosen Play')
+        VenueFactory(name='Unchosen Venue')
+        response = self.client.get('/admin/spectator_events/event/add/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Unchosen')
+        self.assertContains(response,
+                '/admin/spectator_events/classicalwork/autocomplete/')
+        self.assertContains(response,
+                '/admin/spectator_core/creator/autocomplete/')
+
+    def test_change_form_lists_chosen_works(self):
+        work = ClassicalWorkFactory(title='Chosen Work')
+        ClassicalWorkFactory(title='Unchosen Work')
+        event = ConcertEventFactory(venue=VenueFactory(name='Chosen Venue'))
+        event.classicalworks.add(work)
+        response = self.client.get(
+                '/admin/spectator_events/event/{}/change/'.format(event.pk))
+        self.assertContains(response, 'Chosen Work')
+        self.assertContains(response, 'Chosen Venue')
+        self.assertNotContains(response, 'Unchosen Work')
+
+    def test_venue_autocomplete(self):
+        VenueFactory(pk=3, name='Café Oto')
+        response = self.client.get(
+                '/admin/spectator_events/venue/autocomplete/', {'q': 'caf'})
+        self.assertEqual(response.json()['results'][0]['id'], 3)
+
+
+class ChangelistQueriesTestCase(AdminViewTestCase):
+
+    def make_work(self, work_factory, role_factory, field):
+        def make():
+            work = work_factory()
+            for i in range(2):
+                role_factory(**{field: work})
+        return make
+
+    def test_event(self):
+        def make():
+            event = GigEventFactory(venue=VenueFactory())
+            EventRoleFactory(event=event)
+        self.assertChangelistQueriesConstant(
+                            '/admin/spectator_events/event/', make)
+
+    def test_classicalwork(self):
+        self.assertChangelistQueriesConstant(
+                    '/admin/spectator_events/classicalwork/',
+                    self.make_work(ClassicalWorkFactory,
+                                   ClassicalWorkRoleFactory,
+                                   'classical_work'))
+
+    def test_dancepiece(self):
+        self.assertChangelistQueriesConstant(
+                    '/admin/spectator_events/dancepiece/',
+                    self.make_work(DancePieceFactory, DancePieceRoleFactory,
+                                   'dance_piece'))
+
+    def test_movie(self):
+        self.assertChangelistQueriesConstant(
+                    '/admin/spectator_events/movie/',
+                    self.make_work(MovieFactory, MovieRoleFactory, 'movie'))
+
+    def test_play(self):
+        self.assertChangelistQueriesConstant(
+                    '/admin/spectator_events/play/',
+                    self.make_work(PlayFactory, PlayRoleFactory, 'play'))
+
+    def test_venue(self):
+        self.assertChangelistQueriesConstant(
+                            '/admin/spectator_events/venue/', VenueFactory)
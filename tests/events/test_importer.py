@@ -0,0 +1,321 @@
+import datetime
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from spectator.core import counters, importing, versions, years
+from spectator.core.factories import GroupCreatorFactory,\
+        IndividualCreatorFactory
+from spectator.core.models import Creator, CreatorCredit, ImportRecord
+from spectator.events import importer
+from spectator.events.factories import MovieFactory, VenueFactory
+from spectator.events.models import ClassicalWork, Event, Movie, Venue
+
+
+class ParseRowTestCase(SimpleTestCase):
+
+    def test_csv_row(self):
+        row = importer.parse_row({
+            'kind': 'gig', 'date': '2017-06-01', 'venue': ' Academy ',
+            'venue_country': 'gb', 'title': '',
+            'creators': 'The Long Blondes|Headliner|group; Bob Dylan',
+            'movie': '', 'movie_year': '', 'play': '', 'works': ''})
+        self.assertEqual(row, {
+            'kind': 'gig', 'date': '2017-06-01', 'title': '',
+            'venue': {'name': 'Academy', 'country': 'GB'},
+            'creators': [
+                {'name': 'The Long Blondes', 'role': 'Headliner',
+                                                            'kind': 'group'},
+                {'name': 'Bob Dylan', 'role': '', 'kind': None},
+            ],
+            'movie': None, 'play': None, 'works': []})
+
+    def test_json_row(self):
+        row = importer.parse_row('{"kind": "movie", "venue": "Odeon", '
+                '"movie": "Alien", "movie_year": 1979, '
+                '"creators": [{"name": "Ridley Scott", "kind": "individual"}]}')
+        self.assertIsNone(row['date'])
+        self.assertEqual(row['movie'], {'title': 'Alien', 'year': 1979})
+        self.assertEqual(row['creators'], [
+                {'name': 'Ridley Scott', 'role': '', 'kind': 'individual'}])
+
+    def test_works(self):
+        row = importer.parse_row({'kind': 'concert', 'venue': 'Hall',
+                                  'works': ['Symphony No. 5', ' Bolero ']})
+        self.assertEqual(row['works'], [{'title': 'Symphony No. 5'},
+                                        {'title': 'Bolero'}])
+
+    def test_errors(self):
+        rows = [
+            ('Invalid JSON', '{"kind": '),
+            ('Expected an object', '[1, 2]'),
+            ('Unknown kind', {'kind': 'party', 'venue': 'Hall'}),
+            ('need a venue', {'kind': 'gig'}),
+            ('Invalid date', {'kind': 'gig', 'venue': 'Hall',
+                              'date': '01/06/2017'}),
+            ('Unknown venue_country', {'kind': 'gig', 'venue': 'Hall',
+                                       'venue_country': 'XX'}),
+            ('need a movie', {'kind': 'movie', 'venue': 'Odeon'}),
+            ('Invalid movie_year', {'kind': 'movie', 'venue': 'Odeon',
+                                    'movie': 'Alien', 'movie_year': 'soon'}),
+            ('Only movie events', {'kind': 'gig', 'venue': 'Hall',
+                                   'movie': 'Alien'}),
+            ('need a play', {'kind': 'play', 'venue': 'Hall'}),
+            ('Only play events', {'kind': 'gig', 'venue': 'Hall',
+                                  'play': 'Hamlet'}),
+            ('need works', {'kind': 'dance', 'venue': 'Hall'}),
+            ('Only concert and dance', {'kind': 'gig', 'venue': 'Hall',
+                                        'works': 'Bolero'}),
+            ('Unknown creator kind', {'kind': 'gig', 'venue': 'Hall',
+                                      'creators': 'Bob|Singer|robot'}),
+            ('at most 50', {'kind': 'gig', 'venue': 'Hall',
+                            'creators': 'Bob|' + 'x' * 51}),
+        ]
+        for message, data in rows:
+            with self.assertRaisesRegex(importer.RowError, message):
+                importer.parse_row(data)
+
+    def test_hash_ignores_format(self):
+        csv_row = importer.parse_row({'kind': 'gig', 'venue': 'Hall',
+                                      'creators': 'Bob Dylan', 'works': ''})
+        json_row = importer.parse_row('{"kind": "gig", "venue": "Hall", '
+                                      '"creators": ["Bob Dylan"]}')
+        self.assertEqual(importing.make_hash(importer.LABEL, csv_row),
+                         importing.make_hash(importer.LABEL, json_row))
+
+
+class ReadTestCase(SimpleTestCase):
+
+    def test_read_csv(self):
+        f = StringIO('kind,venue\ngig,Hall\nmovie,Odeon\n')
+        self.assertEqual(list(importer.read_csv(f)), [
+                (1, {'kind': 'gig', 'venue': 'Hall'}),
+                (2, {'kind': 'movie', 'venue': 'Odeon'})])
+
+    def test_read_json_lines(self):
+        f = StringIO('{"kind": "gig"}\n\n{"kind": "movie"}\n')
+        self.assertEqual(list(importer.read_json(f)), [
+                (1, '{"kind": "gig"}\n'), (2, '{"kind": "movie"}\n')])
+
+    def test_read_json_array(self):
+        f = StringIO('[\n{"kind": "gig"},\n{"kind": "movie"}\n]\n')
+        self.assertEqual(list(importer.read_json(f)), [
+                (1, {'kind': 'gig'}), (2, {'kind': 'movie'})])
+
+    def test_read_invalid_json_array(self):
+        with self.assertRaisesRegex(ValueError, 'Invalid JSON'):
+            list(importer.read_json(StringIO('[{"kind": ')))
+
+
+class ImportEventsTestCase(TestCase):
+
+    def import_rows(self, rows, **kwargs):
+        return importer.import_events(enumerate(rows, 1), **kwargs)
+
+    def test_imports_events(self):
+        result = self.import_rows([
+            {'kind': 'gig', 'date': '2017-06-01', 'venue': 'Academy',
+             'venue_country': 'GB',
+             'creators': 'The Long Blondes|Headliner|group; Bob Dylan|Support'},
+            {'kind': 'movie', 'date': '2016-01-02', 'venue': 'Odeon',
+             'movie': 'Alien', 'movie_year': '1979'},
+        ])
+        self.assertEqual(result, importer.Result(2, 0, []))
+
+        gig = Event.objects.get(kind='gig')
+        self.assertEqual(gig.date, datetime.date(2017, 6, 1))
+        self.assertEqual(gig.kind_slug, 'gigs')
+        self.assertEqual(gig.venue.name, 'Academy')
+        self.assertEqual(gig.venue.country, 'GB')
+        self.assertEqual(gig.venue.name_sort, 'academy')
+        self.assertEqual(gig.display_title, 'The Long Blondes and Bob Dylan')
+        self.assertEqual(gig.title_sort, 'long blondes and bob dylan, the')
+
+        roles = gig.roles.order_by('role_order')
+        self.assertEqual([(r.creator.name, r.creator.kind, r.role_name)
+                          for r in roles],
+                         [('The Long Blondes', 'group', 'Headliner'),
+                          ('Bob Dylan', 'individual', 'Support')])
+        self.assertEqual(roles[1].creator.name_sort, 'dylan, bob')
+
+        movie = Event.objects.get(kind='movie')
+        self.assertEqual(movie.movie.title, 'Alien')
+        self.assertEqual(movie.movie.year, 1979)
+        self.assertEqual(movie.display_title, 'Alien (1979)')
+        self.assertEqual(movie.kind_slug, 'movies')
+
+    def test_titles_with_pks(self):
+        "Titles that need the Event's pk are made after it's created."
+        self.import_rows([{'kind': 'misc', 'venue': 'Hall'}])
+        event = Event.objects.get()
+        self.assertEqual(event.display_title, 'Event #{}'.format(event.pk))
+
+    def test_works(self):
+        self.import_rows([{'kind': 'concert', 'venue': 'Hall',
+                           'works': 'Bolero; Symphony No. 5'}])
+        event = Event.objects.get()
+        self.assertEqual(sorted(w.title for w in event.classicalworks.all()),
+                         ['Bolero', 'Symphony No. 5'])
+        self.assertEqual(event.display_title, 'Bolero and Symphony No. 5')
+
+    def test_works_title_order(self):
+        "Works are in the title, and title_sort, ordered by their title_sort."
+        self.import_rows([{'kind': 'concert', 'venue': 'Hall',
+                           'works': 'Symphony No. 9; Adagio'}])
+        event = Event.objects.get()
+        self.assertEqual(event.display_title, 'Adagio and Symphony No. 9')
+        self.assertEqual(event.display_title, event.make_display_title())
+
+    def test_uses_existing_objects(self):
+        "Matching on naturalized names, so 'the academy' is 'The Academy'."
+        venue = VenueFactory(name='The Academy')
+        band = GroupCreatorFactory(name='The Long Blondes')
+        bob = IndividualCreatorFactory(name='Bob Dylan')
+        alien = MovieFactory(title='Alien', year=1979)
+        self.import_rows([
+            {'kind': 'gig', 'venue': 'the academy',
+             'creators': 'the long blondes; bob dylan|Support|individual'},
+            {'kind': 'movie', 'venue': 'The Academy', 'movie': 'alien',
+             'movie_year': '1979'},
+            {'kind': 'movie', 'venue': 'The Academy', 'movie': 'Alien',
+             'movie_year': '2050'},
+        ])
+        self.assertEqual(Venue.objects.count(), 1)
+        self.assertEqual(Creator.objects.count(), 2)
+        gig = Event.objects.get(kind='gig')
+        self.assertEqual(gig.venue, venue)
+        self.assertEqual([r.creator for r in gig.roles.all()], [band, bob])
+        # The existing Creator's name is used in the title:
+        self.assertEqual(gig.display_title, 'The Long Blondes and Bob Dylan')
+        self.assertEqual(Event.objects.get(movie=alien).display_title,
+                         'Alien (1979)')
+        self.assertEqual(Movie.objects.filter(year=2050).count(), 1)
+
+    def test_creates_each_object_once(self):
+        self.import_rows([
+            {'kind': 'gig', 'venue': 'Hall', 'creators': 'Bob Dylan'},
+            {'kind': 'gig', 'venue': 'HALL', 'creators': 'bob dylan'},
+        ], batch_size=1)
+        self.assertEqual(Venue.objects.count(), 1)
+        self.assertEqual(Creator.objects.count(), 1)
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_credits(self):
+        self.import_rows([{'kind': 'gig', 'venue': 'Hall',
+                           'date': '2017-06-01', 'creators': 'Bob Dylan'}])
+        role = Event.objects.get().roles.get()
+        credit = CreatorCredit.objects.get()
+        self.assertEqual(credit.creator_id, role.creator_id)
+        self.assertEqual(credit.object_id, role.event_id)
+        self.assertEqual(credit.role_id, role.pk)
+        self.assertEqual(credit.date, datetime.date(2017, 6, 1))
+
+    def test_counts_and_years(self):
+        self.import_rows([
+            {'kind': 'gig', 'venue': 'Hall', 'date': '2017-06-01',
+             'creators': 'The Fall||group'},
+            {'kind': 'gig', 'venue': 'Hall', 'date': '2016-06-01'},
+            {'kind': 'comedy', 'venue': 'Hall', 'date': '2017-07-01'},
+        ])
+        counts = counters.get_counts(Event)
+        self.assertEqual(counts['gig'], 2)
+        self.assertEqual(counts['comedy'], 1)
+        self.assertEqual(counters.get_counts(Creator)['group'], 1)
+        self.assertEqual([y.year for y in years.get_years(Event)],
+                         [2016, 2017])
+
+    def test_idempotent(self):
+        rows = [{'kind': 'gig', 'venue': 'Hall', 'creators': 'Bob Dylan'},
+                {'kind': 'gig', 'venue': 'Hall', 'date': '2017-06-01'}]
+        self.import_rows(rows)
+        result = self.import_rows(rows + [{'kind': 'comedy', 'venue': 'Hall'}])
+        self.assertEqual(result, importer.Result(1, 2, []))
+        self.assertEqual(Event.objects.count(), 3)
+        self.assertEqual(ImportRecord.objects.count(), 3)
+
+    def test_duplicate_rows(self):
+        row = {'kind': 'gig', 'venue': 'Hall', 'creators': 'Bob Dylan'}
+        result = self.import_rows([row, dict(row)])
+        self.assertEqual(result, importer.Result(1, 1, []))
+        self.assertEqual(Event.objects.count(), 1)
+
+    def test_invalid_rows(self):
+        result = self.import_rows([{'kind': 'gig', 'venue': 'Hall'},
+                                   {'kind': 'party', 'venue': 'Hall'}])
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.errors, [(2, "Unknown kind: 'party'.")])
+
+    def test_touches_once(self):
+        "Versions are changed once, after the last batch."
+        with patch('spectator.core.versions.bump',
+                   wraps=versions.bump) as bump:
+            self.import_rows([{'kind': 'gig', 'venue': 'Hall',
+                               'creators': 'Bob Dylan'}] * 2 +
+                             [{'kind': 'gig', 'venue': 'Academy',
+                               'creators': 'Bob Dylan'}],
+                             batch_size=1)
+        self.assertEqual(sorted(c[0][0].__name__ for c in bump.call_args_list),
+                         ['Creator', 'Event', 'EventRole', 'Venue'])
+        bump.assert_any_call(Venue, sorted(Venue.objects.values_list(
+                                                        'pk', flat=True)))
+
+    def test_queries_dont_depend_on_rows(self):
+        "Each batch uses the same number of queries however big it is."
+        def count_queries(number, start):
+            rows = [{'kind': 'concert', 'venue': 'Hall {}'.format(i),
+                     'date': '2017-06-01',
+                     'creators': 'Creator {}|Conductor'.format(i),
+                     'works': 'Work {}; Work {}x'.format(i, i)}
+                    for i in range(start, start + number)]
+            with CaptureQueriesContext(connection) as queries:
+                self.import_rows(rows, batch_size=number)
+            return len(queries)
+
+        # The first import also gets ContentTypes, makes ModelVersions, etc:
+        count_queries(1, 0)
+        self.assertEqual(count_queries(2, 10), count_queries(20, 100))
+        self.assertEqual(ClassicalWork.objects.count(), 46)
+
+
+class ImportEventsCommandTestCase(TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('kind,date,venue,creators\n'
+                    'gig,2017-06-01,Hall,Bob Dylan\n'
+                    'party,2017-06-02,Hall,\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_command(self):
+        out = StringIO()
+        err = StringIO()
+        call_command('spectator_import_events', self.path,
+                     stdout=out, stderr=err)
+        self.assertEqual(out.getvalue(),
+                         '1 imported, 0 already imported, 1 invalid.\n')
+        self.assertEqual(err.getvalue(), "Row 2: Unknown kind: 'party'.\n")
+        self.assertEqual(Event.objects.get().display_title, 'Bob Dylan')
+
+        out = StringIO()
+        call_command('spectator_import_events', self.path,
+                     stdout=out, stderr=StringIO())
+        self.assertEqual(out.getvalue(),
+                         '0 imported, 1 already imported, 1 invalid.\n')
+
+    def test_unknown_format(self):
+        with self.assertRaisesRegex(CommandError, '--format'):
+            call_command('spectator_import_events', 'events.txt')
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('spectator_import_events', '/nonexistent/events.csv')
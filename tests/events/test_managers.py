@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+from spectator.core.factories import *
+from spectator.events.factories import *
+from spectator.events.models import ClassicalWork, Event, Movie
+
+
+class EventQuerySetTestCase(TestCase):
+
+    def setUp(self):
+        for event in GigEventFactory.create_batch(3, title=''):
+            EventRoleFactory.create_batch(2, event=event)
+        MovieEventFactory.create_batch(2, title='')
+        PlayEventFactory.create_batch(2, title='')
+
+    def test_for_display_queries(self):
+        "It should fetch everything event.html uses, and no roles."
+        with self.assertNumQueries(1):
+            for event in Event.objects.for_display():
+                str(event)
+                event.get_absolute_url()
+                event.venue.name
+                str(event.movie)
+        self.assertEqual(Event.objects.for_display()._prefetch_related_lookups,
+                         ())
+
+    def test_with_creators_queries(self):
+        "It should fetch everything visits_list.html uses."
+        # Events, roles and creators:
+        with self.assertNumQueries(3):
+            for event in Event.objects.for_display().with_creators():
+                event.venue.name
+                [r.creator.name for r in event.roles.all()]
+
+    def test_related_managers(self):
+        "Related managers, as used in templates, should have for_display()."
+        creator = IndividualCreatorFactory()
+        EventRoleFactory(creator=creator, event=GigEventFactory())
+        self.assertEqual(len(creator.events.for_display()), 1)
+
+
+class WorkQuerySetTestCase(TestCase):
+
+    def test_for_display_queries(self):
+        "It should fetch everything m2m_work_list.html uses."
+        for work in ClassicalWorkFactory.create_batch(3):
+            ClassicalWorkRoleFactory.create_batch(2, classical_work=work)
+        with self.assertNumQueries(3):
+            for work in ClassicalWork.objects.for_display():
+                [r.creator.name for r in work.roles.all()]
+
+    def test_movie_for_display(self):
+        MovieRoleFactory(movie=MovieFactory())
+        with self.assertNumQueries(3):
+            for movie in Movie.objects.for_display():
+                [r.creator.name for r in movie.roles.all()]
@@ -1,10 +1,16 @@
+from unittest import mock
+
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
 
 from .. import make_date
+from spectator.core import versions
 from spectator.core.factories import *
 from spectator.events.factories import *
-from spectator.events.models import Event, Movie, Play, Venue
+from spectator.events.models import Event, EventRole, Movie, Play, Venue
+from spectator.events.titles import mark_events_changed,\
+        suspended_title_updates, update_titles
 
 
 class EventStrTestCase(TestCase):
@@ -116,8 +122,11 @@ class EventStrTestCase(TestCase):
         self.assertEqual(str(event), 'My Great Play')
 
 
-class EventTestCase(TestCase):
-    "Testing everything except the __str__() method."
+class EventTitlesTestCase(TransactionTestCase):
+    """
+    Testing display_title and title_sort, which are updated when the
+    transaction is committed, so we can't use TestCase.
+    """
 
     def test_title_sort_with_no_title(self):
         "If there's no title, title_sort should be based on creators."
@@ -139,6 +148,172 @@ class EventTestCase(TestCase):
         event.refresh_from_db()
         self.assertEqual(event.title_sort, 'milky wimpshake')
 
+    def test_display_title(self):
+        "It should be set on save, including the pk for default titles."
+        event = GigEventFactory(title='')
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Event #{}'.format(event.pk))
+        self.assertEqual(event.title_sort, 'event #{:08d}'.format(event.pk))
+
+    def test_display_title_roles(self):
+        "It should update when roles are added, deleted or renamed."
+        event = GigEventFactory(title='')
+        role1 = EventRoleFactory(event=event,
+                        creator=GroupCreatorFactory(name='Martha'),
+                        role_order=1)
+        EventRoleFactory(event=event,
+                        creator=GroupCreatorFactory(name='The Tuts'),
+                        role_order=2)
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Martha and The Tuts')
+
+        role1.creator.name = 'Milky Wimpshake'
+        role1.creator.save()
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Milky Wimpshake and The Tuts')
+
+        role1.delete()
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'The Tuts')
+
+    def test_display_title_works(self):
+        "It should update when works are changed from either side."
+        work = ClassicalWorkFactory(title='Work A')
+        event = ConcertEventFactory(title='', classicalworks=[work])
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Work A')
+
+        work.title = 'Work B'
+        work.save()
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Work B')
+
+        work.event_set.clear()
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Concert #{}'.format(event.pk))
+
+        piece = DancePieceFactory(title='Piece A')
+        dance = DanceEventFactory(title='')
+        piece.event_set.add(dance)
+        dance.refresh_from_db()
+        self.assertEqual(dance.display_title, 'Piece A')
+
+    def test_display_title_works_deleted(self):
+        "It should update when a work is deleted."
+        work = ClassicalWorkFactory(title='Work A')
+        event = ConcertEventFactory(title='', classicalworks=[
+                        work, ClassicalWorkFactory(title='Work B')])
+        piece = DancePieceFactory(title='Piece A')
+        dance = DanceEventFactory(title='', dancepieces=[piece])
+
+        work.delete()
+        piece.delete()
+        event.refresh_from_db()
+        dance.refresh_from_db()
+        self.assertEqual(event.display_title, 'Work B')
+        self.assertEqual(event.title_sort, 'work b')
+        self.assertEqual(dance.display_title, 'Dance #{}'.format(dance.pk))
+
+    def test_display_title_movie_and_play(self):
+        "It should update when the Movie or Play is changed."
+        movie_event = MovieEventFactory(title='',
+                                        movie=MovieFactory(title='Old'))
+        play_event = PlayEventFactory(title='', play=PlayFactory(title='Old'))
+
+        movie_event.movie.title = 'New'
+        movie_event.movie.save()
+        play_event.play.title = 'New'
+        play_event.play.save()
+
+        movie_event.refresh_from_db()
+        play_event.refresh_from_db()
+        self.assertEqual(movie_event.display_title, 'New')
+        self.assertEqual(play_event.display_title, 'New')
+
+    def test_str_uses_display_title(self):
+        "It shouldn't query the database."
+        event = GigEventFactory(title='')
+        EventRoleFactory(event=event,
+                        creator=GroupCreatorFactory(name='Martha'))
+        event = Event.objects.get(pk=event.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(event), 'Martha')
+
+    def test_titles_updated_once_per_transaction(self):
+        "Adding many roles should only update the Event's titles once."
+        event = GigEventFactory(title='')
+        creators = GroupCreatorFactory.create_batch(20)
+        with mock.patch('spectator.events.titles.update_titles',
+                        wraps=update_titles) as update:
+            with transaction.atomic():
+                for creator in creators:
+                    EventRole(event_id=event.pk, creator=creator).save()
+                self.assertFalse(update.called)
+            update.assert_called_once_with({event.pk}, using='default')
+        event.refresh_from_db()
+        for creator in creators:
+            self.assertIn(creator.name, event.display_title)
+
+    def test_titles_not_updated_on_rollback(self):
+        event = GigEventFactory(title='')
+        try:
+            with transaction.atomic():
+                EventRoleFactory(event=event,
+                                creator=GroupCreatorFactory(name='Martha'))
+                raise ValueError
+        except ValueError:
+            pass
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Event #{}'.format(event.pk))
+
+        # And a later transaction still updates it:
+        EventRoleFactory(event=event, creator=GroupCreatorFactory(name='Tuts'))
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Tuts')
+
+    def test_suspended_title_updates(self):
+        event = GigEventFactory(title='')
+        with suspended_title_updates():
+            EventRoleFactory(event=event,
+                            creator=GroupCreatorFactory(name='Martha'))
+            event.refresh_from_db()
+            self.assertEqual(event.display_title,
+                                            'Event #{}'.format(event.pk))
+        event.refresh_from_db()
+        self.assertEqual(event.display_title, 'Martha')
+
+    def test_suspended_title_updates_using(self):
+        "Each Event is updated using the database it was changed in."
+        with mock.patch('spectator.events.titles._PendingEvents.get') as get:
+            with suspended_title_updates():
+                mark_events_changed([1, 2])
+                mark_events_changed([3], using='other')
+                self.assertFalse(get.called)
+        get.assert_has_calls([mock.call('default'), mock.call('other')],
+                             any_order=True)
+
+    def test_update_titles_title_sort_only(self):
+        "A changed title_sort alone should change the Event's version."
+        event = GigEventFactory(title='The Fall')
+        Event.objects.filter(pk=event.pk).update(title_sort='old')
+        version = versions.get_object_version(Event, event.pk)
+        update_titles([event.pk])
+        event.refresh_from_db()
+        self.assertEqual(event.title_sort, 'fall, the')
+        self.assertGreater(versions.get_object_version(Event, event.pk),
+                           version)
+
+    def test_deleting_event(self):
+        "Deleting an Event (and so its roles) should be fine."
+        event = GigEventFactory(title='')
+        EventRoleFactory(event=event)
+        event.delete()
+        self.assertEqual(Event.objects.count(), 0)
+
+
+class EventTestCase(TestCase):
+    "Testing everything except the __str__() method."
+
     def test_get_kinds(self):
         self.assertEqual(
             Event.get_kinds(),
@@ -7,6 +7,7 @@ except ImportError:
     from django.core.urlresolvers import resolve, reverse
 
 from .. import make_date
+from spectator.core.views import AutocompleteView
 from spectator.events import views
 from spectator.events.factories import GigEventFactory
 
@@ -42,6 +43,27 @@ class EventsUrlsTestCase(TestCase):
         self.assertEqual(resolve('/events/venues/34/').func.__name__,
                          views.VenueDetailView.__name__)
 
+    def test_autocomplete_urls(self):
+        for name, url in (
+                ('venue_autocomplete', '/events/venues/autocomplete/'),
+                ('movie_autocomplete', '/events/movies/autocomplete/'),
+                ('play_autocomplete', '/events/plays/autocomplete/'),
+                ('classicalwork_autocomplete',
+                                    '/events/concerts/works/autocomplete/'),
+                ('dancepiece_autocomplete',
+                                    '/events/dance/pieces/autocomplete/')):
+            self.assertEqual(reverse('spectator:events:' + name), url)
+
+    def test_autocomplete_views(self):
+        "Should use the correct view."
+        for url in ('/events/venues/autocomplete/',
+                    '/events/movies/autocomplete/',
+                    '/events/plays/autocomplete/',
+                    '/events/concerts/works/autocomplete/',
+                    '/events/dance/pieces/autocomplete/'):
+            self.assertEqual(resolve(url).func.__name__,
+                             AutocompleteView.__name__)
+
     # YEARS
 
     def test_event_year_archive_url(self):
@@ -79,3 +101,28 @@ class EventsUrlsTestCase(TestCase):
         self.assertEqual(resolve('/events/gigs/34/').func.__name__,
                          views.EventDetailView.__name__)
 
+
+    def test_movie_events_url(self):
+        self.assertEqual(
+            reverse('spectator:events:movie_events', kwargs={'pk': 5}),
+            '/events/movies/5/events/')
+
+    def test_play_events_url(self):
+        self.assertEqual(
+            reverse('spectator:events:play_events', kwargs={'pk': 5}),
+            '/events/plays/5/events/')
+
+    def test_classicalwork_events_url(self):
+        self.assertEqual(
+            reverse('spectator:events:classicalwork_events', kwargs={'pk': 5}),
+            '/events/concerts/works/5/events/')
+
+    def test_dancepiece_events_url(self):
+        self.assertEqual(
+            reverse('spectator:events:dancepiece_events', kwargs={'pk': 5}),
+            '/events/dance/pieces/5/events/')
+
+    def test_work_events_view(self):
+        "Should use the correct view."
+        self.assertEqual(resolve('/events/movies/5/events/').func.__name__,
+                         views.WorkEventsView.__name__)
@@ -1,3 +1,5 @@
+from datetime import date
+
 from django.conf import settings
 from django.http.response import Http404
 from django.test import override_settings
@@ -6,6 +8,7 @@ from .. import make_date
 from ..core.test_views import ViewTestCase
 from spectator.events import views
 from spectator.events.factories import *
+from spectator.events.models import ClassicalWork, Event, Movie
 
 
 class EventListViewTestCase(ViewTestCase):
@@ -30,6 +33,24 @@ class EventListViewTestCase(ViewTestCase):
         self.assertEqual(response.template_name[0],
                 'spectator_events/event_list.html')
 
+    def test_count_changes_with_events(self):
+        "The cached count is redone when Events change."
+        GigEventFactory()
+        response = views.EventListView.as_view()(self.request)
+        self.assertEqual(response.context_data['paginator'].count, 1)
+        GigEventFactory()
+        response = views.EventListView.as_view()(self.request)
+        self.assertEqual(response.context_data['paginator'].count, 2)
+
+    def test_no_queries_per_event_title(self):
+        "Untitled events' titles shouldn't need a query each."
+        for event in GigEventFactory.create_batch(3, title=''):
+            EventRoleFactory(event=event)
+        response = views.EventListView.as_view()(self.request)
+        events = list(response.context_data['event_list'])
+        with self.assertNumQueries(0):
+            [str(e) for e in events]
+
     def test_context_counts(self):
         ConcertEventFactory.create_batch(6)
         DanceEventFactory.create_batch(5)
@@ -258,6 +279,126 @@ class EventYearArchiveViewTestCase(ViewTestCase):
         self.assertIn('previous_year', response.context_data)
         self.assertIsNone(response.context_data['previous_year'])
 
+    def test_context_skips_empty_years(self):
+        "Previous/next years should be the nearest ones with Events."
+        GigEventFactory(date=make_date('2014-07-15'))
+        GigEventFactory(date=make_date('2019-07-15'))
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        self.assertEqual(response.context_data['previous_year'],
+                        make_date('2014-01-01'))
+        self.assertEqual(response.context_data['next_year'],
+                        make_date('2019-01-01'))
+
+    def test_context_archive_year(self):
+        "It should include the year's ArchiveYear from the index."
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        self.assertEqual(response.context_data['archive_year'].count, 1)
+
+    def test_response_404_no_events(self):
+        "It should raise 404 if there are no Events at all."
+        Event.objects.all().delete()
+        with self.assertRaises(Http404):
+            views.EventYearArchiveView.as_view()(self.request, year='2017')
+
+    def test_etag(self):
+        "It should have an ETag that changes when the year's Events do."
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        etag = response['ETag']
+        self.gig1.save()
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_related(self):
+        "It should change when things displayed with the Events do."
+        role = EventRoleFactory(event=self.gig1)
+        movie_event = MovieEventFactory(date=make_date('2017-02-01'))
+        etags = []
+
+        def get_etag():
+            response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+            etags.append(response['ETag'])
+
+        get_etag()
+        self.gig1.venue.name = 'New Venue'
+        self.gig1.venue.save()
+        get_etag()
+        role.creator.name = 'New Name'
+        role.creator.save()
+        get_etag()
+        role.role_name = 'Support'
+        role.save()
+        get_etag()
+        movie_event.movie.title = 'New Title'
+        movie_event.movie.save()
+        get_etag()
+        self.assertEqual(len(set(etags)), 5)
+
+    def test_etag_sidebar(self):
+        "It should change when an Event in another year, in the sidebar, does."
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        etag = response['ETag']
+        GigEventFactory(date=make_date('2018-06-01'))
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_not_modified(self):
+        "It should respond with 304 if the ETag matches."
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        request = self.factory.get('/fake-path/',
+                                    HTTP_IF_NONE_MATCH=response['ETag'])
+        with self.assertNumQueries(0):
+            response = views.EventYearArchiveView.as_view()(
+                                                        request, year='2017')
+        self.assertEqual(response.status_code, 304)
+
+    def test_cache_control_past_year(self):
+        "Shared caches can keep past years for a while."
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=3600', response['Cache-Control'])
+
+    @override_settings(SPECTATOR_YEAR_CDN_MAX_AGE=600)
+    def test_cache_control_setting(self):
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        self.assertIn('s-maxage=600', response['Cache-Control'])
+
+    def test_cache_control_this_year(self):
+        "The current year could change at any time."
+        this_year = str(date.today().year)
+        GigEventFactory(date=make_date('{}-01-01'.format(this_year)))
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year=this_year)
+        self.assertNotIn('s-maxage', response['Cache-Control'])
+        self.assertIn('max-age=0', response['Cache-Control'])
+
+    def test_caches_event_list(self):
+        "The list should come from the cache until an Event changes."
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        response.render()
+        old_title = self.gig1.title
+        # Bypasses the signals:
+        Event.objects.filter(pk=self.gig1.pk).update(title='Changed title')
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        # (The new title is also in the uncached sidebar.)
+        self.assertContains(response.render(), old_title)
+
+        Event.objects.get(pk=self.gig1.pk).save()
+        response = views.EventYearArchiveView.as_view()(
+                                                    self.request, year='2017')
+        self.assertNotContains(response.render(), old_title)
+
 
 class ClassicalWorkListViewTestCase(ViewTestCase):
 
@@ -310,6 +451,27 @@ class ClassicalWorkDetailViewTestCase(ViewTestCase):
                          '/events/concerts/works/')
 
 
+    @override_settings(SPECTATOR_SECTION_SIZE=2)
+    def test_context_visits(self):
+        "It should include the first few Events and a link to the rest."
+        work = ClassicalWork.objects.get(pk=5)
+        ConcertEventFactory.create_batch(3, classicalworks=[work])
+        response = views.ClassicalWorkDetailView.as_view()(self.request, pk=5)
+        context = response.context_data
+        self.assertEqual(len(context['visit_list']), 2)
+        self.assertEqual(context['more_visits_url'],
+                         '/events/concerts/works/5/events/')
+
+    def test_context_visits_no_more(self):
+        "It should not link to more Events if they're all displayed."
+        work = ClassicalWork.objects.get(pk=5)
+        ConcertEventFactory(classicalworks=[work])
+        response = views.ClassicalWorkDetailView.as_view()(self.request, pk=5)
+        context = response.context_data
+        self.assertEqual(len(context['visit_list']), 1)
+        self.assertNotIn('more_visits_url', context)
+
+
 class DancePieceListViewTestCase(ViewTestCase):
 
     def test_response_200(self):
@@ -360,6 +522,48 @@ class DancePieceDetailViewTestCase(ViewTestCase):
                          '/events/dance/pieces/')
 
 
+class WorkEventsViewTestCase(ViewTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.movie = MovieFactory(pk=5)
+        self.events = MovieEventFactory.create_batch(3, movie=self.movie)
+        MovieEventFactory()
+
+    def test_response_200(self):
+        "It should respond with 200."
+        response = views.WorkEventsView.as_view(model=Movie)(
+                                                            self.request, pk=5)
+        self.assertEqual(response.status_code, 200)
+
+    def test_response_404(self):
+        "It should raise 404 if there's no work with that pk."
+        with self.assertRaises(Http404):
+            views.WorkEventsView.as_view(model=Movie)(self.request, pk=3)
+
+    def test_templates(self):
+        response = views.WorkEventsView.as_view(model=Movie)(
+                                                            self.request, pk=5)
+        self.assertEqual(response.template_name[0],
+                         'spectator_events/work_events.html')
+
+    def test_templates_ajax(self):
+        "Ajax requests should only get the list's HTML."
+        request = self.factory.get('/fake-path/',
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        response = views.WorkEventsView.as_view(model=Movie)(request, pk=5)
+        self.assertEqual(response.template_name[0],
+                         'spectator_events/includes/visits_list_paginated.html')
+
+    def test_context(self):
+        "It should only include this work's Events."
+        response = views.WorkEventsView.as_view(model=Movie)(
+                                                            self.request, pk=5)
+        context = response.context_data
+        self.assertEqual(context['work'], self.movie)
+        self.assertEqual(len(context['event_list']), 3)
+
+
 class VenueListViewTestCase(ViewTestCase):
 
     def test_response_200(self):
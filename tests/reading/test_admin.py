@@ -1,11 +1,11 @@
 from django.test import TestCase
 
 from .. import make_date
-from ..core.test_admin import AdminTestCase
+from ..core.test_admin import AdminTestCase, AdminViewTestCase
 from spectator.core.factories import IndividualCreatorFactory
 from spectator.reading.admin import PublicationAdmin
 from spectator.reading.factories import PublicationFactory,\
-        PublicationRoleFactory
+        PublicationRoleFactory, PublicationSeriesFactory
 from spectator.reading.models import Publication
 
 
@@ -34,3 +34,52 @@ class PublicationAdminTestCase(AdminTestCase):
         self.assertEqual(ba.show_creators(pub), '-')
 
 
+
+
+class PublicationAdminViewTestCase(AdminViewTestCase):
+
+    def test_series_filter_lists_no_series(self):
+        PublicationFactory(series=PublicationSeriesFactory(title='Unchosen'))
+        response = self.client.get('/admin/spectator_reading/publication/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, '>Unchosen</a>')
+        self.assertContains(response,
+                '/admin/spectator_reading/publicationseries/autocomplete/')
+
+    def test_series_filter_selected(self):
+        series = PublicationSeriesFactory(title='Chosen Series')
+        PublicationFactory(title='In Series', series=series)
+        PublicationFactory(title='Not In Series')
+        response = self.client.get('/admin/spectator_reading/publication/',
+                                   {'series__id__exact': series.pk})
+        self.assertContains(response, 'title="Chosen Series"')
+        self.assertContains(response, 'In Series')
+        self.assertNotContains(response, 'Not In Series')
+
+    def test_series_filter_invalid(self):
+        response = self.client.get('/admin/spectator_reading/publication/',
+                                   {'series__id__exact': 'x'})
+        self.assertNotEqual(response.status_code, 500)
+
+    def test_change_form_lists_no_series(self):
+        PublicationSeriesFactory(title='Unchosen')
+        response = self.client.get('/admin/spectator_reading/publication/add/')
+        self.assertNotContains(response, 'Unchosen')
+        self.assertContains(response,
+                '/admin/spectator_reading/publicationseries/autocomplete/')
+
+
+class ChangelistQueriesTestCase(AdminViewTestCase):
+
+    def test_publication(self):
+        def make():
+            pub = PublicationFactory(series=PublicationSeriesFactory())
+            PublicationRoleFactory(publication=pub)
+            PublicationRoleFactory(publication=pub)
+        self.assertChangelistQueriesConstant(
+                            '/admin/spectator_reading/publication/', make)
+
+    def test_publicationseries(self):
+        self.assertChangelistQueriesConstant(
+                            '/admin/spectator_reading/publicationseries/',
+                            PublicationSeriesFactory)
@@ -0,0 +1,421 @@
+import datetime
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from spectator.core import counters, versions, years
+from spectator.core.factories import GroupCreatorFactory
+from spectator.core.models import Creator, CreatorCredit, ImportRecord
+from spectator.reading import importer
+from spectator.reading.factories import PublicationFactory,\
+        PublicationSeriesFactory, ReadingFactory
+from spectator.reading.models import Publication, PublicationSeries, Reading
+
+
+def goodreads_row(**kwargs):
+    row = {'Title': 'Leviathan Wakes', 'Author': 'James S.A. Corey',
+           'Additional Authors': '', 'ISBN': '', 'ISBN13': '',
+           'Date Read': '2017/06/01', 'Date Added': '2017/05/01',
+           'Exclusive Shelf': 'read'}
+    row.update(kwargs)
+    return row
+
+
+def storygraph_row(**kwargs):
+    row = {'Title': 'Leviathan Wakes', 'Authors': 'James S.A. Corey',
+           'Contributors': '', 'ISBN/UID': '', 'Read Status': 'read',
+           'Dates Read': '', 'Last Date Read': '2017/06/01',
+           'Date Added': '2017/05/01'}
+    row.update(kwargs)
+    return row
+
+
+class ParseGoodreadsRowTestCase(SimpleTestCase):
+
+    def test_row(self):
+        row = importer.parse_goodreads_row(goodreads_row(
+                Title='Leviathan Wakes (The Expanse, #1)',
+                **{'Additional Authors': 'Jane  Doe, James S.A. Corey',
+                   'ISBN': '="0316129089"', 'ISBN13': '="9780316129084"'}))
+        self.assertEqual(row, {
+            'title': 'Leviathan Wakes', 'series': 'The Expanse',
+            'isbn': '0316129089',
+            'creators': [
+                {'name': 'James S.A. Corey', 'role': '', 'kind': None},
+                {'name': 'Jane Doe', 'role': '', 'kind': None},
+            ],
+            'readings': [{'start_date': None, 'start_granularity': 3,
+                          'end_date': '2017-06-01', 'end_granularity': 3,
+                          'is_finished': True}]})
+
+    def test_isbn13(self):
+        row = importer.parse_goodreads_row(goodreads_row(
+                ISBN='=""', ISBN13='="9780316129084"'))
+        self.assertEqual(row['isbn'], '9780316129084')
+
+    def test_shelves(self):
+        def readings(shelf):
+            return importer.parse_goodreads_row(goodreads_row(
+                        **{'Exclusive Shelf': shelf}))['readings']
+
+        self.assertEqual(readings('to-read'), [])
+        self.assertEqual(readings('currently-reading'), [
+                {'start_date': '2017-05-01', 'start_granularity': 3,
+                 'end_date': None, 'end_granularity': 3,
+                 'is_finished': False}])
+        self.assertFalse(readings('did-not-finish')[0]['is_finished'])
+
+    def test_errors(self):
+        rows = [
+            ('need a title', goodreads_row(Title=' ')),
+            ('Unknown Exclusive Shelf',
+                            goodreads_row(**{'Exclusive Shelf': 'favourites'})),
+            ('Invalid date', goodreads_row(**{'Date Read': '01/06/2017'})),
+            ('Invalid date', goodreads_row(**{'Date Read': '2017/02/30'})),
+        ]
+        for message, data in rows:
+            with self.subTest(message=message):
+                with self.assertRaisesRegex(importer.RowError, message):
+                    importer.parse_goodreads_row(data)
+
+
+class ParseStoryGraphRowTestCase(SimpleTestCase):
+
+    def test_row(self):
+        row = importer.parse_storygraph_row(storygraph_row(
+                Contributors='Jane Doe (Translator), John Smith',
+                **{'ISBN/UID': '978-0-316-12908-4',
+                   'Dates Read': '2016/05/01-2016/05, 2017'}))
+        self.assertEqual(row['title'], 'Leviathan Wakes')
+        self.assertEqual(row['series'], '')
+        self.assertEqual(row['isbn'], '9780316129084')
+        self.assertEqual(row['creators'], [
+                {'name': 'James S.A. Corey', 'role': '', 'kind': None},
+                {'name': 'Jane Doe', 'role': 'Translator', 'kind': None},
+                {'name': 'John Smith', 'role': '', 'kind': None}])
+        self.assertEqual(row['readings'], [
+                {'start_date': '2016-05-01', 'start_granularity': 3,
+                 'end_date': '2016-05-01', 'end_granularity': 4,
+                 'is_finished': True},
+                {'start_date': None, 'start_granularity': 3,
+                 'end_date': '2017-01-01', 'end_granularity': 6,
+                 'is_finished': True}])
+
+    def test_last_date_read(self):
+        row = importer.parse_storygraph_row(storygraph_row())
+        self.assertEqual(row['readings'], [
+                {'start_date': None, 'start_granularity': 3,
+                 'end_date': '2017-06-01', 'end_granularity': 3,
+                 'is_finished': True}])
+
+    def test_currently_reading(self):
+        row = importer.parse_storygraph_row(storygraph_row(
+                **{'Read Status': 'currently-reading',
+                   'Dates Read': '2016/01/01-2016/02/01, 2017/03/01-'}))
+        self.assertEqual([(r['start_date'], r['end_date'], r['is_finished'])
+                          for r in row['readings']],
+                         [('2016-01-01', '2016-02-01', True),
+                          ('2017-03-01', None, False)])
+
+    def test_to_read(self):
+        row = importer.parse_storygraph_row(storygraph_row(
+                **{'Read Status': 'to-read'}))
+        self.assertEqual(row['readings'], [])
+
+    def test_unknown_status(self):
+        with self.assertRaisesRegex(importer.RowError, 'Unknown Read Status'):
+            importer.parse_storygraph_row(storygraph_row(
+                    **{'Read Status': 'skimmed'}))
+
+
+class FormatTestCase(SimpleTestCase):
+
+    def test_detect_format(self):
+        self.assertEqual(importer.detect_format(goodreads_row().keys()),
+                         'goodreads')
+        self.assertEqual(importer.detect_format(storygraph_row().keys()),
+                         'storygraph')
+        self.assertIsNone(importer.detect_format(['kind', 'venue']))
+        self.assertIsNone(importer.detect_format(None))
+
+
+class IsbnTestCase(SimpleTestCase):
+
+    def test_normalize_isbn(self):
+        self.assertEqual(importer.normalize_isbn('0-356-50048-9'), '0356500489')
+        self.assertEqual(importer.normalize_isbn('="0356500489"'), '0356500489')
+        self.assertEqual(importer.normalize_isbn('080442957x'), '080442957X')
+        self.assertEqual(importer.normalize_isbn('9780356500485'),
+                         '9780356500485')
+        # Wrong check digits, lengths and Kindle ASINs:
+        self.assertEqual(importer.normalize_isbn('0356500488'), '')
+        self.assertEqual(importer.normalize_isbn('9780356500484'), '')
+        self.assertEqual(importer.normalize_isbn('12345'), '')
+        self.assertEqual(importer.normalize_isbn('B00ABCDEFG'), '')
+        self.assertEqual(importer.normalize_isbn(''), '')
+
+    def test_get_isbn_variants(self):
+        self.assertEqual(importer.get_isbn_variants('0356500489'),
+                         ['0356500489', '9780356500485'])
+        self.assertEqual(importer.get_isbn_variants('9780356500485'),
+                         ['9780356500485', '0356500489'])
+        self.assertEqual(importer.get_isbn_variants('9791032300824'),
+                         ['9791032300824'])
+        self.assertEqual(importer.get_isbn_variants(''), [])
+
+
+class ImportReadingsTestCase(TestCase):
+
+    def import_rows(self, rows, parse_row=importer.parse_goodreads_row,
+                                                                    **kwargs):
+        return importer.import_readings(enumerate(rows, 1), parse_row,
+                                        **kwargs)
+
+    def test_imports_readings(self):
+        result = self.import_rows([
+            goodreads_row(Title='Leviathan Wakes (The Expanse, #1)',
+                          ISBN='="0316129089"',
+                          **{'Additional Authors': 'Jane Doe'}),
+            goodreads_row(Title='Caliban’s War (The Expanse, #2)',
+                          **{'Date Read': '', 'Exclusive Shelf': 'to-read'}),
+        ])
+        self.assertEqual(result, importer.Result(2, 0, []))
+
+        self.assertEqual(PublicationSeries.objects.get().title, 'The Expanse')
+        publication = Publication.objects.get(title='Leviathan Wakes')
+        self.assertEqual(publication.kind, 'book')
+        self.assertEqual(publication.series.title, 'The Expanse')
+        self.assertEqual(publication.isbn_uk, '0316129089')
+        self.assertEqual(publication.isbn_us, '')
+        self.assertEqual(publication.title_sort, 'leviathan wakes')
+
+        roles = publication.roles.order_by('role_order')
+        self.assertEqual([(r.creator.name, r.creator.kind) for r in roles],
+                         [('James S.A. Corey', 'individual'),
+                          ('Jane Doe', 'individual')])
+
+        reading = publication.reading_set.get()
+        self.assertIsNone(reading.start_date)
+        self.assertEqual(reading.end_date, datetime.date(2017, 6, 1))
+        self.assertTrue(reading.is_finished)
+
+        self.assertFalse(Publication.objects.get(title='Caliban’s War')
+                                                .reading_set.exists())
+
+    def test_granularities(self):
+        self.import_rows([storygraph_row(
+                            **{'Dates Read': '2016/05-2016/06/02, 2015'})],
+                         parse_row=importer.parse_storygraph_row)
+        readings = Reading.objects.order_by('end_date')
+        self.assertEqual([(r.start_date, r.start_granularity,
+                           r.end_date, r.end_granularity) for r in readings],
+                         [(None, 3, datetime.date(2015, 1, 1), 6),
+                          (datetime.date(2016, 5, 1), 4,
+                           datetime.date(2016, 6, 2), 3)])
+
+    def test_isbn_field(self):
+        self.import_rows([goodreads_row(ISBN='0316129089')],
+                         isbn_field='isbn_us')
+        publication = Publication.objects.get()
+        self.assertEqual(publication.isbn_us, '0316129089')
+        self.assertEqual(publication.isbn_uk, '')
+
+    def test_dedupes_by_isbn(self):
+        "Either ISBN field, in either form, regardless of the title."
+        existing = PublicationFactory(title='Leviathan Wakes: A Novel',
+                                      isbn_us='9780316129084')
+        self.import_rows([
+            goodreads_row(ISBN='0316129089', **{'Date Read': '2017/06/01'}),
+            goodreads_row(Title='LEVIATHAN WAKES', ISBN13='9780316129084',
+                          **{'Date Read': '2018/06/01'}),
+        ])
+        self.assertEqual(Publication.objects.count(), 1)
+        self.assertEqual(existing.reading_set.count(), 2)
+        # Existing Publications keep their Creators:
+        self.assertFalse(existing.roles.exists())
+
+    def test_dedupes_by_title(self):
+        existing = PublicationFactory(title='The Left Hand of Darkness',
+                                      series=None)
+        self.import_rows([
+            goodreads_row(Title='the left hand of darkness'),
+            goodreads_row(Title='Left Hand of Darkness, The',
+                          **{'Date Read': '2018/01/01'}),
+            goodreads_row(Title='Dune', **{'Date Read': '2018/02/01'}),
+            goodreads_row(Title='dune', **{'Date Read': '2018/03/01'}),
+        ])
+        self.assertEqual(Publication.objects.count(), 2)
+        self.assertEqual(existing.reading_set.count(), 2)
+        dune = Publication.objects.get(title='Dune')
+        self.assertEqual(dune.reading_set.count(), 2)
+        self.assertEqual(dune.roles.count(), 1)
+
+    def test_different_isbns_are_different(self):
+        "Books with the same title and different ISBNs, in any batches."
+        rows = [
+            goodreads_row(Title='Poems', Author='Emily Dickinson',
+                          ISBN='="0316184136"'),
+            goodreads_row(Title='Poems', Author='Sylvia Plath',
+                          ISBN='="0571118380"', **{'Date Read': '2018/01/01'}),
+        ]
+        for batch_size in (1, 2):
+            with self.subTest(batch_size=batch_size):
+                Publication.objects.all().delete()
+                ImportRecord.objects.all().delete()
+                self.import_rows(rows, batch_size=batch_size)
+                publications = Publication.objects.order_by('pk')
+                self.assertEqual([(p.isbn_uk, p.roles.get().creator.name,
+                                   p.reading_set.count())
+                                  for p in publications],
+                                 [('0316184136', 'Emily Dickinson', 1),
+                                  ('0571118380', 'Sylvia Plath', 1)])
+
+    def test_title_matches_without_isbns(self):
+        "A book without an ISBN is the same as one with, in any batches."
+        rows = [
+            goodreads_row(Title='Dune'),
+            goodreads_row(Title='Dune', ISBN='0340960191',
+                          **{'Date Read': '2018/01/01'}),
+            goodreads_row(Title='dune', **{'Date Read': '2019/01/01'}),
+        ]
+        for batch_size in (1, 3):
+            with self.subTest(batch_size=batch_size):
+                Publication.objects.all().delete()
+                ImportRecord.objects.all().delete()
+                self.import_rows(rows, batch_size=batch_size)
+                self.assertEqual(Publication.objects.get().reading_set.count(),
+                                 3)
+
+    def test_uses_existing_creators_and_series(self):
+        series = PublicationSeriesFactory(title='The Expanse')
+        corey = GroupCreatorFactory(name='James S.A. Corey')
+        self.import_rows([
+            goodreads_row(Title='Leviathan Wakes (the expanse, #1)')])
+        publication = Publication.objects.get()
+        self.assertEqual(publication.series, series)
+        self.assertEqual([r.creator for r in publication.roles.all()],
+                         [corey])
+        self.assertEqual(Creator.objects.count(), 1)
+
+    def test_skips_existing_readings(self):
+        publication = PublicationFactory(title='Dune')
+        ReadingFactory(publication=publication,
+                       end_date=datetime.date(2017, 6, 1), is_finished=True)
+        self.import_rows([goodreads_row(Title='Dune')])
+        self.assertEqual(publication.reading_set.count(), 1)
+
+    def test_finishes_readings(self):
+        "A reading in progress is finished by a later export."
+        self.import_rows([goodreads_row(
+                    **{'Exclusive Shelf': 'currently-reading'})])
+        reading = Reading.objects.get()
+        self.assertIsNone(reading.end_date)
+        self.assertFalse(reading.is_finished)
+
+        self.import_rows([goodreads_row()])
+        reading = Reading.objects.get()
+        self.assertEqual(reading.start_date, datetime.date(2017, 5, 1))
+        self.assertEqual(reading.end_date, datetime.date(2017, 6, 1))
+        self.assertTrue(reading.is_finished)
+
+    def test_credits(self):
+        self.import_rows([goodreads_row()])
+        role = Publication.objects.get().roles.get()
+        credit = CreatorCredit.objects.get()
+        self.assertEqual(credit.creator_id, role.creator_id)
+        self.assertEqual(credit.object_id, role.publication_id)
+        self.assertEqual(credit.role_id, role.pk)
+
+    def test_counts_and_years(self):
+        self.import_rows([
+            goodreads_row(Title='Dune', **{'Date Read': '2016/01/01'}),
+            goodreads_row(Title='Emma', **{'Date Read': '2017/01/01'}),
+        ])
+        self.assertEqual(counters.get_counts(Publication)['book'], 2)
+        self.assertEqual(counters.get_counts(Creator)['individual'], 1)
+        self.assertEqual([y.year for y in years.get_years(Reading)],
+                         [2016, 2017])
+
+    def test_idempotent(self):
+        rows = [goodreads_row(Title='Dune'), goodreads_row(Title='Emma')]
+        self.import_rows(rows)
+        result = self.import_rows(rows + [goodreads_row(Title='Persuasion')])
+        self.assertEqual(result, importer.Result(1, 2, []))
+        self.assertEqual(Publication.objects.count(), 3)
+        self.assertEqual(Reading.objects.count(), 3)
+        self.assertEqual(ImportRecord.objects.count(), 3)
+
+    def test_creates_each_object_once(self):
+        self.import_rows([goodreads_row(Title='Dune'),
+                          goodreads_row(Title='Dune',
+                                        **{'Date Read': '2018/01/01'})],
+                         batch_size=1)
+        self.assertEqual(Publication.objects.count(), 1)
+        self.assertEqual(Creator.objects.count(), 1)
+        self.assertEqual(Reading.objects.count(), 2)
+
+    def test_touches_once(self):
+        "Versions are changed once, after the last batch."
+        with patch('spectator.core.versions.bump',
+                   wraps=versions.bump) as bump:
+            self.import_rows([goodreads_row(Title='Dune (Dune, #1)'),
+                              goodreads_row(Title='Dune Messiah (Dune, #2)')],
+                             batch_size=1)
+        self.assertEqual(sorted(c[0][0].__name__ for c in bump.call_args_list),
+                         ['Creator', 'Publication', 'PublicationRole',
+                          'PublicationSeries', 'Reading'])
+        bump.assert_any_call(Publication, sorted(
+                        Publication.objects.values_list('pk', flat=True)))
+
+    def test_invalid_rows(self):
+        result = self.import_rows([
+                goodreads_row(), goodreads_row(**{'Date Read': 'yesterday'})])
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.errors, [(2, "Invalid date: 'yesterday'.")])
+
+
+class ImportReadingsCommandTestCase(TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='utf-8-sig') as f:
+            f.write('Title,Author,Additional Authors,ISBN,ISBN13,Date Read,'
+                    'Date Added,Exclusive Shelf\n'
+                    'Dune,Frank Herbert,,="0340960191",,2017/06/01,,read\n'
+                    'Emma,Jane Austen,,,,,,favourites\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_command(self):
+        out = StringIO()
+        err = StringIO()
+        call_command('spectator_import_readings', self.path,
+                     stdout=out, stderr=err)
+        self.assertEqual(out.getvalue(),
+                         '1 imported, 0 already imported, 1 invalid.\n')
+        self.assertEqual(err.getvalue(),
+                         "Row 2: Unknown Exclusive Shelf: 'favourites'.\n")
+        self.assertEqual(Publication.objects.get().isbn_uk, '0340960191')
+
+        out = StringIO()
+        call_command('spectator_import_readings', self.path,
+                     '--isbn-field', 'us', stdout=out, stderr=StringIO())
+        self.assertEqual(out.getvalue(),
+                         '0 imported, 1 already imported, 1 invalid.\n')
+
+    def test_unknown_format(self):
+        with open(self.path, 'w') as f:
+            f.write('kind,venue\ngig,Hall\n')
+        with self.assertRaisesRegex(CommandError, '--format'):
+            call_command('spectator_import_readings', self.path)
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('spectator_import_readings',
+                         '/nonexistent/goodreads.csv')
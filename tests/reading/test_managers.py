@@ -89,3 +89,36 @@ class ReadingManagersTestCase(TestCase):
         self.assertEqual(readings[1], self.reading2)
         self.assertEqual(readings[2], self.reading1)
 
+
+
+class PublicationQuerySetTestCase(TestCase):
+
+    def setUp(self):
+        for pub in PublicationFactory.create_batch(3):
+            PublicationRoleFactory(publication=pub)
+            ReadingFactory(publication=pub,
+                            start_date=make_date('2017-02-15'),
+                            end_date=make_date('2017-02-28'))
+            ReadingFactory(publication=pub,
+                            start_date=make_date('2017-03-15'))
+
+    def test_for_display_queries(self):
+        "It should fetch everything publication.html uses in 4 queries."
+        with self.assertNumQueries(4):
+            for pub in Publication.objects.for_display():
+                str(pub.series)
+                [str(r.creator) for r in pub.roles.all()]
+                pub.get_current_reading()
+
+    def test_for_display_current_reading(self):
+        "get_current_reading() should be the same with prefetched Readings."
+        for pub in Publication.objects.for_display():
+            self.assertEqual(pub.get_current_reading(),
+                        Publication.objects.get(pk=pub.pk).get_current_reading())
+            self.assertIsNone(pub.get_current_reading().end_date)
+
+    def test_other_managers(self):
+        "The in-progress and unread managers should have for_display()."
+        self.assertEqual(
+                len(Publication.in_progress_objects.for_display()), 3)
+        self.assertEqual(len(Publication.unread_objects.for_display()), 0)
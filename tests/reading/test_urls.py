@@ -6,6 +6,7 @@ except ImportError:
     # Django < 1.10
     from django.core.urlresolvers import resolve, reverse
 
+from spectator.core.views import AutocompleteView
 from spectator.reading import views
 from spectator.reading.factories import PublicationFactory,\
         PublicationSeriesFactory, ReadingFactory
@@ -78,6 +79,18 @@ class ReadingUrlsTestCase(TestCase):
                          views.PublicationDetailView.__name__)
 
 
+    def test_publication_autocomplete_url(self):
+        self.assertEqual(
+                reverse('spectator:reading:publication_autocomplete'),
+                '/reading/publications/autocomplete/')
+
+    def test_publication_autocomplete_view(self):
+        "Should use the correct view."
+        self.assertEqual(
+                resolve('/reading/publications/autocomplete/').func.__name__,
+                AutocompleteView.__name__)
+
+
     def test_reading_year_archive_url(self):
         ReadingFactory(end_date=('2017-02-15'))
         self.assertEqual(
@@ -100,6 +100,15 @@ class PublicationListViewTestCase(ViewTestCase):
         self.assertEqual(response.template_name[0],
                          'spectator_reading/publication_list.html')
 
+    def test_count_changes_with_publications(self):
+        "The cached count is redone when Publications change."
+        PublicationFactory()
+        response = views.PublicationListView.as_view()(self.request)
+        self.assertEqual(response.context_data['paginator'].count, 1)
+        PublicationFactory()
+        response = views.PublicationListView.as_view()(self.request)
+        self.assertEqual(response.context_data['paginator'].count, 2)
+
     def test_context_book(self):
         "It should have publication_kind='book' in the context."
         response = views.PublicationListView.as_view()(self.request)
@@ -0,0 +1,288 @@
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from spectator.core.factories import IndividualCreatorFactory
+from spectator.core.models import Creator
+from spectator.events.factories import *
+from spectator.events.models import Event, Movie, Venue
+from spectator.reading.factories import *
+from spectator.reading.models import Publication, PublicationSeries
+from spectator.search import backends, index
+from spectator.search.models import SearchDocument, SearchPosting, SearchTerm
+
+
+class TokenizeTestCase(TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(index.tokenize('The Cure, live!'),
+                         ['the', 'cure', 'live'])
+
+    def test_removes_accents(self):
+        self.assertEqual(index.tokenize('Café Oto'), ['cafe', 'oto'])
+
+    def test_empty(self):
+        self.assertEqual(index.tokenize(''), [])
+
+
+class SearchTestsMixin(object):
+    """
+    Tests for each backend.
+    Using rebuild(), because updates happen when transactions commit.
+    """
+
+    def rebuild(self):
+        for model in index.registered_models():
+            index.rebuild(model)
+
+    def titles(self, qs):
+        return [document.title for document in qs]
+
+    def test_registered_models(self):
+        models = index.registered_models()
+        for model in (Creator, Event, Movie, Venue, Publication,
+                                                        PublicationSeries):
+            self.assertIn(model, models)
+
+    def test_finds_all_models(self):
+        IndividualCreatorFactory(name='Kate Bush')
+        VenueFactory(name='Bush Hall')
+        PublicationFactory(title='Bush Tucker')
+        self.rebuild()
+        self.assertEqual(
+            sorted(d.model_label for d in index.search('bush')),
+            ['spectator_core.creator', 'spectator_events.venue',
+             'spectator_reading.publication'])
+
+    def test_must_match_all_words(self):
+        VenueFactory(name='Bush Hall')
+        VenueFactory(name='Royal Albert Hall')
+        self.rebuild()
+        self.assertEqual(self.titles(index.search('royal hall')),
+                         ['Royal Albert Hall'])
+
+    def test_must_match_first_word(self):
+        VenueFactory(name='Bush Hall')
+        VenueFactory(name='Royal Albert Hall')
+        self.rebuild()
+        self.assertEqual(self.titles(index.search('bush hall')),
+                         ['Bush Hall'])
+        self.assertEqual(self.titles(index.search('hall bush')),
+                         ['Bush Hall'])
+
+    def test_unknown_word(self):
+        VenueFactory(name='Bush Hall')
+        self.rebuild()
+        self.assertEqual(list(index.search('bush garden')), [])
+
+    def test_empty_query(self):
+        VenueFactory(name='Bush Hall')
+        self.rebuild()
+        self.assertEqual(list(index.search(' ,. ')), [])
+
+    def test_ranking(self):
+        "Title matches beat series matches, then shorter titles rank higher."
+        series = PublicationSeriesFactory(title='London Review of Books')
+        PublicationFactory(title='Volume 1', series=series)
+        PublicationFactory(title='London Fields and Other Stories')
+        PublicationFactory(title='London Fields')
+        self.rebuild()
+        self.assertEqual(self.titles(index.search('london',
+                                                    models=[Publication])),
+                         ['London Fields', 'London Fields and Other Stories',
+                          'Volume 1'])
+
+    def test_restrict_to_models(self):
+        IndividualCreatorFactory(name='Kate Bush')
+        VenueFactory(name='Bush Hall')
+        self.rebuild()
+        self.assertEqual(self.titles(index.search('bush', models=[Venue])),
+                         ['Bush Hall'])
+
+    def test_document(self):
+        venue = VenueFactory(name='Café Oto')
+        self.rebuild()
+        document = index.search('cafe')[0]
+        self.assertEqual(document.url, venue.get_absolute_url())
+        self.assertEqual(document.kind, 'Venue')
+        self.assertEqual(document.model, Venue)
+        self.assertEqual(document.object_id, venue.pk)
+
+    def test_rebuild_in_batches(self):
+        for n in range(5):
+            VenueFactory(name='Venue {}'.format(n))
+        self.assertEqual(index.rebuild(Venue, batch_size=2), 5)
+        self.assertEqual(index.search('venue').count(), 5)
+
+    def test_index_queries_per_batch(self):
+        "The number of queries doesn't depend on the number of objects."
+        venues = [VenueFactory(name='Venue {}'.format(n)) for n in range(4)]
+        # So that all their terms exist already:
+        index.index_objects(Venue, venues)
+        with CaptureQueriesContext(connection) as one:
+            index.index_objects(Venue, venues[:1])
+        with CaptureQueriesContext(connection) as four:
+            index.index_objects(Venue, venues)
+        self.assertEqual(len(four), len(one))
+
+    def test_rebuild_replaces(self):
+        venue = VenueFactory(name='Bush Hall')
+        self.rebuild()
+        Venue.objects.filter(pk=venue.pk).update(name='Union Chapel')
+        index.rebuild(Venue)
+        self.assertEqual(list(index.search('bush')), [])
+        self.assertEqual(self.titles(index.search('chapel')),
+                         ['Union Chapel'])
+
+    def test_rebuild_command(self):
+        VenueFactory(name='Bush Hall')
+        out = StringIO()
+        call_command('spectator_rebuild_search', '--batch-size=10', stdout=out)
+        self.assertIn('Indexed 1 venues', out.getvalue())
+        self.assertEqual(self.titles(index.search('hall')), ['Bush Hall'])
+
+
+@override_settings(
+            SPECTATOR_SEARCH_BACKEND='spectator.search.backends.PostingsBackend')
+class PostingsBackendTestCase(SearchTestsMixin, TestCase):
+
+    def test_search_queries(self):
+        "One to find the terms, one for the results."
+        VenueFactory(name='Royal Albert Hall')
+        self.rebuild()
+        with self.assertNumQueries(2):
+            list(index.search('royal albert hall'))
+
+    def test_postings(self):
+        VenueFactory(name='Bush Hall')
+        self.rebuild()
+        self.assertEqual(
+            sorted(SearchPosting.objects.values_list('term__term', 'weight')),
+            [('bush', 3), ('hall', 3)])
+
+    def test_remove_unused_terms(self):
+        venue = VenueFactory(name='Bush Hall')
+        self.rebuild()
+        index.remove(Venue, [venue.pk])
+        index.remove_unused_terms()
+        self.assertFalse(SearchTerm.objects.filter(term='bush').exists())
+
+
+@override_settings(
+            SPECTATOR_SEARCH_BACKEND='spectator.search.backends.SQLiteFTSBackend')
+class SQLiteFTSBackendTestCase(SearchTestsMixin, TestCase):
+
+    def setUp(self):
+        if connection.vendor != 'sqlite' \
+                                    or not backends.has_fts_table(connection):
+            self.skipTest('Needs SQLite with FTS5')
+
+    def test_search_queries(self):
+        VenueFactory(name='Royal Albert Hall')
+        self.rebuild()
+        with self.assertNumQueries(1):
+            list(index.search('royal albert hall'))
+
+    def test_no_postings(self):
+        "The FTS5 table is kept in sync by triggers instead."
+        VenueFactory(name='Bush Hall')
+        self.rebuild()
+        self.assertFalse(SearchPosting.objects.exists())
+
+    def test_quotes_words(self):
+        "FTS5 syntax in the query is only searched for."
+        VenueFactory(name='Bush Hall')
+        self.rebuild()
+        self.assertEqual(self.titles(index.search('bush AND OR NEAR(hall')),
+                         [])
+        self.assertEqual(self.titles(index.search('"bush" hall*')),
+                         ['Bush Hall'])
+
+
+class GetBackendTestCase(TestCase):
+
+    @override_settings(
+            SPECTATOR_SEARCH_BACKEND='spectator.search.backends.PostingsBackend')
+    def test_setting(self):
+        self.assertIsInstance(backends.get_backend(), backends.PostingsBackend)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Needs SQLite')
+    def test_sqlite(self):
+        if backends.has_fts_table(connection):
+            expected = backends.SQLiteFTSBackend
+        else:
+            expected = backends.PostingsBackend
+        self.assertIsInstance(backends.get_backend(), expected)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL')
+    def test_postgresql(self):
+        self.assertIsInstance(backends.get_backend(),
+                              backends.PostgreSQLBackend)
+
+
+class UpdateTestCase(TransactionTestCase):
+    "TransactionTestCase because updates happen when transactions commit."
+
+    def titles(self, qs):
+        return [document.title for document in qs]
+
+    def test_created(self):
+        VenueFactory(name='Bush Hall')
+        self.assertEqual(self.titles(index.search('bush')), ['Bush Hall'])
+
+    def test_changed(self):
+        venue = VenueFactory(name='Bush Hall')
+        venue.name = 'Union Chapel'
+        venue.save()
+        self.assertEqual(list(index.search('bush')), [])
+        self.assertEqual(self.titles(index.search('union')), ['Union Chapel'])
+
+    def test_deleted(self):
+        venue = VenueFactory(name='Bush Hall')
+        venue.delete()
+        self.assertEqual(list(index.search('bush')), [])
+        self.assertFalse(SearchDocument.objects.exists())
+        self.assertFalse(SearchPosting.objects.exists())
+
+    def test_one_update_per_transaction(self):
+        "Changes in a transaction are indexed once, when it's committed."
+        with transaction.atomic():
+            venue = VenueFactory(name='Bush Hall')
+            venue.name = 'Union Chapel'
+            venue.save()
+            self.assertFalse(SearchDocument.objects.exists())
+        self.assertEqual(SearchDocument.objects.count(), 1)
+        self.assertEqual(self.titles(index.search('union')), ['Union Chapel'])
+
+    def test_not_updated_on_rollback(self):
+        try:
+            with transaction.atomic():
+                VenueFactory(name='Bush Hall')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(SearchDocument.objects.exists())
+
+    def test_event_display_title(self):
+        "Events' generated titles are indexed once they've been made."
+        movie = MovieFactory(title='Vertigo')
+        MovieEventFactory(movie=movie, title='')
+        self.assertEqual(
+            sorted(d.model_label for d in index.search('vertigo')),
+            ['spectator_events.event', 'spectator_events.movie'])
+
+    def test_dependents(self):
+        "Changing a series updates its publications' documents."
+        series = PublicationSeriesFactory(title='Discworld')
+        PublicationFactory(title='Mort', series=series)
+        series.title = 'Disc World'
+        series.save()
+        self.assertEqual(self.titles(index.search('world',
+                                                    models=[Publication])),
+                         ['Mort'])
+        self.assertEqual(list(index.search('discworld',
+                                                    models=[Publication])), [])
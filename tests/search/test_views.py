@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from spectator.core.factories import IndividualCreatorFactory
+from spectator.events.factories import VenueFactory
+from spectator.search import index
+
+
+class SearchViewTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def rebuild(self):
+        for model in index.registered_models():
+            index.rebuild(model)
+
+    def test_templates(self):
+        response = self.client.get('/search/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'spectator_search/search.html')
+
+    def test_no_query(self):
+        response = self.client.get('/search/')
+        self.assertEqual(list(response.context['document_list']), [])
+        self.assertEqual(response.context['search_query'], '')
+
+    def test_results(self):
+        IndividualCreatorFactory(name='Kate Bush')
+        VenueFactory(name='Bush Hall')
+        VenueFactory(name='Union Chapel')
+        self.rebuild()
+        response = self.client.get('/search/', {'q': 'Bush'})
+        self.assertEqual(response.context['search_query'], 'Bush')
+        self.assertEqual(
+            sorted(d.title for d in response.context['document_list']),
+            ['Bush Hall', 'Kate Bush'])
+        self.assertContains(response, 'Kate Bush')
+
+    def test_no_results(self):
+        response = self.client.get('/search/', {'q': 'Bush'})
+        self.assertContains(response, 'Nothing was found')
+
+    def test_paginated(self):
+        for n in range(25):
+            VenueFactory(name='Venue {}'.format(n))
+        self.rebuild()
+        response = self.client.get('/search/', {'q': 'venue', 'p': 2})
+        self.assertEqual(len(response.context['document_list']), 5)
+        # The query is kept in the pagination links:
+        self.assertContains(response, 'q=venue')
+
+    def test_surrogate_keys(self):
+        venue = VenueFactory(name='Bush Hall')
+        self.rebuild()
+        response = self.client.get('/search/', {'q': 'bush'})
+        keys = response['Surrogate-Key'].split()
+        self.assertIn('venue-{}'.format(venue.pk), keys)
+        self.assertIn('venue-list', keys)
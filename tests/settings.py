@@ -19,6 +19,7 @@ INSTALLED_APPS = (
     'spectator.core',
     'spectator.events',
     'spectator.reading',
+    'spectator.search',
     'tests.core.fields',
 )
 